@@ -1119,6 +1119,9 @@ Return only the JSON object, nothing else.
                 reason=reason or "run_failed",
             )
 
+    # Long-poll window per /runs/{id}/wait request (server caps it at 60s)
+    _RUN_WAIT_SECONDS = 25.0
+
     async def _await_run_completion(
         self,
         run_id: str,
@@ -1127,11 +1130,17 @@ Return only the JSON object, nothing else.
         poll_interval: float = 0.5,
         on_progress: Optional[Callable[..., Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
-        """Poll /runs/{run_id} until it reaches a terminal state, then fetch the export result.
+        """Wait until /runs/{run_id} reaches a terminal state, then extract the export result.
+
+        Completion is pushed through the long-poll endpoint ``/runs/{run_id}/wait``,
+        which returns as soon as the run finishes (with its system exports) or, when
+        progress is tracked, as soon as the run is updated. If that endpoint is
+        unavailable or errors, falls back to polling ``/runs/{run_id}`` every
+        *poll_interval* seconds.
 
         Args:
             on_progress: Optional async callback ``(progress, stage, message, step, step_total) -> None``
-                called whenever the run's progress/stage/message changes between polls.
+                called whenever the run's progress/stage/message changes.
 
         Returns a dict:
           {"status": str, "success": bool, "data": Any, "error": str|None,
@@ -1139,20 +1148,86 @@ Return only the JSON object, nothing else.
         """
         base = f"http://127.0.0.1:{USER_PLUGIN_SERVER_PORT}"
         terminal = frozenset(("succeeded", "failed", "canceled", "timeout"))
-        deadline = asyncio.get_event_loop().time() + timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
         last_status: Optional[str] = None
+        run_data: Dict[str, Any] = {}
+        exports: Optional[List[Any]] = None
         # Track last-seen progress fingerprint to avoid redundant callbacks
         _last_progress_key: Optional[tuple] = None
         _consecutive_errors = 0
         _MAX_CONSECUTIVE_ERRORS = 3
 
+        def _timed_out() -> Dict[str, Any]:
+            return {"status": "timeout", "success": False, "data": None,
+                    "error": f"Timed out waiting for run {run_id} ({timeout}s)"}
+
+        async def _report_progress(data: Dict[str, Any]) -> None:
+            nonlocal _last_progress_key
+            if not on_progress or data.get("status") in terminal:
+                return
+            cur_key = (data.get("progress"), data.get("stage"), data.get("message"), data.get("step"))
+            if cur_key == _last_progress_key:
+                return
+            _last_progress_key = cur_key
+            try:
+                await on_progress(
+                    progress=data.get("progress"),
+                    stage=data.get("stage"),
+                    message=data.get("message"),
+                    step=data.get("step"),
+                    step_total=data.get("step_total"),
+                )
+            except Exception:
+                pass
+
         async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=2.0), proxy=None, trust_env=False) as client:
-            # ── Phase 1: poll until terminal ──
+            # ── Phase 1: long-poll until terminal ──
+            # With a progress callback, since=0 returns the current state at once and
+            # each later request returns on the next update; without one, only on terminal.
+            since: Optional[float] = 0.0 if on_progress else None
             while True:
-                remaining = deadline - asyncio.get_event_loop().time()
+                remaining = deadline - loop.time()
                 if remaining <= 0:
-                    return {"status": "timeout", "success": False, "data": None,
-                            "error": f"Timed out waiting for run {run_id} ({timeout}s)"}
+                    return _timed_out()
+                wait_s = min(self._RUN_WAIT_SECONDS, remaining)
+                params: Dict[str, Any] = {"timeout": round(wait_s, 3)}
+                if since is not None:
+                    params["since"] = since
+                try:
+                    r = await client.get(
+                        f"{base}/runs/{run_id}/wait",
+                        params=params,
+                        timeout=httpx.Timeout(wait_s + 10.0, connect=2.0),
+                    )
+                    payload = r.json() if r.status_code == 200 else None
+                except Exception as e:
+                    logger.debug("[_await_run_completion] long-poll error, falling back to polling: %s", e)
+                    break
+                run_obj = payload.get("run") if isinstance(payload, dict) else None
+                if not isinstance(run_obj, dict):
+                    # Older plugin server without /wait, or an error: the poll loop classifies it
+                    logger.debug(
+                        "[_await_run_completion] long-poll unavailable (HTTP %s), falling back to polling",
+                        r.status_code,
+                    )
+                    break
+                run_data = run_obj
+                last_status = run_data.get("status")
+                if last_status in terminal:
+                    raw_exports = payload.get("exports")
+                    exports = raw_exports if isinstance(raw_exports, list) else None
+                    break
+                await _report_progress(run_data)
+                if since is not None:
+                    updated_at = run_data.get("updated_at")
+                    since = float(updated_at) if isinstance(updated_at, (int, float)) else since
+
+            # ── Phase 1 (fallback): poll until terminal ──
+            while last_status not in terminal:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return _timed_out()
                 try:
                     r = await client.get(f"{base}/runs/{run_id}")
                     if r.status_code in (404, 410):
@@ -1171,33 +1246,14 @@ Return only the JSON object, nothing else.
                         _consecutive_errors = 0
                         run_data = r.json()
                         last_status = run_data.get("status")
-                        # Fire on_progress callback when progress/stage/message changes
-                        if on_progress and last_status not in terminal:
-                            cur_key = (
-                                run_data.get("progress"),
-                                run_data.get("stage"),
-                                run_data.get("message"),
-                                run_data.get("step"),
-                            )
-                            if cur_key != _last_progress_key:
-                                _last_progress_key = cur_key
-                                try:
-                                    await on_progress(
-                                        progress=run_data.get("progress"),
-                                        stage=run_data.get("stage"),
-                                        message=run_data.get("message"),
-                                        step=run_data.get("step"),
-                                        step_total=run_data.get("step_total"),
-                                    )
-                                except Exception:
-                                    pass
+                        await _report_progress(run_data)
                         if last_status in terminal:
                             break
                 except Exception as e:
                     logger.debug("[_await_run_completion] poll error: %s", e)
                 await asyncio.sleep(min(poll_interval, remaining))
 
-            # ── Phase 2: fetch export to get plugin_response ──
+            # ── Phase 2: extract plugin_response from the exports ──
             plugin_result: Dict[str, Any] = {
                 "status": last_status,
                 "success": last_status == "succeeded",
@@ -1217,28 +1273,29 @@ Return only the JSON object, nothing else.
                 else:
                     plugin_result["error"] = f"Run {last_status}"
 
-            try:
-                r = await client.get(f"{base}/runs/{run_id}/export", params={"limit": 50})
-                if r.status_code == 200:
-                    export_data = r.json()
-                    items = export_data.get("items") or []
-                    for item in items:
-                        if not isinstance(item, dict):
-                            continue
-                        # Look for the system trigger_response export
-                        if item.get("type") == "json" and (item.get("json") is not None or item.get("json_data") is not None):
-                            raw = item.get("json") or item.get("json_data")
-                            if isinstance(raw, dict):
-                                plugin_result["data"] = raw.get("data")
-                                if raw.get("error"):
-                                    err = raw["error"]
-                                    if isinstance(err, dict):
-                                        plugin_result["error"] = err.get("message") or str(err)
-                                    elif isinstance(err, str):
-                                        plugin_result["error"] = err
-                            break
-            except Exception as e:
-                logger.debug("[_await_run_completion] export fetch error: %s", e)
+            if exports is None:
+                try:
+                    r = await client.get(f"{base}/runs/{run_id}/export", params={"limit": 50})
+                    if r.status_code == 200:
+                        exports = r.json().get("items") or []
+                except Exception as e:
+                    logger.debug("[_await_run_completion] export fetch error: %s", e)
+
+            for item in exports or []:
+                if not isinstance(item, dict):
+                    continue
+                # Look for the system trigger_response export
+                if item.get("type") == "json" and (item.get("json") is not None or item.get("json_data") is not None):
+                    raw = item.get("json") or item.get("json_data")
+                    if isinstance(raw, dict):
+                        plugin_result["data"] = raw.get("data")
+                        if raw.get("error"):
+                            err = raw["error"]
+                            if isinstance(err, dict):
+                                plugin_result["error"] = err.get("message") or str(err)
+                            elif isinstance(err, str):
+                                plugin_result["error"] = err
+                    break
 
             return plugin_result
 
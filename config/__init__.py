@@ -109,6 +109,17 @@ def _read_port_env(port_name: str, default: int) -> int:
             continue
     return default
 
+# 非负浮点数环境变量，非法或负值时回退默认值
+def _read_float_env(key: str, default: float) -> float:
+    raw = os.getenv(key)
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+        return value if value >= 0 else default
+    except Exception:
+        return default
+
 # 服务器端口配置
 MAIN_SERVER_PORT = _read_port_env("MAIN_SERVER_PORT", 48911)
 MEMORY_SERVER_PORT = _read_port_env("MEMORY_SERVER_PORT", 48912)
@@ -119,6 +130,10 @@ USER_PLUGIN_SERVER_PORT = _read_port_env("USER_PLUGIN_SERVER_PORT", 48916)
 AGENT_MQ_PORT = _read_port_env("AGENT_MQ_PORT", 48917)
 MAIN_AGENT_EVENT_PORT = _read_port_env("MAIN_AGENT_EVENT_PORT", 48918)
 
+# monitor 迟到观众回放窗口（时间窗口秒数 / 字节窗口上限），可通过环境变量覆盖
+MONITOR_REPLAY_WINDOW_SECONDS = _read_float_env("NEKO_MONITOR_REPLAY_WINDOW_SECONDS", 15.0)
+MONITOR_REPLAY_WINDOW_BYTES = int(_read_float_env("NEKO_MONITOR_REPLAY_WINDOW_BYTES", 2 * 1024 * 1024))
+
 # 实例 ID：同一次启动的所有服务共享。
 # launcher 会在拉起子进程前写入 NEKO_INSTANCE_ID 环境变量。
 # 若源码直跑绕过 launcher，则每次导入使用随机回退值，确保 /health
@@ -613,6 +628,8 @@ __all__ = [
     'USER_PLUGIN_SERVER_PORT',
     'AGENT_MQ_PORT',
     'MAIN_AGENT_EVENT_PORT',
+    'MONITOR_REPLAY_WINDOW_SECONDS',
+    'MONITOR_REPLAY_WINDOW_BYTES',
     'INSTANCE_ID',
     'TFLINK_UPLOAD_URL',
     'TFLINK_ALLOWED_HOSTS',
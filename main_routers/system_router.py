@@ -51,7 +51,7 @@ from config.prompts_sys import (
 )
 from utils.workshop_utils import get_workshop_path
 from utils.screenshot_utils import compress_screenshot, COMPRESS_TARGET_HEIGHT, COMPRESS_JPEG_QUALITY
-from utils.language_utils import detect_language, translate_text, normalize_language_code, get_global_language
+from utils.language_utils import detect_language, normalize_language_code, get_global_language, get_batch_translator
 from utils.web_scraper import (
     fetch_trending_content, format_trending_content,
     fetch_window_context_content, format_window_context_content,
@@ -2272,9 +2272,9 @@ async def translate_text_api(request: Request):
         # 检查是否跳过 Google 翻译（前端传递的会话级失败标记）
         skip_google = data.get('skip_google', False)
         
-        # 调用翻译服务
+        # 调用翻译服务（经批量翻译器合并流式字幕的并发片段）
         try:
-            translated, google_failed = await translate_text(
+            translated, google_failed = await get_batch_translator().translate(
                 text, 
                 target_lang_normalized, 
                 detected_source_lang,
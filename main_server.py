@@ -900,6 +900,22 @@ async def on_shutdown():
         except Exception as e:
             logger.debug(f"音乐爬虫清理失败: {e}", exc_info=True)
 
+        # 关闭网页抓取共享的 httpx 客户端池
+        try:
+            from utils.scraper_cache import http_pool
+            await asyncio.wait_for(http_pool.aclose(), timeout=1.0)
+        except asyncio.TimeoutError:
+            logger.warning("网页抓取连接池清理超时，已强制跳过以保证服务正常退出。")
+        except Exception as e:
+            logger.debug(f"网页抓取连接池清理失败: {e}", exc_info=True)
+
+        # 发送字幕批量翻译器中剩余的批次，超时则取消
+        try:
+            from utils.language_utils import close_batch_translator
+            await close_batch_translator(timeout=1.0)
+        except Exception as e:
+            logger.debug(f"批量翻译器清理失败: {e}", exc_info=True)
+
 # 使用 FastAPI 的 app.state 来管理启动配置
 def get_start_config():
     """从 app.state 获取启动配置"""
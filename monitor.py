@@ -7,7 +7,8 @@ import asyncio
 import json
 import os
 import logging
-from config import MONITOR_SERVER_PORT
+import time
+from config import MONITOR_SERVER_PORT, MONITOR_REPLAY_WINDOW_SECONDS, MONITOR_REPLAY_WINDOW_BYTES
 from utils.config_manager import get_config_manager, get_reserved
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.staticfiles import StaticFiles
@@ -17,6 +18,7 @@ from fastapi.templating import Jinja2Templates
 from utils.frontend_utils import find_models, find_model_config_file, find_model_directory
 from utils.workshop_utils import get_default_workshop_folder
 from utils.preferences import load_user_preferences
+from utils.replay_buffer import ReplayRegistry
 
 # Setup logger
 from utils.logger_config import setup_logging
@@ -176,6 +178,11 @@ def get_emotion_mapping(model_name: str):
         print(f"获取情绪映射配置失败: {e}")
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
+@app.get("/api/monitor/replay_stats")
+async def get_replay_stats():
+    """获取迟到观众回放缓冲状态与重连首帧耗时统计"""
+    return {"success": True, **replay_registry.stats()}
+
 @app.get("/{lanlan_name}", response_class=HTMLResponse)
 async def get_index(request: Request, lanlan_name: str):
     # lanlan_name 将从 URL 中提取，前端会通过 API 获取配置
@@ -190,17 +197,85 @@ subtitle_clients = set()
 current_subtitle = ""
 should_clear_next = False
 
+# 每个房间（lanlan_name）最近的字幕/音频帧，供中途加入的观众回放
+replay_registry = ReplayRegistry(
+    max_age_seconds=MONITOR_REPLAY_WINDOW_SECONDS,
+    max_bytes=MONITOR_REPLAY_WINDOW_BYTES,
+)
+# 房间 -> 回放锁：新观众的回放在本房间锁内整体发送完毕后才加入实时广播，
+# 同房间的实时帧在锁外等待，保证回放帧与实时帧之间既不交错也不丢帧，且不同房间互不阻塞。
+# 锁空闲时随观众离开回收，下次使用时重建
+room_locks = {}
+# 尚未收到任何帧的观众，用于统计首帧耗时
+pending_first_frame = set()
+
+
+def _room_lock(lanlan_name):
+    lock = room_locks.get(lanlan_name)
+    if lock is None:
+        lock = room_locks[lanlan_name] = asyncio.Lock()
+    return lock
+
+
+def _remove_client(client, lanlan_name=None):
+    connected_clients.discard(client)
+    pending_first_frame.discard(client)
+    lock = room_locks.get(lanlan_name)
+    # 锁空闲时没有协程在等待，可以安全回收；否则留给下次清理
+    if lock is not None and not lock.locked():
+        room_locks.pop(lanlan_name, None)
+
+
+def _note_frame_delivered(client):
+    """首帧耗时从该观众的连接被接受时开始计时（含回放），即重连后看到画面前的等待"""
+    if client in pending_first_frame:
+        pending_first_frame.discard(client)
+        accepted_at = getattr(client.state, "accepted_at", None)
+        if accepted_at is not None:
+            replay_registry.record_time_to_first_frame((time.perf_counter() - accepted_at) * 1000)
+
 def is_japanese(text):
     import re
     # 检测平假名、片假名、汉字
     japanese_pattern = re.compile(r'[\u3040-\u309F\u30A0-\u30FF]')
     return bool(japanese_pattern.search(text))
 
-# 简单的日文到中文翻译（这里需要你集成实际的翻译API）
+# 日文到中文翻译：经由批量翻译器合并同一时间窗口内的多条字幕，减少翻译请求数
 async def translate_japanese_to_chinese(text):
-    # 为了演示，这里返回一个占位符
-    # 你需要根据实际情况实现翻译功能
-    pass
+    try:
+        # 监控端依赖精简，翻译模块按需导入；不可用时保留原文
+        from utils.language_utils import get_batch_translator
+    except ImportError as e:
+        logger.warning(f"翻译模块不可用，字幕保留原文: {e}")
+        return text
+    try:
+        translated, _ = await get_batch_translator().translate(text, 'zh', 'ja')
+        return translated or text
+    except Exception as e:
+        logger.warning(f"字幕翻译失败，保留原文: {e}")
+        return text
+
+# 后台字幕翻译任务，关闭时取消
+translation_tasks = set()
+
+
+async def broadcast_translated_subtitle(original_text):
+    """翻译完成后广播译文；期间已开始新一轮字幕则丢弃，避免覆盖新字幕"""
+    global current_subtitle
+    translated_text = await translate_japanese_to_chinese(original_text)
+    if current_subtitle != original_text:
+        return
+    current_subtitle = translated_text
+    clients = subtitle_clients.copy()
+    for client in clients:
+        try:
+            await client.send_json({
+                "type": "subtitle",
+                "text": translated_text
+            })
+        except Exception as e:
+            print(f"翻译字幕广播错误: {e}")
+            subtitle_clients.discard(client)
 
 @app.websocket("/subtitle_ws")
 async def subtitle_websocket_endpoint(websocket: WebSocket):
@@ -290,27 +365,21 @@ async def sync_endpoint(websocket: WebSocket, lanlan_name:str):
                 elif msg_type == "turn end":
                     # 处理回合结束
                     if current_subtitle:
-                        # 检查是否为日文，如果是则翻译
+                        # 检查是否为日文，如果是则在后台翻译，不阻塞后续消息的回放记录与广播
                         if is_japanese(current_subtitle):
-                            translated_text = await translate_japanese_to_chinese(current_subtitle)
-                            current_subtitle = translated_text
-                            clients = subtitle_clients.copy()
-                            for client in clients:
-                                try:
-                                    await client.send_json({
-                                        "type": "subtitle",
-                                        "text": translated_text
-                                    })
-                                except Exception as e:
-                                    print(f"翻译字幕广播错误: {e}")
-                                    subtitle_clients.discard(client)
+                            task = asyncio.create_task(broadcast_translated_subtitle(current_subtitle))
+                            translation_tasks.add(task)
+                            task.add_done_callback(translation_tasks.discard)
 
                     # 清空字幕区域，准备下一条
                     global should_clear_next
                     should_clear_next = True
 
                 if msg_type != "heartbeat":
-                    await broadcast_message(data)
+                    replay_registry.record_json(lanlan_name, data)
+                    if msg_type == "turn end":
+                        replay_registry.mark_turn_end(lanlan_name)
+                    await broadcast_message(data, lanlan_name)
             except asyncio.exceptions.TimeoutError:
                 pass
     except WebSocketDisconnect:
@@ -330,7 +399,8 @@ async def sync_binary_endpoint(websocket: WebSocket, lanlan_name:str):
             try:
                 data = await asyncio.wait_for(websocket.receive_bytes(), timeout=25)
                 if len(data)>4:
-                    await broadcast_binary(data)
+                    replay_registry.record_binary(lanlan_name, data)
+                    await broadcast_binary(data, lanlan_name)
             except asyncio.exceptions.TimeoutError:
                 pass
     except WebSocketDisconnect:
@@ -343,12 +413,24 @@ async def sync_binary_endpoint(websocket: WebSocket, lanlan_name:str):
 @app.websocket("/ws/{lanlan_name}")
 async def websocket_endpoint(websocket: WebSocket, lanlan_name:str):
     await websocket.accept()
+    websocket.state.accepted_at = time.perf_counter()
     print(f"✅ [CLIENT] 查看客户端已连接: {websocket.client}, 当前总数: {len(connected_clients) + 1}")
-
-    # 添加到连接集合
-    connected_clients.add(websocket)
+    pending_first_frame.add(websocket)
 
     try:
+        # 先在本房间的广播锁内补发最近的帧，再加入连接集合接收实时广播
+        async with _room_lock(lanlan_name):
+            frames = replay_registry.snapshot(lanlan_name)
+            for frame in frames:
+                if frame.kind == "binary":
+                    await websocket.send_bytes(frame.payload)
+                else:
+                    await websocket.send_json(frame.payload)
+                _note_frame_delivered(websocket)
+            connected_clients.add(websocket)
+        if frames:
+            print(f"⏪ [CLIENT] 已回放 {len(frames)} 帧到 {websocket.client}")
+
         # 保持连接直到客户端断开
         while True:
             # 接收任何类型的消息（文本或二进制），主要用于保持连接
@@ -367,54 +449,62 @@ async def websocket_endpoint(websocket: WebSocket, lanlan_name:str):
         print(f"❌ [CLIENT] 客户端连接异常: {e}")
     finally:
         # 安全地移除客户端（即使已经被移除也不会报错）
-        connected_clients.discard(websocket)
+        _remove_client(websocket, lanlan_name)
         print(f"🗑️ [CLIENT] 已移除客户端，当前剩余: {len(connected_clients)}")
 
 
-# 广播消息到所有客户端
-async def broadcast_message(message):
-    clients = connected_clients.copy()
+# 广播消息到所有客户端；持有来源房间的回放锁，避免与该房间新观众的回放交错
+async def broadcast_message(message, lanlan_name):
     success_count = 0
     fail_count = 0
     disconnected_clients = []
-    
-    for client in clients:
-        try:
-            await client.send_json(message)
-            success_count += 1
-        except Exception as e:
-            print(f"❌ [BROADCAST] 广播错误到 {client.client}: {e}")
-            fail_count += 1
-            disconnected_clients.append(client)
+
+    if not connected_clients:
+        return
+    async with _room_lock(lanlan_name):
+        clients = connected_clients.copy()
+        for client in clients:
+            try:
+                await client.send_json(message)
+                _note_frame_delivered(client)
+                success_count += 1
+            except Exception as e:
+                print(f"❌ [BROADCAST] 广播错误到 {client.client}: {e}")
+                fail_count += 1
+                disconnected_clients.append(client)
     
     # 移除所有断开的客户端
     for client in disconnected_clients:
-        connected_clients.discard(client)
+        _remove_client(client, lanlan_name)
         print(f"🗑️ [BROADCAST] 移除断开的客户端: {client.client}")
     
     if success_count > 0:
         print(f"✅ [BROADCAST] 成功广播到 {success_count} 个客户端" + (f", 失败并移除 {fail_count} 个" if fail_count > 0 else ""))
 
 
-# 广播二进制数据到所有客户端
-async def broadcast_binary(data):
-    clients = connected_clients.copy()
+# 广播二进制数据到所有客户端；持有来源房间的回放锁，避免与该房间新观众的回放交错
+async def broadcast_binary(data, lanlan_name):
     success_count = 0
     fail_count = 0
     disconnected_clients = []
-    
-    for client in clients:
-        try:
-            await client.send_bytes(data)
-            success_count += 1
-        except Exception as e:
-            print(f"❌ [BINARY BROADCAST] 二进制广播错误到 {client.client}: {e}")
-            fail_count += 1
-            disconnected_clients.append(client)
+
+    if not connected_clients:
+        return
+    async with _room_lock(lanlan_name):
+        clients = connected_clients.copy()
+        for client in clients:
+            try:
+                await client.send_bytes(data)
+                _note_frame_delivered(client)
+                success_count += 1
+            except Exception as e:
+                print(f"❌ [BINARY BROADCAST] 二进制广播错误到 {client.client}: {e}")
+                fail_count += 1
+                disconnected_clients.append(client)
     
     # 移除所有断开的客户端
     for client in disconnected_clients:
-        connected_clients.discard(client)
+        _remove_client(client, lanlan_name)
         print(f"🗑️ [BINARY BROADCAST] 移除断开的客户端: {client.client}")
     
     if success_count > 0:
@@ -427,6 +517,19 @@ async def startup_event():
     asyncio.create_task(cleanup_disconnected_clients())
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(translation_tasks):
+        task.cancel()
+    # 翻译模块按需导入，未加载过则无需清理
+    language_utils = sys.modules.get("utils.language_utils")
+    if language_utils is not None:
+        try:
+            await language_utils.close_batch_translator(timeout=1.0)
+        except Exception as e:
+            logger.debug(f"批量翻译器清理失败: {e}")
+
+
 async def cleanup_disconnected_clients():
     while True:
         try:
@@ -436,7 +539,7 @@ async def cleanup_disconnected_clients():
                     await client.send_json({"type": "heartbeat"})
                 except Exception as e:
                     print("广播错误:", e)
-                    connected_clients.remove(client)
+                    _remove_client(client)
             await asyncio.sleep(60)  # 每分钟检查一次
         except Exception as e:
             print(f"清理客户端错误: {e}")
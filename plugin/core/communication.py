@@ -25,7 +25,7 @@ from plugin.settings import (
 from plugin._types.exceptions import PluginExecutionError
 from plugin.logging_config import format_log_text as _format_log_text
 from plugin.core.zmq_transport import (
-    HostTransport, CH_CMD, CH_RES, CH_STS, CH_MSG, CH_COMM, CH_RESP,
+    HostTransport, TransportCodecError, CH_CMD, CH_RES, CH_STS, CH_MSG, CH_COMM, CH_RESP,
 )
 
 
@@ -46,6 +46,7 @@ class PluginCommunicationResourceManager:
     _uplink_consumer_task: Optional[asyncio.Task] = None
     _shutdown_event: Optional[asyncio.Event] = None
     _message_target_queue: Optional[asyncio.Queue] = None
+    _ready_event: Optional[asyncio.Event] = None
     _background_tasks: set[asyncio.Task] = field(default_factory=set)
     _last_forward_log_key: Optional[tuple] = field(default=None, init=False, repr=False)
     _last_forward_log_time: float = field(default=0.0, init=False, repr=False)
@@ -57,6 +58,22 @@ class PluginCommunicationResourceManager:
         if self._shutdown_event is None:
             self._shutdown_event = asyncio.Event()
 
+    def _ensure_ready_event(self) -> asyncio.Event:
+        if self._ready_event is None:
+            self._ready_event = asyncio.Event()
+        return self._ready_event
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """等待子进程上报 PLUGIN_READY，超时返回 False。"""
+        event = self._ensure_ready_event()
+        if event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
     async def start(self, message_target_queue: Optional[asyncio.Queue] = None) -> None:
         self._message_target_queue = message_target_queue
         if self._uplink_consumer_task is None or self._uplink_consumer_task.done():
@@ -114,25 +131,30 @@ class PluginCommunicationResourceManager:
         msg: dict,
         timeout: float,
         error_context: str,
+        metric_entry: Optional[str] = None,
     ) -> Any:
         future: asyncio.Future = asyncio.get_running_loop().create_future()
         self._pending_futures[req_id] = future
+        started = time.perf_counter()
         try:
             await self.transport.send_command(msg)
         except Exception as e:
             self._pending_futures.pop(req_id, None)
+            self._record_entry_latency(metric_entry, started, None)
             raise RuntimeError(
                 f"Failed to send command to plugin {self.plugin_id} ({error_context}): {e}"
             ) from e
 
         try:
             result = await asyncio.wait_for(future, timeout=timeout)
+            self._record_entry_latency(metric_entry, started, result)
             if result["success"]:
                 return result["data"]
             raise PluginExecutionError(
                 self.plugin_id, error_context, result.get("error", "Unknown error"),
             )
         except asyncio.TimeoutError:
+            self._record_entry_latency(metric_entry, started, None)
             self.logger.error(
                 "Plugin {} {} timed out after {}s, req_id={}",
                 self.plugin_id, error_context, timeout, req_id,
@@ -145,6 +167,30 @@ class PluginCommunicationResourceManager:
             ct.add_done_callback(self._background_tasks.discard)
             raise TimeoutError(f"{error_context} execution timed out after {timeout}s") from None
 
+    def _record_entry_latency(self, entry: Optional[str], started: float, result: Optional[dict]) -> None:
+        """Record trigger latency, queue wait and errors for the metrics endpoint.
+
+        ``result`` is None when the call failed before a result arrived
+        (send error / timeout); otherwise the child's ``exec_ms`` splits the
+        round trip into execution and queue wait.
+        """
+        if entry is None:
+            return
+        latency = time.perf_counter() - started
+        queue_wait = None
+        error = True
+        if isinstance(result, dict):
+            error = not result.get("success")
+            exec_ms = result.get("exec_ms")
+            if isinstance(exec_ms, (int, float)):
+                queue_wait = max(0.0, latency - exec_ms / 1000.0)
+        try:
+            from plugin.server.monitoring.metrics import entry_latency
+
+            entry_latency.record(self.plugin_id, entry, latency, queue_wait=queue_wait, error=error)
+        except Exception:
+            pass
+
     async def trigger(self, entry_id: str, args: dict, timeout: float = PLUGIN_TRIGGER_TIMEOUT) -> Any:
         req_id = str(uuid.uuid4())
         self.logger.debug(
@@ -152,7 +198,9 @@ class PluginCommunicationResourceManager:
             self.plugin_id, entry_id, req_id,
         )
         msg = {"type": "TRIGGER", "req_id": req_id, "entry_id": entry_id, "args": args}
-        return await self._send_command_and_wait(req_id, msg, timeout, f"entry {entry_id}")
+        return await self._send_command_and_wait(
+            req_id, msg, timeout, f"entry {entry_id}", metric_entry=str(entry_id),
+        )
 
     async def trigger_custom_event(
         self,
@@ -175,6 +223,7 @@ class PluginCommunicationResourceManager:
         }
         return await self._send_command_and_wait(
             req_id, msg, timeout, f"custom event {event_type}.{event_id}",
+            metric_entry=f"{event_type}.{event_id}",
         )
 
     async def send_freeze_command(self, timeout: float = PLUGIN_TRIGGER_TIMEOUT) -> Dict[str, Any]:
@@ -253,6 +302,7 @@ class PluginCommunicationResourceManager:
     _MESSAGE_ROUTING: ClassVar[Dict[str, str]] = {
         "ENTRY_UPDATE": "_handle_entry_update",
         "STATIC_UI_REGISTER": "_handle_static_ui_register",
+        "PLUGIN_READY": "_handle_plugin_ready",
     }
 
     async def _consume_uplink(self) -> None:
@@ -295,6 +345,9 @@ class PluginCommunicationResourceManager:
 
             except asyncio.CancelledError:
                 break
+            except TransportCodecError as e:
+                # 不符合编码策略/通道 schema 的帧直接丢弃，不影响后续消息
+                self.logger.warning("Dropped invalid uplink frame from plugin {}: {}", self.plugin_id, e)
             except Exception:
                 if not se.is_set():
                     self.logger.exception("Error in uplink consumer for plugin {}", self.plugin_id)
@@ -400,7 +453,11 @@ class PluginCommunicationResourceManager:
         except Exception as e:
             self.logger.warning("Failed to route comm message from plugin {}: {}", self.plugin_id, e)
 
-    # ── ENTRY_UPDATE / STATIC_UI_REGISTER handlers ───────────────
+    # ── PLUGIN_READY / ENTRY_UPDATE / STATIC_UI_REGISTER handlers ─
+
+    async def _handle_plugin_ready(self, msg: Dict[str, Any]) -> None:
+        self.logger.debug("Plugin {} reported ready", self.plugin_id)
+        self._ensure_ready_event().set()
 
     async def _handle_entry_update(self, msg: Dict[str, Any]) -> None:
         try:
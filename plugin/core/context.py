@@ -110,8 +110,6 @@ class PluginContext:
     _zmq_ipc_client: Optional[Any] = None
     _cmd_queue: Optional[Any] = None  # 命令队列（用于在等待期间处理命令）
     _res_queue: Optional[Any] = None  # 结果队列（用于在等待期间处理响应）
-    _response_queue: Optional[Any] = None
-    _response_pending: Optional[Dict[str, Any]] = None
     _entry_map: Optional[Dict[str, Any]] = None  # 入口映射（用于处理命令）
     _instance: Optional[Any] = None  # 插件实例（用于处理命令）
     _bus_hub: Optional[Any] = None
@@ -1141,78 +1139,18 @@ class PluginContext:
                     pass
             raise RuntimeError(f"Failed to send {request_type} request: {e}") from e
 
-        response_queue = getattr(self, "_response_queue", None)
-        pending = getattr(self, "_response_pending", None)
-        if pending is None:
-            pending = {}
-            try:
-                object.__setattr__(self, "_response_pending", pending)
-            except Exception:
-                self._response_pending = pending
-
-        if isinstance(pending, dict) and request_id in pending:
-            response = pending.pop(request_id)
-            if isinstance(response, dict) and response.get("error"):
-                raise RuntimeError(_error_to_message(response.get("error")))
-            result = response.get("result") if isinstance(response, dict) else None
-            if wrap_result:
-                return result if isinstance(result, dict) else {"result": result}
-            return result
-
-        if response_queue is not None:
-            while time.time() < deadline:
-                response = state.get_plugin_response(request_id)
-                if isinstance(response, dict):
-                    if response.get("error"):
-                        raise RuntimeError(_error_to_message(response.get("error")))
-                    result = response.get("result")
-                    if wrap_result:
-                        return result if isinstance(result, dict) else {"result": result}
-                    return result
-
-                remaining = deadline - time.time()
-                if remaining <= 0:
-                    break
-                try:
-                    msg = await asyncio.wait_for(
-                        response_queue.get(), timeout=min(0.05, remaining),
-                    )
-                except asyncio.TimeoutError:
-                    continue
-                except Exception:
-                    break
-                if not isinstance(msg, dict):
-                    continue
-                rid = msg.get("request_id")
-                if rid == request_id:
-                    if msg.get("error"):
-                        raise RuntimeError(_error_to_message(msg.get("error")))
-                    result = msg.get("result")
-                    if wrap_result:
-                        return result if isinstance(result, dict) else {"result": result}
-                    return result
-                if isinstance(pending, dict) and rid:
-                    if len(pending) > 1024:
-                        raise RuntimeError(
-                            f"_response_pending overflow (size={len(pending)}, rid={rid}); "
-                            "upstream response correlation/backpressure bug must be fixed."
-                        )
-                    pending[str(rid)] = msg
-
-        check_interval = 0.01
-        while time.time() < deadline:
-            response = state.get_plugin_response(request_id)
-            if not isinstance(response, dict):
-                await asyncio.sleep(check_interval)
-                continue
-
-            if response.get("error"):
-                raise RuntimeError(_error_to_message(response.get("error")))
-
-            result = response.get("result")
-            if wrap_result:
-                return result if isinstance(result, dict) else {"result": result}
-            return result
+        remaining = deadline - time.time()
+        if remaining > 0:
+            # CH_RESP 接收循环收到响应后直接唤醒这里登记的 future
+            response = await state.wait_for_plugin_response_async(request_id, remaining)
+            if isinstance(response, dict):
+                if response.get("error"):
+                    raise RuntimeError(_error_to_message(response.get("error")))
+
+                result = response.get("result")
+                if wrap_result:
+                    return result if isinstance(result, dict) else {"result": result}
+                return result
 
         orphan_response = None
         try:
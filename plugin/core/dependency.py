@@ -582,29 +582,11 @@ def _get_dependency_plugin_ids(dep: PluginDependency, logger: Any) -> List[str]:
     return out
 
 
-def _topological_sort_plugins(
-    plugin_contexts: List["PluginContext"],
-    pid_to_context: Dict[str, "PluginContext"],
-    logger: Any,
-) -> List[str]:
+def _collect_entry_providers(plugin_contexts: List["PluginContext"]) -> Dict[str, set[str]]:
     """
-    Phase 2: 根据依赖关系对插件进行拓扑排序。
-    
-    Args:
-        plugin_contexts: 插件上下文列表
-        pid_to_context: pid -> context 映射
-        logger: 日志记录器
-    
-    Returns:
-        排序后的插件 ID 列表
+    仅基于当前待加载集合构建 entry provider 映射，避免依赖运行时全局状态。
+    这里采用配置中声明的 entries（conf/pdata）来近似 entry provider 关系。
     """
-    logger.info("Sorting {} plugins based on dependencies...", len(plugin_contexts))
-    
-    # 构建依赖图
-    graph: Dict[str, set] = {ctx.pid: set() for ctx in plugin_contexts}
-
-    # 仅基于当前待加载集合构建 entry provider 映射，避免依赖运行时全局状态。
-    # 这里采用配置中声明的 entries（conf/pdata）来近似 entry provider 关系。
     entry_providers: Dict[str, set[str]] = {}
     for pctx in plugin_contexts:
         entries = pctx.conf.get("entries") or pctx.pdata.get("entries") or []
@@ -615,7 +597,18 @@ def _topological_sort_plugins(
                 entry_id = None
             if entry_id:
                 entry_providers.setdefault(str(entry_id), set()).add(pctx.pid)
-    
+    return entry_providers
+
+
+def _build_plugin_dependency_graph(
+    plugin_contexts: List["PluginContext"],
+    pid_to_context: Dict[str, "PluginContext"],
+    logger: Any,
+) -> Dict[str, set]:
+    """构建依赖图：pid -> 其依赖的插件 ID 集合（仅限当前待加载集合内）。"""
+    graph: Dict[str, set] = {ctx.pid: set() for ctx in plugin_contexts}
+    entry_providers = _collect_entry_providers(plugin_contexts)
+
     for ctx in plugin_contexts:
         for dep in ctx.dependencies:
             for dep_pid in _get_dependency_plugin_ids(dep, logger):
@@ -628,24 +621,68 @@ def _topological_sort_plugins(
                     if provider_pid != ctx.pid and provider_pid in pid_to_context:
                         graph[ctx.pid].add(provider_pid)
                         logger.debug("Dependency edge (entry): {} -> {} via entry '{}'", ctx.pid, provider_pid, entry_spec)
+    return graph
+
+
+def _group_plugins_by_dependency_level(
+    final_order: List[str],
+    graph: Dict[str, set],
+    logger: Any,
+) -> List[List[str]]:
+    """
+    按依赖深度把拓扑序切分为若干层：无依赖的插件在第 0 层，
+    其余插件位于其所有依赖所在层之后的一层。同层插件之间没有依赖关系，可以并发启动。
+
+    层内保持 ``final_order`` 中的相对顺序（adapter 优先级等规则不变）。
+    循环依赖中的插件忽略尚未分层的依赖边。
+
+    ``graph`` 为 ``_build_plugin_dependency_graph`` 的结果，与拓扑排序共用同一份。
+    """
+    level_of: Dict[str, int] = {}
+    levels: List[List[str]] = []
+    for pid in final_order:
+        dep_levels = [level_of[d] for d in graph.get(pid, ()) if d in level_of]
+        level = max(dep_levels) + 1 if dep_levels else 0
+        level_of[pid] = level
+        while len(levels) <= level:
+            levels.append([])
+        levels[level].append(pid)
+    logger.debug("Plugin load levels: {}", levels)
+    return levels
+
+
+def _topological_sort_plugins(
+    plugin_contexts: List["PluginContext"],
+    pid_to_context: Dict[str, "PluginContext"],
+    logger: Any,
+    graph: Optional[Dict[str, set]] = None,
+) -> List[str]:
+    """
+    Phase 2: 根据依赖关系对插件进行拓扑排序。
+    
+    Args:
+        plugin_contexts: 插件上下文列表
+        pid_to_context: pid -> context 映射
+        logger: 日志记录器
+        graph: 预先构建的依赖图（不传则在此构建）
+    
+    Returns:
+        排序后的插件 ID 列表
+    """
+    logger.info("Sorting {} plugins based on dependencies...", len(plugin_contexts))
     
-    # Kahn 算法：构建邻接表和入度表
+    # 构建依赖图
+    if graph is None:
+        graph = _build_plugin_dependency_graph(plugin_contexts, pid_to_context, logger)
+    
+    # Kahn 算法：由依赖图反推邻接表和入度表
     adj_list: Dict[str, List[str]] = {pid: [] for pid in pid_to_context}
     in_degree: Dict[str, int] = {pid: 0 for pid in pid_to_context}
     
-    for ctx in plugin_contexts:
-        dependent = ctx.pid
-        for dep in ctx.dependencies:
-            for dependency in _get_dependency_plugin_ids(dep, logger):
-                if dependency in pid_to_context:
-                    adj_list[dependency].append(dependent)
-                    in_degree[dependent] += 1
-            entry_spec = getattr(dep, "entry", None)
-            if isinstance(entry_spec, str) and ":" not in entry_spec and entry_spec:
-                for provider_pid in entry_providers.get(entry_spec, set()):
-                    if provider_pid != dependent and provider_pid in pid_to_context:
-                        adj_list[provider_pid].append(dependent)
-                        in_degree[dependent] += 1
+    for dependent, dependencies in graph.items():
+        for dependency in dependencies:
+            adj_list[dependency].append(dependent)
+            in_degree[dependent] += 1
     
     def _queue_sort_key(pid: str) -> tuple[int, int, int, str]:
         """
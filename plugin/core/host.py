@@ -4,7 +4,6 @@ import asyncio
 import copy
 import importlib
 import inspect
-import multiprocessing
 import os
 import sys
 import threading
@@ -38,8 +37,10 @@ from plugin.settings import (
 )
 from plugin.sdk.router import PluginRouter
 from plugin.sdk.bus.types import dispatch_bus_change
+from plugin.core.shm_payload import SharedPayloadChannel
+from plugin.core.zygote import get_plugin_process_context
 from plugin.core.zmq_transport import (
-    HostTransport, ChildTransport, ChannelSender,
+    HostTransport, ChildTransport, ChannelSender, TransportCodec, TransportCodecError,
     CH_CMD, CH_RES, CH_STS, CH_MSG, CH_COMM, CH_RESP,
 )
 
@@ -358,6 +359,38 @@ def _find_project_root(config_path: Path) -> Path:
         return config_path.parent.resolve()
 
 
+def _close_plugin_storage(instance: Any, logger: Any) -> None:
+    """
+    落盘并关闭插件实例的 PluginStore（写缓冲 + 后台线程）。
+
+    插件进程由 multiprocessing 以 ``os._exit`` 结束，不会执行 atexit 钩子，
+    因此退出前必须在这里显式落盘，否则尚未提交的写入会丢失。
+    """
+    store = getattr(instance, "store", None)
+    close = getattr(store, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning("[Plugin Process] Failed to flush plugin store: {}", e)
+
+
+def _deliver_plugin_response(msg: Any) -> None:
+    """
+    把下行 CH_RESP 帧交给本进程里等待该 request_id 的调用方。
+
+    有等待者时直接完成其 future；响应先于等待者登记到达时，写入共享字典，
+    由 ``wait_for_plugin_response_async`` 登记后取走。
+    """
+    if not isinstance(msg, dict):
+        return
+    request_id = msg.get("request_id")
+    if not request_id:
+        return
+    state.set_plugin_response(str(request_id), msg)
+
+
 def _check_extension_type_guard(config_path: Path, plugin_id: str, logger: Any) -> bool:
     """
     检查插件是否是 Extension 类型（不应作为独立进程运行）。
@@ -516,8 +549,10 @@ def _plugin_process_runner(
     uplink_endpoint: str,
     stop_event: Any | None = None,
     extension_configs: list | None = None,
+    transport_codec: TransportCodec | None = None,
+    transport_shm: SharedPayloadChannel | None = None,
 ) -> None:
-    """独立进程中的运行函数。通过 ZMQ 与宿主进程通信。"""
+    """独立进程中的运行函数。通过 ZMQ 与宿主进程通信（编码策略与宿主的 HostTransport 一致）。"""
     # 保存进程级 stop event
     process_stop_event = stop_event
     
@@ -535,11 +570,14 @@ def _plugin_process_runner(
         return
 
     # ── ZMQ child-side transport ─────────────────────────────────
-    child_transport = ChildTransport(downlink_endpoint, uplink_endpoint)
+    child_transport = ChildTransport(
+        downlink_endpoint, uplink_endpoint, codec=transport_codec, shm=transport_shm,
+    )
     res_sender = child_transport.channel_sender(CH_RES)
     status_sender = child_transport.channel_sender(CH_STS)
     message_sender = child_transport.channel_sender(CH_MSG)
     comm_sender = child_transport.channel_sender(CH_COMM)
+    instance: Any = None
 
     try:
         if str(project_root) not in sys.path:
@@ -564,8 +602,6 @@ def _plugin_process_runner(
             _zmq_ipc_client=None,
             _cmd_queue=None,
             _res_queue=None,
-            _response_queue=None,
-            _response_pending={},
             _entry_map=None,
             _instance=None,
         )
@@ -726,9 +762,6 @@ def _plugin_process_runner(
         ctx._entry_map = entry_map
         ctx._instance = instance
 
-        # asyncio.Queue fed from the downlink for plugin-to-plugin responses
-        _response_inbox: asyncio.Queue = asyncio.Queue()
-        ctx._response_queue = _response_inbox
         _startup_pending_downlink: list[tuple[str, dict]] = []
 
         async def _startup_downlink_pump(stop_event: asyncio.Event) -> None:
@@ -739,7 +772,7 @@ def _plugin_process_runner(
                     continue
                 ch, msg = result
                 if ch == CH_RESP:
-                    await _response_inbox.put(msg)
+                    _deliver_plugin_response(msg)
                     continue
                 if ch == CH_CMD and isinstance(msg, dict) and msg.get("type") == "STOP":
                     stop_event.set()
@@ -867,6 +900,12 @@ def _plugin_process_runner(
                         t.start()
                         logger.info("Started auto custom event '{}' (type: {})", eid, event_type)
 
+        # 启动流程结束：通知主进程本插件已就绪，下一依赖层才会开始启动
+        try:
+            message_sender.put_nowait({"type": "PLUGIN_READY", "plugin_id": plugin_id})
+        except Exception:
+            logger.warning("Failed to send PLUGIN_READY for plugin {}", plugin_id)
+
         # ────────────────────────────────────────────────────
         #  Async command loop  (replaces the old sync while-loop)
         # ────────────────────────────────────────────────────
@@ -928,6 +967,7 @@ def _plugin_process_runner(
                 or getattr(instance, f"entry_{entry_id}", None)
             )
             ret = {"req_id": req_id, "success": False, "data": None, "error": None}
+            exec_started: float | None = None
 
             run_id = None
             try:
@@ -950,6 +990,7 @@ def _plugin_process_runner(
 
                 timeout_seconds = _resolve_timeout(entry_id)
 
+                exec_started = time.perf_counter()
                 with ctx._handler_scope(f"plugin_entry.{entry_id}"), ctx._run_scope(run_id):
                     result = await _run_with_watchdog(
                         method(**args), entry_id, timeout_seconds,
@@ -980,6 +1021,9 @@ def _plugin_process_runner(
             finally:
                 if run_id:
                     _run_tasks.pop(run_id, None)
+                if exec_started is not None:
+                    # 入口实际执行耗时，主进程据此区分执行时间与排队等待
+                    ret["exec_ms"] = (time.perf_counter() - exec_started) * 1000.0
                 try:
                     res_sender.put(ret, timeout=10.0)
                 except Exception:
@@ -1005,6 +1049,7 @@ def _plugin_process_runner(
             custom_events = events_by_type.get(event_type, {})
             method = custom_events.get(event_id)
             ret = {"req_id": req_id, "success": False, "data": None, "error": None}
+            exec_started: float | None = None
 
             try:
                 if not method:
@@ -1015,6 +1060,7 @@ def _plugin_process_runner(
                     ret["error"] = f"Custom event '{event_type}.{event_id}' must be 'async def'."
                     return
 
+                exec_started = time.perf_counter()
                 with ctx._handler_scope(f"{event_type}.{event_id}"):
                     result = await _run_with_watchdog(
                         method(**args),
@@ -1034,6 +1080,8 @@ def _plugin_process_runner(
                 logger.exception("Error executing custom event {}.{}", event_type, event_id)
                 ret["error"] = str(e)
             finally:
+                if exec_started is not None:
+                    ret["exec_ms"] = (time.perf_counter() - exec_started) * 1000.0
                 try:
                     res_sender.put(ret, timeout=10.0)
                 except Exception:
@@ -1057,13 +1105,16 @@ def _plugin_process_runner(
                 except asyncio.CancelledError:
                     logger.info("[Plugin Process] Command loop cancelled, shutting down")
                     break
+                except TransportCodecError as e:
+                    logger.warning("[Plugin Process] Dropped undecodable downlink frame: {}", e)
+                    continue
                 if result is None:
                     continue
                 ch, msg = result
 
                 # Plugin-to-plugin responses arrive on the downlink tagged CH_RESP
                 if ch == CH_RESP:
-                    await _response_inbox.put(msg)
+                    _deliver_plugin_response(msg)
                     continue
 
                 if ch != CH_CMD or not isinstance(msg, dict):
@@ -1231,6 +1282,8 @@ def _plugin_process_runner(
             except Exception as e:
                 logger.exception("Error in lifecycle.shutdown: {}", e)
 
+        _close_plugin_storage(instance, logger)
+
         try:
             ctx.close()
         except Exception as e:
@@ -1257,6 +1310,7 @@ def _plugin_process_runner(
                         asyncio.run(result)
         except BaseException:
             pass
+        _close_plugin_storage(instance, logger)
         try:
             ctx.close()
         except Exception:
@@ -1268,6 +1322,7 @@ def _plugin_process_runner(
     except Exception as e:
         # 进程崩溃，记录详细信息
         logger.exception("Plugin process {} crashed", plugin_id)
+        _close_plugin_storage(instance, logger)
         # 尝试发送错误信息到结果队列（如果可能）
         try:
             res_sender.put({
@@ -1297,12 +1352,19 @@ class PluginHost:
         self.logger = logger.bind(plugin_id=plugin_id, host=True)
 
         # ZMQ transport: 2 socket pairs replace 5 mp.Queues
+        # (端点类型 / 编码由 NEKO_PLUGIN_TRANSPORT_ENDPOINT / NEKO_PLUGIN_TRANSPORT_CODEC 决定)
         self.transport = HostTransport()
 
-        self._process_stop_event: Any = multiprocessing.Event()
+        # 插件进程的启动方式见 plugin.core.zygote（默认沿用平台默认方式，可选 zygote / spawn）；
+        # stop event 必须与进程来自同一个 multiprocessing 上下文
+        mp_context = get_plugin_process_context()
+        self._process_stop_event: Any = mp_context.Event()
 
-        # Shared response notification primitives must be initialized before
-        # forking, otherwise each child creates its own Manager proxies.
+        # With the fork start method (the Linux default) children inherit the
+        # shared response notification primitives, so they must exist before
+        # the process starts; otherwise each child creates its own Manager
+        # proxies. zygote/spawn children inherit nothing and get plugin
+        # responses over the transport downlink instead.
         try:
             _ = state.plugin_response_map
         except Exception as e:
@@ -1318,7 +1380,7 @@ class PluginHost:
                 plugin_id, e
             )
 
-        self.process = multiprocessing.Process(
+        self.process = mp_context.Process(
             target=_plugin_process_runner,
             args=(
                 plugin_id,
@@ -1328,6 +1390,8 @@ class PluginHost:
                 self.transport.uplink_endpoint,
                 self._process_stop_event,
                 extension_configs,
+                self.transport.codec,
+                self.transport.shm,
             ),
             # Plugin code may spawn subprocesses/Managers; daemon process would forbid that.
             daemon=False,
@@ -1570,6 +1634,21 @@ class PluginHost:
         }
         return await self.comm_manager._send_command_and_wait(req_id, cmd, timeout, "CONFIG_UPDATE")
 
+    async def wait_ready(self, timeout: float) -> bool:
+        """
+        等待子进程完成启动流程（收到 PLUGIN_READY）。
+
+        进程提前退出或超时返回 False。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, float(timeout))
+        while True:
+            remaining = deadline - loop.time()
+            if await self.comm_manager.wait_ready(timeout=min(0.2, max(0.0, remaining))):
+                return True
+            if not self.is_alive() or remaining <= 0:
+                return False
+
     def is_alive(self) -> bool:
         """检查进程是否存活"""
         return self.process.is_alive() and self.process.exitcode is None
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import hashlib
 import importlib
 import inspect
 import os
 import sys
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Callable, Type, Optional, Iterable, cast
 
@@ -53,6 +54,8 @@ from plugin.core.dependency import (
     _parse_plugin_dependencies,
     _get_dependency_plugin_ids,
     _topological_sort_plugins,
+    _build_plugin_dependency_graph,
+    _group_plugins_by_dependency_level,
 )
 
 try:
@@ -85,6 +88,44 @@ class PluginContext:
     auto_start: bool
 
 
+@dataclass
+class PluginLoadReport:
+    """
+    插件加载 / 启动耗时报告
+
+    - levels: 按依赖深度分层的已加载插件 ID（同层可并发启动）
+    - load_seconds: 每个插件在主进程中的加载耗时（导入 + 创建宿主 + 注册）
+    - start_seconds: 每个插件进程的启动耗时（由 server lifecycle 填充）
+    - skipped: 加载阶段被跳过或失败的已启用插件 ID（依赖不满足、重复、导入失败等）
+    - failed: 进程启动失败的插件 ID（由 server lifecycle 填充）
+    - depended_on: 被其他插件依赖的插件 ID（启动时只需等待这些插件就绪）
+    """
+    levels: List[List[str]] = field(default_factory=list)
+    depended_on: List[str] = field(default_factory=list)
+    load_seconds: Dict[str, float] = field(default_factory=dict)
+    start_seconds: Dict[str, float] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    load_total_seconds: float = 0.0
+    start_total_seconds: float = 0.0
+
+    def slowest(self, limit: int = 5) -> List[tuple[str, float]]:
+        """按 加载 + 启动 总耗时降序返回最慢的插件"""
+        totals: Dict[str, float] = {}
+        for source in (self.load_seconds, self.start_seconds):
+            for pid, seconds in source.items():
+                totals[pid] = totals.get(pid, 0.0) + seconds
+        return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+    def summary(self) -> str:
+        slowest = ", ".join(f"{pid}={seconds * 1000:.0f}ms" for pid, seconds in self.slowest())
+        return (
+            f"{sum(len(level) for level in self.levels)} plugin(s) in {len(self.levels)} level(s), "
+            f"load {self.load_total_seconds * 1000:.0f}ms, start {self.start_total_seconds * 1000:.0f}ms, "
+            f"skipped={self.skipped or '[]'}, failed={self.failed or '[]'}, slowest: {slowest or '-'}"
+        )
+
+
 # Mapping from (plugin_id, entry_id) -> actual python method name on the instance.
 plugin_entry_method_map: Dict[tuple, str] = {}
 
@@ -1361,7 +1402,7 @@ def load_plugins_from_roots(
     plugin_config_roots: Iterable[Path],
     logger: Any,
     process_host_factory: Callable[..., Any],
-) -> None:
+) -> PluginLoadReport:
     """
     扫描插件配置，启动子进程，并静态扫描元数据用于注册列表。
     process_host_factory 接收 (plugin_id, entry_point, config_path, extension_configs=None) 并返回宿主对象。
@@ -1369,7 +1410,10 @@ def load_plugins_from_roots(
     加载过程分为三个阶段：
     1. 收集（Collect）：扫描所有 TOML 文件，解析配置和依赖。
     2. 排序（Sort）：根据插件依赖关系进行拓扑排序，确保依赖先加载。
-    3. 加载（Load）：按顺序执行实际加载。
+    3. 加载（Load）：按依赖深度分层，逐个注册（进程启动阶段再按层并发）。
+
+    返回 :class:`PluginLoadReport`（分层结果与每个插件的加载耗时），
+    server lifecycle 据此按层并发启动插件进程。
     """
     logger = _wrap_logger(logger)
     roots: list[Path] = []
@@ -1383,7 +1427,7 @@ def load_plugins_from_roots(
 
     if not roots:
         logger.info("No plugin config roots provided, skipping")
-        return
+        return PluginLoadReport()
 
     logger.info("Loading plugins from roots: {}", [str(root) for root in roots])
 
@@ -1397,295 +1441,339 @@ def load_plugins_from_roots(
     
     if not plugin_contexts:
         logger.info("No valid plugins found to load")
-        return
+        return PluginLoadReport()
     
     # === Phase 2: Topological Sort ===
-    final_order = _topological_sort_plugins(plugin_contexts, pid_to_context, logger)
+    # 依赖图只构建一次，拓扑排序与分层共用
+    dependency_graph = _build_plugin_dependency_graph(plugin_contexts, pid_to_context, logger)
+    final_order = _topological_sort_plugins(plugin_contexts, pid_to_context, logger, dependency_graph)
     
     # === Phase 3: Load ===
     # 预构建 extension 映射
     extension_map = _build_extension_map(plugin_contexts)
     
-    # 加载每个插件
-    for pid in final_order:
-        ctx = pid_to_context.get(pid)
-        if not ctx:
-            continue
-            
-        toml_path = ctx.toml_path
-        conf = ctx.conf
-        pdata = ctx.pdata
-        entry = ctx.entry
-        dependencies = ctx.dependencies
-        sdk_supported_str = ctx.sdk_supported_str
-        sdk_recommended_str = ctx.sdk_recommended_str
-        sdk_untested_str = ctx.sdk_untested_str
-        sdk_conflicts_list = ctx.sdk_conflicts_list
-        enabled_val = ctx.enabled
-        auto_start_val = ctx.auto_start
-        
-        logger.info("Loading plugin: {}", pid)
+    # 按依赖深度分层：同层插件之间没有依赖关系
+    levels = _group_plugins_by_dependency_level(final_order, dependency_graph, logger)
+    report = PluginLoadReport()
+    report.depended_on = sorted({dep for deps in dependency_graph.values() for dep in deps})
+    load_started = time.perf_counter()
+
+    for level_index, level in enumerate(levels):
+        # 注册阶段保持串行（ID 冲突处理依赖顺序）；并发发生在 lifecycle 按层启动进程时
+        loaded_level: List[str] = []
+        for pid in level:
+            ctx = pid_to_context.get(pid)
+            if not ctx:
+                continue
+            logger.info("Loading plugin: {} (level {})", pid, level_index)
+            started = time.perf_counter()
+            try:
+                loaded_pid = _load_plugin_from_context(pid, ctx, extension_map, logger, process_host_factory)
+            except Exception:
+                logger.exception("Unexpected error loading plugin {}", pid)
+                loaded_pid = None
+            elapsed = time.perf_counter() - started
+            if loaded_pid is None:
+                if ctx.enabled and ctx.pdata.get("type", "plugin") != "extension":
+                    report.skipped.append(pid)
+                continue
+            report.load_seconds[loaded_pid] = elapsed
+            loaded_level.append(loaded_pid)
+        if loaded_level:
+            report.levels.append(loaded_level)
 
-        # disabled plugins: visibility only
-        if not enabled_val:
-            _load_disabled_plugin(ctx, logger)
-            continue
-        # 根据插件类型分发加载逻辑
-        plugin_type = pdata.get("type", "plugin")
-        
-        # extension 类型：不启动独立进程，只注册元数据
-        if plugin_type == "extension":
-            _load_extension_plugin(ctx, logger)
-            continue
-        
-        # 依赖检查（可通过配置禁用）
-        dependency_check_failed = False
-        if PLUGIN_ENABLE_DEPENDENCY_CHECK and dependencies:
-            logger.debug("Plugin {}: checking {} dependency(ies)...", pid, len(dependencies))
-            for dep in dependencies:
-                # 检查依赖（包括简化格式和完整格式）
-                satisfied, error_msg = _check_plugin_dependency(dep, logger, pid)
-                if not satisfied:
-                    logger.error(
-                        "Plugin {}: dependency check failed: {}; skipping load",
-                        pid, error_msg
-                    )
-                    dependency_check_failed = True
-                    break
-                logger.debug("Plugin {}: dependency '{}' check passed", pid, getattr(dep, 'id', getattr(dep, 'entry', getattr(dep, 'custom_event', 'unknown'))))
-            if not dependency_check_failed:
-                logger.debug("Plugin {}: all dependencies satisfied", pid)
-        elif not PLUGIN_ENABLE_DEPENDENCY_CHECK and dependencies:
-            logger.warning(
-                "Plugin {}: has {} dependency(ies), but dependency check is disabled. "
-                "Loading plugin without dependency validation.",
-                pid, len(dependencies)
-            )
-        else:
-            logger.debug("Plugin {}: no dependencies to check", pid)
-        
-        if dependency_check_failed:
-            logger.debug("Plugin {}: skipping due to failed dependency check", pid)
-            continue
+    report.load_total_seconds = time.perf_counter() - load_started
+    logger.info("Plugin load finished: {}", report.summary())
+    return report
 
-        # 检查插件是否已经加载
-        if _check_plugin_already_loaded(pid, toml_path, logger):
-            continue
-        
-        # 检测并解决插件 ID 冲突
-        plugin_data_for_hash = {
-            "id": pid,
-            "name": pdata.get("name", pid),
-            "version": pdata.get("version", "0.1.0"),
-            "entry": entry or "",
-        }
-        original_pid = pid
-        resolved_pid = _resolve_plugin_id_conflict(
-            pid, logger,
-            config_path=toml_path,
-            entry_point=entry,
-            plugin_data=plugin_data_for_hash,
-            purpose="load",
-            enable_rename=bool(PLUGIN_ENABLE_ID_CONFLICT_CHECK),
-        )
 
-        if resolved_pid is None:
-            logger.info("Plugin {} from {} is already loaded (duplicate detected), skipping", original_pid, toml_path)
-            continue
+def _load_plugin_from_context(
+    pid: str,
+    ctx: PluginContext,
+    extension_map: Dict[str, List[Dict[str, str]]],
+    logger: Any,
+    process_host_factory: Callable[..., Any],
+) -> Optional[str]:
+    """
+    加载单个插件：依赖检查、ID 冲突处理、创建进程宿主、注册元数据。
 
-        pid = resolved_pid
-        if pid != original_pid:
-            logger.warning("Plugin {} from {}: ID changed from '{}' to '{}' due to conflict", original_pid, toml_path, original_pid, pid)
-            # 同步 extension_map：将 original_pid 下收集的扩展迁移到新 pid
-            if original_pid in extension_map:
-                moved_exts = extension_map.pop(original_pid)
-                extension_map.setdefault(pid, []).extend(moved_exts)
+    Returns:
+        最终注册的插件 ID；禁用 / extension / 被跳过 / 失败时返回 None。
+        任何失败只影响当前插件。
+    """
+    toml_path = ctx.toml_path
+    conf = ctx.conf
+    pdata = ctx.pdata
+    entry = ctx.entry
+    dependencies = ctx.dependencies
+    sdk_supported_str = ctx.sdk_supported_str
+    sdk_recommended_str = ctx.sdk_recommended_str
+    sdk_untested_str = ctx.sdk_untested_str
+    sdk_conflicts_list = ctx.sdk_conflicts_list
+    enabled_val = ctx.enabled
+    auto_start_val = ctx.auto_start
+
+    # disabled plugins: visibility only
+    if not enabled_val:
+        _load_disabled_plugin(ctx, logger)
+        return None
+    # 根据插件类型分发加载逻辑
+    plugin_type = pdata.get("type", "plugin")
+    
+    # extension 类型：不启动独立进程，只注册元数据
+    if plugin_type == "extension":
+        _load_extension_plugin(ctx, logger)
+        return None
+    
+    # 依赖检查（可通过配置禁用）
+    dependency_check_failed = False
+    if PLUGIN_ENABLE_DEPENDENCY_CHECK and dependencies:
+        logger.debug("Plugin {}: checking {} dependency(ies)...", pid, len(dependencies))
+        for dep in dependencies:
+            # 检查依赖（包括简化格式和完整格式）
+            satisfied, error_msg = _check_plugin_dependency(dep, logger, pid)
+            if not satisfied:
+                logger.error(
+                    "Plugin {}: dependency check failed: {}; skipping load",
+                    pid, error_msg
+                )
+                dependency_check_failed = True
+                break
+            logger.debug("Plugin {}: dependency '{}' check passed", pid, getattr(dep, 'id', getattr(dep, 'entry', getattr(dep, 'custom_event', 'unknown'))))
+        if not dependency_check_failed:
+            logger.debug("Plugin {}: all dependencies satisfied", pid)
+    elif not PLUGIN_ENABLE_DEPENDENCY_CHECK and dependencies:
+        logger.warning(
+            "Plugin {}: has {} dependency(ies), but dependency check is disabled. "
+            "Loading plugin without dependency validation.",
+            pid, len(dependencies)
+        )
+    else:
+        logger.debug("Plugin {}: no dependencies to check", pid)
+    
+    if dependency_check_failed:
+        logger.debug("Plugin {}: skipping due to failed dependency check", pid)
+        return None
 
-        # 检查插件是否已注册
-        if _check_plugin_already_registered(pid, toml_path, logger):
-            continue
+    # 检查插件是否已经加载
+    if _check_plugin_already_loaded(pid, toml_path, logger):
+        return None
+    
+    # 检测并解决插件 ID 冲突
+    plugin_data_for_hash = {
+        "id": pid,
+        "name": pdata.get("name", pid),
+        "version": pdata.get("version", "0.1.0"),
+        "entry": entry or "",
+    }
+    original_pid = pid
+    resolved_pid = _resolve_plugin_id_conflict(
+        pid, logger,
+        config_path=toml_path,
+        entry_point=entry,
+        plugin_data=plugin_data_for_hash,
+        purpose="load",
+        enable_rename=bool(PLUGIN_ENABLE_ID_CONFLICT_CHECK),
+    )
 
-        # adapter 类型：在通过统一依赖和重复检查后，再走 adapter-specific 启动逻辑
-        if plugin_type == "adapter":
-            _load_adapter_plugin(ctx, logger, process_host_factory, plugin_id=pid)
-            continue
+    if resolved_pid is None:
+        logger.info("Plugin {} from {} is already loaded (duplicate detected), skipping", original_pid, toml_path)
+        return None
 
-        module_path, class_name = entry.split(":", 1)
-        logger.debug("Plugin {}: importing {}:{}", pid, module_path, class_name)
-        try:
-            mod = importlib.import_module(module_path)
-            cls: Type[Any] = getattr(mod, class_name)
-        except (ImportError, ModuleNotFoundError) as e:
-            logger.error("Failed to import module '{}' for plugin {}: {}", module_path, pid, e, exc_info=True)
-            continue
-        except AttributeError as e:
-            logger.error("Class '{}' not found in module '{}' for plugin {}: {}", class_name, module_path, pid, e, exc_info=True)
-            continue
-        except Exception:
-            logger.exception("Unexpected error importing plugin class {} for plugin {}", entry, pid)
-            continue
+    pid = resolved_pid
+    if pid != original_pid:
+        logger.warning("Plugin {} from {}: ID changed from '{}' to '{}' due to conflict", original_pid, toml_path, original_pid, pid)
+        # 同步 extension_map：将 original_pid 下收集的扩展迁移到新 pid
+        if original_pid in extension_map:
+            moved_exts = extension_map.pop(original_pid)
+            extension_map.setdefault(pid, []).extend(moved_exts)
 
-        host = None
-        if enabled_val and auto_start_val:
-            try:
-                logger.debug("Plugin {}: creating process host...", pid)
-                ext_cfgs = extension_map.get(pid)
-                host = process_host_factory(pid, entry, toml_path, extension_configs=ext_cfgs)
-                logger.info(
-                    "Plugin {}: process host created successfully (pid: {}, alive: {})",
-                    pid,
-                    getattr(host.process, 'pid', 'N/A') if hasattr(host, 'process') and host.process else 'N/A',
-                    host.process.is_alive() if hasattr(host, 'process') and host.process else False
-                )
-                
-                # 如果 ID 被重命名，更新 host 的 plugin_id（如果支持）
-                if pid != original_pid and hasattr(host, 'plugin_id'):
-                    host.plugin_id = pid
-                    logger.debug("Updated host plugin_id to '{}'", pid)
-                
-                skip_register = False
-                with state.acquire_plugin_hosts_write_lock():
-                    # 检查是否已经存在（防止重复注册）
-                    if pid in state.plugin_hosts:
-                        existing_host = state.plugin_hosts[pid]
-                        existing_config = getattr(existing_host, 'config_path', None)
-                        if existing_config:
-                            try:
-                                if Path(existing_config).resolve() == toml_path.resolve():
-                                    logger.warning(
-                                        "Plugin {} from {} is already registered in plugin_hosts, skipping duplicate registration",
-                                        pid, toml_path
-                                    )
-                                    skip_register = True
-                            except (OSError, RuntimeError):
-                                pass
-
-                    if not skip_register:
-                        # 注册 host
-                        state.plugin_hosts[pid] = host
-                        # 立即验证注册是否成功
-                        registered_keys = list(state.plugin_hosts.keys())
-                        logger.info(
-                            "Plugin {}: registered in plugin_hosts. Current plugin_hosts keys: {}",
-                            pid, registered_keys
-                        )
-                        # 在同一个锁内验证 host 是否还在（防止在注册后立即被其他代码移除）
-                        if pid not in state.plugin_hosts:
-                            logger.error(
-                                "Plugin {} host was removed from plugin_hosts immediately after registration! "
-                                "This should not happen. Current plugin_hosts keys: {}. "
-                                "Re-registering host to continue...",
-                                pid, list(state.plugin_hosts.keys())
-                            )
-                            # 重新注册 host（可能是被意外清空了）
-                            state.plugin_hosts[pid] = host
-                            logger.debug("Plugin {}: re-registered in plugin_hosts", pid)
-
-                if skip_register:
-                    _shutdown_host_safely(host, logger, pid)
-                    continue
-            except (OSError, RuntimeError) as e:
-                logger.error("Failed to start process for plugin {}: {}", pid, e, exc_info=True)
-                continue
-            except Exception:
-                logger.exception("Unexpected error starting process for plugin {}", pid)
-                continue
+    # 检查插件是否已注册
+    if _check_plugin_already_registered(pid, toml_path, logger):
+        return None
 
-        scan_static_metadata(pid, cls, conf, pdata)
+    # adapter 类型：在通过统一依赖和重复检查后，再走 adapter-specific 启动逻辑
+    if plugin_type == "adapter":
+        adapter_host = _load_adapter_plugin(ctx, logger, process_host_factory, plugin_id=pid)
+        return pid if adapter_host is not None else None
 
-        plugin_meta = _build_plugin_meta(
-            pid, pdata,
-            sdk_supported_str=sdk_supported_str,
-            sdk_recommended_str=sdk_recommended_str,
-            sdk_untested_str=sdk_untested_str,
-            sdk_conflicts_list=sdk_conflicts_list,
-            dependencies=dependencies,
-            input_schema=getattr(cls, "input_schema", {}) or {"type": "object", "properties": {}},
-        )
-        
-        # 在调用 register_plugin 之前，验证 host 是否还在 plugin_hosts 中。
-        # 对于 manual-start-only 插件（auto_start=false），host 允许为 None，此时不应要求在 plugin_hosts 中存在。
-        host_still_exists = False
-        if host is not None:
-            with state.acquire_plugin_hosts_read_lock():
-                host_still_exists = pid in state.plugin_hosts
-                if not host_still_exists:
-                    logger.error(
-                        "Plugin {} host was removed from plugin_hosts before register_plugin call! "
-                        "This should not happen. Current plugin_hosts keys: {}",
-                        pid, list(state.plugin_hosts.keys())
-                    )
-        
-        resolved_id = register_plugin(
-            plugin_meta,
-            logger,
-            config_path=toml_path,
-            entry_point=entry
-        )
+    module_path, class_name = entry.split(":", 1)
+    logger.debug("Plugin {}: importing {}:{}", pid, module_path, class_name)
+    try:
+        mod = importlib.import_module(module_path)
+        cls: Type[Any] = getattr(mod, class_name)
+    except (ImportError, ModuleNotFoundError) as e:
+        logger.error("Failed to import module '{}' for plugin {}: {}", module_path, pid, e, exc_info=True)
+        return None
+    except AttributeError as e:
+        logger.error("Class '{}' not found in module '{}' for plugin {}: {}", class_name, module_path, pid, e, exc_info=True)
+        return None
+    except Exception:
+        logger.exception("Unexpected error importing plugin class {} for plugin {}", entry, pid)
+        return None
 
-        # Mark runtime flags for dependency/conflict filtering.
-        if resolved_id is not None:
-            with state.acquire_plugins_write_lock():
-                meta = state.plugins.get(resolved_id)
-                if isinstance(meta, dict):
-                    meta["runtime_enabled"] = True
-                    meta["runtime_auto_start"] = bool(auto_start_val)
-                    state.plugins[resolved_id] = meta
-        
-        logger.debug(
-            "Plugin {}: register_plugin returned resolved_id={}, original pid={}",
-            pid, resolved_id, pid
-        )
-        
-        # 验证 register_plugin 调用后 host 是否还在
-        if host is not None:
-            with state.acquire_plugin_hosts_read_lock():
-                host_after_register = pid in state.plugin_hosts
-                all_keys_after = list(state.plugin_hosts.keys())
-                if host_still_exists and not host_after_register:
-                    logger.error(
-                        "Plugin {} host was removed from plugin_hosts during register_plugin call! "
-                        "resolved_id={}, host_still_exists={}, host_after_register={}, "
-                        "Current plugin_hosts keys: {}",
-                        pid, resolved_id, host_still_exists, host_after_register, all_keys_after
-                    )
-                elif host_still_exists and host_after_register:
-                    logger.debug(
-                        "Plugin {} host still exists in plugin_hosts after register_plugin (resolved_id={})",
-                        pid, resolved_id
-                    )
-        
-        # 如果 register_plugin 返回 None，说明这是重复加载
-        if resolved_id is None:
-            logger.warning("Plugin {} from {} detected as duplicate in register_plugin, removing from plugin_hosts", pid, toml_path)
-            existing_host = None
+    host = None
+    if enabled_val and auto_start_val:
+        try:
+            logger.debug("Plugin {}: creating process host...", pid)
+            ext_cfgs = extension_map.get(pid)
+            host = process_host_factory(pid, entry, toml_path, extension_configs=ext_cfgs)
+            logger.info(
+                "Plugin {}: process host created successfully (pid: {}, alive: {})",
+                pid,
+                getattr(host.process, 'pid', 'N/A') if hasattr(host, 'process') and host.process else 'N/A',
+                host.process.is_alive() if hasattr(host, 'process') and host.process else False
+            )
+            
+            # 如果 ID 被重命名，更新 host 的 plugin_id（如果支持）
+            if pid != original_pid and hasattr(host, 'plugin_id'):
+                host.plugin_id = pid
+                logger.debug("Updated host plugin_id to '{}'", pid)
+            
+            skip_register = False
             with state.acquire_plugin_hosts_write_lock():
+                # 检查是否已经存在（防止重复注册）
                 if pid in state.plugin_hosts:
-                    existing_host = state.plugin_hosts.pop(pid)
-            if existing_host is not None:
-                _shutdown_host_safely(existing_host, logger, pid)
-            logger.debug("Plugin {} removed from plugin_hosts due to duplicate detection", pid)
-            continue
-        
-        # 如果 ID 被进一步重命名，迁移所有相关映射
-        if resolved_id != pid:
-            _migrate_plugin_id(pid, resolved_id, host, logger)
-            pid = resolved_id
+                    existing_host = state.plugin_hosts[pid]
+                    existing_config = getattr(existing_host, 'config_path', None)
+                    if existing_config:
+                        try:
+                            if Path(existing_config).resolve() == toml_path.resolve():
+                                logger.warning(
+                                    "Plugin {} from {} is already registered in plugin_hosts, skipping duplicate registration",
+                                    pid, toml_path
+                                )
+                                skip_register = True
+                        except (OSError, RuntimeError):
+                            pass
 
-        logger.info("Loaded plugin {} (Process: {})", pid, getattr(host, "process", None))
-        try:
-            from plugin.server.messaging.lifecycle_events import emit_lifecycle_event
-            from plugin.server.infrastructure.utils import now_iso
+                if not skip_register:
+                    # 注册 host
+                    state.plugin_hosts[pid] = host
+                    # 立即验证注册是否成功
+                    registered_keys = list(state.plugin_hosts.keys())
+                    logger.info(
+                        "Plugin {}: registered in plugin_hosts. Current plugin_hosts keys: {}",
+                        pid, registered_keys
+                    )
+                    # 在同一个锁内验证 host 是否还在（防止在注册后立即被其他代码移除）
+                    if pid not in state.plugin_hosts:
+                        logger.error(
+                            "Plugin {} host was removed from plugin_hosts immediately after registration! "
+                            "This should not happen. Current plugin_hosts keys: {}. "
+                            "Re-registering host to continue...",
+                            pid, list(state.plugin_hosts.keys())
+                        )
+                        # 重新注册 host（可能是被意外清空了）
+                        state.plugin_hosts[pid] = host
+                        logger.debug("Plugin {}: re-registered in plugin_hosts", pid)
 
-            emit_lifecycle_event({"type": "plugin_loaded", "plugin_id": pid, "time": now_iso()})
+            if skip_register:
+                _shutdown_host_safely(host, logger, pid)
+                return None
+        except (OSError, RuntimeError) as e:
+            logger.error("Failed to start process for plugin {}: {}", pid, e, exc_info=True)
+            return None
         except Exception:
-            logger.debug("Failed to enqueue lifecycle event for plugin {}", pid, exc_info=True)
+            logger.exception("Unexpected error starting process for plugin {}", pid)
+            return None
+
+    scan_static_metadata(pid, cls, conf, pdata)
+
+    plugin_meta = _build_plugin_meta(
+        pid, pdata,
+        sdk_supported_str=sdk_supported_str,
+        sdk_recommended_str=sdk_recommended_str,
+        sdk_untested_str=sdk_untested_str,
+        sdk_conflicts_list=sdk_conflicts_list,
+        dependencies=dependencies,
+        input_schema=getattr(cls, "input_schema", {}) or {"type": "object", "properties": {}},
+    )
+    
+    # 在调用 register_plugin 之前，验证 host 是否还在 plugin_hosts 中。
+    # 对于 manual-start-only 插件（auto_start=false），host 允许为 None，此时不应要求在 plugin_hosts 中存在。
+    host_still_exists = False
+    if host is not None:
+        with state.acquire_plugin_hosts_read_lock():
+            host_still_exists = pid in state.plugin_hosts
+            if not host_still_exists:
+                logger.error(
+                    "Plugin {} host was removed from plugin_hosts before register_plugin call! "
+                    "This should not happen. Current plugin_hosts keys: {}",
+                    pid, list(state.plugin_hosts.keys())
+                )
+    
+    resolved_id = register_plugin(
+        plugin_meta,
+        logger,
+        config_path=toml_path,
+        entry_point=entry
+    )
+
+    # Mark runtime flags for dependency/conflict filtering.
+    if resolved_id is not None:
+        with state.acquire_plugins_write_lock():
+            meta = state.plugins.get(resolved_id)
+            if isinstance(meta, dict):
+                meta["runtime_enabled"] = True
+                meta["runtime_auto_start"] = bool(auto_start_val)
+                state.plugins[resolved_id] = meta
+    
+    logger.debug(
+        "Plugin {}: register_plugin returned resolved_id={}, original pid={}",
+        pid, resolved_id, pid
+    )
+    
+    # 验证 register_plugin 调用后 host 是否还在
+    if host is not None:
+        with state.acquire_plugin_hosts_read_lock():
+            host_after_register = pid in state.plugin_hosts
+            all_keys_after = list(state.plugin_hosts.keys())
+            if host_still_exists and not host_after_register:
+                logger.error(
+                    "Plugin {} host was removed from plugin_hosts during register_plugin call! "
+                    "resolved_id={}, host_still_exists={}, host_after_register={}, "
+                    "Current plugin_hosts keys: {}",
+                    pid, resolved_id, host_still_exists, host_after_register, all_keys_after
+                )
+            elif host_still_exists and host_after_register:
+                logger.debug(
+                    "Plugin {} host still exists in plugin_hosts after register_plugin (resolved_id={})",
+                    pid, resolved_id
+                )
+    
+    # 如果 register_plugin 返回 None，说明这是重复加载
+    if resolved_id is None:
+        logger.warning("Plugin {} from {} detected as duplicate in register_plugin, removing from plugin_hosts", pid, toml_path)
+        existing_host = None
+        with state.acquire_plugin_hosts_write_lock():
+            if pid in state.plugin_hosts:
+                existing_host = state.plugin_hosts.pop(pid)
+        if existing_host is not None:
+            _shutdown_host_safely(existing_host, logger, pid)
+        logger.debug("Plugin {} removed from plugin_hosts due to duplicate detection", pid)
+        return None
+    
+    # 如果 ID 被进一步重命名，迁移所有相关映射
+    if resolved_id != pid:
+        _migrate_plugin_id(pid, resolved_id, host, logger)
+        pid = resolved_id
+
+    logger.info("Loaded plugin {} (Process: {})", pid, getattr(host, "process", None))
+    try:
+        from plugin.server.messaging.lifecycle_events import emit_lifecycle_event
+        from plugin.server.infrastructure.utils import now_iso
+
+        emit_lifecycle_event({"type": "plugin_loaded", "plugin_id": pid, "time": now_iso()})
+    except Exception:
+        logger.debug("Failed to enqueue lifecycle event for plugin {}", pid, exc_info=True)
+    return pid
 
 
 def load_plugins_from_toml(
     plugin_config_root: Path,
     logger: Any,
     process_host_factory: Callable[..., Any],
-) -> None:
+) -> PluginLoadReport:
     """兼容旧调用：从单个插件根目录加载。"""
-    load_plugins_from_roots((plugin_config_root,), logger, process_host_factory)
+    return load_plugins_from_roots((plugin_config_root,), logger, process_host_factory)
@@ -0,0 +1,228 @@
+"""Shared-memory side channel for large plugin payloads.
+
+Large ``bytes`` / ``bytearray`` / ``memoryview`` values inside a ZMQ frame
+(screenshots, file blobs, binary results…) are moved into
+:mod:`multiprocessing.shared_memory` segments before the frame is encoded;
+only a small descriptor dict crosses the socket::
+
+    {"__neko_shm__": "<segment name>", "size": 12345678, "kind": "bytes"}
+
+Ownership
+~~~~~~~~~
+The sender creates the segment, copies the data in once and closes its own
+mapping right after the frame is sent — ownership moves to the receiver.
+The receiver copies the payload back out into ``bytes`` / ``bytearray`` and
+unlinks the segment, so consumers see the same types as before.  The gain
+over inline frames is that the payload is no longer serialised into, queued
+in and copied out of the ZMQ frame; it is not zero-copy.
+
+Space
+~~~~~
+Shared-memory filesystems are often small (64 MiB in a default Docker
+container), and writing to a tmpfs page that cannot be allocated raises
+``SIGBUS`` rather than an error.  Before creating a segment the sender checks
+the free space of ``/dev/shm`` and reserves the pages up front
+(``posix_fallocate``); when space is short, or either step fails, the value
+is sent inline instead.
+
+Segments share a per-host name prefix, so :meth:`SharedPayloadChannel.cleanup`
+can unlink anything left behind by a crashed peer.  The channel is POSIX-only:
+on Windows a segment disappears as soon as the sender closes it, so payloads
+are always sent inline there.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+SHM_DESCRIPTOR_KEY = "__neko_shm__"
+
+_SHM_SUPPORTED = os.name == "posix"
+_SHM_DIR = "/dev/shm"
+# 写入后 /dev/shm 至少保留的空闲空间，避免挤占同机其他进程
+_SHM_MIN_FREE_BYTES = 16 * 1024 * 1024
+_counter = itertools.count()
+
+
+def is_descriptor(obj: Any) -> bool:
+    return isinstance(obj, dict) and isinstance(obj.get(SHM_DESCRIPTOR_KEY), str)
+
+
+def _shm_free_bytes() -> Optional[int]:
+    """Free space on the shared-memory filesystem, or ``None`` if it cannot be determined."""
+    try:
+        st = os.statvfs(_SHM_DIR)
+    except OSError:
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+def _read_segment(name: str, size: int, kind: str) -> Any:
+    """Copy a received segment out into its original type, then close and unlink it."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        data = bytes(shm.buf[: int(size)])
+    finally:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    return bytearray(data) if kind == "bytearray" else data
+
+
+class SharedPayloadChannel:
+    """Offloads large binary values to shared memory and restores them.
+
+    Args:
+        prefix: segment name prefix shared by both ends (used for orphan cleanup)
+        threshold: minimum value size in bytes; ``0`` disables the channel
+        (the default setting — see ``NEKO_PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES``)
+    """
+
+    def __init__(self, prefix: str, threshold: int) -> None:
+        self.prefix = prefix
+        self.threshold = int(threshold) if _SHM_SUPPORTED else 0
+        self.stats: Dict[str, int] = {
+            "offloaded": 0,
+            "offloaded_bytes": 0,
+            "inline_fallbacks": 0,
+            "restored": 0,
+            "discarded": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    # ── sender side ──────────────────────────────────────────────
+
+    def offload(self, obj: Any) -> Tuple[Any, List[str]]:
+        """Return ``(obj_with_descriptors, created_segment_names)``.
+
+        Containers are only copied along paths that actually contain an
+        offloaded value; everything else is returned as-is.
+        """
+        if not self.enabled:
+            return obj, []
+        created: List[str] = []
+        try:
+            return self._offload(obj, created), created
+        except Exception:
+            self.discard(created)
+            raise
+
+    def _offload(self, obj: Any, created: List[str]) -> Any:
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            size = obj.nbytes if isinstance(obj, memoryview) else len(obj)
+            if size >= self.threshold:
+                descriptor = self._write_segment(obj, created)
+                return obj if descriptor is None else descriptor
+            return obj
+        if isinstance(obj, dict):
+            out = None
+            for key, value in obj.items():
+                new = self._offload(value, created)
+                if new is not value:
+                    if out is None:
+                        out = dict(obj)
+                    out[key] = new
+            return obj if out is None else out
+        if isinstance(obj, (list, tuple)):
+            items = [self._offload(value, created) for value in obj]
+            if all(a is b for a, b in zip(items, obj)):
+                return obj
+            return items if isinstance(obj, list) else tuple(items)
+        return obj
+
+    def _write_segment(self, data: Any, created: List[str]) -> Optional[Dict[str, Any]]:
+        """Copy *data* into a new segment; ``None`` means "send inline" (not enough space)."""
+        view = memoryview(data).cast("B")
+        size = view.nbytes
+        free = _shm_free_bytes()
+        if free is None or free - size < _SHM_MIN_FREE_BYTES:
+            self.stats["inline_fallbacks"] += 1
+            return None
+        name = f"{self.prefix}_{os.getpid():x}_{next(_counter):x}"
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        except OSError:
+            self.stats["inline_fallbacks"] += 1
+            return None
+        # 所有权交给接收方：避免本进程的 resource_tracker 在退出时抢先 unlink
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        try:
+            # 先分配全部页面：空间不足时在这里得到 ENOSPC，而不是写入时收到 SIGBUS
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(shm._fd, 0, max(size, 1))  # type: ignore[attr-defined]
+            shm.buf[:size] = view
+        except BaseException as e:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            self.stats["inline_fallbacks"] += 1
+            return None
+        shm.close()
+        created.append(name)
+        self.stats["offloaded"] += 1
+        self.stats["offloaded_bytes"] += size
+        kind = "bytearray" if isinstance(data, bytearray) else "bytes"
+        return {SHM_DESCRIPTOR_KEY: name, "size": size, "kind": kind}
+
+    def discard(self, names: List[str]) -> None:
+        """Unlink segments whose frame was never sent."""
+        for name in names:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.stats["discarded"] += 1
+
+    # ── receiver side ────────────────────────────────────────────
+
+    def restore(self, obj: Any) -> Any:
+        """Replace descriptors with the payload bytes, unlinking each segment."""
+        if is_descriptor(obj):
+            name = obj[SHM_DESCRIPTOR_KEY]
+            if not name.startswith(self.prefix + "_"):
+                raise ValueError(f"shared payload {name!r} does not belong to this channel")
+            data = _read_segment(name, obj.get("size", 0), str(obj.get("kind") or "bytes"))
+            self.stats["restored"] += 1
+            return data
+        if isinstance(obj, dict):
+            if not any(isinstance(v, (dict, list, tuple)) for v in obj.values()):
+                return obj
+            return {k: self.restore(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.restore(v) for v in obj]
+        if isinstance(obj, tuple):
+            return tuple(self.restore(v) for v in obj)
+        return obj
+
+    # ── housekeeping ─────────────────────────────────────────────
+
+    def cleanup(self) -> int:
+        """Unlink every segment left under this channel's prefix; returns the count."""
+        if not _SHM_SUPPORTED or not os.path.isdir(_SHM_DIR):
+            return 0
+        removed = 0
+        for entry in os.listdir(_SHM_DIR):
+            if entry.startswith(self.prefix + "_"):
+                try:
+                    os.unlink(os.path.join(_SHM_DIR, entry))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -196,6 +196,60 @@ class BusChangeHub:
                 continue
 
 
+class PluginResponseWaiters:
+    """
+    进程内的插件响应等待表（request_id -> asyncio.Future）
+
+    ``wait_for_plugin_response_async`` 在事件循环上登记 future，
+    ``set_plugin_response``（通常在传输接收循环里调用，可以来自任意线程）
+    通过 ``call_soon_threadsafe`` 直接完成对应 future。等待不占用线程池线程，
+    超时由事件循环的定时器处理。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List[tuple[asyncio.AbstractEventLoop, "asyncio.Future[Any]"]]] = {}
+
+    def register(self, request_id: str) -> "asyncio.Future[Any]":
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[Any]" = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(request_id, []).append((loop, fut))
+        return fut
+
+    def discard(self, request_id: str, fut: "asyncio.Future[Any]") -> None:
+        with self._lock:
+            entries = self._waiters.get(request_id)
+            if not entries:
+                return
+            entries[:] = [e for e in entries if e[1] is not fut]
+            if not entries:
+                self._waiters.pop(request_id, None)
+
+    def resolve(self, request_id: str, response: Any) -> bool:
+        """把响应交给等待者；没有（仍存活的）等待者时返回 False。"""
+        with self._lock:
+            entries = self._waiters.pop(request_id, None)
+        delivered = False
+        for loop, fut in entries or ():
+            try:
+                loop.call_soon_threadsafe(_set_future_result, fut, response)
+                delivered = True
+            except RuntimeError:
+                # 事件循环已关闭
+                continue
+        return delivered
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._waiters.values())
+
+
+def _set_future_result(fut: "asyncio.Future[Any]", result: Any) -> None:
+    if not fut.done():
+        fut.set_result(result)
+
+
 class GlobalState:
     def __init__(self) -> None:
         self._lock = threading.Lock()
@@ -237,6 +291,7 @@ class GlobalState:
         self._plugin_response_map_manager: Optional[Any] = None
         self._plugin_response_event_map: Optional[Any] = None
         self._plugin_response_notify_event: Optional[Any] = None
+        self._plugin_response_waiters = PluginResponseWaiters()
         self._plugin_comm_lock = threading.Lock()
 
         # Per-plugin downlink senders for routing plugin-to-plugin responses
@@ -1359,6 +1414,9 @@ class GlobalState:
         rid = str(request_id).strip()
         if not rid:
             return
+        # 本进程内已有异步等待者：直接完成其 future，不经过跨进程字典
+        if self._plugin_response_waiters.resolve(rid, response):
+            return
         # 存储响应和过期时间（当前时间 + timeout + 缓冲时间）
         # 缓冲时间用于处理网络延迟等情况
         expire_time = time.time() + timeout + 1.0  # 额外1秒缓冲
@@ -1428,73 +1486,29 @@ class GlobalState:
         return response_data.get("response")
 
     async def wait_for_plugin_response_async(self, request_id: str, timeout: float) -> Optional[Dict[str, Any]]:
-        """异步版本:等待响应到达,完全消除轮询,使用纯事件驱动
-        
-        相比同步版本,异步版本完全避免了 time.sleep 轮询,
-        使用 asyncio.Event 实现零延迟响应。
+        """异步版本：在事件循环上等待响应到达，不占用线程池。
+
+        先登记 future 再检查共享字典，因此 ``set_plugin_response`` 无论发生在
+        登记之前还是之后都不会丢失唤醒；超时由事件循环处理。插件进程内由
+        CH_RESP 接收循环调用 ``set_plugin_response`` 直接唤醒等待者。
         """
         rid = str(request_id).strip()
         if not rid:
             return None
-        
-        # 快速路径:先检查响应是否已到达
-        got = self.get_plugin_response(rid)
-        if got is not None:
-            return got
-        
-        # 创建异步事件用于等待
-        async_event = asyncio.Event()
-        
-        # 注册回调:响应到达时立即通知
-        def check_and_notify():
-            response = self.get_plugin_response(rid)
-            if response is not None:
-                async_event.set()
-                return response
-            return None
-        
-        # 使用 asyncio.wait_for 实现超时
+
+        waiters = self._plugin_response_waiters
+        fut = waiters.register(rid)
         try:
-            # 启动后台任务轮询(但使用很短的间隔)
-            async def wait_with_polling():
-                # 先检查一次
-                result = check_and_notify()
-                if result is not None:
-                    return result
-                
-                # 等待事件或使用短轮询作为后备
-                while True:
-                    # 尝试等待同步事件(如果可用)
-                    per_req_ev = None
-                    try:
-                        per_req_ev = self._get_or_create_response_event(rid)
-                    except Exception:
-                        pass
-                    
-                    if per_req_ev is not None:
-                        # 使用线程事件等待(在线程池中执行)
-                        loop = asyncio.get_running_loop()
-                        ev = per_req_ev  # 捕获变量避免 None 类型问题
-                        await loop.run_in_executor(
-                            None,
-                            lambda ev=ev: ev.wait(timeout=0.01)
-                        )
-                    else:
-                        # 后备:短暂休眠
-                        await asyncio.sleep(0.001)  # 1ms,比同步版本的 10ms 快 10 倍
-                    
-                    # 检查响应
-                    result = check_and_notify()
-                    if result is not None:
-                        return result
-                    
-                    # 避免事件已被消费但仍保持 set 导致的空转
-                    await asyncio.sleep(0.005)
-            
-            return await asyncio.wait_for(wait_with_polling(), timeout=timeout)
-        except asyncio.TimeoutError:
-            return None
-    
+            got = self.get_plugin_response(rid)
+            if got is not None:
+                return got
+            done, _ = await asyncio.wait((fut,), timeout=max(0.0, float(timeout)))
+            if done:
+                return fut.result()
+            return self.get_plugin_response(rid)
+        finally:
+            waiters.discard(rid, fut)
+
     def wait_for_plugin_response(self, request_id: str, timeout: float) -> Optional[Dict[str, Any]]:
         """同步版本:Block until response arrives or timeout, then pop and return it.
 
@@ -5,8 +5,31 @@ Replaces ``multiprocessing.Queue`` with a pair of ZMQ PUSH/PULL sockets:
 * **Downlink** (host → child): commands, plugin-to-plugin responses
 * **Uplink** (child → host): results, status, messages, plugin-to-plugin requests
 
-All messages are serialised with :mod:`pickle` (same as ``mp.Queue``) and
-carry a *channel tag* so the receiver can demux.
+Every frame carries a *channel tag* so the receiver can demux.
+
+Endpoints
+~~~~~~~~~
+- ``tcp`` – loopback TCP on a random port (default)
+- ``ipc`` – Unix-domain sockets in the temp dir; falls back to ``tcp`` when
+  libzmq has no ipc support on this platform
+
+Codecs
+~~~~~~
+- ``pickle``  – ``pickle.dumps((channel, payload))``, same as ``mp.Queue``
+- ``msgpack`` – ``ormsgpack.packb([channel, payload])``; the payload must match
+  the channel schema (:data:`CHANNEL_SCHEMAS`) and contain only plain
+  msgpack types.  Anything else (tuples, datetimes, custom objects…) is
+  rejected, or sent as a pickle frame when
+  ``NEKO_PLUGIN_TRANSPORT_ALLOW_PICKLE`` is enabled (every such fallback is
+  logged as a warning).
+
+Receivers always auto-detect the frame codec from the first byte (pickle
+frames start with ``0x80``, msgpack frames with ``0x92``), so both ends only
+need to agree on whether pickle frames are acceptable.
+
+Large binary values (``>= NEKO_PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES``, off by
+default) are moved to shared memory before encoding; only a descriptor
+crosses the socket (see :mod:`plugin.core.shm_payload`).
 
 Channel tags
 ~~~~~~~~~~~~
@@ -19,12 +42,29 @@ Channel tags
 """
 from __future__ import annotations
 
+import os
 import pickle
+import tempfile
 import threading
-from typing import Any, Optional, Tuple
+import uuid
+from typing import Any, Dict, Optional, Tuple
 
 import zmq
 import zmq.asyncio
+from loguru import logger
+
+try:
+    import ormsgpack
+except Exception:  # pragma: no cover
+    ormsgpack = None  # type: ignore[assignment]
+
+from plugin.core.shm_payload import SharedPayloadChannel
+from plugin.settings import (
+    PLUGIN_TRANSPORT_ALLOW_PICKLE,
+    PLUGIN_TRANSPORT_CODEC,
+    PLUGIN_TRANSPORT_ENDPOINT,
+    PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES,
+)
 
 # ── Channel constants ──────────────────────────────────────────────
 CH_CMD = "cmd"
@@ -36,6 +76,149 @@ CH_RESP = "resp"
 
 _LINGER_MS = 1000
 
+# ── Channel schemas (msgpack codec) ────────────────────────────────
+# Required top-level keys and their types for each channel.  Payloads are
+# always dicts; extra keys are allowed.
+CHANNEL_SCHEMAS: Dict[str, Dict[str, type]] = {
+    CH_CMD: {"type": str},
+    CH_RES: {"req_id": str},
+    CH_STS: {"type": str},
+    CH_MSG: {"type": str},
+    CH_COMM: {"type": str, "from_plugin": str, "request_id": str},
+    CH_RESP: {"to_plugin": str, "request_id": str},
+}
+
+CODEC_PICKLE = "pickle"
+CODEC_MSGPACK = "msgpack"
+
+_PICKLE_MAGIC = 0x80
+# Only plain msgpack types are encoded natively; everything ormsgpack would
+# otherwise convert lossily (tuple → list, datetime → str, dataclass → dict…)
+# raises instead, so the message falls back to pickle with full fidelity.
+_MSGPACK_OPTS = 0
+if ormsgpack is not None:
+    _MSGPACK_OPTS = (
+        ormsgpack.OPT_PASSTHROUGH_TUPLE
+        | ormsgpack.OPT_PASSTHROUGH_DATETIME
+        | ormsgpack.OPT_PASSTHROUGH_DATACLASS
+        | ormsgpack.OPT_PASSTHROUGH_ENUM
+        | ormsgpack.OPT_PASSTHROUGH_UUID
+        | ormsgpack.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+
+class TransportCodecError(ValueError):
+    """A frame could not be encoded/decoded under the active codec policy."""
+
+
+def validate_channel_payload(channel: str, msg: Any) -> Optional[str]:
+    """Check *msg* against :data:`CHANNEL_SCHEMAS`; return an error string or *None*."""
+    schema = CHANNEL_SCHEMAS.get(channel)
+    if schema is None:
+        return f"unknown channel {channel!r}"
+    if not isinstance(msg, dict):
+        return f"{channel}: payload must be a dict, got {type(msg).__name__}"
+    for key, typ in schema.items():
+        if not isinstance(msg.get(key), typ):
+            return f"{channel}: field {key!r} must be {typ.__name__}"
+    return None
+
+
+class TransportCodec:
+    """Frame codec shared by :class:`HostTransport` and :class:`ChildTransport`.
+
+    Plain picklable object so the host can hand the same policy to the child
+    process.  ``stats`` counts frames per codec and per-message pickle
+    fallbacks (local to the process that owns the instance).
+    """
+
+    def __init__(self, name: str = CODEC_PICKLE, *, allow_pickle: bool = True) -> None:
+        if name not in (CODEC_PICKLE, CODEC_MSGPACK):
+            raise ValueError(f"unknown transport codec: {name!r}")
+        if name == CODEC_MSGPACK and ormsgpack is None:
+            raise RuntimeError("msgpack transport codec requires ormsgpack")
+        self.name = name
+        # pickle codec always needs pickle frames
+        self.allow_pickle = True if name == CODEC_PICKLE else bool(allow_pickle)
+        self.stats: Dict[str, int] = {
+            "msgpack_frames": 0,
+            "pickle_frames": 0,
+            "pickle_fallbacks": 0,
+            "rejected": 0,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.name, "allow_pickle": self.allow_pickle}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["name"], allow_pickle=state["allow_pickle"])  # type: ignore[misc]
+
+    def __repr__(self) -> str:
+        return f"TransportCodec({self.name!r}, allow_pickle={self.allow_pickle})"
+
+    def encode(self, channel: str, msg: Any) -> bytes:
+        if self.name == CODEC_MSGPACK:
+            reason = validate_channel_payload(channel, msg)
+            if reason is None:
+                try:
+                    data = ormsgpack.packb([channel, msg], option=_MSGPACK_OPTS)
+                    self.stats["msgpack_frames"] += 1
+                    return data
+                except TypeError as e:
+                    reason = str(e)
+            if not self.allow_pickle:
+                self.stats["rejected"] += 1
+                raise TransportCodecError(f"cannot encode {channel!r} frame as msgpack: {reason}")
+            self.stats["pickle_fallbacks"] += 1
+            logger.warning("msgpack transport: {!r} frame falls back to pickle ({})", channel, reason)
+        self.stats["pickle_frames"] += 1
+        return pickle.dumps((channel, msg))
+
+    def decode(self, raw: bytes) -> Tuple[str, Any]:
+        if raw[:1] and raw[0] == _PICKLE_MAGIC:
+            if not self.allow_pickle:
+                self.stats["rejected"] += 1
+                raise TransportCodecError("pickle frame rejected by transport codec policy")
+            if self.name == CODEC_MSGPACK:
+                logger.warning("msgpack transport: accepted a pickle frame from the peer")
+            self.stats["pickle_frames"] += 1
+            return pickle.loads(raw)  # type: ignore[no-any-return]
+        if ormsgpack is None:
+            raise TransportCodecError("received msgpack frame but ormsgpack is unavailable")
+        try:
+            frame = ormsgpack.unpackb(raw)
+        except Exception as e:
+            self.stats["rejected"] += 1
+            raise TransportCodecError(f"malformed msgpack frame: {e}") from e
+        if not isinstance(frame, list) or len(frame) != 2 or not isinstance(frame[0], str):
+            self.stats["rejected"] += 1
+            raise TransportCodecError("msgpack frame must be [channel, payload]")
+        channel, msg = frame
+        reason = validate_channel_payload(channel, msg)
+        if reason is not None:
+            self.stats["rejected"] += 1
+            raise TransportCodecError(reason)
+        self.stats["msgpack_frames"] += 1
+        return channel, msg
+
+
+def default_codec() -> TransportCodec:
+    """Codec configured by ``NEKO_PLUGIN_TRANSPORT_CODEC`` / ``NEKO_PLUGIN_TRANSPORT_ALLOW_PICKLE``."""
+    return TransportCodec(PLUGIN_TRANSPORT_CODEC, allow_pickle=PLUGIN_TRANSPORT_ALLOW_PICKLE)
+
+
+def _bind_endpoint(sock: zmq.Socket, kind: str, tag: str) -> Tuple[str, Optional[str]]:
+    """Bind *sock* and return ``(endpoint, ipc_path)``; ``ipc_path`` is set for ipc endpoints."""
+    if kind == "ipc" and zmq.has("ipc"):
+        path = os.path.join(tempfile.gettempdir(), f"neko-plugin-{os.getpid()}-{uuid.uuid4().hex[:12]}-{tag}")
+        try:
+            sock.bind(f"ipc://{path}")
+            return sock.getsockopt(zmq.LAST_ENDPOINT).decode(), path
+        except zmq.ZMQError:
+            pass
+    sock.bind("tcp://127.0.0.1:*")
+    return sock.getsockopt(zmq.LAST_ENDPOINT).decode(), None
+
 
 # ═══════════════════════════════════════════════════════════════════
 # Host-side transport (runs in the user_plugin_server process)
@@ -49,44 +232,82 @@ class HostTransport:
 
     All public send/recv methods are *coroutines* and must be called from the
     event loop.
+
+    ``endpoint_kind`` / ``codec`` / ``shm_threshold`` default to the
+    ``NEKO_PLUGIN_TRANSPORT_*`` settings; pass :attr:`codec` and :attr:`shm`
+    on to the child's :class:`ChildTransport`.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        endpoint_kind: Optional[str] = None,
+        codec: Optional[TransportCodec] = None,
+        shm_threshold: Optional[int] = None,
+    ) -> None:
+        self.endpoint_kind = endpoint_kind or PLUGIN_TRANSPORT_ENDPOINT
+        self.codec = codec or default_codec()
+        self.shm = SharedPayloadChannel(
+            prefix=f"nk{uuid.uuid4().hex[:8]}",
+            threshold=PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES if shm_threshold is None else shm_threshold,
+        )
+        self._ipc_paths: list[str] = []
         self._ctx = zmq.asyncio.Context()
 
         # Downlink: host → child (PUSH/PULL)
         self._dl_sock = self._ctx.socket(zmq.PUSH)
         self._dl_sock.setsockopt(zmq.LINGER, _LINGER_MS)
         self._dl_sock.setsockopt(zmq.SNDHWM, 5000)
-        self._dl_sock.bind("tcp://127.0.0.1:*")
-        self.downlink_endpoint: str = self._dl_sock.getsockopt(zmq.LAST_ENDPOINT).decode()
+        self.downlink_endpoint: str = self._bind(self._dl_sock, "dl")
 
         # Uplink: child → host (PUSH/PULL)
         self._ul_sock = self._ctx.socket(zmq.PULL)
         self._ul_sock.setsockopt(zmq.LINGER, 0)
         self._ul_sock.setsockopt(zmq.RCVHWM, 5000)
-        self._ul_sock.bind("tcp://127.0.0.1:*")
-        self.uplink_endpoint: str = self._ul_sock.getsockopt(zmq.LAST_ENDPOINT).decode()
+        self.uplink_endpoint: str = self._bind(self._ul_sock, "ul")
 
         self._closed = False
 
+    def _bind(self, sock: zmq.Socket, tag: str) -> str:
+        endpoint, ipc_path = _bind_endpoint(sock, self.endpoint_kind, tag)
+        if ipc_path is not None:
+            self._ipc_paths.append(ipc_path)
+        return endpoint
+
     # ── send helpers ─────────────────────────────────────────────
 
     async def send_command(self, msg: dict) -> None:
         """Send a command on the downlink."""
-        await self._dl_sock.send(pickle.dumps((CH_CMD, msg)))
+        await self._send(CH_CMD, msg)
 
     async def send_response(self, msg: dict) -> None:
         """Send a plugin-to-plugin response on the downlink."""
-        await self._dl_sock.send(pickle.dumps((CH_RESP, msg)))
+        await self._send(CH_RESP, msg)
+
+    async def _send(self, channel: str, msg: dict) -> None:
+        msg, segments = self.shm.offload(msg)
+        try:
+            await self._dl_sock.send(self.codec.encode(channel, msg))
+        except BaseException:
+            self.shm.discard(segments)
+            raise
 
     # ── recv helper ──────────────────────────────────────────────
 
     async def recv(self, timeout_ms: int = 1000) -> Optional[Tuple[str, dict]]:
-        """Receive one ``(channel, payload)`` from the uplink, or *None* on timeout."""
+        """Receive one ``(channel, payload)`` from the uplink, or *None* on timeout.
+
+        Raises :class:`TransportCodecError` for frames that violate the codec
+        policy (the frame is consumed; the next ``recv`` continues normally).
+        """
         if await self._ul_sock.poll(timeout=timeout_ms):
             raw = await self._ul_sock.recv()
-            return pickle.loads(raw)  # type: ignore[return-value]
+            ch, msg = self.codec.decode(raw)
+            if self.shm.enabled:
+                try:
+                    msg = self.shm.restore(msg)
+                except (ValueError, OSError) as e:
+                    raise TransportCodecError(f"invalid shared-memory descriptor: {e}") from e
+            return ch, msg
         return None
 
     # ── lifecycle ────────────────────────────────────────────────
@@ -104,6 +325,13 @@ class HostTransport:
             self._ctx.term()
         except Exception:
             pass
+        for path in self._ipc_paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        # 子进程崩溃或消息未被消费时遗留的共享内存段
+        self.shm.cleanup()
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -120,7 +348,15 @@ class ChildTransport:
       event-loop thread.
     """
 
-    def __init__(self, downlink_endpoint: str, uplink_endpoint: str) -> None:
+    def __init__(
+        self,
+        downlink_endpoint: str,
+        uplink_endpoint: str,
+        codec: Optional[TransportCodec] = None,
+        shm: Optional[SharedPayloadChannel] = None,
+    ) -> None:
+        self.codec = codec or TransportCodec()
+        self.shm = shm or SharedPayloadChannel(prefix="nk", threshold=0)
         # Sync context — used for the uplink PUSH socket (thread-safe via lock)
         self._sync_ctx = zmq.Context()
 
@@ -146,22 +382,33 @@ class ChildTransport:
         """Receive ``(channel, payload)`` from the downlink, or *None* on timeout."""
         if await self._dl_sock.poll(timeout=timeout_ms):
             raw = await self._dl_sock.recv()
-            return pickle.loads(raw)  # type: ignore[return-value]
+            ch, msg = self.codec.decode(raw)
+            if self.shm.enabled:
+                try:
+                    msg = self.shm.restore(msg)
+                except (ValueError, OSError) as e:
+                    raise TransportCodecError(f"invalid shared-memory descriptor: {e}") from e
+            return ch, msg
         return None
 
     # ── uplink (thread-safe, any thread) ─────────────────────────
 
     def send_uplink(self, channel: str, msg: Any, *, timeout: float = 10.0) -> None:
         """Thread-safe blocking send on the uplink."""
-        data = pickle.dumps((channel, msg))
-        with self._ul_lock:
-            self._ul_sock.send(data)
+        self._send_uplink(channel, msg, 0)
 
     def send_uplink_nowait(self, channel: str, msg: Any) -> None:
         """Thread-safe non-blocking send on the uplink."""
-        data = pickle.dumps((channel, msg))
-        with self._ul_lock:
-            self._ul_sock.send(data, zmq.NOBLOCK)
+        self._send_uplink(channel, msg, zmq.NOBLOCK)
+
+    def _send_uplink(self, channel: str, msg: Any, flags: int) -> None:
+        msg, segments = self.shm.offload(msg)
+        try:
+            with self._ul_lock:
+                self._ul_sock.send(self.codec.encode(channel, msg), flags)
+        except BaseException:
+            self.shm.discard(segments)
+            raise
 
     # ── channel senders (queue-compatible interface) ─────────────
 
@@ -0,0 +1,103 @@
+"""
+插件进程启动方式（zygote 预派生）
+
+每个插件进程如果都从一个全新解释器启动（spawn），在运行插件代码前都要重新导入
+SDK、zmq、ormsgpack、pydantic、loguru 等模块，这部分开销主导了插件的启动 / 重启 /
+热重载延迟；而直接 fork 插件服务器本身又会把其中的线程、事件循环和 ZMQ 上下文
+一并复制进子进程。
+
+这里的 zygote 是一个单线程的干净进程：启动时预先导入 :data:`ZYGOTE_PRELOAD_MODULES`，
+之后每个插件进程都由它 fork 出来。实现上直接使用标准库的 ``forkserver`` 启动方式
+（它就是这样一个预导入模块、按请求 fork 的服务进程），插件进程仍然是普通的
+``multiprocessing.Process``，传输端点 / 编码 / 共享内存通道照常作为参数传入，
+``is_alive`` / ``exitcode`` / ``join`` / ``terminate`` 等语义不变。
+
+启动方式（``NEKO_PLUGIN_PROCESS_START_METHOD``）：
+
+- ``inherit``：沿用 multiprocessing 的全局默认启动方式（默认；Linux 上为 fork）
+- ``zygote``：forkserver + 预导入（需显式开启）；平台不支持 fork 时自动退回 ``spawn``
+- ``spawn``：每个插件一个全新解释器
+
+zygote / spawn 出来的插件进程不会继承宿主在 fork 前创建的 Manager 代理等对象，
+插件间响应只经由传输下行通道送达。
+"""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from multiprocessing.context import BaseContext
+
+from loguru import logger
+
+from plugin.settings import PLUGIN_PROCESS_START_METHOD
+
+START_METHOD_ZYGOTE = "zygote"
+START_METHOD_SPAWN = "spawn"
+START_METHOD_INHERIT = "inherit"
+
+# zygote 启动时预导入的模块；导入失败的模块会被 forkserver 静默跳过
+ZYGOTE_PRELOAD_MODULES: tuple[str, ...] = (
+    "zmq",
+    "ormsgpack",
+    "pydantic",
+    "loguru",
+    "plugin.sdk",
+    "plugin.core.host",
+)
+
+_lock = threading.Lock()
+_preload_configured = False
+_fallback_logged = False
+
+
+def resolve_start_method(requested: str | None = None) -> str:
+    """把配置的启动方式解析为当前平台实际可用的方式。"""
+    global _fallback_logged
+
+    method = (requested or PLUGIN_PROCESS_START_METHOD or START_METHOD_INHERIT).strip().lower()
+    if method not in (START_METHOD_ZYGOTE, START_METHOD_SPAWN, START_METHOD_INHERIT):
+        method = START_METHOD_INHERIT
+    if method == START_METHOD_ZYGOTE and "forkserver" not in multiprocessing.get_all_start_methods():
+        if not _fallback_logged:
+            _fallback_logged = True
+            logger.info("Plugin zygote unavailable on this platform (no fork), falling back to spawn")
+        return START_METHOD_SPAWN
+    return method
+
+
+def get_plugin_process_context(method: str | None = None) -> BaseContext:
+    """返回创建插件进程（及其 Event 等同步原语）所用的 multiprocessing 上下文。"""
+    global _preload_configured
+
+    resolved = resolve_start_method(method)
+    if resolved == START_METHOD_SPAWN:
+        return multiprocessing.get_context("spawn")
+    if resolved == START_METHOD_INHERIT:
+        return multiprocessing.get_context()
+
+    ctx = multiprocessing.get_context("forkserver")
+    with _lock:
+        if not _preload_configured:
+            # 只在 zygote 启动前生效；已在运行的 forkserver 不受影响
+            ctx.set_forkserver_preload(list(ZYGOTE_PRELOAD_MODULES))
+            _preload_configured = True
+    return ctx
+
+
+def warm_up_plugin_zygote(requested: str | None = None) -> str:
+    """提前拉起 zygote，使预导入与插件注册并行进行，首个插件启动不再等待。
+
+    未启用 zygote 时什么也不做。
+
+    Returns:
+        实际使用的启动方式
+    """
+    method = resolve_start_method(requested)
+    if method != START_METHOD_ZYGOTE:
+        return method
+    get_plugin_process_context(method)
+    from multiprocessing import forkserver
+
+    forkserver.ensure_running()
+    logger.debug("Plugin zygote is running (preload: {})", ", ".join(ZYGOTE_PRELOAD_MODULES))
+    return method
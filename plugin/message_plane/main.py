@@ -17,6 +17,7 @@ from .ingest_server import MessagePlaneIngestServer
 from .pub_server import MessagePlanePubServer
 from .rpc_server import MessagePlaneRpcServer
 from .stores import StoreRegistry, TopicStore
+from .wal import build_message_plane_wal
 
 
 def run_message_plane(
@@ -34,6 +35,14 @@ def run_message_plane(
     for name in ("messages", "events", "lifecycle", "runs", "export", "memory", "conversations"):
         stores.register(TopicStore(name=name, maxlen=MESSAGE_PLANE_STORE_MAXLEN))
 
+    wal = build_message_plane_wal()
+    if wal is not None:
+        for store_name in stores.list_store_names():
+            store = stores.get(store_name)
+            if store is not None:
+                wal.attach(store)
+        wal.start()
+
     pub_srv = MessagePlanePubServer(endpoint=pub_ep)
     ingest_srv = MessagePlaneIngestServer(endpoint=ingest_ep, stores=stores, pub_server=pub_srv)
     srv = MessagePlaneRpcServer(endpoint=endpoint, pub_server=pub_srv, stores=stores)
@@ -77,6 +86,11 @@ def run_message_plane(
             pub_srv.close()
         except Exception:
             pass
+        if wal is not None:
+            try:
+                wal.close()
+            except Exception:
+                pass
         logger.info("stopped")
 
 
@@ -1,16 +1,68 @@
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
+import ormsgpack
 import zmq
 from loguru import logger
 
+from plugin.settings import (
+    MESSAGE_PLANE_PUB_BATCH_ENABLED,
+    MESSAGE_PLANE_PUB_BATCH_FLUSH_MS,
+    MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS,
+    MESSAGE_PLANE_PUB_BATCH_MAX_PENDING,
+)
+
+# Batched wire format: [topic, msgpack(header), msgpack([event, ...])]. The header's
+# ``prev_seq`` is the seq of the record published on the topic right before ``first_seq``,
+# so a subscriber whose last seen seq differs knows it missed records (see BatchGapDetector).
+# Unbatched format (legacy): [topic, json(event)].
+PUB_BATCH_VERSION = 1
+
+
+def decode_pub_message(parts: List[bytes]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Decode either wire format into ``(header or None, events)``."""
+    if len(parts) >= 3:
+        header = ormsgpack.unpackb(parts[1])
+        events = ormsgpack.unpackb(parts[2])
+        return (header if isinstance(header, dict) else None), (events if isinstance(events, list) else [])
+    if len(parts) == 2:
+        event = json.loads(parts[1])
+        return None, [event] if isinstance(event, dict) else []
+    return None, []
+
+
+class BatchGapDetector:
+    """Tracks the last seq seen per topic and reports records missed between batches."""
+
+    def __init__(self) -> None:
+        self._last: Dict[str, Any] = {}
+
+    def observe(self, header: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+        """Returns ``(after_seq, before_seq)`` of a gap (exclusive), or None when contiguous.
+
+        ``bus.get_since(after_seq=...)`` can backfill it. The first batch of a topic only
+        establishes the baseline.
+        """
+        topic = str(header.get("topic") or "")
+        last = self._last.get(topic)
+        self._last[topic] = header.get("last_seq")
+        prev = header.get("prev_seq")
+        if last is None or prev == last:
+            return None
+        return last, header.get("first_seq")
+
 
 @dataclass
 class MessagePlanePubServer:
     endpoint: str
+    batch: bool = MESSAGE_PLANE_PUB_BATCH_ENABLED
+    batch_max_items: int = MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS
+    flush_interval_ms: int = MESSAGE_PLANE_PUB_BATCH_FLUSH_MS
+    max_pending: int = MESSAGE_PLANE_PUB_BATCH_MAX_PENDING
 
     def __post_init__(self) -> None:
         self._ctx = zmq.Context.instance()
@@ -24,20 +76,143 @@ class MessagePlanePubServer:
             raise e
         logger.info("pub server bound: {}", self.endpoint)
 
+        # topic -> (seq preceding the buffered records, buffered events)
+        self._pending: Dict[str, Tuple[Any, List[Dict[str, Any]]]] = {}
+        self._pending_count = 0
+        self._last_seq: Dict[str, Any] = {}
+        self._flush_now = False
+        self._sending = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"records": 0, "batches": 0, "dropped": 0}
+        self._flusher: Optional[threading.Thread] = None
+        if self.batch:
+            # The flusher thread is the only sender once batching is on.
+            self._flusher = threading.Thread(target=self._run_flusher, daemon=True, name="message-plane-pub-batcher")
+            self._flusher.start()
+
     def publish(self, topic: str, event: Dict[str, Any]) -> None:
         if self._sock is None:
             raise RuntimeError("Socket is not bound")
-        t = str(topic).encode("utf-8")
-        body = json.dumps(event, ensure_ascii=False).encode("utf-8")
-        try:
-            self._sock.send_multipart([t, body])
-        except Exception:
-            pass
+        if not self.batch:
+            t = str(topic).encode("utf-8")
+            body = json.dumps(event, ensure_ascii=False).encode("utf-8")
+            try:
+                self._sock.send_multipart([t, body])
+            except Exception:
+                pass
+            return
+
+        t = str(topic)
+        seq = event.get("seq")
+        with self._cond:
+            prev = self._last_seq.get(t)
+            self._last_seq[t] = seq
+            entry = self._pending.get(t)
+            if self._pending_count >= self.max_pending:
+                # Shed this topic's backlog (or the record itself). The next batch's prev_seq
+                # then no longer matches what subscribers saw, which reveals the gap.
+                self.stats["dropped"] += 1
+                if entry is None:
+                    return
+                self.stats["dropped"] += len(entry[1])
+                self._pending_count -= len(entry[1])
+                del self._pending[t]
+                return
+            if entry is None:
+                entry = self._pending[t] = (prev, [])
+                if len(self._pending) == 1:
+                    self._cond.notify_all()
+            entry[1].append(event)
+            self._pending_count += 1
+            if len(entry[1]) >= self.batch_max_items and not self._flush_now:
+                self._flush_now = True
+                self._cond.notify_all()
+
+    def _run_flusher(self) -> None:
+        window = max(0.0, float(self.flush_interval_ms) / 1000.0)
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._flush_now and not self._closed and window > 0:
+                    # Collect for one window after the first record, unless a topic fills up.
+                    self._cond.wait(timeout=window)
+                batches = self._pending
+                self._pending = {}
+                self._pending_count = 0
+                self._flush_now = False
+                self._sending = bool(batches)
+                closed = self._closed
+            for topic, (prev, events) in batches.items():
+                self._send_batches(topic, prev, events)
+            if batches:
+                with self._cond:
+                    self._sending = False
+                    self._cond.notify_all()
+            if closed and not batches:
+                return
+
+    def _send_batches(self, topic: str, prev: Any, events: List[Dict[str, Any]]) -> None:
+        sock = self._sock
+        if sock is None:
+            return
+        t = topic.encode("utf-8")
+        step = max(1, int(self.batch_max_items))
+        for i in range(0, len(events), step):
+            chunk = events[i : i + step]
+            try:
+                body = ormsgpack.packb(chunk)
+            except Exception:
+                chunk = [ev for ev in chunk if _packable(ev)]
+                if not chunk:
+                    continue
+                logger.warning("pub batch for {} contained records msgpack cannot encode; skipped them", topic)
+                body = ormsgpack.packb(chunk)
+            header = {
+                "v": PUB_BATCH_VERSION,
+                "topic": topic,
+                "count": len(chunk),
+                "first_seq": chunk[0].get("seq"),
+                "last_seq": chunk[-1].get("seq"),
+                "prev_seq": prev,
+            }
+            prev = header["last_seq"]
+            try:
+                sock.send_multipart([t, ormsgpack.packb(header), body])
+            except Exception:
+                continue
+            self.stats["batches"] += 1
+            self.stats["records"] += len(chunk)
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Ask the flusher to send what is buffered now; True once everything has been sent."""
+        if self._flusher is None:
+            return True
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._sending, timeout=timeout)
 
     def close(self) -> None:
+        flusher = self._flusher
+        if flusher is not None:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            flusher.join(timeout=1.0)
+            self._flusher = None
         if self._sock is not None:
             try:
                 self._sock.close(linger=0)
             except Exception:
                 pass
             self._sock = None
+
+
+def _packable(event: Dict[str, Any]) -> bool:
+    try:
+        ormsgpack.packb(event)
+        return True
+    except Exception:
+        return False
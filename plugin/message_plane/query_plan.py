@@ -0,0 +1,549 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import regex as safe_regex  # type: ignore
+except ImportError:  # pragma: no cover
+    safe_regex = None
+
+from plugin.settings import MESSAGE_PLANE_GET_RECENT_MAX_LIMIT, MESSAGE_PLANE_QUERY_CACHE_ENTRIES
+
+from .stores import TopicStore
+
+
+_MAX_USER_REGEX_LEN = 128
+_MAX_REGEX_TEXT_LEN = 1024
+_REGEX_TIMEOUT_SECONDS = 0.02
+_MAX_PLAN_DEPTH = 16
+_MAX_COMPILED_PLANS = 1024
+_REGEX_SPECIAL_CHARS = ("*", "+", "{", "}", "(", ")", "|", "[", "]", "?", "\\")
+
+Event = Dict[str, Any]
+Matcher = Callable[[Any], Optional[bool]]
+UnaryFn = Callable[[List[Event]], List[Event]]
+Check = Callable[[Event], bool]
+
+
+def _validate_regex_pattern(pattern: str, *, strict: bool) -> Optional[bool]:
+    if not isinstance(pattern, str) or not pattern:
+        return None
+    if len(pattern) > _MAX_USER_REGEX_LEN:
+        return False if strict else None
+
+    if safe_regex is not None:
+        # The timeout applies to matching; regex.compile() rejects it as an unused keyword.
+        try:
+            safe_regex.compile(pattern)
+            return True
+        except Exception:
+            return False if strict else None
+
+    if any(ch in pattern for ch in _REGEX_SPECIAL_CHARS):
+        return False if strict else None
+    try:
+        re.compile(pattern)
+        return True
+    except re.error:
+        return False if strict else None
+
+
+def _compile_regex(pattern: Any, *, strict: bool) -> Matcher:
+    """Compile a user pattern once; the matcher returns True/False, or None for "no opinion"."""
+    rejected: Optional[bool] = False if strict else None
+    if not isinstance(pattern, str) or not pattern:
+        return lambda value: None
+    if len(pattern) > _MAX_USER_REGEX_LEN:
+        return lambda value: rejected
+
+    if safe_regex is not None:
+        try:
+            compiled = safe_regex.compile(pattern)
+        except Exception:
+            return lambda value: rejected
+
+        def _match_safe(value: Any) -> Optional[bool]:
+            s = str(value or "")[:_MAX_REGEX_TEXT_LEN]
+            try:
+                return bool(compiled.search(s, timeout=_REGEX_TIMEOUT_SECONDS))
+            except Exception:
+                return rejected
+
+        return _match_safe
+
+    if any(ch in pattern for ch in _REGEX_SPECIAL_CHARS):
+        return lambda value: rejected
+    try:
+        compiled_re = re.compile(pattern)
+    except re.error:
+        return lambda value: rejected
+    return lambda value: bool(compiled_re.search(str(value or "")[:_MAX_REGEX_TEXT_LEN]))
+
+
+def dedupe_key(ev: Event) -> Tuple[str, Any]:
+    idx = ev.get("index")
+    if isinstance(idx, dict):
+        v = idx.get("id")
+        if isinstance(v, str) and v:
+            return ("id", v)
+    try:
+        return ("seq", int(ev.get("seq") or 0))
+    except Exception:
+        return ("obj", id(ev))
+
+
+def _seq_desc(items: List[Event]) -> List[Event]:
+    items.sort(key=lambda e: int(e.get("seq") or 0), reverse=True)
+    return items
+
+
+def _field_getter(field: str, *, event_fallback: bool = False) -> Callable[[Event], Any]:
+    """Read ``field`` from the event index, then its payload (then the event itself)."""
+
+    def _get(ev: Event) -> Any:
+        idx = ev.get("index")
+        if isinstance(idx, dict) and field in idx:
+            return idx.get(field)
+        payload = ev.get("payload")
+        if isinstance(payload, dict) and field in payload:
+            return payload.get(field)
+        if event_fallback and field in ev:
+            return ev.get(field)
+        return None
+
+    return _get
+
+
+def _keep_where(pred: Callable[[Any], Any], getter: Callable[[Event], Any]) -> UnaryFn:
+    return lambda items: [ev for ev in items if pred(getter(ev))]
+
+
+def _identity(items: List[Event]) -> List[Event]:
+    return items
+
+
+def _eq_check(field: str, value: Any) -> Check:
+    def _check(ev: Event) -> bool:
+        idx = ev.get("index")
+        if isinstance(idx, dict) and idx.get(field) == value:
+            return True
+        payload = ev.get("payload")
+        return isinstance(payload, dict) and payload.get(field) == value
+
+    return _check
+
+
+def _conversation_check(value: Any) -> Check:
+    def _check(ev: Event) -> bool:
+        idx = ev.get("index")
+        if isinstance(idx, dict) and idx.get("conversation_id") == value:
+            return True
+        payload = ev.get("payload")
+        if not isinstance(payload, dict):
+            return False
+        metadata = payload.get("metadata")
+        return isinstance(metadata, dict) and metadata.get("conversation_id") == value
+
+    return _check
+
+
+def _index_number(ev: Event, key: str, cast: Callable[[Any], Any], default: Any) -> Any:
+    idx = ev.get("index")
+    if not isinstance(idx, dict):
+        return default
+    try:
+        return cast(idx.get(key) or default)
+    except Exception:
+        return default
+
+
+def _to_number(value: Any, cast: Callable[[Any], Any]) -> Any:
+    if value is None:
+        return None
+    try:
+        return cast(value)
+    except Exception:
+        return None
+
+
+def _regex_check(matcher: Matcher, key: str) -> Check:
+    def _check(ev: Event) -> bool:
+        idx = ev.get("index")
+        val = idx.get(key) if isinstance(idx, dict) else None
+        if val is None:
+            payload = ev.get("payload")
+            if isinstance(payload, dict):
+                val = payload.get(key)
+        return matcher(val) is not False
+
+    return _check
+
+
+def _content_check(matcher: Matcher) -> Check:
+    def _check(ev: Event) -> bool:
+        payload = ev.get("payload")
+        content = payload.get("content") if isinstance(payload, dict) else None
+        return matcher(content) is not False
+
+    return _check
+
+
+def _compile_filter(params: Dict[str, Any]) -> UnaryFn:
+    p = dict(params)
+    strict = bool(p.pop("strict", True))
+    flt = p.get("flt")
+    if isinstance(flt, dict):
+        p = {**p, **flt}
+
+    # Checks run cheapest first, in the same order the interpreter used.
+    checks: List[Check] = []
+    for field in ("plugin_id", "source", "kind", "type"):
+        if p.get(field) is not None:
+            checks.append(_eq_check(field, p.get(field)))
+    if p.get("conversation_id") is not None:
+        checks.append(_conversation_check(p.get("conversation_id")))
+
+    pmin = _to_number(p.get("priority_min"), int)
+    if pmin is not None:
+        checks.append(lambda ev: _index_number(ev, "priority", int, 0) >= pmin)
+    since = _to_number(p.get("since_ts"), float)
+    until = _to_number(p.get("until_ts"), float)
+    if since is not None or until is not None:
+        lo = float("-inf") if since is None else since
+        hi = float("inf") if until is None else until
+        checks.append(lambda ev: lo <= _index_number(ev, "timestamp", float, 0.0) <= hi)
+
+    for key in ("plugin_id", "source", "kind", "type"):
+        pat = p.get(f"{key}_re")
+        if pat and isinstance(pat, str):
+            checks.append(_regex_check(_compile_regex(pat, strict=strict), key))
+    content_re = p.get("content_re")
+    if content_re and isinstance(content_re, str):
+        checks.append(_content_check(_compile_regex(content_re, strict=strict)))
+
+    def _run(items: List[Event]) -> List[Event]:
+        out: List[Event] = []
+        for ev in items:
+            if not isinstance(ev, dict):
+                continue
+            for check in checks:
+                if not check(ev):
+                    break
+            else:
+                out.append(ev)
+        return out
+
+    return _run
+
+
+def _compile_sort(params: Dict[str, Any]) -> UnaryFn:
+    by = params.get("by")
+    if isinstance(by, str):
+        by_fields = [by]
+    elif isinstance(by, (list, tuple)):
+        by_fields = [str(x) for x in by]
+    else:
+        by_fields = ["timestamp", "created_at", "time"]
+    reverse = bool(params.get("reverse", False))
+    getters = [_field_getter(f, event_fallback=True) for f in by_fields]
+
+    def _sort_key(ev: Event) -> Tuple[Tuple[int, Any], ...]:
+        key_parts: List[Tuple[int, Any]] = []
+        for get in getters:
+            v = get(ev)
+            if v is None:
+                key_parts.append((2, ""))
+            elif isinstance(v, (int, float)):
+                key_parts.append((0, v))
+            else:
+                key_parts.append((1, str(v)))
+        return tuple(key_parts)
+
+    return lambda items: sorted(items, key=_sort_key, reverse=reverse)
+
+
+def _compile_unary(op: str, params: Dict[str, Any]) -> Optional[UnaryFn]:
+    if op == "limit":
+        try:
+            n = int(params.get("n") or 0)
+        except Exception:
+            n = 0
+        if n <= 0:
+            return lambda items: []
+        return lambda items: list(items)[:n]
+
+    if op == "sort":
+        return _compile_sort(params)
+
+    if op == "filter":
+        return _compile_filter(params)
+
+    field = str(params.get("field") or "").strip()
+    if op == "where_eq":
+        if not field:
+            return _identity
+        value = params.get("value")
+        return _keep_where(lambda got: got == value, _field_getter(field))
+
+    if op == "where_in":
+        values = params.get("values")
+        if not field or not isinstance(values, list):
+            return _identity
+        try:
+            allowed = set(values)
+        except TypeError:
+            return _identity
+        return _keep_where(lambda got: got in allowed, _field_getter(field))
+
+    if op == "where_contains":
+        needle = str(params.get("value") or "")
+        if not field or not needle:
+            return _identity
+        return _keep_where(lambda got: needle in str(got or ""), _field_getter(field))
+
+    if op == "where_regex":
+        pattern = str(params.get("pattern") or "")
+        strict = bool(params.get("strict", True))
+        if not field or not pattern:
+            return _identity
+        pattern_ok = _validate_regex_pattern(pattern, strict=strict)
+        if pattern_ok is False:
+            return (lambda items: []) if strict else _identity
+        if pattern_ok is None:
+            return _identity
+        return _keep_where(_compile_regex(pattern, strict=strict), _field_getter(field))
+
+    return None
+
+
+def _merge(left: List[Event], right: List[Event]) -> List[Event]:
+    merged: List[Event] = []
+    seen: set[Tuple[str, Any]] = set()
+    for ev in left + right:
+        k = dedupe_key(ev)
+        if k in seen:
+            continue
+        seen.add(k)
+        merged.append(ev)
+    return _seq_desc(merged)
+
+
+def _intersection(left: List[Event], right: List[Event]) -> List[Event]:
+    right_keys = {dedupe_key(x) for x in right}
+    kept: List[Event] = []
+    seen: set[Tuple[str, Any]] = set()
+    for ev in left:
+        k = dedupe_key(ev)
+        if k in seen or k not in right_keys:
+            continue
+        seen.add(k)
+        kept.append(ev)
+    return _seq_desc(kept)
+
+
+def _difference(left: List[Event], right: List[Event]) -> List[Event]:
+    right_keys = {dedupe_key(x) for x in right}
+    kept: List[Event] = []
+    seen: set[Tuple[str, Any]] = set()
+    for ev in left:
+        k = dedupe_key(ev)
+        if k in seen or k in right_keys:
+            continue
+        seen.add(k)
+        kept.append(ev)
+    return _seq_desc(kept)
+
+
+_BINARY_OPS: Dict[str, Callable[[List[Event], List[Event]], List[Event]]] = {
+    "merge": _merge,
+    "intersection": _intersection,
+    "difference": _difference,
+}
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """A plan tree turned into closures.
+
+    ``topics`` lists the topics the plan reads (``None`` = every topic of the store);
+    their revisions key the result cache.
+    """
+
+    run: Callable[[TopicStore], List[Event]]
+    topics: Tuple[Optional[str], ...]
+
+
+def _compile_get(params: Dict[str, Any]) -> CompiledPlan:
+    p = params.get("params")
+    if not isinstance(p, dict):
+        p = {}
+    try:
+        limit_i = int(p.get("max_count", p.get("limit", 200)))
+    except Exception:
+        limit_i = 200
+    limit_i = min(limit_i, MESSAGE_PLANE_GET_RECENT_MAX_LIMIT)
+
+    topic = p.get("topic")
+    if topic is None:
+        topic = "all"
+    else:
+        try:
+            topic = str(topic)
+        except Exception:
+            topic = "all"
+    if not topic:
+        topic = "all"
+
+    def _norm(v: Any) -> Optional[str]:
+        return v if isinstance(v, str) and v.strip() else None
+
+    pid, src, kind, type_ = (_norm(p.get(k)) for k in ("plugin_id", "source", "kind", "type"))
+    priority_min = p.get("priority_min")
+    since_ts = p.get("since_ts")
+
+    # Fast path: when there is no filtering, use get_recent which avoids scanning.
+    if pid is None and src is None and kind is None and type_ is None and priority_min is None and since_ts is None:
+        return CompiledPlan(run=lambda st: st.get_recent(topic, limit_i), topics=(topic,))
+
+    def _query(st: TopicStore) -> List[Event]:
+        return st.query(
+            topic=topic,
+            plugin_id=pid,
+            source=src,
+            kind=kind,
+            type_=type_,
+            priority_min=priority_min,
+            since_ts=since_ts,
+            until_ts=None,
+            limit=limit_i,
+        )
+
+    return CompiledPlan(run=_query, topics=(None,) if topic.strip() in ("", "*") else (topic,))
+
+
+def compile_plan(node: Any, depth: int = 0) -> Optional[CompiledPlan]:
+    """Compile a ``bus.replay`` plan; returns None for unsupported or malformed plans.
+
+    Leaves copy event references out of the store (under its lock, or via the optimistic
+    get_recent copy). Events are never mutated after publish, so the unary/binary closures
+    run on these snapshots without holding the lock, also on worker threads.
+    """
+    if depth > _MAX_PLAN_DEPTH or not isinstance(node, dict):
+        return None
+    kind = node.get("kind")
+    op = str(node.get("op") or "")
+    params = node.get("params")
+    if not isinstance(params, dict):
+        params = {}
+
+    if kind == "get":
+        return _compile_get(params)
+
+    if kind == "unary":
+        child = compile_plan(node.get("child"), depth + 1)
+        fn = _compile_unary(op, params)
+        if child is None or fn is None:
+            return None
+        child_run = child.run
+        return CompiledPlan(run=lambda st: fn(child_run(st)), topics=child.topics)
+
+    if kind == "binary":
+        left = compile_plan(node.get("left"), depth + 1)
+        right = compile_plan(node.get("right"), depth + 1)
+        combine = _BINARY_OPS.get(op)
+        if left is None or right is None or combine is None:
+            return None
+        left_run, right_run = left.run, right.run
+        topics = tuple(dict.fromkeys(left.topics + right.topics))
+        return CompiledPlan(run=lambda st: combine(left_run(st), right_run(st)), topics=topics)
+
+    return None
+
+
+def plan_fingerprint(plan: Any) -> Optional[str]:
+    try:
+        canonical = json.dumps(plan, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr)
+    except Exception:
+        return None
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_UNSUPPORTED = object()
+
+
+class QueryPlanCache:
+    """Compiled plans by fingerprint, plus plan results keyed by the revisions of the topics read.
+
+    Watchers re-send the same plan on every reload; an unchanged topic answers from the result
+    cache without touching the store. Both caches are LRU and safe to share between threads.
+    """
+
+    def __init__(self, *, max_results: int = MESSAGE_PLANE_QUERY_CACHE_ENTRIES) -> None:
+        self._max_results = max(0, int(max_results))
+        self._plans: "OrderedDict[str, Any]" = OrderedDict()
+        self._results: "OrderedDict[Tuple[Any, ...], List[Event]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+    def _compiled(self, fingerprint: Optional[str], plan: Any) -> Optional[CompiledPlan]:
+        if fingerprint is None:
+            return compile_plan(plan)
+        with self._lock:
+            cached = self._plans.get(fingerprint)
+            if cached is not None:
+                self._plans.move_to_end(fingerprint)
+                self.plan_hits += 1
+                return None if cached is _UNSUPPORTED else cached
+            self.plan_misses += 1
+        compiled = compile_plan(plan)
+        with self._lock:
+            self._plans[fingerprint] = _UNSUPPORTED if compiled is None else compiled
+            while len(self._plans) > _MAX_COMPILED_PLANS:
+                self._plans.popitem(last=False)
+        return compiled
+
+    def execute(self, st: TopicStore, plan: Any) -> Optional[List[Event]]:
+        """Evaluate ``plan`` against ``st``. The returned list may be shared: do not mutate it."""
+        fingerprint = plan_fingerprint(plan)
+        compiled = self._compiled(fingerprint, plan)
+        if compiled is None:
+            return None
+        if fingerprint is None or self._max_results <= 0:
+            return compiled.run(st)
+
+        # Revisions are read before running: a publish racing with the run only makes the
+        # entry unreachable (the revision has moved on), never stale.
+        key = (st.name, fingerprint, tuple(st.revision(t) for t in compiled.topics))
+        with self._lock:
+            items = self._results.get(key)
+            if items is not None:
+                self._results.move_to_end(key)
+                self.result_hits += 1
+                return items
+            self.result_misses += 1
+        items = compiled.run(st)
+        with self._lock:
+            self._results[key] = items
+            while len(self._results) > self._max_results:
+                self._results.popitem(last=False)
+        return items
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "plan_hits": self.plan_hits,
+                "plan_misses": self.plan_misses,
+                "result_hits": self.result_hits,
+                "result_misses": self.result_misses,
+                "compiled_plans": len(self._plans),
+                "cached_results": len(self._results),
+            }
@@ -100,6 +100,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
         self._rpc = None
         self._ingest = None
         self._pub = None
+        self._wal = None
 
     def _cleanup_embedded(
         self,
@@ -109,6 +110,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
         pub_srv=None,
         ingest_thread: threading.Thread | None = None,
         rpc_thread: threading.Thread | None = None,
+        wal=None,
     ) -> None:
         try:
             if rpc_srv is not None:
@@ -145,10 +147,16 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
                 pub_srv.close()
         except Exception:
             pass
+        try:
+            if wal is not None:
+                wal.close()
+        except Exception:
+            pass
 
         self._rpc = None
         self._ingest = None
         self._pub = None
+        self._wal = None
         self._thread = None
         self._ingest_thread = None
 
@@ -163,11 +171,13 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
         pub_srv = None
         ingest_thread = None
         t = None
+        wal = None
         try:
             from plugin.message_plane.ingest_server import MessagePlaneIngestServer
             from plugin.message_plane.pub_server import MessagePlanePubServer
             from plugin.message_plane.rpc_server import MessagePlaneRpcServer
             from plugin.message_plane.stores import StoreRegistry, TopicStore
+            from plugin.message_plane.wal import build_message_plane_wal
             from plugin.settings import MESSAGE_PLANE_STORE_MAXLEN
 
             stores = StoreRegistry(default_store="messages")
@@ -175,6 +185,15 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
             for name in ("messages", "events", "lifecycle", "runs", "export", "memory", "conversations"):
                 stores.register(TopicStore(name=name, maxlen=MESSAGE_PLANE_STORE_MAXLEN))
 
+            # 可选持久化：先回放上次的日志，再开始接收新消息
+            wal = build_message_plane_wal()
+            if wal is not None:
+                for store_name in stores.list_store_names():
+                    store = stores.get(store_name)
+                    if store is not None:
+                        wal.attach(store)
+                wal.start()
+
             pub_srv = MessagePlanePubServer(endpoint=str(self._endpoints.pub))
             ingest_srv = MessagePlaneIngestServer(endpoint=str(self._endpoints.ingest), stores=stores, pub_server=pub_srv)
             rpc_srv = MessagePlaneRpcServer(endpoint=str(self._endpoints.rpc), pub_server=pub_srv, stores=stores)
@@ -199,6 +218,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
             self._rpc = rpc_srv
             self._ingest = ingest_srv
             self._pub = pub_srv
+            self._wal = wal
             logger.info("message_plane embedded started")
         except Exception as e:
             logger.warning("message_plane embedded start failed: {}", e)
@@ -208,6 +228,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
                 pub_srv=pub_srv,
                 ingest_thread=ingest_thread,
                 rpc_thread=t,
+                wal=wal,
             )
             raise
         return self._endpoints
@@ -218,6 +239,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
         pub_srv = self._pub
         ingest_thread = self._ingest_thread
         rpc_thread = self._thread
+        wal = self._wal
 
         self._rpc = None
         self._ingest = None
@@ -231,6 +253,7 @@ class PythonMessagePlaneRunner(MessagePlaneRunner):
             pub_srv=pub_srv,
             ingest_thread=ingest_thread,
             rpc_thread=rpc_thread,
+            wal=wal,
         )
 
     def health_check(self, *, timeout_s: float = 1.0) -> bool:
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import heapq
 import time
 import threading
+from bisect import bisect_right
 from collections import defaultdict, deque
+from itertools import islice
 from dataclasses import dataclass
-from typing import Any, Deque, Dict, Optional
+from typing import Any, Deque, Dict, Optional, Tuple
 
-from loguru import logger
+
+# Equality-filter fields of ``event["index"]`` that get a per-topic secondary
+# index (value -> events of that topic in seq order).
+INDEXED_FIELDS: Tuple[str, ...] = ("plugin_id", "source", "kind", "type")
 
 
 @dataclass
@@ -18,14 +24,38 @@ class TopicStore:
         self.maxlen = int(self.maxlen)
         self.items: Dict[str, Deque[Dict[str, Any]]] = defaultdict(lambda: deque(maxlen=self.maxlen))
         self.meta: Dict[str, Dict[str, Any]] = {}
+        # topic -> field -> value -> events (same order as self.items[topic])
+        self._indexes: Dict[str, Dict[str, Dict[str, Deque[Dict[str, Any]]]]] = {}
+        # topic -> seqs of the topic's events, ascending. The first
+        # ``_seq_base[topic]`` entries belong to evicted events and are dropped
+        # lazily, so eviction stays O(1) while bisection works on a plain list.
+        self._seqs: Dict[str, list[int]] = {}
+        self._seq_base: Dict[str, int] = {}
         self._seq: int = 0
+        # Bumped on every change; topic -> store revision of the topic's last change.
+        # Lets readers (the query plan result cache) detect unchanged topics cheaply.
+        self._revision: int = 0
+        self._topic_revisions: Dict[str, int] = {}
         self._lock = threading.RLock()
+        # Optional durable log (plugin.message_plane.wal.MessagePlaneWal), set by its attach().
+        self.wal: Optional[Any] = None
 
     def _next_seq(self) -> int:
         # Caller is expected to hold _lock.
         self._seq += 1
         return self._seq
 
+    def _bump_revision(self, topic: str) -> None:
+        # Caller is expected to hold _lock.
+        self._revision += 1
+        self._topic_revisions[topic] = self._revision
+
+    def revision(self, topic: Optional[str] = None) -> int:
+        """Revision of ``topic`` (or of the whole store for None / "" / "*"); grows on every change."""
+        if topic is None or topic.strip() in ("", "*"):
+            return self._revision
+        return self._topic_revisions.get(topic, 0)
+
     def list_topics(self) -> list[Dict[str, Any]]:
         with self._lock:
             meta_items = list(self.meta.items())
@@ -49,7 +79,8 @@ class TopicStore:
                 "payload": payload,
                 "index": idx,
             }
-            self.items[t].append(event)
+            if self._append_event(t, event) and self.wal is not None:
+                self.wal.append(self, event)
             m = self.meta.get(t)
             if m is None:
                 self.meta[t] = {"created_at": now, "last_ts": now, "count_total": 1}
@@ -58,6 +89,156 @@ class TopicStore:
                 m["count_total"] = int(m.get("count_total") or 0) + 1
             return event
 
+    def _append_event(self, topic: str, event: Dict[str, Any]) -> bool:
+        # Caller is expected to hold _lock. Returns False when the topic keeps nothing (maxlen 0).
+        dq = self.items[topic]
+        if not dq.maxlen:
+            return False
+        self._bump_revision(topic)
+        evicting = len(dq) == dq.maxlen
+        if evicting:
+            self._unindex_oldest(topic, dq[0])
+        self._index_event(topic, event)
+        self._track_seq(topic, int(event["seq"]), evicting)
+        dq.append(event)
+        return True
+
+    def load_replayed(self, topic: str, records: list[Dict[str, Any]]) -> None:
+        """Restore WAL records (``{"seq", "ts", "payload"}``, oldest first) without re-logging them."""
+        t = str(topic)
+        with self._lock:
+            for rec in records:
+                payload = rec.get("payload")
+                if not isinstance(payload, dict):
+                    continue
+                ts = float(rec.get("ts") or 0.0)
+                seq = int(rec["seq"])
+                event = {
+                    "seq": seq,
+                    "ts": ts,
+                    "store": self.name,
+                    "topic": t,
+                    "payload": payload,
+                    "index": self._extract_index(payload, ts),
+                }
+                self._append_event(t, event)
+                self._seq = max(self._seq, seq)
+                m = self.meta.get(t)
+                if m is None:
+                    self.meta[t] = {"created_at": ts, "last_ts": ts, "count_total": 1}
+                else:
+                    m["last_ts"] = ts
+                    m["count_total"] = int(m.get("count_total") or 0) + 1
+
+    def oldest_seq(self, topic: str) -> Optional[int]:
+        with self._lock:
+            dq = self.items.get(str(topic))
+            if not dq:
+                return None
+            return int(dq[0]["seq"])
+
+    def _index_event(self, topic: str, event: Dict[str, Any]) -> None:
+        # Caller is expected to hold _lock.
+        idx = event["index"]
+        by_field = self._indexes.get(topic)
+        if by_field is None:
+            by_field = self._indexes[topic] = {f: {} for f in INDEXED_FIELDS}
+        for f in INDEXED_FIELDS:
+            v = idx.get(f)
+            if v is None:
+                continue
+            postings = by_field[f].get(v)
+            if postings is None:
+                postings = by_field[f][v] = deque()
+            postings.append(event)
+
+    def _unindex_oldest(self, topic: str, event: Dict[str, Any]) -> None:
+        # Caller is expected to hold _lock. ``event`` is the topic's oldest event,
+        # so it is also the oldest entry of every posting list it appears in.
+        by_field = self._indexes.get(topic)
+        if by_field is None:
+            return
+        idx = event.get("index") or {}
+        for f in INDEXED_FIELDS:
+            v = idx.get(f)
+            if v is None:
+                continue
+            postings = by_field[f].get(v)
+            if not postings:
+                continue
+            if postings[0] is event:
+                postings.popleft()
+            else:
+                try:
+                    postings.remove(event)
+                except ValueError:
+                    pass
+            if not postings:
+                del by_field[f][v]
+
+    def _track_seq(self, topic: str, seq: int, evicting: bool) -> None:
+        # Caller is expected to hold _lock.
+        seqs = self._seqs.get(topic)
+        if seqs is None:
+            seqs = self._seqs[topic] = []
+            self._seq_base[topic] = 0
+        if evicting:
+            base = self._seq_base[topic] + 1
+            if base >= self.maxlen:
+                del seqs[:base]
+                base = 0
+            self._seq_base[topic] = base
+        seqs.append(seq)
+
+    def _window_after(self, topic: str, after: int, limit: int) -> list[Dict[str, Any]]:
+        """Up to ``limit`` events of ``topic`` with seq > ``after``, oldest first.
+
+        The start position is found by bisecting the topic's seq list; the
+        window is then read from whichever end of the deque is closer.
+        Caller is expected to hold _lock.
+        """
+        dq = self.items.get(topic)
+        if not dq:
+            return []
+        seqs = self._seqs.get(topic)
+        if seqs is None:
+            return [ev for ev in dq if int(ev.get("seq") or 0) > after][:limit]
+        base = self._seq_base.get(topic, 0)
+        n = len(dq)
+        pos = bisect_right(seqs, after, base) - base
+        if pos >= n:
+            return []
+        end = min(n, pos + limit)
+        if pos <= n - end:
+            return list(islice(dq, pos, end))
+        window = list(islice(reversed(dq), n - end, n - pos))
+        window.reverse()
+        return window
+
+    def _plan_topic(self, topic: str, eq: Dict[str, str]) -> Tuple[Optional[str], Deque[Dict[str, Any]]]:
+        """Pick the smallest candidate list for one topic.
+
+        Returns ``(driver, rows)`` where ``driver`` is the indexed field used
+        (``None`` for a full topic scan) and ``rows`` are the candidate events
+        in seq order. Caller is expected to hold _lock.
+        """
+        dq = self.items.get(topic)
+        if not dq:
+            return None, deque()
+        if not eq:
+            return None, dq
+        by_field = self._indexes.get(topic) or {}
+        best_field: Optional[str] = None
+        best: Optional[Deque[Dict[str, Any]]] = None
+        for f, v in eq.items():
+            postings = (by_field.get(f) or {}).get(v)
+            if not postings:
+                # An equality filter with no matches empties the topic.
+                return f, deque()
+            if best is None or len(postings) < len(best):
+                best_field, best = f, postings
+        return best_field, best if best is not None else dq
+
     def _extract_index(self, payload: Dict[str, Any], default_ts: float) -> Dict[str, Any]:
         plugin_id = payload.get("plugin_id")
         if not isinstance(plugin_id, str):
@@ -165,32 +346,19 @@ class TopicStore:
             after = 0
 
         topic_q = None if topic is None else str(topic)
-        out: list[Dict[str, Any]] = []
-        
+
         with self._lock:
             if topic_q is None or topic_q.strip() in ("", "*"):
                 topics = list(self.items.keys())
             else:
                 topics = [topic_q]
-            
-            # Filter while iterating, avoid copying entire deque
-            for t in topics:
-                dq = self.items.get(t)
-                if not dq:
-                    continue
-                
-                for ev in dq:
-                    try:
-                        if int(ev.get("seq", 0)) > after:
-                            out.append(ev)
-                    except Exception:
-                        logger.debug("skip event due to invalid seq: {}", ev)
-                        continue
+            windows = [w for w in (self._window_after(t, after, nn) for t in topics) if w]
 
-        out.sort(key=lambda e: int(e.get("seq") or 0))
-        if nn >= len(out):
-            return out
-        return out[:nn]
+        if not windows:
+            return []
+        if len(windows) == 1:
+            return windows[0]
+        return list(islice(heapq.merge(*windows, key=lambda e: int(e.get("seq") or 0)), nn))
 
     def query(
         self,
@@ -229,6 +397,11 @@ class TopicStore:
         except (ValueError, TypeError):
             u_ts = None
 
+        eq: Dict[str, str] = {}
+        for f, v in (("plugin_id", pid), ("source", src), ("kind", kd), ("type", tp)):
+            if v is not None:
+                eq[f] = v
+
         out: list[Dict[str, Any]] = []
         
         with self._lock:
@@ -237,24 +410,26 @@ class TopicStore:
             else:
                 topics = [topic_q]
             
-            # Filter while iterating, avoid copying entire deque
+            # Drive each topic from its most selective index (or the topic itself),
+            # newest first, and stop once this topic has contributed `nn` matches.
             for t in topics:
-                dq = self.items.get(t)
-                if not dq:
+                driver, rows = self._plan_topic(t, eq)
+                if not rows:
                     continue
-                
-                for ev in dq:
+
+                taken = 0
+                for ev in reversed(rows):
                     idx = ev.get("index")
                     if not isinstance(idx, dict):
                         continue
 
-                    if pid is not None and idx.get("plugin_id") != pid:
+                    if pid is not None and driver != "plugin_id" and idx.get("plugin_id") != pid:
                         continue
-                    if src is not None and idx.get("source") != src:
+                    if src is not None and driver != "source" and idx.get("source") != src:
                         continue
-                    if kd is not None and idx.get("kind") != kd:
+                    if kd is not None and driver != "kind" and idx.get("kind") != kd:
                         continue
-                    if tp is not None and idx.get("type") != tp:
+                    if tp is not None and driver != "type" and idx.get("type") != tp:
                         continue
                     if pmin is not None:
                         try:
@@ -276,8 +451,12 @@ class TopicStore:
                             continue
 
                     out.append(ev)
+                    taken += 1
+                    if taken >= nn:
+                        break
 
-        out.sort(key=lambda e: int(e.get("seq") or 0), reverse=True)
+        if len(topics) > 1:
+            out.sort(key=lambda e: int(e.get("seq") or 0), reverse=True)
         if nn >= len(out):
             return out
         return out[:nn]
@@ -291,7 +470,13 @@ class TopicStore:
         dq = deque(maxlen=ml)
         with self._lock:
             self.items[t] = dq
+            self._indexes.pop(t, None)
+            self._seqs.pop(t, None)
+            self._seq_base.pop(t, None)
+            self._bump_revision(t)
             self.meta[t] = {"created_at": now, "last_ts": now, "count_total": 0}
+            if self.wal is not None:
+                self.wal.reset(self, t)
 
             out: list[Dict[str, Any]] = []
             for rec in records:
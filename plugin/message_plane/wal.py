@@ -0,0 +1,381 @@
+"""Optional write-ahead log for message plane topic stores.
+
+Each ``(store, topic)`` gets its own directory of append-only segment files::
+
+    <root>/<store>/<sha1(topic)[:20]>/<first_seq:020d>.seg
+
+A segment is a sequence of frames ``<u32 length><u32 crc32><msgpack body>``
+where the body is ``{"seq", "ts", "topic", "payload"}``; the secondary index
+is rebuilt on replay.  Segments roll after ``segment_bytes`` or a quarter of
+the store's ``maxlen`` records, so background compaction can drop whole
+segments once every record in them has been evicted from memory — disk usage
+stays within roughly ``maxlen`` plus one or two segments per topic.
+
+fsync policies:
+
+- ``none``: frames are written to the OS on every append (survives a crash of
+  the process, not of the machine)
+- ``interval``: as ``none``, plus a background fsync of dirty topics every
+  ``fsync_interval`` seconds
+- ``always``: fsync after every append
+
+On startup :meth:`MessagePlaneWal.attach` replays the last ``maxlen`` records
+of every topic into the store with their original seqs, so consumers can keep
+polling ``get_since`` from where they were.  A torn frame at the end of a
+segment (crash mid-write) is truncated away.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import ormsgpack
+except Exception:  # pragma: no cover
+    ormsgpack = None
+
+if TYPE_CHECKING:
+    from .stores import TopicStore
+
+FSYNC_POLICIES: Tuple[str, ...] = ("none", "interval", "always")
+
+_FRAME_HEADER = struct.Struct("<II")
+_SEGMENT_SUFFIX = ".seg"
+# Active segment file handles kept open at once (LRU); the rest are reopened on demand.
+_MAX_OPEN_SEGMENTS = 128
+
+
+def _topic_dirname(topic: str) -> str:
+    return hashlib.sha1(topic.encode("utf-8")).hexdigest()[:20]
+
+
+def _fsync(f: Any) -> None:
+    fd = f.fileno()
+    sync = getattr(os, "fdatasync", os.fsync)
+    sync(fd)
+
+
+def _read_segment(path: Path) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Decode a segment; returns ``(records, valid_bytes, file_bytes)``."""
+    data = path.read_bytes()
+    records: List[Dict[str, Any]] = []
+    off = 0
+    end = len(data)
+    while off + _FRAME_HEADER.size <= end:
+        length, crc = _FRAME_HEADER.unpack_from(data, off)
+        body = data[off + _FRAME_HEADER.size : off + _FRAME_HEADER.size + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        try:
+            rec = ormsgpack.unpackb(body)
+        except Exception:
+            break
+        if isinstance(rec, dict) and isinstance(rec.get("seq"), int):
+            records.append(rec)
+        off += _FRAME_HEADER.size + length
+    return records, off, end
+
+
+@dataclass
+class _Segment:
+    path: Path
+    first_seq: int
+    last_seq: int
+    count: int
+    size: int
+
+
+class TopicLog:
+    """Segment files of one topic. All methods are thread-safe."""
+
+    def __init__(self, directory: Path, *, fsync: str, segment_bytes: int, segment_records: int) -> None:
+        self.directory = directory
+        self.fsync = fsync
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.segment_records = max(1, int(segment_records))
+        self.segments: List[_Segment] = []
+        self.dirty = False
+        self._file: Any = None
+        self._lock = threading.Lock()
+
+    # ── replay ───────────────────────────────────────────────────
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read all segments (oldest first), truncating torn tails."""
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            self.segments = []
+            if not self.directory.is_dir():
+                return out
+            for path in sorted(self.directory.glob("*" + _SEGMENT_SUFFIX)):
+                records, valid, size = _read_segment(path)
+                if valid < size:
+                    logger.warning("message_plane wal: truncating torn segment {} at {}/{} bytes", path, valid, size)
+                    with open(path, "r+b") as f:
+                        f.truncate(valid)
+                if not records:
+                    path.unlink(missing_ok=True)
+                    continue
+                self.segments.append(
+                    _Segment(path, records[0]["seq"], records[-1]["seq"], len(records), valid)
+                )
+                out.extend(records)
+        return out
+
+    # ── writes ───────────────────────────────────────────────────
+
+    def append(self, frame: bytes, seq: int) -> None:
+        with self._lock:
+            seg = self.segments[-1] if self.segments else None
+            if seg is None or seg.size >= self.segment_bytes or seg.count >= self.segment_records:
+                self._close_file()
+                self.directory.mkdir(parents=True, exist_ok=True)
+                seg = _Segment(self.directory / f"{seq:020d}{_SEGMENT_SUFFIX}", seq, seq, 0, 0)
+                self.segments.append(seg)
+            if self._file is None:
+                self._file = open(seg.path, "ab", buffering=0)
+            self._file.write(frame)
+            seg.last_seq = seq
+            seg.count += 1
+            seg.size += len(frame)
+            if self.fsync == "always":
+                _fsync(self._file)
+            else:
+                self.dirty = True
+
+    def reset(self) -> None:
+        """Drop every segment (topic replaced by a snapshot)."""
+        with self._lock:
+            self._close_file()
+            for seg in self.segments:
+                seg.path.unlink(missing_ok=True)
+            self.segments = []
+            self.dirty = False
+
+    def compact(self, keep_from_seq: int) -> int:
+        """Delete closed segments whose records all have seq < ``keep_from_seq``."""
+        removed = 0
+        with self._lock:
+            while len(self.segments) > 1 and self.segments[0].last_seq < keep_from_seq:
+                self.segments.pop(0).path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def sync(self) -> None:
+        with self._lock:
+            if self.dirty and self._file is not None:
+                _fsync(self._file)
+            self.dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    def _close_file(self) -> None:
+        # Caller is expected to hold _lock.
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            if self.dirty and self.fsync != "none":
+                _fsync(f)
+            self.dirty = False
+        finally:
+            f.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    @property
+    def record_count(self) -> int:
+        return sum(seg.count for seg in self.segments)
+
+
+class MessagePlaneWal:
+    """Per-topic segment logs for a set of :class:`TopicStore` instances."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str],
+        *,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        segment_bytes: int = 4 * 1024 * 1024,
+        compact_interval: float = 30.0,
+    ) -> None:
+        if ormsgpack is None:
+            raise RuntimeError("message_plane wal requires ormsgpack")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}")
+        self.root = Path(root)
+        self.fsync = fsync
+        self.fsync_interval = max(0.01, float(fsync_interval))
+        self.segment_bytes = int(segment_bytes)
+        self.compact_interval = max(0.01, float(compact_interval))
+        self._stores: Dict[str, "TopicStore"] = {}
+        self._logs: Dict[Tuple[str, str], TopicLog] = {}
+        self._open: "OrderedDict[Tuple[str, str], TopicLog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {"appended": 0, "encode_errors": 0, "compacted_segments": 0, "replayed": 0}
+
+    # ── store wiring ─────────────────────────────────────────────
+
+    def attach(self, store: "TopicStore") -> int:
+        """Replay ``store``'s logs into it and start logging its writes.
+
+        Returns the number of records replayed.
+        """
+        store_dir = self.root / store.name
+        replayed = 0
+        if store_dir.is_dir():
+            for topic_dir in sorted(p for p in store_dir.iterdir() if p.is_dir()):
+                log = self._new_log(topic_dir, store)
+                records = log.load()
+                if not records:
+                    continue
+                topic = str(records[-1].get("topic") or "")
+                with self._lock:
+                    self._logs[(store.name, topic)] = log
+                store.load_replayed(topic, records[-store.maxlen :] if store.maxlen > 0 else [])
+                replayed += min(len(records), max(0, store.maxlen))
+        with self._lock:
+            self._stores[store.name] = store
+        store.wal = self
+        self.stats["replayed"] += replayed
+        if replayed:
+            logger.info("message_plane wal: replayed {} records into store {}", replayed, store.name)
+        return replayed
+
+    def _new_log(self, directory: Path, store: "TopicStore") -> TopicLog:
+        return TopicLog(
+            directory,
+            fsync=self.fsync,
+            segment_bytes=self.segment_bytes,
+            segment_records=max(1, int(store.maxlen) // 4),
+        )
+
+    def _log_for(self, store: "TopicStore", topic: str) -> TopicLog:
+        key = (store.name, topic)
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                log = self._logs[key] = self._new_log(self.root / store.name / _topic_dirname(topic), store)
+            self._open[key] = log
+            self._open.move_to_end(key)
+            while len(self._open) > _MAX_OPEN_SEGMENTS:
+                _, stale = self._open.popitem(last=False)
+                stale.close()
+        return log
+
+    # ── called by TopicStore under its lock ──────────────────────
+
+    def append(self, store: "TopicStore", event: Dict[str, Any]) -> None:
+        topic = str(event["topic"])
+        try:
+            body = ormsgpack.packb(
+                {"seq": event["seq"], "ts": event["ts"], "topic": topic, "payload": event["payload"]},
+                option=ormsgpack.OPT_NON_STR_KEYS,
+            )
+        except Exception:
+            self.stats["encode_errors"] += 1
+            logger.debug("message_plane wal: payload not serializable, not persisted: {}.{}", store.name, topic)
+            return
+        frame = _FRAME_HEADER.pack(len(body), zlib.crc32(body)) + body
+        self._log_for(store, topic).append(frame, int(event["seq"]))
+        self.stats["appended"] += 1
+
+    def reset(self, store: "TopicStore", topic: str) -> None:
+        self._log_for(store, topic).reset()
+
+    # ── background work ──────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="message-plane-wal")
+        self._thread.start()
+
+    def _run(self) -> None:
+        tick = self.fsync_interval if self.fsync == "interval" else self.compact_interval
+        next_compact = time.monotonic() + self.compact_interval
+        while not self._stop.wait(tick):
+            try:
+                if self.fsync == "interval":
+                    self.sync()
+                if time.monotonic() >= next_compact:
+                    self.compact()
+                    next_compact = time.monotonic() + self.compact_interval
+            except Exception:
+                logger.exception("message_plane wal background task failed")
+
+    def sync(self) -> None:
+        with self._lock:
+            logs = list(self._open.values())
+        for log in logs:
+            if log.dirty:
+                log.sync()
+
+    def compact(self) -> int:
+        """Drop segments that only hold records already evicted from memory."""
+        with self._lock:
+            items = list(self._logs.items())
+            stores = dict(self._stores)
+        removed = 0
+        for (store_name, topic), log in items:
+            store = stores.get(store_name)
+            if store is None or len(log.segments) < 2:
+                continue
+            oldest = store.oldest_seq(topic)
+            if oldest is None:
+                continue
+            removed += log.compact(oldest)
+        self.stats["compacted_segments"] += removed
+        return removed
+
+    def close(self) -> None:
+        self._stop.set()
+        t = self._thread
+        if t is not None and t.is_alive():
+            t.join(timeout=2.0)
+        self._thread = None
+        with self._lock:
+            logs = list(self._logs.values())
+            self._open.clear()
+        for log in logs:
+            log.close()
+
+
+def build_message_plane_wal() -> Optional[MessagePlaneWal]:
+    """Create the WAL from settings, or ``None`` when it is disabled."""
+    from plugin.settings import (
+        MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS,
+        MESSAGE_PLANE_WAL_DIR,
+        MESSAGE_PLANE_WAL_ENABLED,
+        MESSAGE_PLANE_WAL_FSYNC,
+        MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS,
+        MESSAGE_PLANE_WAL_SEGMENT_BYTES,
+    )
+
+    if not MESSAGE_PLANE_WAL_ENABLED:
+        return None
+    return MessagePlaneWal(
+        MESSAGE_PLANE_WAL_DIR,
+        fsync=MESSAGE_PLANE_WAL_FSYNC,
+        fsync_interval=MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS,
+        segment_bytes=MESSAGE_PLANE_WAL_SEGMENT_BYTES,
+        compact_interval=MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS,
+    )
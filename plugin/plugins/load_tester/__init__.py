@@ -1,10 +1,17 @@
 import asyncio
+import tempfile
 import time
 import threading
 from collections import Counter
+from pathlib import Path
 from typing import Any, Dict, Optional, cast
 
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
 from plugin.sdk.base import NekoPluginBase
+from plugin.sdk.database import PluginDatabase
 from plugin.sdk.decorators import neko_plugin, plugin_entry, lifecycle
 from plugin.sdk import ok
 from plugin.sdk.bus.types import BusReplayContext
@@ -1466,6 +1473,104 @@ class LoadTestPlugin(NekoPluginBase):
         )
         return ok(data=stats)
 
+    @plugin_entry(
+        id="bench_db_kv",
+        name="Bench DB KV",
+        description="Measure per-op latency of db.kv.get: session-per-op + DDL check (legacy) vs scoped session + schema cache",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "duration_seconds": {"type": "number", "default": 5.0},
+                "keys": {"type": "integer", "default": 1000},
+            },
+        },
+    )
+    def bench_db_kv(self, duration_seconds: float = 5.0, keys: int = 1000, **_: Any):
+        root_cfg = self._get_load_test_section(None)
+        sec_cfg = self._get_load_test_section("db_kv")
+        n_keys = max(1, int(keys))
+
+        # Use throwaway databases so the benchmark does not depend on [plugin.database] being enabled.
+        with tempfile.TemporaryDirectory(prefix="load_tester_db_") as tmp:
+            db = PluginDatabase(plugin_id=f"{self.plugin_id}_bench", plugin_dir=Path(tmp))
+            # Legacy baseline: its own file and engine, configured the way PluginDatabase used to be
+            # (one StaticPool connection, rollback journal, no schema cache).
+            legacy_engine = create_engine(
+                f"sqlite:///{Path(tmp) / 'legacy.db'}",
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+                echo=False,
+            )
+
+            @event.listens_for(legacy_engine, "connect")
+            def _legacy_pragma(dbapi_conn, connection_record):
+                cursor = dbapi_conn.cursor()
+                cursor.execute("PRAGMA foreign_keys=ON")
+                cursor.close()
+
+            legacy_sessions = sessionmaker(bind=legacy_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+            try:
+                db.kv.mset({f"k{i}": {"n": i, "payload": "x" * 64} for i in range(n_keys)})
+                ddl = text(
+                    "CREATE TABLE IF NOT EXISTS _plugin_kv_store "
+                    "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                query = text("SELECT value FROM _plugin_kv_store WHERE key = :key")
+                now = time.time()
+                with legacy_sessions() as session:
+                    session.execute(ddl)
+                    session.execute(
+                        text("INSERT INTO _plugin_kv_store VALUES (:key, :value, :ts, :ts)"),
+                        [{"key": f"k{i}", "value": b"x" * 80, "ts": now} for i in range(n_keys)],
+                    )
+                    session.commit()
+                counter = {"i": 0}
+
+                def _next_key() -> str:
+                    counter["i"] += 1
+                    return f"k{counter['i'] % n_keys}"
+
+                def _legacy_op() -> None:
+                    # What every kv call used to do: a fresh session for the DDL check, then one for the read.
+                    with legacy_sessions() as session:
+                        session.execute(ddl)
+                        session.commit()
+                    with legacy_sessions() as session:
+                        session.execute(query, {"key": _next_key()}).fetchone()
+
+                def _pooled_op() -> None:
+                    db.kv.get(_next_key())
+
+                def _build_log_args(duration: float, stats: Dict[str, Any], workers: int):
+                    return (
+                        duration,
+                        stats["iterations"],
+                        stats["qps"],
+                        stats["errors"],
+                        stats.get("latency_p50_ms"),
+                        stats.get("latency_p99_ms"),
+                        stats.get("workers", workers),
+                    )
+
+                results: Dict[str, Any] = {}
+                for mode, op_fn in (("legacy", _legacy_op), ("pooled", _pooled_op)):
+                    results[mode] = self._run_benchmark(
+                        test_name=f"bench_db_kv_{mode}",
+                        root_cfg=root_cfg,
+                        sec_cfg=sec_cfg,
+                        default_duration=duration_seconds,
+                        op_fn=op_fn,
+                        log_template=(
+                            "[load_tester] bench_db_kv_" + mode
+                            + " duration={}s iterations={} qps={} errors={} p50_ms={} p99_ms={} workers={}"
+                        ),
+                        build_log_args=_build_log_args,
+                    )
+            finally:
+                db.close()
+                legacy_engine.dispose()
+        return ok(data={"test": "bench_db_kv", "keys": n_keys, **results})
+
     @plugin_entry(
         id="run_all_benchmarks",
         name="Run All Benchmarks",
@@ -1619,6 +1724,16 @@ class LoadTestPlugin(NekoPluginBase):
         except Exception as e:
             results["bench_buslist_reload_nochange"] = {"error": str(e)}
         _pause("buslist_reload_nochange")
+        try:
+            db_kv = self._unwrap_ok_data(self.bench_db_kv(duration_seconds=duration_seconds))
+            if isinstance(db_kv, dict) and "legacy" in db_kv:
+                results["bench_db_kv_legacy"] = db_kv.get("legacy")
+                results["bench_db_kv_pooled"] = db_kv.get("pooled")
+            else:
+                results["bench_db_kv"] = db_kv
+        except Exception as e:
+            results["bench_db_kv"] = {"error": str(e)}
+        _pause("db_kv")
 
         try:
             headers = ["test", "qps", "errors", "iterations", "elapsed_s", "extra"]
@@ -6,6 +6,8 @@ Run Protocol 模块
 from plugin.runs.manager import (
     RunCancelRequest,
     RunRecord,
+    RunWaitResponse,
+    RunListResponse,
     ExportCategory,
     ExportListResponse,
     InvalidRunTransition,
@@ -16,6 +18,8 @@ from plugin.runs.manager import (
     shutdown_runs,
     list_export_for_run,
     list_runs,
+    list_runs_page,
+    wait_for_run,
 )
 from plugin.runs.websocket import ws_run_endpoint, issue_run_token
 from plugin.runs.storage import blob_store
@@ -23,6 +27,8 @@ from plugin.runs.storage import blob_store
 __all__ = [
     'RunCancelRequest',
     'RunRecord',
+    'RunWaitResponse',
+    'RunListResponse',
     'ExportCategory',
     'ExportListResponse',
     'InvalidRunTransition',
@@ -33,6 +39,8 @@ __all__ = [
     'shutdown_runs',
     'list_export_for_run',
     'list_runs',
+    'list_runs_page',
+    'wait_for_run',
     'ws_run_endpoint',
     'issue_run_token',
     'blob_store',
@@ -3,9 +3,12 @@ from __future__ import annotations
 import asyncio
 import collections
 import json
+import sqlite3
 import threading
 import time
 import uuid
+import zlib
+from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional, Protocol, Tuple
 
 from pydantic import BaseModel, Field
@@ -14,9 +17,18 @@ from loguru import logger
 
 from plugin.core.state import state
 from plugin._types.models import RunCreateRequest, RunCreateResponse, RunStatus
+from plugin.runs.storage import blob_store
 from plugin.server.runs.trigger_service import trigger_plugin
 from plugin.server.messaging.plane_bridge import publish_record as _publish_record_impl
-from plugin.settings import RUN_EXECUTION_TIMEOUT, RUN_STORE_MAX_COMPLETED
+from plugin.settings import (
+    RUN_EXECUTION_TIMEOUT,
+    RUN_EXPORT_INLINE_MAX_BYTES,
+    RUN_STORE_BACKEND,
+    RUN_STORE_DB_PATH,
+    RUN_STORE_MAX_COMPLETED,
+    RUN_STORE_RETENTION_SECONDS,
+    RUN_STORE_SQLITE_MAX_COMPLETED,
+)
 
 
 ExportType = Literal["text", "json", "url", "binary_url", "binary"]
@@ -94,6 +106,21 @@ class RunRecord(BaseModel):
     result_refs: List[str] = Field(default_factory=list)
 
 
+class RunWaitResponse(BaseModel):
+    """Long-poll result: the run as of now, plus its system exports once terminal."""
+    model_config = {"populate_by_name": True}
+
+    run: RunRecord
+    terminal: bool
+    exports: List[ExportItem] = Field(default_factory=list)
+
+
+class RunListResponse(BaseModel):
+    """One page of runs, newest first; pass ``next_cursor`` back as ``cursor``."""
+    items: List[RunRecord]
+    next_cursor: Optional[str] = None
+
+
 class ExportStore(Protocol):
     def append(self, item: ExportItem) -> None: ...
 
@@ -193,6 +220,78 @@ def validate_run_transition(current: str, target: str) -> None:
         raise InvalidRunTransition(current, target)
 
 
+def _patched_run(r: RunRecord, patch: Dict[str, Any]) -> Optional[RunRecord]:
+    """Apply *patch* to a non-terminal run; None if the status change is illegal."""
+    new_status = patch.get("status")
+    if new_status is not None and new_status != r.status:
+        allowed = _ALLOWED_TRANSITIONS.get(r.status)
+        if allowed is not None and new_status not in allowed:
+            logger.warning("Blocked illegal run transition: {} -> {} (run={})", r.status, new_status, r.run_id)
+            return None
+    data = r.model_dump()
+    data.update(patch)
+    data["updated_at"] = float(time.time())
+    return RunRecord.model_validate(data)
+
+
+def _terminal_run(r: RunRecord, *, status: RunStatus, error: Optional[RunError], result_refs: List[str]) -> RunRecord:
+    now = float(time.time())
+    data = r.model_dump()
+
+    if status == "succeeded":
+        try:
+            pv = data.get("progress")
+            if pv is None or float(pv) < 1.0:
+                data["progress"] = 1.0
+        except Exception:
+            data["progress"] = 1.0
+        if not (isinstance(data.get("stage"), str) and str(data.get("stage") or "").strip()):
+            data["stage"] = "done"
+        if not (isinstance(data.get("message"), str) and str(data.get("message") or "").strip()):
+            data["message"] = "done"
+
+    data.update(
+        {
+            "status": status,
+            "finished_at": now,
+            "updated_at": now,
+            "error": error.model_dump() if isinstance(error, RunError) else None,
+            "result_refs": list(result_refs or []),
+        }
+    )
+    return RunRecord.model_validate(data)
+
+
+def _cleanup_evicted_runs(evicted: List[str]) -> None:
+    """Drop exports, blobs and emit tracking of evicted runs (call outside store locks)."""
+    for rid in evicted:
+        try:
+            _export_store.remove_for_run(rid)
+        except Exception:
+            pass
+        try:
+            blob_store.release_run(rid)
+        except Exception:
+            logger.debug("Failed to release blobs of evicted run {}", rid, exc_info=True)
+        try:
+            with _runs_emit_lock:
+                _runs_last_emit_at.pop(rid, None)
+        except Exception:
+            pass
+
+
+def _encode_run_cursor(rec: RunRecord) -> str:
+    return f"{rec.created_at!r}:{rec.run_id}"
+
+
+def _decode_run_cursor(cursor: str) -> Tuple[float, str]:
+    """Raises ValueError for a malformed cursor."""
+    ts, sep, rid = str(cursor).partition(":")
+    if not sep or not rid:
+        raise ValueError(f"invalid run cursor: {cursor!r}")
+    return float(ts), rid
+
+
 class InMemoryRunStore:
     def __init__(self, max_completed: int = 0) -> None:
         self._lock = threading.Lock()
@@ -216,22 +315,17 @@ class InMemoryRunStore:
                 return None
             if r.status in _TERMINAL_STATUSES:
                 return r.model_copy(deep=True)
-            new_status = patch.get("status")
-            if new_status is not None and new_status != r.status:
-                allowed = _ALLOWED_TRANSITIONS.get(r.status)
-                if allowed is not None and new_status not in allowed:
-                    logger.warning("Blocked illegal run transition: {} -> {} (run={})", r.status, new_status, run_id)
-                    return r.model_copy(deep=True)
-            data = r.model_dump()
-            data.update(patch)
-            data["updated_at"] = float(time.time())
-            nr = RunRecord.model_validate(data)
+            nr = _patched_run(r, patch)
+            if nr is None:
+                return r.model_copy(deep=True)
             self._runs[run_id] = nr
             return nr.model_copy(deep=True)
 
-    def list_runs(self) -> List[RunRecord]:
+    def list_runs(self, *, plugin_id: Optional[str] = None) -> List[RunRecord]:
         with self._lock:
             items = list(self._runs.values())
+        if plugin_id:
+            items = [r for r in items if r.plugin_id == plugin_id]
         out: List[RunRecord] = []
         for r in items:
             try:
@@ -247,49 +341,38 @@ class InMemoryRunStore:
                 return None
             if r.status in ("succeeded", "failed", "canceled", "timeout"):
                 return r.model_copy(deep=True)
-            now = float(time.time())
-            data = r.model_dump()
-
-            if status == "succeeded":
-                try:
-                    pv = data.get("progress")
-                    if pv is None or float(pv) < 1.0:
-                        data["progress"] = 1.0
-                except Exception:
-                    data["progress"] = 1.0
-                if not (isinstance(data.get("stage"), str) and str(data.get("stage") or "").strip()):
-                    data["stage"] = "done"
-                if not (isinstance(data.get("message"), str) and str(data.get("message") or "").strip()):
-                    data["message"] = "done"
-
-            data.update(
-                {
-                    "status": status,
-                    "finished_at": now,
-                    "updated_at": now,
-                    "error": error.model_dump() if isinstance(error, RunError) else None,
-                    "result_refs": list(result_refs or []),
-                }
-            )
-            nr = RunRecord.model_validate(data)
+            nr = _terminal_run(r, status=status, error=error, result_refs=result_refs)
             self._runs[run_id] = nr
             self._completed_order.append(run_id)
             evicted = self._evict_completed_locked()
             result = nr.model_copy(deep=True)
 
-        for rid in evicted:
-            try:
-                _export_store.remove_for_run(rid)
-            except Exception:
-                pass
-            try:
-                with _runs_emit_lock:
-                    _runs_last_emit_at.pop(rid, None)
-            except Exception:
-                pass
-
+        _cleanup_evicted_runs(evicted)
         return result
 
+    def list_page(
+        self,
+        *,
+        plugin_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[RunRecord], Optional[str]]:
+        """Runs ordered newest first (created_at, run_id), keyset-paginated by *cursor*."""
+        after = _decode_run_cursor(cursor) if cursor else None
+        page_size = max(1, int(limit))
+        with self._lock:
+            items = [
+                r for r in self._runs.values()
+                if (not plugin_id or r.plugin_id == plugin_id) and (not status or r.status == status)
+            ]
+            items.sort(key=lambda r: (r.created_at, r.run_id), reverse=True)
+            if after is not None:
+                items = [r for r in items if (r.created_at, r.run_id) < after]
+            page = [r.model_copy(deep=True) for r in items[: page_size + 1]]
+        next_cursor = _encode_run_cursor(page[page_size - 1]) if len(page) > page_size else None
+        return page[:page_size], next_cursor
+
     def _evict_completed_locked(self) -> List[str]:
         """Evict oldest terminal Runs when exceeding max_completed.
 
@@ -308,8 +391,337 @@ class InMemoryRunStore:
         return evicted
 
 
-_run_store: RunStore = InMemoryRunStore()
-_export_store: ExportStore = InMemoryExportStore()
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    plugin_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_plugin_created ON runs (plugin_id, created_at, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_status_created ON runs (status, created_at, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_finished ON runs (finished_at) WHERE finished_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS run_exports (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    export_item_id TEXT NOT NULL UNIQUE,
+    run_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_run_exports_run ON run_exports (run_id, seq);
+
+CREATE TABLE IF NOT EXISTS run_export_payloads (
+    seq INTEGER PRIMARY KEY,
+    item BLOB NOT NULL
+);
+"""
+
+# Max number of bound parameters per statement when deleting in batches.
+_SQLITE_BATCH = 500
+
+
+class RunsDatabase:
+    """SQLite file shared by SqliteRunStore and SqliteExportStore.
+
+    Each thread gets its own connection (runs are touched from the event loop
+    and from IPC handler threads); writes are serialized by ``write_lock``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.write_lock = threading.Lock()
+        self._local = threading.local()
+        conn = self.conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SQLITE_SCHEMA)
+        conn.commit()
+
+    def conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10.0)
+            # WAL: readers never block the writer; NORMAL only fsyncs at checkpoints
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+
+class SqliteRunStore:
+    """Persistent RunStore.
+
+    The full record is stored as JSON; the columns used for filtering and
+    ordering (plugin_id, status, created_at, finished_at) are indexed. Terminal
+    runs are evicted oldest-first beyond *max_completed* or after
+    *retention_seconds*. Runs left non-terminal by a previous process are
+    closed on open, since nothing will ever finish them.
+    """
+
+    # Retention sweeps run at most this often (seconds), piggybacked on commits.
+    RETENTION_SWEEP_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        db: RunsDatabase,
+        *,
+        max_completed: int = 0,
+        retention_seconds: Optional[float] = None,
+    ) -> None:
+        self._db = db
+        self._max_completed = max_completed if max_completed > 0 else int(RUN_STORE_SQLITE_MAX_COMPLETED)
+        self._retention_seconds = float(
+            RUN_STORE_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        )
+        self._next_retention_sweep = 0.0
+        self._recover_interrupted()
+        row = db.conn().execute("SELECT COUNT(*) FROM runs WHERE finished_at IS NOT NULL").fetchone()
+        self._completed = int(row[0])
+
+    @staticmethod
+    def _row(rec: RunRecord) -> Tuple[str, str, str, float, Optional[float], str]:
+        # finished_at is only set for terminal runs: it drives eviction order
+        finished_at = (rec.finished_at or rec.updated_at) if rec.status in _TERMINAL_STATUSES else None
+        return rec.run_id, rec.plugin_id, rec.status, rec.created_at, finished_at, rec.model_dump_json()
+
+    def _put(self, conn: sqlite3.Connection, rec: RunRecord) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO runs (run_id, plugin_id, status, created_at, finished_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            self._row(rec),
+        )
+
+    def _load(self, conn: sqlite3.Connection, run_id: str) -> Optional[RunRecord]:
+        row = conn.execute("SELECT data FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return RunRecord.model_validate_json(row[0]) if row is not None else None
+
+    def _recover_interrupted(self) -> None:
+        error = RunError(code="INTERRUPTED", message="plugin server restarted before the run finished")
+        with self._db.write_lock:
+            conn = self._db.conn()
+            with conn:
+                rows = conn.execute(
+                    "SELECT data FROM runs WHERE status IN ('queued', 'running', 'cancel_requested')"
+                ).fetchall()
+                for (data,) in rows:
+                    r = RunRecord.model_validate_json(data)
+                    status: RunStatus = "failed" if r.status == "running" else "canceled"
+                    self._put(conn, _terminal_run(r, status=status, error=error, result_refs=r.result_refs))
+        if rows:
+            logger.info("Closed {} run(s) interrupted by a previous shutdown", len(rows))
+
+    def create(self, rec: RunRecord) -> None:
+        with self._db.write_lock:
+            conn = self._db.conn()
+            with conn:
+                self._put(conn, rec)
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        return self._load(self._db.conn(), run_id)
+
+    def update(self, run_id: str, **patch: Any) -> Optional[RunRecord]:
+        with self._db.write_lock:
+            conn = self._db.conn()
+            r = self._load(conn, run_id)
+            if r is None or r.status in _TERMINAL_STATUSES:
+                return r
+            nr = _patched_run(r, patch)
+            if nr is None:
+                return r
+            with conn:
+                self._put(conn, nr)
+            return nr
+
+    def commit_terminal(self, run_id: str, *, status: RunStatus, error: Optional[RunError], result_refs: List[str]) -> Optional[RunRecord]:
+        with self._db.write_lock:
+            conn = self._db.conn()
+            r = self._load(conn, run_id)
+            if r is None or r.status in _TERMINAL_STATUSES:
+                return r
+            nr = _terminal_run(r, status=status, error=error, result_refs=result_refs)
+            with conn:
+                self._put(conn, nr)
+                evicted = self._evict_locked(conn, nr.finished_at or time.time(), pending=1)
+            self._completed += 1 - len(evicted)
+
+        _cleanup_evicted_runs(evicted)
+        return nr
+
+    def _evict_locked(self, conn: sqlite3.Connection, now: float, *, pending: int = 0) -> List[str]:
+        """Delete terminal runs over the count cap or past retention; returns their IDs.
+
+        *pending* counts terminal runs written in this transaction but not yet
+        reflected in ``self._completed``.
+        """
+        victims: List[str] = []
+        over = self._completed + pending - self._max_completed
+        if over > 0:
+            victims.extend(
+                rid for (rid,) in conn.execute(
+                    "SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY finished_at LIMIT ?",
+                    (over,),
+                )
+            )
+        if self._retention_seconds > 0 and now >= self._next_retention_sweep:
+            self._next_retention_sweep = now + min(self.RETENTION_SWEEP_INTERVAL, self._retention_seconds)
+            victims.extend(
+                rid for (rid,) in conn.execute(
+                    "SELECT run_id FROM runs WHERE finished_at IS NOT NULL AND finished_at < ? "
+                    "ORDER BY finished_at LIMIT ?",
+                    (now - self._retention_seconds, _SQLITE_BATCH * 10),
+                )
+            )
+        evicted = list(dict.fromkeys(victims))
+        for i in range(0, len(evicted), _SQLITE_BATCH):
+            batch = evicted[i : i + _SQLITE_BATCH]
+            conn.execute(f"DELETE FROM runs WHERE run_id IN ({','.join('?' * len(batch))})", batch)
+        return evicted
+
+    def list_runs(self, *, plugin_id: Optional[str] = None) -> List[RunRecord]:
+        conn = self._db.conn()
+        if plugin_id:
+            rows = conn.execute(
+                "SELECT data FROM runs WHERE plugin_id = ? ORDER BY created_at, run_id", (plugin_id,)
+            )
+        else:
+            rows = conn.execute("SELECT data FROM runs ORDER BY created_at, run_id")
+        return [RunRecord.model_validate_json(data) for (data,) in rows]
+
+    def list_page(
+        self,
+        *,
+        plugin_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[RunRecord], Optional[str]]:
+        """Runs ordered newest first (created_at, run_id), keyset-paginated by *cursor*."""
+        where: List[str] = []
+        params: List[Any] = []
+        if plugin_id:
+            where.append("plugin_id = ?")
+            params.append(plugin_id)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if cursor:
+            where.append("(created_at, run_id) < (?, ?)")
+            params.extend(_decode_run_cursor(cursor))
+        page_size = max(1, int(limit))
+        sql = "SELECT data FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, run_id DESC LIMIT ?"
+        params.append(page_size + 1)
+        page = [RunRecord.model_validate_json(data) for (data,) in self._db.conn().execute(sql, params)]
+        next_cursor = _encode_run_cursor(page[page_size - 1]) if len(page) > page_size else None
+        return page[:page_size], next_cursor
+
+
+class SqliteExportStore:
+    """Persistent ExportStore.
+
+    Items whose JSON exceeds *inline_max_bytes* are zlib-compressed into a
+    side table, so listing and category filtering only touch the small rows.
+    Pagination keeps the ``after=export_item_id`` contract of the in-memory
+    store, resolved to the row's insertion sequence.
+    """
+
+    def __init__(self, db: RunsDatabase, *, inline_max_bytes: Optional[int] = None) -> None:
+        self._db = db
+        self._inline_max_bytes = int(RUN_EXPORT_INLINE_MAX_BYTES if inline_max_bytes is None else inline_max_bytes)
+
+    def append(self, item: ExportItem) -> None:
+        encoded = item.model_dump_json(by_alias=True)
+        inline = encoded if len(encoded) <= self._inline_max_bytes else None
+        with self._db.write_lock:
+            conn = self._db.conn()
+            with conn:
+                # Same semantics as the in-memory store: re-appending an ID replaces the item
+                self._delete(conn, "export_item_id = ?", (item.export_item_id,))
+                cur = conn.execute(
+                    "INSERT INTO run_exports (export_item_id, run_id, category, item) VALUES (?, ?, ?, ?)",
+                    (item.export_item_id, item.run_id, item.category, inline),
+                )
+                if inline is None:
+                    conn.execute(
+                        "INSERT INTO run_export_payloads (seq, item) VALUES (?, ?)",
+                        (cur.lastrowid, zlib.compress(encoded.encode("utf-8"), 1)),
+                    )
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, where: str, params: Tuple[Any, ...]) -> None:
+        conn.execute(
+            f"DELETE FROM run_export_payloads WHERE seq IN (SELECT seq FROM run_exports WHERE {where})",
+            params,
+        )
+        conn.execute(f"DELETE FROM run_exports WHERE {where}", params)
+
+    def list_for_run(
+        self, *, run_id: str, after: Optional[str], limit: int,
+        category: Optional[ExportCategory] = None,
+    ) -> Tuple[List[ExportItem], Optional[str]]:
+        conn = self._db.conn()
+        start_seq = 0
+        if after:
+            row = conn.execute(
+                "SELECT seq FROM run_exports WHERE export_item_id = ? AND run_id = ?", (after, run_id)
+            ).fetchone()
+            start_seq = int(row[0]) if row is not None else 0
+        page_size = max(1, int(limit))
+        sql = "SELECT seq, export_item_id, item FROM run_exports WHERE run_id = ? AND seq > ?"
+        params: List[Any] = [run_id, start_seq]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(page_size + 1)
+        rows = conn.execute(sql, params).fetchall()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        out_of_line = [seq for seq, _eid, item in rows if item is None]
+        payloads: Dict[int, str] = {}
+        if out_of_line:
+            marks = ",".join("?" * len(out_of_line))
+            for seq, blob in conn.execute(
+                f"SELECT seq, item FROM run_export_payloads WHERE seq IN ({marks})", out_of_line
+            ):
+                payloads[seq] = zlib.decompress(blob).decode("utf-8")
+        items: List[ExportItem] = []
+        for seq, _eid, item in rows:
+            raw = item if item is not None else payloads.get(seq)
+            if raw is not None:
+                items.append(ExportItem.model_validate_json(raw))
+        next_after = rows[-1][1] if has_more and rows else None
+        return items, next_after
+
+    def remove_for_run(self, run_id: str) -> None:
+        with self._db.write_lock:
+            conn = self._db.conn()
+            with conn:
+                self._delete(conn, "run_id = ?", (run_id,))
+
+
+def _create_default_stores() -> Tuple[RunStore, ExportStore]:
+    backend = str(RUN_STORE_BACKEND or "memory").strip().lower()
+    if backend == "sqlite":
+        try:
+            db = RunsDatabase(Path(RUN_STORE_DB_PATH))
+            return SqliteRunStore(db), SqliteExportStore(db)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Failed to open run store at {}: {}; falling back to memory", RUN_STORE_DB_PATH, e)
+    elif backend != "memory":
+        logger.warning("Unknown run store backend {!r}; using memory", backend)
+    return InMemoryRunStore(), InMemoryExportStore()
+
+
+_run_store: RunStore
+_export_store: ExportStore
+_run_store, _export_store = _create_default_stores()
 
 _active_run_tasks: Dict[str, asyncio.Task] = {}
 _pending_cancel_tasks: set[asyncio.Task] = set()
@@ -320,6 +732,12 @@ _runs_emit_lock = threading.Lock()
 _runs_last_emit_at: Dict[str, float] = {}
 _runs_emit_min_interval_s: float = 0.2
 
+# run_id -> futures of long-poll waiters (wait_for_run). Guarded by a
+# threading.Lock because _emit_runs may run on IPC handler threads; waiters
+# are woken on their own loop via call_soon_threadsafe.
+_run_waiters_lock = threading.Lock()
+_run_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
 
 def _publish_bus_record(*, store: str, record: Dict[str, Any]) -> None:
     try:
@@ -338,7 +756,24 @@ def set_export_store(store: ExportStore) -> None:
     _export_store = store
 
 
+def _resolve_waiter(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+def _notify_run_waiters(run_id: str) -> None:
+    with _run_waiters_lock:
+        waiters = _run_waiters.pop(run_id, None)
+    for loop, fut in waiters or ():
+        try:
+            loop.call_soon_threadsafe(_resolve_waiter, fut)
+        except RuntimeError:
+            # loop already closed
+            pass
+
+
 def _emit_runs(op: str, rec: RunRecord) -> None:
+    _notify_run_waiters(rec.run_id)
     try:
         rev = state._bump_bus_rev("runs")
     except Exception:
@@ -415,23 +850,74 @@ def list_runs(*, plugin_id: Optional[str] = None) -> List[RunRecord]:
     fn = getattr(_run_store, "list_runs", None)
     if fn is None:
         return []
+    pid = str(plugin_id) if plugin_id is not None else ""
     try:
-        items = fn()
+        # Built-in stores filter by plugin_id themselves (SQLite via its index)
+        return fn(plugin_id=pid or None)
     except Exception:
         return []
-    if plugin_id is None:
-        return items
-    pid = str(plugin_id)
-    if not pid:
-        return items
-    out: List[RunRecord] = []
-    for r in items:
+
+
+def list_runs_page(
+    *,
+    plugin_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> RunListResponse:
+    """One page of runs, newest first. Raises ValueError for a malformed cursor."""
+    fn = getattr(_run_store, "list_page", None)
+    if fn is None:
+        return RunListResponse(items=[])
+    items, next_cursor = fn(plugin_id=plugin_id, status=status, limit=int(limit), cursor=cursor)
+    return RunListResponse(items=items, next_cursor=next_cursor)
+
+
+async def wait_for_run(
+    run_id: str,
+    *,
+    timeout: float,
+    since: Optional[float] = None,
+) -> Optional[RunRecord]:
+    """Wait until the run is terminal (or, with *since*, updated after it).
+
+    Returns the current record when the condition holds or *timeout* elapses,
+    and None if the run does not exist. Wakeups come from ``_emit_runs``, so
+    terminal commits are delivered immediately; progress updates are subject
+    to the same throttling as the bus events.
+    """
+    rid = str(run_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, float(timeout))
+    while True:
+        fut: asyncio.Future = loop.create_future()
+        entry = (loop, fut)
+        # Register before reading the record so a change in between is not missed.
+        with _run_waiters_lock:
+            _run_waiters.setdefault(rid, []).append(entry)
         try:
-            if r.plugin_id == pid:
-                out.append(r)
-        except Exception:
-            continue
-    return out
+            rec = _run_store.get(rid)
+            if rec is None or rec.status in _TERMINAL_STATUSES:
+                return rec
+            if since is not None and rec.updated_at > float(since):
+                return rec
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return rec
+            try:
+                await asyncio.wait_for(fut, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            with _run_waiters_lock:
+                waiters = _run_waiters.get(rid)
+                if waiters is not None:
+                    try:
+                        waiters.remove(entry)
+                    except ValueError:
+                        pass
+                    if not waiters:
+                        _run_waiters.pop(rid, None)
 
 
 def list_export_for_run(
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import sqlite3
 import threading
 import time
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional
 
 from loguru import logger
 
@@ -16,6 +18,28 @@ from plugin.settings import (
     BLOB_UPLOAD_SESSION_TTL_SECONDS,
 )
 
+# Granularity for hashing, buffered upload writes and download reads (bytes).
+BLOB_IO_CHUNK = 1024 * 1024
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    filename TEXT,
+    mime TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_run ON blobs (run_id);
+"""
+
 
 class UploadNotFoundError(RuntimeError):
     """Raised when a finalize targets a missing or expired upload session."""
@@ -35,30 +59,139 @@ class UploadSession:
     created_at: float
     max_bytes: int
     tmp_path: Path
-    final_path: Path
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    blob_id: str
+    run_id: str
+    sha256: str
+    size: int
+    filename: Optional[str]
+    mime: Optional[str]
+    created_at: float
+    path: Path
+    # Set on the finalize result when the content was already stored
+    deduplicated: bool = False
+
+
+class BlobWriter:
+    """Writes an upload to its temp file, hashing it on the way (blocking I/O)."""
+
+    def __init__(self, session: UploadSession) -> None:
+        self.session = session
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = open(session.tmp_path, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(BLOB_IO_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
 
 
 class BlobStore:
-    def __init__(self) -> None:
+    """Content-addressed blob storage for run artifacts.
+
+    Each upload gets its own blob_id (scoped to a run), but the bytes are
+    stored once per sha256 under ``sha256/<xx>/<digest>`` and reference
+    counted; identical artifacts share one file. The blob -> object mapping
+    and refcounts live in a small SQLite index next to the objects, so blobs
+    survive restarts. Objects are deleted when their last blob is released
+    (``release_run`` is called when a run is evicted). Expired upload
+    sessions are swept lazily on ``create_upload``.
+    """
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self._root_override = Path(root) if root is not None else None
         self._lock = threading.Lock()
         self._uploads: Dict[str, UploadSession] = {}
-        self._blob_to_run: Dict[str, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_root: Optional[Path] = None
         self._upload_ttl_seconds = max(1.0, float(BLOB_UPLOAD_SESSION_TTL_SECONDS))
-        self._janitor_stop = threading.Event()
-        self._janitor_interval_seconds = min(60.0, max(5.0, self._upload_ttl_seconds / 4.0))
-        self._janitor_thread = threading.Thread(
-            target=self._janitor_loop,
-            daemon=True,
-            name="blob-upload-janitor",
+        self._cleanup_interval_seconds = min(60.0, max(5.0, self._upload_ttl_seconds / 4.0))
+        self._next_cleanup = 0.0
+
+    def _root(self) -> Path:
+        if self._root_override is not None:
+            return self._root_override.expanduser().resolve()
+        return Path(str(BLOB_STORE_DIR)).expanduser().resolve()
+
+    def _ensure_dirs(self) -> Path:
+        p = self._root()
+        (p / "tmp").mkdir(parents=True, exist_ok=True)
+        return p
+
+    def _index_locked(self, *, create: bool = True) -> Optional[sqlite3.Connection]:
+        """The index connection (caller holds ``self._lock``); None if absent and not *create*."""
+        root = self._root()
+        if self._conn is not None and self._conn_root == root:
+            return self._conn
+        db_path = root / "index.db"
+        if not create and not db_path.exists():
+            return None
+        self._ensure_dirs()
+        conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_INDEX_SCHEMA)
+        conn.commit()
+        if self._conn is not None:
+            self._conn.close()
+        self._conn, self._conn_root = conn, root
+        return conn
+
+    def object_path(self, sha256: str) -> Path:
+        return self._root() / "sha256" / sha256[:2] / sha256
+
+    def _info(self, row: tuple, *, deduplicated: bool = False) -> BlobInfo:
+        blob_id, run_id, sha256, size, filename, mime, created_at = row
+        return BlobInfo(
+            blob_id=blob_id,
+            run_id=run_id,
+            sha256=sha256,
+            size=int(size),
+            filename=filename,
+            mime=mime,
+            created_at=float(created_at),
+            path=self.object_path(sha256),
+            deduplicated=deduplicated,
         )
-        self._janitor_thread.start()
 
-    def _janitor_loop(self) -> None:
-        while not self._janitor_stop.wait(self._janitor_interval_seconds):
-            try:
-                self.cleanup_expired_uploads()
-            except Exception:
-                logger.debug("blob upload janitor error", exc_info=True)
+    def _get_info_locked(self, blob_id: str) -> Optional[BlobInfo]:
+        conn = self._index_locked(create=False)
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT blob_id, run_id, sha256, size, filename, mime, created_at FROM blobs WHERE blob_id = ?",
+            (blob_id,),
+        ).fetchone()
+        return self._info(row) if row is not None else None
 
     def cleanup_expired_uploads(self) -> int:
         deadline = float(time.time()) - self._upload_ttl_seconds
@@ -75,26 +208,26 @@ class BlobStore:
                     pass
                 expired.append(sess)
                 self._uploads.pop(upload_id, None)
-                if self._blob_to_run.get(sess.blob_id) == sess.run_id:
-                    self._blob_to_run.pop(sess.blob_id, None)
 
         for sess in expired:
-            for path in (sess.tmp_path, sess.final_path):
-                try:
-                    if path.exists():
-                        path.unlink()
-                except FileNotFoundError:
-                    pass
-                except Exception:
-                    logger.warning("Failed to remove expired blob {}: {}", path, sess.upload_id, exc_info=True)
+            try:
+                sess.tmp_path.unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Failed to remove expired upload {}: {}", sess.tmp_path, sess.upload_id, exc_info=True)
         return len(expired)
 
-    def _ensure_dirs(self) -> Path:
-        p = Path(str(BLOB_STORE_DIR)).expanduser().resolve()
-        p.mkdir(parents=True, exist_ok=True)
-        return p
+    def _maybe_cleanup(self) -> None:
+        now = time.monotonic()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self._cleanup_interval_seconds
+        try:
+            self.cleanup_expired_uploads()
+        except Exception:
+            logger.debug("blob upload cleanup error", exc_info=True)
 
     def create_upload(self, *, run_id: str, filename: Optional[str], mime: Optional[str], max_bytes: Optional[int]) -> UploadSession:
+        self._maybe_cleanup()
         base = self._ensure_dirs()
         upload_id = str(uuid.uuid4())
         blob_id = upload_id
@@ -108,9 +241,6 @@ class BlobStore:
             except (ValueError, TypeError) as e:
                 raise ValueError(f"invalid max_bytes: {max_bytes}") from e
 
-        tmp_path = base / f"{blob_id}.upload"
-        final_path = base / f"{blob_id}.blob"
-
         sess = UploadSession(
             upload_id=upload_id,
             run_id=str(run_id),
@@ -119,52 +249,143 @@ class BlobStore:
             mime=str(mime) if isinstance(mime, str) and mime else None,
             created_at=created_at,
             max_bytes=limit,
-            tmp_path=tmp_path,
-            final_path=final_path,
+            tmp_path=base / "tmp" / f"{upload_id}.upload",
         )
         with self._lock:
             self._uploads[upload_id] = sess
-            self._blob_to_run[blob_id] = str(run_id)
         return sess
 
     def get_upload(self, upload_id: str) -> Optional[UploadSession]:
         with self._lock:
             return self._uploads.get(str(upload_id))
 
-    def finalize_upload(self, upload_id: str) -> UploadSession:
+    def open_writer(self, session: UploadSession) -> BlobWriter:
+        self._ensure_dirs()
+        return BlobWriter(session)
+
+    def finalize_upload(self, upload_id: str, *, sha256: Optional[str] = None) -> BlobInfo:
+        """Move a completed upload into the object store (or drop it if already stored).
+
+        *sha256* is the digest computed while streaming; when omitted the temp
+        file is hashed here. Finalizing an already finalized upload returns
+        the stored blob.
+        """
         upload_id = str(upload_id)
         with self._lock:
             sess = self._uploads.get(upload_id)
             if sess is None:
+                done = self._get_info_locked(upload_id)
+                if done is not None:
+                    return done
                 raise UploadNotFoundError(upload_id, reason="session not found (expired or never created)")
-            if sess.final_path.exists():
-                if self._uploads.get(upload_id) == sess:
-                    self._uploads.pop(upload_id, None)
-                return sess
-            if sess.tmp_path.exists():
-                os.replace(str(sess.tmp_path), str(sess.final_path))
+        if not sess.tmp_path.exists():
+            logger.warning("finalize_upload: temp file missing for upload_id={}", upload_id)
+            with self._lock:
                 if self._uploads.get(upload_id) == sess:
                     self._uploads.pop(upload_id, None)
-                return sess
-            logger.warning("finalize_upload: both paths missing for upload_id={}", upload_id)
-            if self._uploads.get(upload_id) == sess:
-                self._uploads.pop(upload_id, None)
-            if self._blob_to_run.get(sess.blob_id) == sess.run_id:
-                self._blob_to_run.pop(sess.blob_id, None)
-            raise UploadNotFoundError(upload_id, reason="both tmp and final paths missing")
+            raise UploadNotFoundError(upload_id, reason="upload data missing")
 
-    def get_blob_path(self, *, run_id: str, blob_id: str) -> Optional[Path]:
+        digest = sha256 or _hash_file(sess.tmp_path)
+        size = sess.tmp_path.stat().st_size
+        obj_path = self.object_path(digest)
+        with self._lock:
+            if self._uploads.get(upload_id) != sess:
+                done = self._get_info_locked(upload_id)
+                if done is not None:
+                    return done
+                raise UploadNotFoundError(upload_id, reason="session expired during finalize")
+            conn = self._index_locked()
+            assert conn is not None
+            row = conn.execute("SELECT refcount FROM objects WHERE sha256 = ?", (digest,)).fetchone()
+            deduplicated = row is not None and obj_path.exists()
+            if deduplicated:
+                sess.tmp_path.unlink(missing_ok=True)
+            else:
+                obj_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(str(sess.tmp_path), str(obj_path))
+            now = float(time.time())
+            with conn:
+                conn.execute(
+                    "INSERT INTO objects (sha256, size, refcount, created_at) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(sha256) DO UPDATE SET refcount = refcount + 1",
+                    (digest, size, now),
+                )
+                conn.execute(
+                    "INSERT INTO blobs (blob_id, run_id, sha256, size, filename, mime, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sess.blob_id, sess.run_id, digest, size, sess.filename, sess.mime, now),
+                )
+            self._uploads.pop(upload_id, None)
+            return self._info(
+                (sess.blob_id, sess.run_id, digest, size, sess.filename, sess.mime, now),
+                deduplicated=deduplicated,
+            )
+
+    def _release_locked(self, conn: sqlite3.Connection, where: str, param: str) -> int:
+        rows = conn.execute(f"SELECT blob_id, sha256 FROM blobs WHERE {where}", (param,)).fetchall()
+        if not rows:
+            return 0
+        dead: List[str] = []
+        with conn:
+            conn.execute(f"DELETE FROM blobs WHERE {where}", (param,))
+            for _blob_id, digest in rows:
+                conn.execute("UPDATE objects SET refcount = refcount - 1 WHERE sha256 = ?", (digest,))
+            for digest in dict.fromkeys(digest for _blob_id, digest in rows):
+                if conn.execute(
+                    "DELETE FROM objects WHERE sha256 = ? AND refcount <= 0", (digest,)
+                ).rowcount:
+                    dead.append(digest)
+        # Unlink under the lock: a concurrent finalize of the same content
+        # would otherwise recreate the object just before it is removed.
+        for digest in dead:
+            try:
+                self.object_path(digest).unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Failed to remove blob object {}", digest, exc_info=True)
+        return len(rows)
+
+    def release_blob(self, blob_id: str) -> bool:
+        """Drop one blob reference; the object is deleted with its last reference."""
+        with self._lock:
+            conn = self._index_locked(create=False)
+            return conn is not None and self._release_locked(conn, "blob_id = ?", str(blob_id)) > 0
+
+    def release_run(self, run_id: str) -> int:
+        """Drop every blob (and pending upload) of a run; returns the number of blobs released."""
         rid = str(run_id)
-        bid = str(blob_id)
         with self._lock:
-            owner = self._blob_to_run.get(bid)
-        if owner != rid:
-            return None
-        base = self._ensure_dirs()
-        p = base / f"{bid}.blob"
-        if not p.exists():
+            pending = [s for s in self._uploads.values() if s.run_id == rid]
+            for sess in pending:
+                self._uploads.pop(sess.upload_id, None)
+            conn = self._index_locked(create=False)
+            released = self._release_locked(conn, "run_id = ?", rid) if conn is not None else 0
+        for sess in pending:
+            try:
+                sess.tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+        return released
+
+    def get_blob(self, *, run_id: str, blob_id: str) -> Optional[BlobInfo]:
+        with self._lock:
+            info = self._get_info_locked(str(blob_id))
+        if info is None or info.run_id != str(run_id) or not info.path.exists():
             return None
-        return p
+        return info
+
+    def get_blob_path(self, *, run_id: str, blob_id: str) -> Optional[Path]:
+        info = self.get_blob(run_id=run_id, blob_id=blob_id)
+        return info.path if info is not None else None
+
+    def usage(self) -> Dict[str, int]:
+        """Blob / object counts, bytes referenced by blobs and bytes actually stored."""
+        with self._lock:
+            conn = self._index_locked(create=False)
+            if conn is None:
+                return {"blobs": 0, "objects": 0, "logical_bytes": 0, "stored_bytes": 0}
+            blobs, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            objects, stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        return {"blobs": blobs, "objects": objects, "logical_bytes": logical, "stored_bytes": stored}
 
 
 blob_store = BlobStore()
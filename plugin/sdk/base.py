@@ -138,11 +138,14 @@ class NekoPluginBase(HookExecutorMixin):
         # 读取 database 配置（默认禁用，需要在 plugin.toml 中显式启用）
         db_enabled = False
         db_name = None
+        db_pool: Dict[str, Any] = {}
         try:
             db_cfg = _effective_cfg.get("plugin", {}).get("database", {})
             if isinstance(db_cfg, dict):
                 db_enabled = db_cfg.get("enabled", False)
                 db_name = db_cfg.get("name")
+                # 可选的连接池配置：pool_size / max_overflow / pool_timeout
+                db_pool = {k: db_cfg[k] for k in ("pool_size", "max_overflow", "pool_timeout") if k in db_cfg}
         except Exception:
             pass
         
@@ -152,6 +155,7 @@ class NekoPluginBase(HookExecutorMixin):
             logger=getattr(ctx, "logger", None),
             enabled=db_enabled,
             db_name=db_name,
+            **db_pool,
         )
 
     def get_input_schema(self) -> Dict[str, Any]:
@@ -305,12 +305,5 @@ class BusDeletableClientBase(BusRpcClientBase):
                 self.ctx._plugin_comm_queue.put(request, timeout=timeout)
             except Exception as e:
                 raise RuntimeError(f"Failed to send {self._del_type}: {e}") from e
-            loop = asyncio.get_running_loop()
-            start = loop.time()
-            resp = None
-            while loop.time() - start < timeout:
-                resp = state.get_plugin_response(req_id)
-                if resp is not None:
-                    break
-                await asyncio.sleep(0.01)
+            resp = await state.wait_for_plugin_response_async(req_id, timeout)
         return self._check_delete_response(resp)
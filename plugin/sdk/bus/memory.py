@@ -296,18 +296,8 @@ class MemoryClient:
             except Exception as e:
                 raise RuntimeError(f"Failed to send USER_CONTEXT_GET request: {e}") from e
 
-            start_time = asyncio.get_event_loop().time()
-            check_interval = 0.01
-            while asyncio.get_event_loop().time() - start_time < timeout:
-                response = state.get_plugin_response(request_id)
-                if response is None:
-                    await asyncio.sleep(check_interval)
-                    continue
-
-                if not isinstance(response, dict):
-                    await asyncio.sleep(check_interval)
-                    continue
-
+            response = await state.wait_for_plugin_response_async(request_id, timeout)
+            if isinstance(response, dict):
                 if response.get("error"):
                     raise RuntimeError(str(response.get("error")))
 
@@ -322,7 +312,6 @@ class MemoryClient:
                     history = result
                 else:
                     history = []
-                break
 
             else:
                 orphan_response = None
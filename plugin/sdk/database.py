@@ -4,24 +4,41 @@
 提供基于 SQLAlchemy 的数据库支持，包括：
 - 自动创建数据库文件
 - ORM 模型定义
-- 同步和异步 Session 管理
+- 同步和异步 Session 管理（连接池 + 线程本地长生命周期 Session）
+- 批量插入 / upsert
+- 专用数据库线程上的异步访问
 - 简单易用的 API
 """
 
 import asyncio
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, TYPE_CHECKING, Any, Union, Coroutine, overload
+from typing import (
+    Optional, TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Sequence, Set, Tuple,
+    TypeVar, Union, Coroutine, overload,
+)
 from contextlib import contextmanager, asynccontextmanager
 
-from sqlalchemy import create_engine, event, text
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy import Table, create_engine, event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 
 if TYPE_CHECKING:
     from loguru import Logger as LoguruLogger
 
+_T = TypeVar("_T")
+
+# 进程内已确认存在的 (数据库文件, 表名)，同一张表只执行一次 CREATE TABLE IF NOT EXISTS
+_SCHEMA_CACHE: Set[Tuple[str, str]] = set()
+_SCHEMA_LOCK = threading.Lock()
+# 单条 SQL 中 IN (...) 的最大参数个数（老版本 SQLite 上限为 999）
+_SQL_BATCH = 500
+
 
 class PluginDatabase:
     """
@@ -50,6 +67,12 @@ class PluginDatabase:
         async with self.db.async_session() as session:
             result = await session.execute(select(User))
             users = result.scalars().all()
+        
+        # 批量写入
+        self.db.bulk_upsert(User, [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}])
+        
+        # 在专用数据库线程上执行同步代码（不阻塞事件循环）
+        users = await self.db.run_in_db_thread(lambda s: s.query(User).all())
     """
     
     def __init__(
@@ -59,6 +82,9 @@ class PluginDatabase:
         logger: Optional["LoguruLogger"] = None,
         enabled: bool = True,
         db_name: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
     ):
         """
         初始化数据库管理器
@@ -69,11 +95,17 @@ class PluginDatabase:
             logger: 日志记录器
             enabled: 是否启用数据库（默认 True）
             db_name: 数据库文件名（默认为 {plugin_id}.db）
+            pool_size: 同步引擎连接池常驻连接数
+            max_overflow: 连接池在 pool_size 之外允许临时创建的连接数
+            pool_timeout: 连接池耗尽时等待空闲连接的秒数
         """
         self.plugin_id = plugin_id
         self.plugin_dir = Path(plugin_dir)
         self.logger = logger
         self.enabled = enabled
+        self.pool_size = max(1, int(pool_size))
+        self.max_overflow = max(0, int(max_overflow))
+        self.pool_timeout = float(pool_timeout)
         
         # 数据库文件路径
         if db_name is None:
@@ -88,6 +120,12 @@ class PluginDatabase:
         self._async_engine = None
         self._SessionLocal = None
         self._AsyncSessionLocal = None
+        self._scoped = None
+        self._kv_store: Optional["PluginKVStore"] = None
+        
+        # 专用数据库线程（首次使用 run_in_db_thread 时创建）
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         
         if self.enabled:
             self._init_engines()
@@ -101,20 +139,25 @@ class PluginDatabase:
         注意：这只是创建引擎对象，不会立即创建数据库文件。
         数据库文件会在首次连接时（调用 create_all() 或 session()）自动创建。
         """
-        # 同步引擎
+        # 同步引擎：连接池复用连接，每个线程同一时刻持有各自的连接
         sync_url = f"sqlite:///{self._db_path}"
         self._engine = create_engine(
             sync_url,
             connect_args={"check_same_thread": False},
-            poolclass=StaticPool,
+            poolclass=QueuePool,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
             echo=False,
         )
         
-        # 启用 SQLite 外键约束
+        # 启用 SQLite 外键约束；WAL 模式下多个连接读写互不阻塞
         @event.listens_for(self._engine, "connect")
         def set_sqlite_pragma(dbapi_conn, connection_record):
             cursor = dbapi_conn.cursor()
             cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
             cursor.close()
         
         # 同步 Session 工厂
@@ -125,6 +168,9 @@ class PluginDatabase:
             expire_on_commit=False,
         )
         
+        # 线程本地的长生命周期 Session：同一线程内反复复用，避免每次操作重新构造
+        self._scoped = scoped_session(self._SessionLocal)
+        
         # 异步引擎
         async_url = f"sqlite+aiosqlite:///{self._db_path}"
         self._async_engine = create_async_engine(
@@ -362,12 +408,173 @@ class PluginDatabase:
         
         return self._AsyncSessionLocal()
     
+    def scoped_session(self) -> Session:
+        """
+        获取当前线程的长生命周期 Session
+        
+        同一线程多次调用返回同一个 Session；事务结束（commit / rollback）后连接归还连接池，
+        Session 本身留待下次复用。适合高频的小读写，无需每次构造 Session。
+        
+        Returns:
+            Session: 当前线程的 SQLAlchemy Session 对象
+        """
+        if not self.enabled:
+            raise RuntimeError(f"PluginDatabase is disabled for plugin {self.plugin_id}")
+        
+        return self._scoped()
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        在当前线程的 scoped Session 上执行一个事务，成功提交、异常回滚
+        
+        如果调用方正在同一个 scoped Session 上进行尚未结束的事务，改用独立 Session，
+        不会替调用方提交或回滚。
+        """
+        session = self.scoped_session()
+        if session.in_transaction():
+            with self.session() as own:
+                yield own
+                own.commit()
+            return
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+    
+    @staticmethod
+    def _resolve_table(target: Any) -> Table:
+        table = getattr(target, "__table__", target)
+        if not isinstance(table, Table):
+            raise TypeError(f"Expected an ORM model or Table, got {type(target).__name__}")
+        return table
+    
+    def bulk_insert(self, target: Any, rows: Iterable[Mapping[str, Any]]) -> int:
+        """
+        批量插入（单个事务，executemany）
+        
+        Args:
+            target: ORM 模型类或 Table
+            rows: 行数据（列名 -> 值）
+        
+        Returns:
+            插入的行数
+        """
+        if not self.enabled:
+            raise RuntimeError(f"PluginDatabase is disabled for plugin {self.plugin_id}")
+        
+        table = self._resolve_table(target)
+        data = [dict(r) for r in rows]
+        if not data:
+            return 0
+        with self._transaction() as session:
+            session.execute(table.insert(), data)
+        return len(data)
+    
+    def bulk_upsert(
+        self,
+        target: Any,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        index_elements: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        批量插入或更新（INSERT ... ON CONFLICT DO UPDATE，单个事务）
+        
+        Args:
+            target: ORM 模型类或 Table
+            rows: 行数据（列名 -> 值）
+            index_elements: 冲突判定列（默认为主键）
+            update_columns: 冲突时更新的列（默认为行数据中除冲突列外的所有列；为空则忽略冲突行）
+        
+        Returns:
+            处理的行数
+        """
+        if not self.enabled:
+            raise RuntimeError(f"PluginDatabase is disabled for plugin {self.plugin_id}")
+        
+        table = self._resolve_table(target)
+        data = [dict(r) for r in rows]
+        if not data:
+            return 0
+        conflict = list(index_elements) if index_elements else [c.name for c in table.primary_key.columns]
+        if not conflict:
+            raise ValueError(f"Table {table.name} has no primary key; pass index_elements")
+        if update_columns is None:
+            update_columns = [c for c in data[0] if c not in conflict]
+        
+        stmt = sqlite_insert(table)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict,
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict)
+        with self._transaction() as session:
+            session.execute(stmt, data)
+        return len(data)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix=f"plugin-db-{self.plugin_id}",
+                )
+            return self._executor
+    
+    async def run_in_db_thread(self, fn: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """
+        在专用数据库线程上执行同步函数（异步等待结果）
+        
+        所有调用在同一个线程内串行执行，复用该线程的 scoped Session，
+        事件循环不会被 SQLite IO 阻塞。函数的第一个参数为该线程的 Session，
+        返回前自动提交；异常时回滚。
+        
+        Usage:
+            users = await self.db.run_in_db_thread(lambda s: s.query(User).all())
+        
+        Returns:
+            fn 的返回值
+        """
+        if not self.enabled:
+            raise RuntimeError(f"PluginDatabase is disabled for plugin {self.plugin_id}")
+        
+        def _call() -> _T:
+            with self._transaction() as session:
+                return fn(session, *args, **kwargs)
+        
+        return await asyncio.wrap_future(self._get_executor().submit(_call))
+    
+    async def _offload(self, fn: Callable[..., _T], *args: Any) -> _T:
+        """在专用数据库线程上执行不需要 Session 参数的函数"""
+        return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+    
+    def _shutdown_executor(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            if self._scoped is not None:
+                # 数据库线程上的 scoped Session 只能在该线程内移除
+                executor.submit(self._scoped.remove)
+            executor.shutdown(wait=True)
+    
+    def _release_sessions(self) -> None:
+        self._shutdown_executor()
+        if self._scoped is not None:
+            self._scoped.remove()
+    
     def close(self) -> None:
         """
         关闭数据库连接
         
         清理所有引擎和连接池。
         """
+        self._release_sessions()
         if self._engine:
             self._engine.dispose()
             self._engine = None
@@ -386,6 +593,7 @@ class PluginDatabase:
         
         清理所有引擎和连接池。
         """
+        self._release_sessions()
         if self._engine:
             self._engine.dispose()
             self._engine = None
@@ -443,7 +651,7 @@ class PluginDatabase:
         Returns:
             PluginKVStore: KV 存储接口
         """
-        if not hasattr(self, "_kv_store") or self._kv_store is None:
+        if self._kv_store is None:
             self._kv_store = PluginKVStore(self)
         return self._kv_store
 
@@ -455,6 +663,9 @@ class PluginKVStore:
     提供类似 localStorage 的简单 API，数据存储在同一个 SQLite 数据库中。
     线程安全，支持并发访问。
     
+    每个操作复用当前线程的 scoped Session；KV 表的建表检查在进程内只执行一次。
+    ``*_async`` 方法在数据库专用线程上执行，不阻塞事件循环。
+    
     Note:
         此类是 PluginDatabase 的一部分，通过 db.kv 访问。
         如需独立的 KV 存储，请使用 PluginStore。
@@ -465,26 +676,44 @@ class PluginKVStore:
     
     def __init__(self, db: PluginDatabase):
         self._db = db
-        self._table_created = False
+        self._schema_key = (str(db.db_path.resolve()), self._TABLE_NAME)
     
-    def _ensure_table(self) -> None:
-        """确保 KV 表已创建"""
-        if self._table_created:
-            return
+    def _ensure_table(self, force: bool = False) -> None:
+        """确保 KV 表已创建（同一进程内同一数据库只检查一次）"""
         if not self._db.enabled:
             return
+        if not force and self._schema_key in _SCHEMA_CACHE:
+            return
         
-        with self._db.session() as session:
-            session.execute(text(f"""
-                CREATE TABLE IF NOT EXISTS {self._TABLE_NAME} (
-                    key TEXT PRIMARY KEY,
-                    value BLOB NOT NULL,
-                    created_at REAL NOT NULL,
-                    updated_at REAL NOT NULL
-                )
-            """))
-            session.commit()
-        self._table_created = True
+        with _SCHEMA_LOCK:
+            if not force and self._schema_key in _SCHEMA_CACHE:
+                return
+            with self._db._transaction() as session:
+                session.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self._TABLE_NAME} (
+                        key TEXT PRIMARY KEY,
+                        value BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """))
+            _SCHEMA_CACHE.add(self._schema_key)
+    
+    def _run(self, op: Callable[[Session], _T]) -> _T:
+        """在 scoped Session 的一个事务中执行操作
+        
+        建表缓存失效（例如数据库文件被外部删除重建）时重新建表并重试一次。
+        """
+        self._ensure_table()
+        try:
+            with self._db._transaction() as session:
+                return op(session)
+        except OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            self._ensure_table(force=True)
+            with self._db._transaction() as session:
+                return op(session)
     
     def _serialize(self, value: Any) -> bytes:
         """序列化值"""
@@ -508,119 +737,157 @@ class PluginKVStore:
         """获取值"""
         if not self._db.enabled:
             return default
-        self._ensure_table()
         
-        with self._db.session() as session:
-            result = session.execute(
-                text(f"SELECT value FROM {self._TABLE_NAME} WHERE key = :key"),
-                {"key": key}
-            ).fetchone()
-            if result is None:
-                return default
+        row = self._run(lambda session: session.execute(
+            text(f"SELECT value FROM {self._TABLE_NAME} WHERE key = :key"),
+            {"key": key}
+        ).fetchone())
+        if row is None:
+            return default
+        try:
+            return self._deserialize(row[0])
+        except Exception:
+            return default
+    
+    def mget(self, keys: Iterable[str], default: Any = None) -> Dict[str, Any]:
+        """批量获取值，返回 {键名: 值}，不存在的键对应 default"""
+        key_list = list(dict.fromkeys(keys))
+        result: Dict[str, Any] = {k: default for k in key_list}
+        if not self._db.enabled or not key_list:
+            return result
+        
+        def _op(session: Session) -> List[Any]:
+            rows: List[Any] = []
+            for i in range(0, len(key_list), _SQL_BATCH):
+                chunk = key_list[i:i + _SQL_BATCH]
+                params = {f"k{j}": k for j, k in enumerate(chunk)}
+                marks = ", ".join(f":k{j}" for j in range(len(chunk)))
+                rows.extend(session.execute(
+                    text(f"SELECT key, value FROM {self._TABLE_NAME} WHERE key IN ({marks})"),
+                    params
+                ).fetchall())
+            return rows
+        
+        for key, data in self._run(_op):
             try:
-                return self._deserialize(result[0])
+                result[key] = self._deserialize(data)
             except Exception:
-                return default
+                pass
+        return result
     
     def set(self, key: str, value: Any) -> None:
         """设置值"""
-        if not self._db.enabled:
-            return
-        self._ensure_table()
+        self.mset({key: value})
+    
+    def mset(self, mapping: Mapping[str, Any]) -> int:
+        """批量设置值（单个事务），返回写入的键数量"""
+        if not self._db.enabled or not mapping:
+            return 0
         
         now = time.time()
-        data = self._serialize(value)
-        
-        with self._db.session() as session:
-            session.execute(
-                text(f"""
-                    INSERT INTO {self._TABLE_NAME} (key, value, created_at, updated_at)
-                    VALUES (:key, :value, :now, :now)
-                    ON CONFLICT(key) DO UPDATE SET
-                        value = excluded.value,
-                        updated_at = excluded.updated_at
-                """),
-                {"key": key, "value": data, "now": now}
-            )
-            session.commit()
+        params = [
+            {"key": key, "value": self._serialize(value), "now": now}
+            for key, value in mapping.items()
+        ]
+        self._run(lambda session: session.execute(
+            text(f"""
+                INSERT INTO {self._TABLE_NAME} (key, value, created_at, updated_at)
+                VALUES (:key, :value, :now, :now)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = excluded.updated_at
+            """),
+            params
+        ))
+        return len(params)
     
     def delete(self, key: str) -> bool:
         """删除键"""
         if not self._db.enabled:
             return False
-        self._ensure_table()
         
-        with self._db.session() as session:
-            # 先检查是否存在
-            exists = session.execute(
-                text(f"SELECT 1 FROM {self._TABLE_NAME} WHERE key = :key"),
-                {"key": key}
-            ).fetchone() is not None
-            if exists:
-                session.execute(
-                    text(f"DELETE FROM {self._TABLE_NAME} WHERE key = :key"),
-                    {"key": key}
-                )
-                session.commit()
-            return exists
+        result = self._run(lambda session: session.execute(
+            text(f"DELETE FROM {self._TABLE_NAME} WHERE key = :key"),
+            {"key": key}
+        ))
+        return (result.rowcount or 0) > 0
     
     def exists(self, key: str) -> bool:
         """检查键是否存在"""
         if not self._db.enabled:
             return False
-        self._ensure_table()
         
-        with self._db.session() as session:
-            result = session.execute(
-                text(f"SELECT 1 FROM {self._TABLE_NAME} WHERE key = :key"),
-                {"key": key}
-            ).fetchone()
-            return result is not None
+        row = self._run(lambda session: session.execute(
+            text(f"SELECT 1 FROM {self._TABLE_NAME} WHERE key = :key"),
+            {"key": key}
+        ).fetchone())
+        return row is not None
     
     def keys(self, prefix: str = "") -> list:
         """获取所有键"""
         if not self._db.enabled:
             return []
-        self._ensure_table()
         
-        with self._db.session() as session:
+        def _op(session: Session) -> List[Any]:
             if prefix:
-                result = session.execute(
+                return session.execute(
                     text(f"SELECT key FROM {self._TABLE_NAME} WHERE key LIKE :prefix"),
                     {"prefix": prefix + "%"}
                 ).fetchall()
-            else:
-                result = session.execute(
-                    text(f"SELECT key FROM {self._TABLE_NAME}")
-                ).fetchall()
-            return [row[0] for row in result]
+            return session.execute(
+                text(f"SELECT key FROM {self._TABLE_NAME}")
+            ).fetchall()
+        
+        return [row[0] for row in self._run(_op)]
     
     def clear(self) -> int:
         """清空所有数据"""
         if not self._db.enabled:
             return 0
-        self._ensure_table()
         
-        with self._db.session() as session:
-            # 先获取数量
-            count = session.execute(
-                text(f"SELECT COUNT(*) FROM {self._TABLE_NAME}")
-            ).scalar() or 0
-            session.execute(text(f"DELETE FROM {self._TABLE_NAME}"))
-            session.commit()
-            return count
+        result = self._run(lambda session: session.execute(text(f"DELETE FROM {self._TABLE_NAME}")))
+        return result.rowcount or 0
     
     def count(self) -> int:
         """获取记录数"""
         if not self._db.enabled:
             return 0
-        self._ensure_table()
         
-        with self._db.session() as session:
-            result = session.execute(
-                text(f"SELECT COUNT(*) FROM {self._TABLE_NAME}")
-            ).fetchone()
-            return result[0] if result else 0
+        return self._run(lambda session: session.execute(
+            text(f"SELECT COUNT(*) FROM {self._TABLE_NAME}")
+        ).scalar()) or 0
+    
+    # 异步接口（在数据库专用线程上执行）
+    async def get_async(self, key: str, default: Any = None) -> Any:
+        """获取值（异步）"""
+        if not self._db.enabled:
+            return default
+        return await self._db._offload(self.get, key, default)
+    
+    async def mget_async(self, keys: Iterable[str], default: Any = None) -> Dict[str, Any]:
+        """批量获取值（异步）"""
+        key_list = list(keys)
+        if not self._db.enabled:
+            return {k: default for k in key_list}
+        return await self._db._offload(self.mget, key_list, default)
+    
+    async def set_async(self, key: str, value: Any) -> None:
+        """设置值（异步）"""
+        if not self._db.enabled:
+            return
+        await self._db._offload(self.set, key, value)
+    
+    async def mset_async(self, mapping: Mapping[str, Any]) -> int:
+        """批量设置值（异步）"""
+        if not self._db.enabled:
+            return 0
+        return await self._db._offload(self.mset, dict(mapping))
+    
+    async def delete_async(self, key: str) -> bool:
+        """删除键（异步）"""
+        if not self._db.enabled:
+            return False
+        return await self._db._offload(self.delete, key)
     
     # 便捷语法
     def __getitem__(self, key: str) -> Any:
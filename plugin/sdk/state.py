@@ -7,13 +7,19 @@
 - 手动保存（freeze 时）
 - 启动恢复（检测到保存的状态时自动恢复）
 - 扩展类型支持（datetime, Enum, dataclass 等）
+- 增量保存（file 后端：只追加变化的属性到 delta 日志，定期写完整快照）
 """
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime, date, timedelta
 from enum import Enum
+import hashlib
+import os
+import struct
+import threading
 import time
+import zlib
 
 try:
     import ormsgpack as msgpack
@@ -121,6 +127,9 @@ def _deserialize_extended_type(data: Dict[str, Any]) -> Any:
 # 扩展类型列表（用于类型检查）
 EXTENDED_TYPES = (datetime, date, timedelta, Enum, set, frozenset, Path)
 
+# 增量保存基线中可变值的占位（可变对象原地修改后仍是同一对象，不能按 is 跳过）
+_UNTRACKED = object()
+
 
 class PluginStatePersistence:
     """管理 __freezable__ 属性的状态持久化
@@ -135,6 +144,13 @@ class PluginStatePersistence:
     插件可以通过实现 __freeze_serialize__ 和 __freeze_deserialize__ 方法
     来支持自定义类型的序列化。
     
+    file 后端的增量保存：
+    - 每个属性单独序列化并记录摘要，保存时只把摘要变化的属性（以及被删除的属性）
+      追加到 ``.plugin_state.log``，不再重写整个状态
+    - 本进程首次保存、freeze、delta 条数达到 ``snapshot_every`` 或日志超过快照大小的
+      ``compact_ratio`` 倍时，原子地写一次完整快照 ``.plugin_state`` 并清空日志
+    - 恢复时读取快照，再按顺序重放同一代（generation）的 delta；末尾写坏的记录被忽略
+    
     Note:
         此类用于自动管理运行时状态（freeze/unfreeze），适合保存计数器、缓存等。
         如需手动管理持久化数据，请使用 PluginDatabase.kv 或 PluginStore。
@@ -143,8 +159,14 @@ class PluginStatePersistence:
     # 支持序列化的基本类型
     SERIALIZABLE_TYPES = (str, int, float, bool, type(None), list, dict, tuple, bytes)
     
+    # 同一对象未被替换时可跳过重新序列化的不可变类型
+    _IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+    
     # 状态文件版本
-    STATE_VERSION = 3  # 升级版本号，支持扩展类型
+    STATE_VERSION = 4  # 快照带 generation，配合 delta 日志
+    
+    # delta 日志记录头：payload 长度 + CRC32
+    _LOG_HEADER = struct.Struct(">II")
     
     def __init__(
         self,
@@ -152,14 +174,19 @@ class PluginStatePersistence:
         plugin_dir: Path,
         logger: Optional["LoguruLogger"] = None,
         backend: str = "off",  # "file", "memory", or "off"
+        snapshot_every: int = 1000,
+        compact_ratio: float = 1.0,
     ):
         self.plugin_id = plugin_id
         self.plugin_dir = Path(plugin_dir)
         self.logger = logger
         self.backend = backend.lower() if backend else "off"
+        self.snapshot_every = max(1, int(snapshot_every))
+        self.compact_ratio = float(compact_ratio)
         
         # 状态文件路径
         self._state_path = self.plugin_dir / ".plugin_state"
+        self._log_path = self.plugin_dir / ".plugin_state.log"
         
         # 内存中的最新状态（用于快速访问）
         self._cached_state: Optional[bytes] = None
@@ -167,6 +194,15 @@ class PluginStatePersistence:
         
         # 保存计数器（用于统计）
         self._save_count: int = 0
+        
+        # 增量保存的基线：上次落盘时每个属性的 (不可变对象或 _UNTRACKED, 序列化摘要)
+        self._lock = threading.Lock()
+        self._baseline: Optional[Dict[str, Tuple[Any, bytes]]] = None
+        self._generation: int = 0
+        self._snapshot_bytes: int = 0
+        self._log_bytes: int = 0
+        self._delta_count: int = 0
+        self._log_file: Optional[BinaryIO] = None
     
     def _is_serializable(self, value: Any, instance: Any = None) -> bool:
         """检查值是否可序列化
@@ -317,6 +353,54 @@ class PluginStatePersistence:
                     )
         return restored_count
     
+    def _encode_attr(
+        self,
+        instance: Any,
+        key: str,
+    ) -> Optional[Tuple[Any, Optional[Any], bytes]]:
+        """序列化单个属性，返回 (原值, 序列化后的对象, 摘要)；属性缺失或不可序列化时返回 None
+        
+        未变化的属性不做扩展序列化（对象位为 None）：
+        - 不可变值仍是上次保存的同一个对象时，直接复用上次的摘要
+        - 其余值先用 msgpack 直接编码原值求摘要（C 实现，远快于逐层 _serialize_value），
+          与上次相同即视为未变化；含扩展类型等无法直接编码时退回完整序列化
+        """
+        if not hasattr(instance, key):
+            if self.logger:
+                self.logger.debug(
+                    f"[State] Attribute '{key}' not found in plugin {self.plugin_id}"
+                )
+            return None
+        
+        value = getattr(instance, key)
+        prev = self._baseline.get(key) if self._baseline else None
+        if prev is not None and prev[0] is value:
+            return value, None, prev[1]
+        
+        fast_digest = self._raw_digest(value)
+        if prev is not None and fast_digest is not None and prev[1] == fast_digest:
+            return value, None, fast_digest
+        
+        if not self._is_serializable(value, instance):
+            if self.logger:
+                self.logger.warning(
+                    f"[State] Attribute '{key}' is not serializable, skipping"
+                )
+            return None
+        obj = self._serialize_value(key, value, instance)
+        if fast_digest is not None:
+            return value, obj, fast_digest
+        digest = hashlib.blake2b(self._serialize(obj), digest_size=16, person=b"obj").digest()
+        return value, obj, digest
+    
+    def _raw_digest(self, value: Any) -> Optional[bytes]:
+        """直接编码原值求摘要；原值含 msgpack 无法直接编码的类型时返回 None"""
+        try:
+            packed = self._serialize(value)
+        except Exception:
+            return None
+        return hashlib.blake2b(packed, digest_size=16, person=b"raw").digest()
+    
     def save(
         self,
         instance: Any,
@@ -325,6 +409,8 @@ class PluginStatePersistence:
     ) -> bool:
         """保存插件状态
         
+        file 后端只追加变化的属性到 delta 日志，必要时写完整快照；memory 后端总是整体保存。
+        
         Args:
             instance: 插件实例
             freezable_keys: 需要保存的属性名列表
@@ -338,53 +424,181 @@ class PluginStatePersistence:
             return True
         
         try:
-            snapshot = self.collect_attrs(instance, freezable_keys)
-            if not snapshot:
-                return True
-            
-            state_data = {
-                "version": self.STATE_VERSION,
-                "plugin_id": self.plugin_id,
-                "saved_at": time.time(),
-                "reason": reason,
-                "data": snapshot,
-            }
-            
-            data_bytes = self._serialize(state_data)
-            self._save_count += 1
-            
             if self.backend == "memory":
-                # 保存到内存（通过 GlobalState）
-                from plugin.core.state import state
-                state.save_frozen_state_memory(self.plugin_id, data_bytes)
-                # 同时缓存到本地
-                self._cached_state = data_bytes
-                self._cached_state_time = time.time()
-                if self.logger:
-                    self.logger.debug(
-                        f"[State] Saved to memory ({reason}): {len(snapshot)} attrs, "
-                        f"{len(data_bytes)} bytes"
-                    )
-            else:
-                # 保存到文件
-                self._state_path.write_bytes(data_bytes)
-                self._cached_state = data_bytes
-                self._cached_state_time = time.time()
-                if self.logger:
-                    self.logger.debug(
-                        f"[State] Saved to file ({reason}): {len(snapshot)} attrs, "
-                        f"{len(data_bytes)} bytes"
-                    )
-            
-            return True
+                return self._save_memory(instance, freezable_keys, reason)
+            with self._lock:
+                return self._save_file(instance, freezable_keys, reason)
         except Exception as e:
             if self.logger:
                 self.logger.exception(f"[State] Save failed: {e}")
             return False
     
+    def _build_state_data(self, snapshot: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        return {
+            "version": self.STATE_VERSION,
+            "plugin_id": self.plugin_id,
+            "saved_at": time.time(),
+            "reason": reason,
+            "generation": self._generation,
+            "data": snapshot,
+        }
+    
+    def _save_memory(self, instance: Any, freezable_keys: List[str], reason: str) -> bool:
+        snapshot = self.collect_attrs(instance, freezable_keys)
+        if not snapshot:
+            return True
+        
+        data_bytes = self._serialize(self._build_state_data(snapshot, reason))
+        self._save_count += 1
+        
+        # 保存到内存（通过 GlobalState）
+        from plugin.core.state import state
+        state.save_frozen_state_memory(self.plugin_id, data_bytes)
+        # 同时缓存到本地
+        self._cached_state = data_bytes
+        self._cached_state_time = time.time()
+        if self.logger:
+            self.logger.debug(
+                f"[State] Saved to memory ({reason}): {len(snapshot)} attrs, "
+                f"{len(data_bytes)} bytes"
+            )
+        return True
+    
+    def _save_file(self, instance: Any, freezable_keys: List[str], reason: str) -> bool:
+        # 调用方持有 self._lock
+        encoded: Dict[str, Tuple[Any, Optional[Any], bytes]] = {}
+        for key in freezable_keys:
+            entry = self._encode_attr(instance, key)
+            if entry is not None:
+                encoded[key] = entry
+        if not encoded:
+            return True
+        
+        baseline = self._baseline
+        if baseline is None or reason == "freeze" or self._delta_count >= self.snapshot_every:
+            return self._write_snapshot(instance, encoded, reason)
+        
+        changed = {
+            key: obj
+            for key, (_, obj, digest) in encoded.items()
+            if key not in baseline or baseline[key][1] != digest
+        }
+        deleted = [key for key in baseline if key not in encoded]
+        if not changed and not deleted:
+            return True
+        
+        payload = self._serialize({
+            "gen": self._generation,
+            "saved_at": time.time(),
+            "reason": reason,
+            "set": changed,
+            "del": deleted,
+        })
+        frame_size = self._LOG_HEADER.size + len(payload)
+        if self._log_bytes + frame_size > self._snapshot_bytes * self.compact_ratio:
+            # 日志已经比快照还大：与其继续追加，不如压实成一个新快照
+            return self._write_snapshot(instance, encoded, reason)
+        
+        if self._log_file is None:
+            self._log_file = open(self._log_path, "ab")
+        self._log_file.write(self._LOG_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._log_file.flush()
+        self._log_bytes += frame_size
+        self._delta_count += 1
+        self._save_count += 1
+        self._update_baseline(encoded)
+        if self.logger:
+            self.logger.debug(
+                f"[State] Appended delta ({reason}): {len(changed)} changed, "
+                f"{len(deleted)} deleted, {frame_size} bytes"
+            )
+        return True
+    
+    def _write_snapshot(
+        self,
+        instance: Any,
+        encoded: Dict[str, Tuple[Any, Optional[Any], bytes]],
+        reason: str,
+    ) -> bool:
+        snapshot = {
+            key: obj if obj is not None else self._serialize_value(key, value, instance)
+            for key, (value, obj, _) in encoded.items()
+        }
+        # generation 单调且跨进程唯一：旧进程残留的 delta 不会被重放到新快照上
+        self._generation = max(self._generation + 1, time.time_ns())
+        data_bytes = self._serialize(self._build_state_data(snapshot, reason))
+        
+        self._close_log()
+        tmp_path = self._state_path.with_name(self._state_path.name + ".tmp")
+        tmp_path.write_bytes(data_bytes)
+        os.replace(tmp_path, self._state_path)
+        # 快照已替换；此时崩溃留下的日志属于旧 generation，恢复时会被忽略
+        self._log_path.unlink(missing_ok=True)
+        
+        self._snapshot_bytes = len(data_bytes)
+        self._log_bytes = 0
+        self._delta_count = 0
+        self._save_count += 1
+        self._cached_state = data_bytes
+        self._cached_state_time = time.time()
+        self._update_baseline(encoded)
+        if self.logger:
+            self.logger.debug(
+                f"[State] Saved snapshot to file ({reason}): {len(snapshot)} attrs, "
+                f"{len(data_bytes)} bytes"
+            )
+        return True
+    
+    def _update_baseline(self, encoded: Dict[str, Tuple[Any, Optional[Any], bytes]]) -> None:
+        # 只为不可变值保留对象引用（用于同一对象跳过序列化）
+        self._baseline = {
+            key: (value if isinstance(value, self._IMMUTABLE_TYPES) else _UNTRACKED, digest)
+            for key, (value, _, digest) in encoded.items()
+        }
+    
+    def _close_log(self) -> None:
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except Exception:
+                pass
+            self._log_file = None
+    
+    def _replay_log(self, snapshot: Dict[str, Any], generation: Any) -> int:
+        """把属于该快照 generation 的 delta 依次应用到 snapshot 上，返回应用的记录数"""
+        if not self._log_path.exists():
+            return 0
+        
+        buf = self._log_path.read_bytes()
+        header = self._LOG_HEADER
+        offset = 0
+        applied = 0
+        while offset + header.size <= len(buf):
+            length, crc = header.unpack_from(buf, offset)
+            start = offset + header.size
+            payload = buf[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                # 末尾写了一半的记录（例如进程被杀）：之前的记录仍然有效
+                if self.logger:
+                    self.logger.warning(
+                        f"[State] Ignoring torn delta log tail at offset {offset}"
+                    )
+                break
+            offset = start + length
+            record = self._deserialize(payload)
+            if record.get("gen") != generation:
+                continue
+            snapshot.update(record.get("set") or {})
+            for key in record.get("del") or []:
+                snapshot.pop(key, None)
+            applied += 1
+        return applied
+    
     def load(self, instance: Any) -> bool:
         """加载并恢复插件状态
         
+        file 后端先读取快照，再重放同一 generation 的 delta 日志。
+        
         Args:
             instance: 插件实例
         
@@ -417,21 +631,25 @@ class PluginStatePersistence:
             state_data = self._deserialize(data_bytes)
             
             version = state_data.get("version", 0)
-            if version not in (1, 2, self.STATE_VERSION):
+            if version not in (1, 2, 3, self.STATE_VERSION):
                 if self.logger:
                     self.logger.warning(
                         f"[State] Unknown state version: {version}"
                     )
                 return False
             
-            snapshot = state_data.get("data", {})
+            snapshot = dict(state_data.get("data", {}))
+            replayed = 0
+            if self.backend == "file" and state_data.get("generation") is not None:
+                replayed = self._replay_log(snapshot, state_data["generation"])
             restored = self.restore_attrs(instance, snapshot)
             
             source = "memory" if self.backend == "memory" else "file"
             reason = state_data.get("reason", "unknown")
             if self.logger:
                 self.logger.info(
-                    f"[State] Restored from {source} (saved by {reason}): {restored} attrs"
+                    f"[State] Restored from {source} (saved by {reason}): {restored} attrs, "
+                    f"{replayed} deltas replayed"
                 )
             return True
         except Exception as e:
@@ -446,8 +664,15 @@ class PluginStatePersistence:
                 from plugin.core.state import state
                 state.clear_frozen_state_memory(self.plugin_id)
             elif self.backend == "file":
-                if self._state_path.exists():
-                    self._state_path.unlink()
+                with self._lock:
+                    self._close_log()
+                    if self._state_path.exists():
+                        self._state_path.unlink()
+                    self._log_path.unlink(missing_ok=True)
+                    self._baseline = None
+                    self._snapshot_bytes = 0
+                    self._log_bytes = 0
+                    self._delta_count = 0
             
             self._cached_state = None
             self._cached_state_time = 0.0
@@ -490,6 +715,11 @@ class PluginStatePersistence:
                 "reason": state_data.get("reason"),
                 "data_keys": list(state_data.get("data", {}).keys()),
                 "size_bytes": len(data_bytes),
+                "generation": state_data.get("generation"),
+                "delta_log_bytes": (
+                    self._log_path.stat().st_size
+                    if self.backend == "file" and self._log_path.exists() else 0
+                ),
             }
         except Exception:
             return None
@@ -4,11 +4,14 @@
 基于 SQLite 的轻量级键值存储，类似 localStorage。
 """
 
+import atexit
 import sqlite3
 import threading
 import time
+import weakref
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, TYPE_CHECKING
 
 try:
     import ormsgpack as msgpack
@@ -21,52 +24,105 @@ if TYPE_CHECKING:
     from loguru import Logger as LoguruLogger
 
 
+# 缓冲区 / LRU 中的条目：(序列化后的值, 过期时间戳或 None)；None 表示已删除（墓碑）
+_Entry = Optional[Tuple[bytes, Optional[float]]]
+_MISSING = object()
+# 单条 SQL 中 IN (...) 的最大参数个数（老版本 SQLite 上限为 999）
+_SQL_BATCH = 500
+
+
+def _expired(expires_at: Optional[float], now: float) -> bool:
+    return expires_at is not None and expires_at <= now
+
+
 class PluginStore:
     """
     插件持久化 KV 存储
-    
-    基于 SQLite 实现，提供类似 localStorage 的简单 API。
+
+    基于 SQLite（WAL 模式）实现，提供类似 localStorage 的简单 API。
     线程安全，支持并发访问。
-    
+
+    写入默认先进入内存缓冲区（write-behind），由后台线程每 ``flush_interval`` 秒
+    或缓冲满 ``max_pending`` 条时合并为一个事务提交；``flush()`` / ``close()`` 立即落盘。
+    读取依次查缓冲区、进程内 LRU、数据库，因此总能读到自己刚写入的值。
+    ``write_behind=False`` 时每次写入同步提交。
+    进程退出前需调用 ``close()``：multiprocessing 子进程以 ``os._exit`` 结束，不执行 atexit
+    （插件进程由 host 在退出前关闭 ``self.store``）。
+
+    键可以带 TTL（秒）：过期的键读取时视为不存在并惰性删除，后台线程每
+    ``expire_interval`` 秒批量清理。
+
     Usage:
         store = PluginStore(plugin_id, plugin_dir)
-        
+
         # 基本操作
         store.set("key", {"data": 123})
         value = store.get("key")
         store.delete("key")
-        
+
+        # 批量与过期
+        store.mset({"a": 1, "b": 2}, ttl=60)
+        values = store.mget(["a", "b", "c"])  # {"a": 1, "b": 2, "c": None}
+        store.mdelete(["a", "b"])
+        store.flush()
+
         # 便捷语法
         store["key"] = {"data": 123}
         value = store["key"]
         del store["key"]
     """
-    
+
     def __init__(
         self,
         plugin_id: str,
         plugin_dir: Path,
         logger: Optional["LoguruLogger"] = None,
         enabled: bool = True,
+        *,
+        write_behind: bool = True,
+        flush_interval: float = 0.2,
+        max_pending: int = 1000,
+        cache_size: int = 1024,
+        expire_interval: float = 60.0,
     ):
         self.plugin_id = plugin_id
         self.plugin_dir = Path(plugin_dir)
         self.logger = logger
         self.enabled = enabled
-        
+        self.write_behind = bool(write_behind)
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.max_pending = max(1, int(max_pending))
+        self.cache_size = max(0, int(cache_size))
+        self.expire_interval = float(expire_interval)
+
         # 数据库文件路径
         self._db_path = self.plugin_dir / "store.db"
-        
+
         # 线程本地连接（每个线程一个连接）
         self._local = threading.local()
-        
+
+        # _lock 保护内存结构（缓冲区 / LRU），_write_lock 串行化所有数据库写入，
+        # 保证「缓冲写入落盘」与「删除 / 清空」按调用顺序生效。
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._pending: Dict[str, _Entry] = {}
+        # 正在由 flush 提交、其他线程连接尚不可见的条目
+        self._flushing: Dict[str, _Entry] = {}
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        # 每次写入递增；读库回填 LRU 前比对，避免并发写入后回填旧值
+        self._generation = 0
+        self._last_expire = time.time()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
         # 初始化数据库（仅在启用时）
         if self.enabled:
             self._init_db()
         else:
             if self.logger:
                 self.logger.debug(f"[Store] PluginStore disabled for plugin {self.plugin_id}")
-    
+
     def _get_conn(self) -> sqlite3.Connection:
         """获取当前线程的数据库连接"""
         if not self.enabled:
@@ -78,186 +134,487 @@ class PluginStore:
                 timeout=10.0,
             )
             self._local.conn.row_factory = sqlite3.Row
+            # WAL 下 NORMAL 只在检查点时 fsync，读写互不阻塞
+            self._local.conn.execute("PRAGMA synchronous=NORMAL")
         return self._local.conn
-    
+
     def _init_db(self) -> None:
         """初始化数据库表"""
         conn = self._get_conn()
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS kv_store (
                 key TEXT PRIMARY KEY,
                 value BLOB NOT NULL,
                 created_at REAL NOT NULL,
-                updated_at REAL NOT NULL
+                updated_at REAL NOT NULL,
+                expires_at REAL
             )
         """)
+        # 旧版本创建的表没有 expires_at 列
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(kv_store)")}
+        if "expires_at" not in columns:
+            conn.execute("ALTER TABLE kv_store ADD COLUMN expires_at REAL")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_kv_store_expires_at ON kv_store (expires_at) "
+            "WHERE expires_at IS NOT NULL"
+        )
         conn.commit()
-    
+
     def _serialize(self, value: Any) -> bytes:
         """序列化值"""
         if _USE_ORMSGPACK:
             return msgpack.packb(value)
         return msgpack.packb(value, use_bin_type=True)
-    
+
     def _deserialize(self, data: bytes) -> Any:
         """反序列化值"""
         if _USE_ORMSGPACK:
             return msgpack.unpackb(data)
         return msgpack.unpackb(data, raw=False)
-    
+
+    def _decode(self, key: str, data: bytes, default: Any) -> Any:
+        try:
+            return self._deserialize(data)
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"[Store] Failed to deserialize key '{key}': {e}")
+            return default
+
+    # ------------------------------------------------------------------
+    # 内存层：缓冲区 + LRU
+    # ------------------------------------------------------------------
+
+    def _cache_put(self, key: str, entry: _Entry) -> None:
+        # 调用方持有 _lock
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _lookup_memory(self, key: str) -> Any:
+        """依次查缓冲区、提交中的条目与 LRU；都没有时返回 _MISSING。调用方持有 _lock。"""
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._flushing:
+            return self._flushing[key]
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        return _MISSING
+
+    def _select(self, keys: List[str]) -> Dict[str, Tuple[bytes, Optional[float]]]:
+        conn = self._get_conn()
+        found: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        for i in range(0, len(keys), _SQL_BATCH):
+            chunk = keys[i : i + _SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT key, value, expires_at FROM kv_store WHERE key IN ({marks})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                found[row["key"]] = (row["value"], row["expires_at"])
+        return found
+
+    def _load(self, keys: List[str]) -> Dict[str, _Entry]:
+        """读取一组键的条目（未过期判断前）；不存在的键为 None。"""
+        now = time.time()
+        out: Dict[str, _Entry] = {}
+        missing: List[str] = []
+        expired: List[str] = []
+        with self._lock:
+            generation = self._generation
+            for key in keys:
+                entry = self._lookup_memory(key)
+                if entry is _MISSING:
+                    missing.append(key)
+                else:
+                    out[key] = entry
+        if missing:
+            rows = self._select(missing)
+            with self._lock:
+                fill = generation == self._generation
+                for key in missing:
+                    entry = rows.get(key)
+                    out[key] = entry
+                    if fill:
+                        self._cache_put(key, entry)
+        for key, entry in out.items():
+            if entry is not None and _expired(entry[1], now):
+                out[key] = None
+                expired.append(key)
+        if expired:
+            self._expire_lazily(expired, now)
+        return out
+
+    def _expire_lazily(self, keys: List[str], now: float) -> None:
+        # 读到过期键时记一个墓碑，随下一次 flush 删除；期间被重新写入的键不受影响
+        with self._lock:
+            for key in keys:
+                entry = self._lookup_memory(key)
+                if entry is not _MISSING and entry is not None and _expired(entry[1], now):
+                    self._pending[key] = None
+                    self._cache_put(key, None)
+        self._ensure_flusher()
+
+    # ------------------------------------------------------------------
+    # 写入与落盘
+    # ------------------------------------------------------------------
+
+    def _buffer(self, entries: Dict[str, _Entry]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key, entry in entries.items():
+                self._pending[key] = entry
+                self._cache_put(key, entry)
+            full = len(self._pending) >= self.max_pending
+        # close() 之后没有后台线程，直接同步落盘
+        if not self.write_behind or full or self._stop.is_set():
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def flush(self) -> int:
+        """
+        把缓冲区中的写入提交到数据库
+
+        Returns:
+            提交的条目数
+        """
+        if not self.enabled:
+            return 0
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._flushing = batch
+            try:
+                self._commit(batch)
+            except Exception:
+                # 提交失败：放回缓冲区（期间的新写入优先），下次再试
+                with self._lock:
+                    for key, entry in batch.items():
+                        self._pending.setdefault(key, entry)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+            return len(batch)
+
+    def _commit(self, batch: Dict[str, _Entry]) -> None:
+        now = time.time()
+        upserts = [(k, e[0], now, now, e[1]) for k, e in batch.items() if e is not None]
+        deletes = [(k,) for k, e in batch.items() if e is None]
+        conn = self._get_conn()
+        try:
+            if upserts:
+                conn.executemany("""
+                    INSERT INTO kv_store (key, value, created_at, updated_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value,
+                        updated_at = excluded.updated_at,
+                        expires_at = excluded.expires_at
+                """, upserts)
+            if deletes:
+                conn.executemany("DELETE FROM kv_store WHERE key = ?", deletes)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def purge_expired(self) -> int:
+        """
+        立即删除所有已过期的键
+
+        Returns:
+            删除的记录数
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        with self._write_lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                "DELETE FROM kv_store WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            )
+            conn.commit()
+            removed = cursor.rowcount
+        with self._lock:
+            for key in [k for k, e in self._cache.items() if e is not None and _expired(e[1], now)]:
+                self._cache[key] = None
+            self._last_expire = now
+        return removed
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            ref = weakref.ref(self)
+            t = threading.Thread(
+                target=PluginStore._run_flusher,
+                args=(ref, self._stop, self._wake, self.flush_interval),
+                daemon=True,
+                name=f"plugin-store-{self.plugin_id}",
+            )
+            self._flusher = t
+            atexit.register(PluginStore._flush_at_exit, ref)
+            t.start()
+
+    @staticmethod
+    def _run_flusher(
+        ref: "weakref.ReferenceType[PluginStore]",
+        stop: threading.Event,
+        wake: threading.Event,
+        interval: float,
+    ) -> None:
+        # 只持有弱引用：插件丢弃 store 后线程随之退出
+        while not stop.is_set():
+            wake.wait(interval)
+            wake.clear()
+            store = ref()
+            if store is None:
+                return
+            try:
+                store.flush()
+                if store.expire_interval > 0 and time.time() - store._last_expire >= store.expire_interval:
+                    store.purge_expired()
+            except Exception as e:
+                if store.logger:
+                    store.logger.warning(f"[Store] Background flush failed for plugin {store.plugin_id}: {e}")
+            finally:
+                del store
+
+    @staticmethod
+    def _flush_at_exit(ref: "weakref.ReferenceType[PluginStore]") -> None:
+        store = ref()
+        if store is not None and store.enabled:
+            try:
+                store.flush()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # 公共 API
+    # ------------------------------------------------------------------
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         获取值
-        
+
         Args:
             key: 键名
-            default: 默认值（如果键不存在）
-        
+            default: 默认值（如果键不存在或已过期）
+
         Returns:
             存储的值，如果不存在则返回 default
         """
         if not self.enabled:
             return default
-        conn = self._get_conn()
-        cursor = conn.execute(
-            "SELECT value FROM kv_store WHERE key = ?",
-            (key,)
-        )
-        row = cursor.fetchone()
-        if row is None:
-            return default
-        try:
-            return self._deserialize(row["value"])
-        except Exception as e:
-            if self.logger:
-                self.logger.warning(f"[Store] Failed to deserialize key '{key}': {e}")
+        entry = self._load([key])[key]
+        if entry is None:
             return default
-    
-    def set(self, key: str, value: Any) -> None:
+        return self._decode(key, entry[0], default)
+
+    def mget(self, keys: Iterable[str], default: Any = None) -> Dict[str, Any]:
+        """
+        批量获取值（未命中内存的键合并为一次查询）
+
+        Args:
+            keys: 键名列表
+            default: 不存在或已过期的键对应的值
+
+        Returns:
+            {键名: 值} 字典，包含请求的每个键
+        """
+        key_list = list(dict.fromkeys(keys))
+        if not self.enabled:
+            return {k: default for k in key_list}
+        entries = self._load(key_list)
+        return {
+            k: default if entries[k] is None else self._decode(k, entries[k][0], default)  # type: ignore[index]
+            for k in key_list
+        }
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
         """
         设置值
-        
+
         Args:
             key: 键名
             value: 值（必须可序列化）
+            ttl: 过期时间（秒），None 表示永不过期
         """
         if not self.enabled:
             if self.logger:
                 self.logger.warning(f"[Store] Attempted to set key '{key}' but store is disabled")
             return
-        conn = self._get_conn()
-        now = time.time()
-        data = self._serialize(value)
-        
-        conn.execute("""
-            INSERT INTO kv_store (key, value, created_at, updated_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(key) DO UPDATE SET
-                value = excluded.value,
-                updated_at = excluded.updated_at
-        """, (key, data, now, now))
-        conn.commit()
-    
+        expires_at = time.time() + float(ttl) if ttl is not None else None
+        self._buffer({key: (self._serialize(value), expires_at)})
+
+    def mset(self, mapping: Mapping[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        批量设置值（同一批写入在一个事务中提交）
+
+        Args:
+            mapping: {键名: 值}
+            ttl: 过期时间（秒），作用于本批所有键
+        """
+        if not self.enabled:
+            if self.logger:
+                self.logger.warning("[Store] Attempted to mset but store is disabled")
+            return
+        expires_at = time.time() + float(ttl) if ttl is not None else None
+        self._buffer({k: (self._serialize(v), expires_at) for k, v in mapping.items()})
+
     def delete(self, key: str) -> bool:
         """
         删除键
-        
+
         Args:
             key: 键名
-        
+
         Returns:
             True 如果删除成功，False 如果键不存在
         """
+        return self.mdelete([key]) > 0
+
+    def mdelete(self, keys: Iterable[str]) -> int:
+        """
+        批量删除键（立即提交）
+
+        Args:
+            keys: 键名列表
+
+        Returns:
+            实际删除的（存在且未过期的）键数量
+        """
         if not self.enabled:
-            return False
-        conn = self._get_conn()
-        cursor = conn.execute(
-            "DELETE FROM kv_store WHERE key = ?",
-            (key,)
-        )
-        conn.commit()
-        return cursor.rowcount > 0
-    
+            return 0
+        key_list = list(dict.fromkeys(keys))
+        if not key_list:
+            return 0
+        now = time.time()
+        with self._write_lock:
+            with self._lock:
+                self._generation += 1
+                buffered = {k: self._pending.pop(k) for k in key_list if k in self._pending}
+                for k in key_list:
+                    self._cache_put(k, None)
+            stored = self._select([k for k in key_list if k not in buffered])
+            conn = self._get_conn()
+            try:
+                for i in range(0, len(key_list), _SQL_BATCH):
+                    chunk = key_list[i : i + _SQL_BATCH]
+                    conn.execute(f"DELETE FROM kv_store WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        live = [e for e in list(buffered.values()) + list(stored.values()) if e is not None and not _expired(e[1], now)]
+        return len(live)
+
     def exists(self, key: str) -> bool:
         """
         检查键是否存在
-        
+
         Args:
             key: 键名
-        
+
         Returns:
-            True 如果存在
+            True 如果存在（且未过期）
         """
         if not self.enabled:
             return False
-        conn = self._get_conn()
-        cursor = conn.execute(
-            "SELECT 1 FROM kv_store WHERE key = ?",
-            (key,)
-        )
-        return cursor.fetchone() is not None
-    
+        return self._load([key])[key] is not None
+
     def keys(self, prefix: str = "") -> List[str]:
         """
         获取所有键（可选前缀过滤）
-        
+
         Args:
             prefix: 键名前缀（可选）
-        
+
         Returns:
             键名列表
         """
         if not self.enabled:
             return []
+        self.flush()
         conn = self._get_conn()
         if prefix:
             cursor = conn.execute(
-                "SELECT key FROM kv_store WHERE key LIKE ?",
-                (prefix + "%",)
+                "SELECT key FROM kv_store WHERE key LIKE ? AND (expires_at IS NULL OR expires_at > ?)",
+                (prefix + "%", time.time())
             )
         else:
-            cursor = conn.execute("SELECT key FROM kv_store")
+            cursor = conn.execute(
+                "SELECT key FROM kv_store WHERE expires_at IS NULL OR expires_at > ?",
+                (time.time(),),
+            )
         return [row["key"] for row in cursor.fetchall()]
-    
+
     def clear(self) -> int:
         """
         清空所有数据
-        
+
         Returns:
             删除的记录数
         """
         if not self.enabled:
             return 0
-        conn = self._get_conn()
-        cursor = conn.execute("DELETE FROM kv_store")
-        conn.commit()
-        return cursor.rowcount
-    
+        self.flush()
+        with self._write_lock:
+            with self._lock:
+                self._generation += 1
+                self._pending.clear()
+                self._cache.clear()
+            conn = self._get_conn()
+            cursor = conn.execute("DELETE FROM kv_store")
+            conn.commit()
+            return cursor.rowcount
+
     def count(self) -> int:
         """
         获取记录数
-        
+
         Returns:
-            记录数量
+            记录数量（不含已过期的键）
         """
         if not self.enabled:
             return 0
+        self.flush()
         conn = self._get_conn()
-        cursor = conn.execute("SELECT COUNT(*) as cnt FROM kv_store")
+        cursor = conn.execute(
+            "SELECT COUNT(*) as cnt FROM kv_store WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),),
+        )
         row = cursor.fetchone()
         return row["cnt"] if row else 0
-    
+
     def dump(self) -> Dict[str, Any]:
         """
         导出所有数据
-        
+
         Returns:
-            所有键值对的字典
+            所有（未过期的）键值对的字典
         """
         if not self.enabled:
             return {}
+        self.flush()
         conn = self._get_conn()
-        cursor = conn.execute("SELECT key, value FROM kv_store")
+        cursor = conn.execute(
+            "SELECT key, value FROM kv_store WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),),
+        )
         result = {}
         for row in cursor.fetchall():
             try:
@@ -265,29 +622,41 @@ class PluginStore:
             except Exception:
                 pass
         return result
-    
+
     # 便捷语法支持
     def __getitem__(self, key: str) -> Any:
-        value = self.get(key)
-        if value is None and not self.exists(key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
             raise KeyError(key)
         return value
-    
+
     def __setitem__(self, key: str, value: Any) -> None:
         self.set(key, value)
-    
+
     def __delitem__(self, key: str) -> None:
         if not self.delete(key):
             raise KeyError(key)
-    
+
     def __contains__(self, key: str) -> bool:
         return self.exists(key)
-    
+
     def __len__(self) -> int:
         return self.count()
-    
+
     def close(self) -> None:
-        """关闭数据库连接"""
+        """落盘缓冲区、停止后台线程并关闭数据库连接"""
+        if self.enabled:
+            try:
+                self.flush()
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"[Store] Final flush failed for plugin {self.plugin_id}: {e}")
+        self._stop.set()
+        self._wake.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=2.0)
+        self._flusher = None
         if hasattr(self._local, "conn") and self._local.conn is not None:
             try:
                 self._local.conn.close()
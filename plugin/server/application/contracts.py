@@ -90,6 +90,12 @@ class PluginMetricsHistoryResponse(TypedDict):
     time: str
 
 
+class EntryLatencyMetricsResponse(TypedDict):
+    entries: list[MetricRecord]
+    count: int
+    time: str
+
+
 class UploadSessionResponse(TypedDict):
     upload_id: str
     blob_id: str
@@ -102,3 +108,5 @@ class UploadBlobResponse(TypedDict):
     upload_id: str
     blob_id: str
     size: int
+    sha256: str
+    deduplicated: bool
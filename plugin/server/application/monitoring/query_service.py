@@ -6,6 +6,7 @@ from plugin.core.state import state
 from plugin.logging_config import get_logger
 from plugin.server.application.contracts import (
     AllPluginMetricsResponse,
+    EntryLatencyMetricsResponse,
     MetricRecord,
     PluginMetricsHistoryResponse,
     PluginMetricsResponse,
@@ -19,7 +20,7 @@ from plugin.server.domain.normalization import (
     normalize_optional_iso_datetime,
 )
 from plugin.utils.time_utils import now_iso
-from plugin.server.monitoring.metrics import metrics_collector
+from plugin.server.monitoring.metrics import entry_latency, metrics_collector
 
 logger = get_logger("server.application.monitoring.query")
 
@@ -233,3 +234,42 @@ class MetricsQueryService:
                     "error_type": type(exc).__name__,
                 },
             ) from exc
+
+    async def get_entry_latency_metrics(self, plugin_id: str | None = None) -> EntryLatencyMetricsResponse:
+        try:
+            raw_entries = await asyncio.to_thread(entry_latency.snapshot, plugin_id)
+            entries: list[MetricRecord] = normalize_mapping_list(raw_entries, context="entry_latency")
+            return {
+                "entries": entries,
+                "count": len(entries),
+                "time": now_iso(),
+            }
+        except IO_RUNTIME_ERRORS as exc:
+            logger.error(
+                "get_entry_latency_metrics failed: plugin_id={}, err_type={}, err={}",
+                plugin_id,
+                type(exc).__name__,
+                str(exc),
+            )
+            raise ServerDomainError(
+                code="METRICS_QUERY_FAILED",
+                message="Failed to get entry latency metrics",
+                status_code=500,
+                details={"error_type": type(exc).__name__},
+            ) from exc
+
+    async def get_prometheus_metrics(self) -> str:
+        try:
+            return await asyncio.to_thread(entry_latency.render_prometheus)
+        except IO_RUNTIME_ERRORS as exc:
+            logger.error(
+                "get_prometheus_metrics failed: err_type={}, err={}",
+                type(exc).__name__,
+                str(exc),
+            )
+            raise ServerDomainError(
+                code="METRICS_QUERY_FAILED",
+                message="Failed to render prometheus metrics",
+                status_code=500,
+                details={"error_type": type(exc).__name__},
+            ) from exc
@@ -12,14 +12,18 @@ from plugin.server.domain.errors import ServerDomainError
 from plugin.server.domain.normalization import coerce_optional_int, normalize_non_empty_str
 from plugin.server.runs.manager import (
     ExportListResponse,
+    RunListResponse,
     RunRecord,
+    RunWaitResponse,
     cancel_run as manager_cancel_run,
     create_run as manager_create_run,
     get_run as manager_get_run,
     list_runs as manager_list_runs,
+    list_runs_page as manager_list_runs_page,
     list_export_for_run as manager_list_export_for_run,
+    wait_for_run as manager_wait_for_run,
 )
-from plugin.server.runs.storage import UploadNotFoundError, blob_store
+from plugin.server.runs.storage import BLOB_IO_CHUNK, BlobInfo, UploadNotFoundError, blob_store
 from plugin.server.runs.tokens import issue_run_token
 
 logger = get_logger("server.application.runs.service")
@@ -79,6 +83,46 @@ class RunService:
                 details={"plugin_id": normalized_plugin_id or "", "error_type": type(exc).__name__},
             ) from exc
 
+    def list_runs_page(
+        self,
+        *,
+        plugin_id: str | None,
+        status: str | None,
+        limit: int,
+        cursor: str | None,
+    ) -> RunListResponse:
+        normalized_plugin_id = normalize_non_empty_str(plugin_id)
+        normalized_status = normalize_non_empty_str(status)
+        normalized_cursor = normalize_non_empty_str(cursor)
+        try:
+            return manager_list_runs_page(
+                plugin_id=normalized_plugin_id,
+                status=normalized_status,
+                limit=limit,
+                cursor=normalized_cursor,
+            )
+        except ValueError as exc:
+            raise _to_domain_error(
+                code="INVALID_CURSOR",
+                message="invalid cursor",
+                status_code=400,
+                details={"cursor": normalized_cursor or ""},
+            ) from exc
+        except IO_RUNTIME_ERRORS as exc:
+            logger.error(
+                "list_runs_page failed: plugin_id={}, status={}, err_type={}, err={}",
+                normalized_plugin_id,
+                normalized_status,
+                type(exc).__name__,
+                str(exc),
+            )
+            raise _to_domain_error(
+                code="RUN_LIST_FAILED",
+                message="Failed to list runs",
+                status_code=500,
+                details={"plugin_id": normalized_plugin_id or "", "error_type": type(exc).__name__},
+            ) from exc
+
     async def create_run(self, payload: RunCreateRequest, *, client_host: str | None) -> RunCreateResponse:
         try:
             base = await manager_create_run(payload, client_host=client_host)
@@ -196,7 +240,10 @@ class RunService:
 
         total_bytes = 0
         try:
-            with session.tmp_path.open("wb") as file_obj:
+            # Request chunks are small (~64KB); batch them so each thread hop
+            # writes and hashes about BLOB_IO_CHUNK bytes.
+            buffer = bytearray()
+            with blob_store.open_writer(session) as writer:
                 async for chunk in chunks:
                     if not chunk:
                         continue
@@ -210,10 +257,15 @@ class RunService:
                             status_code=413,
                             details={"upload_id": upload_id, "max_bytes": int(session.max_bytes)},
                         )
-                    await asyncio.to_thread(file_obj.write, bytes(chunk))
+                    buffer += chunk
+                    if len(buffer) >= BLOB_IO_CHUNK:
+                        await asyncio.to_thread(writer.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(writer.write, bytes(buffer))
 
             try:
-                blob_store.finalize_upload(upload_id)
+                blob = await asyncio.to_thread(blob_store.finalize_upload, upload_id, sha256=writer.sha256)
             except UploadNotFoundError as exc:
                 raise _to_domain_error(
                     code="UPLOAD_NOT_FOUND",
@@ -226,6 +278,8 @@ class RunService:
                 "upload_id": session.upload_id,
                 "blob_id": session.blob_id,
                 "size": total_bytes,
+                "sha256": blob.sha256,
+                "deduplicated": blob.deduplicated,
             }
         except ServerDomainError:
             _cleanup_tmp_upload_file(upload_id, session.tmp_path)
@@ -250,6 +304,17 @@ class RunService:
                 },
             ) from exc
 
+    def get_blob(self, *, run_id: str, blob_id: str) -> BlobInfo:
+        blob = blob_store.get_blob(run_id=run_id, blob_id=blob_id)
+        if blob is None:
+            raise _to_domain_error(
+                code="BLOB_NOT_FOUND",
+                message="blob not found",
+                status_code=404,
+                details={"run_id": run_id, "blob_id": blob_id},
+            )
+        return blob
+
     def get_blob_path(self, *, run_id: str, blob_id: str) -> Path:
         path = blob_store.get_blob_path(run_id=run_id, blob_id=blob_id)
         if path is None:
@@ -303,3 +368,29 @@ class RunService:
                 status_code=500,
                 details={"run_id": run_id, "error_type": type(exc).__name__},
             ) from exc
+
+    async def wait_run(self, run_id: str, *, timeout: float, since: float | None) -> RunWaitResponse:
+        rec = await manager_wait_for_run(run_id, timeout=timeout, since=since)
+        if rec is None:
+            raise _to_domain_error(
+                code="RUN_NOT_FOUND",
+                message="run not found",
+                status_code=404,
+                details={"run_id": run_id},
+            )
+
+        terminal = rec.status in ("succeeded", "failed", "canceled", "timeout")
+        exports = []
+        if terminal:
+            try:
+                exports = manager_list_export_for_run(
+                    run_id=run_id, after=None, limit=50, category="system",
+                ).items
+            except IO_RUNTIME_ERRORS as exc:
+                logger.warning(
+                    "wait_run export lookup failed: run_id={}, err_type={}, err={}",
+                    run_id,
+                    type(exc).__name__,
+                    str(exc),
+                )
+        return RunWaitResponse(run=rec, terminal=terminal, exports=exports)
@@ -4,14 +4,16 @@ from __future__ import annotations
 import atexit
 import asyncio
 import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol, runtime_checkable
 
 from plugin.core.host import PluginProcessHost
-from plugin.core.registry import load_plugins_from_roots
+from plugin.core.registry import PluginLoadReport, load_plugins_from_roots
 from plugin.core.state import state
 from plugin.core.status import status_manager
+from plugin.core.zygote import warm_up_plugin_zygote
 from plugin.logging_config import get_logger
 from plugin.utils.time_utils import now_iso
 from plugin.server.messaging.bus_subscriptions import bus_subscription_manager
@@ -21,7 +23,13 @@ from plugin.server.messaging.proactive_bridge import start_proactive_bridge, sto
 from plugin.server.messaging.plane_runner import MessagePlaneRunner, build_message_plane_runner
 from plugin.server.monitoring.metrics import metrics_collector
 from plugin.server.messaging.request_router import plugin_router
-from plugin.settings import PLUGIN_CONFIG_ROOTS, PLUGIN_SHUTDOWN_TIMEOUT, PLUGIN_SHUTDOWN_TOTAL_TIMEOUT
+from plugin.settings import (
+    PLUGIN_CONFIG_ROOTS,
+    PLUGIN_SHUTDOWN_TIMEOUT,
+    PLUGIN_SHUTDOWN_TOTAL_TIMEOUT,
+    PLUGIN_START_CONCURRENCY,
+    PLUGIN_READY_TIMEOUT,
+)
 from utils.logger_config import get_module_logger
 
 _EMBEDDED_BY_AGENT = os.getenv("NEKO_PLUGIN_HOSTED_BY_AGENT", "").strip().lower() == "true"
@@ -47,6 +55,8 @@ class _ShutdownResult:
 class ServerLifecycleService:
     def __init__(self) -> None:
         self._message_plane_runner: MessagePlaneRunner | None = None
+        # 最近一次启动的插件加载 / 启动耗时报告
+        self.load_report = PluginLoadReport()
 
     @staticmethod
     def _plugin_factory(
@@ -135,32 +145,86 @@ class ServerLifecycleService:
         if not healthy:
             logger.warning("message_plane health check returned false; it may still be starting")
 
-    async def _start_hosts(self) -> None:
+    async def _start_hosts(self, levels: list[list[str]] | None = None) -> None:
+        """
+        按依赖层启动插件进程：同层并发（受 PLUGIN_START_CONCURRENCY 限制），层与层之间串行。
+
+        并发名额只覆盖进程拉起本身。进入下一层之前，只等待本层中被后续插件依赖的插件
+        上报 PLUGIN_READY（最多 PLUGIN_READY_TIMEOUT 秒）；最后一层不等待，不阻塞服务启动。
+        """
         hosts_snapshot = self._get_plugin_hosts_snapshot()
         if not hosts_snapshot:
             logger.warning("no plugins loaded at startup; plugins may need manual start")
             return
 
-        for plugin_id, host_obj in hosts_snapshot.items():
+        report = self.load_report
+        groups: list[list[str]] = []
+        seen: set[str] = set()
+        for level in levels or []:
+            group = [pid for pid in level if pid in hosts_snapshot and pid not in seen]
+            seen.update(group)
+            if group:
+                groups.append(group)
+        # 未出现在分层结果中的宿主（例如分层后被重命名）放到最后一层
+        remaining = [pid for pid in hosts_snapshot if pid not in seen]
+        if remaining:
+            groups.append(remaining)
+        if not report.levels:
+            report.levels = [list(group) for group in groups]
+        depended_on = set(report.depended_on)
+
+        semaphore = asyncio.Semaphore(PLUGIN_START_CONCURRENCY)
+
+        async def _start_one(plugin_id: str) -> bool:
+            host_obj = hosts_snapshot[plugin_id]
             if not isinstance(host_obj, _PluginHostContract):
                 logger.warning(
                     "invalid plugin host object skipped during startup: plugin_id={}, host_type={}",
                     plugin_id,
                     type(host_obj).__name__,
                 )
-                continue
+                return False
 
-            try:
-                await host_obj.start(message_target_queue=state.message_queue)
-                logger.debug("started plugin communication resources: plugin_id={}", plugin_id)
-            except (RuntimeError, ValueError, TypeError, OSError, AttributeError, KeyError, TimeoutError) as exc:
-                logger.error(
-                    "failed to start plugin communication resources: plugin_id={}, err_type={}, err={}",
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await host_obj.start(message_target_queue=state.message_queue)
+                    logger.debug("started plugin communication resources: plugin_id={}", plugin_id)
+                    return True
+                except (RuntimeError, ValueError, TypeError, OSError, AttributeError, KeyError, TimeoutError) as exc:
+                    report.failed.append(plugin_id)
+                    logger.error(
+                        "failed to start plugin communication resources: plugin_id={}, err_type={}, err={}",
+                        plugin_id,
+                        type(exc).__name__,
+                        str(exc),
+                    )
+                    return False
+                finally:
+                    report.start_seconds[plugin_id] = time.perf_counter() - started
+
+        async def _wait_ready(plugin_id: str) -> None:
+            wait_ready = getattr(hosts_snapshot[plugin_id], "wait_ready", None)
+            if not callable(wait_ready):
+                return
+            if not await wait_ready(timeout=PLUGIN_READY_TIMEOUT):
+                logger.warning(
+                    "plugin did not report ready within {}s; continuing startup: plugin_id={}",
+                    PLUGIN_READY_TIMEOUT,
                     plugin_id,
-                    type(exc).__name__,
-                    str(exc),
                 )
 
+        started_all = time.perf_counter()
+        for index, group in enumerate(groups):
+            results = await asyncio.gather(*(_start_one(plugin_id) for plugin_id in group))
+            if index == len(groups) - 1 or PLUGIN_READY_TIMEOUT <= 0:
+                continue
+            needed = [pid for pid, ok in zip(group, results) if ok and pid in depended_on]
+            if needed:
+                await asyncio.gather(*(_wait_ready(plugin_id) for plugin_id in needed))
+        report.start_total_seconds = time.perf_counter() - started_all
+        logger.info("plugin startup finished: {}", report.summary())
+
     async def startup(self) -> None:
         try:
             emit_lifecycle_event({"type": "server_startup_begin", "plugin_id": "server", "time": now_iso()})
@@ -178,6 +242,17 @@ class ServerLifecycleService:
 
         self._clear_runtime_state()
 
+        # 启用 zygote 时先将其拉起，让它的模块预导入与消息平面启动、插件注册并行
+        try:
+            start_method = await asyncio.to_thread(warm_up_plugin_zygote)
+            logger.debug("plugin process start method: {}", start_method)
+        except (RuntimeError, ValueError, OSError) as exc:
+            logger.warning(
+                "failed to warm up plugin zygote: err_type={}, err={}",
+                type(exc).__name__,
+                str(exc),
+            )
+
         await plugin_router.start()
         logger.debug("plugin router started")
 
@@ -191,7 +266,7 @@ class ServerLifecycleService:
             )
             self._message_plane_runner = None
 
-        load_plugins_from_roots(PLUGIN_CONFIG_ROOTS, logger, self._plugin_factory)
+        self.load_report = load_plugins_from_roots(PLUGIN_CONFIG_ROOTS, logger, self._plugin_factory)
 
         await bus_subscription_manager.start()
         logger.debug("bus subscription manager started")
@@ -214,7 +289,7 @@ class ServerLifecycleService:
                 str(exc),
             )
 
-        await self._start_hosts()
+        await self._start_hosts(self.load_report.levels)
 
         def _get_hosts() -> dict[str, object]:
             return self._get_plugin_hosts_snapshot()
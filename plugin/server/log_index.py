@@ -0,0 +1,244 @@
+"""
+日志文件的倒序读取与稀疏索引
+
+- read_tail_lines: 从文件末尾按块向前 seek，只读取最后 N 行所需的字节
+- LogFileIndex: 每个日志文件一份的稀疏索引，按约 BLOCK_SIZE 字节切块（块边界对齐行首），
+  记录每块的字节偏移、块内第一个时间戳和出现过的日志级别；文件增长时只索引新增部分。
+  时间范围 / 级别查询据此只读取可能命中的块。
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+# 索引块大小（字节）
+BLOCK_SIZE = 256 * 1024
+# 建索引时在块边界附近读取的窗口大小（字节）
+_WINDOW = 4096
+# 倒序读取 tail 时每次向前 seek 的字节数
+_TAIL_CHUNK = 64 * 1024
+# 同时缓存索引的文件数
+_MAX_CACHED_INDEXES = 32
+
+# 行首时间戳：2024-01-01 00:00:00 或 2024-01-01T00:00:00
+_TS_RE = re.compile(rb"^(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})", re.MULTILINE)
+
+LEVELS = ("TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL")
+_LEVEL_BYTES = tuple(level.encode("ascii") for level in LEVELS)
+_LEVEL_BITS = {level: 1 << i for i, level in enumerate(LEVELS)}
+# 尚未读过的块：视为可能包含任何级别
+LEVELS_UNKNOWN = 0xFFFFFFFF
+
+
+def read_tail_lines(path: Path, lines: int) -> list[str]:
+    """
+    读取文件最后 N 行（从末尾按块向前读取，不扫描整个文件）
+
+    Args:
+        path: 文件路径
+        lines: 行数
+
+    Returns:
+        行文本列表（不含换行符），按文件顺序
+    """
+    if lines <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunks: list[bytes] = []
+        newlines = 0
+        # 多读一个换行：保证最前面那一行是完整的（或者已经读到文件头）
+        while pos > 0 and newlines <= lines:
+            step = min(_TAIL_CHUNK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    text_lines = data.decode("utf-8", errors="ignore").splitlines()
+    if pos > 0 and text_lines:
+        text_lines = text_lines[1:]
+    return text_lines[-lines:]
+
+
+def level_bits(data: bytes) -> int:
+    """块内出现过的日志级别位图（按子串判断，可能多报，不会漏报）"""
+    mask = 0
+    for i, token in enumerate(_LEVEL_BYTES):
+        if token in data:
+            mask |= 1 << i
+    return mask
+
+
+class LogFileIndex:
+    """
+    单个日志文件的稀疏索引
+
+    offsets[i] 为第 i 块的起始字节偏移（行首），first_ts[i] 为块内第一个时间戳
+    （"YYYY-MM-DD HH:MM:SS"；块首附近没有时间戳时沿用前一块的值，并保证单调不减），
+    masks[i] 为块内出现过的日志级别位图（首次读到该块时才计算，之前为 LEVELS_UNKNOWN）。
+    indexed_to 之前的完整行都已经切块。
+
+    建索引只在每个块边界附近读取一个小窗口（找行首和时间戳），不读取整个文件；
+    时间戳按日志大体有序的前提做近似，最终结果仍由逐行过滤保证正确。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._identity: tuple[int, int] | None = None
+        self.offsets = array("q")
+        self.first_ts: list[str] = []
+        self.masks = array("I")
+        self.indexed_to = 0
+
+    def _reset(self) -> None:
+        self.offsets = array("q")
+        self.first_ts = []
+        self.masks = array("I")
+        self.indexed_to = 0
+
+    def refresh(self) -> int:
+        """
+        把文件新增的完整行纳入索引（文件被替换或截断时重建）
+
+        Returns:
+            当前已索引到的字节偏移
+        """
+        with self._lock:
+            st = self.path.stat()
+            identity = (st.st_dev, st.st_ino)
+            if identity != self._identity or st.st_size < self.indexed_to:
+                self._reset()
+                self._identity = identity
+            # 末尾不满一块的块重新切，避免文件缓慢增长时产生大量小块
+            if self.offsets and self.indexed_to - self.offsets[-1] < BLOCK_SIZE:
+                self.indexed_to = self.offsets.pop()
+                self.first_ts.pop()
+                self.masks.pop()
+            if st.st_size > self.indexed_to:
+                with open(self.path, "rb") as f:
+                    self._extend(f, st.st_size)
+            return self.indexed_to
+
+    def _extend(self, f: BinaryIO, size: int) -> None:
+        pos = self.indexed_to
+        while pos < size:
+            f.seek(pos)
+            head = f.read(min(_WINDOW, size - pos))
+            boundary = self._next_line_start(f, pos + BLOCK_SIZE - 1, size)
+            if boundary is None:
+                # 剩余不足一块：最后一个完整行之后的内容留到下次
+                boundary = self._last_line_end(f, pos, size)
+                if boundary <= pos:
+                    break
+            self._add_block(pos, head[: boundary - pos])
+            pos = boundary
+        self.indexed_to = pos
+
+    @staticmethod
+    def _next_line_start(f: BinaryIO, target: int, size: int) -> int | None:
+        """target 之后第一个行首的偏移；直到文件末尾都没有换行时返回 None"""
+        pos = target
+        while pos < size:
+            f.seek(pos)
+            window = f.read(min(_WINDOW, size - pos))
+            nl = window.find(b"\n")
+            if nl >= 0:
+                return pos + nl + 1
+            pos += len(window)
+        return None
+
+    @staticmethod
+    def _last_line_end(f: BinaryIO, start: int, size: int) -> int:
+        """[start, size) 内最后一个换行之后的偏移；没有换行时返回 start"""
+        pos = size
+        while pos > start:
+            step = min(_WINDOW, pos - start)
+            pos -= step
+            f.seek(pos)
+            nl = f.read(step).rfind(b"\n")
+            if nl >= 0:
+                return pos + nl + 1
+        return start
+
+    def _add_block(self, offset: int, head: bytes) -> None:
+        match = _TS_RE.search(head)
+        prev = self.first_ts[-1] if self.first_ts else ""
+        ts = f"{match.group(1).decode()} {match.group(2).decode()}" if match else prev
+        self.offsets.append(offset)
+        self.first_ts.append(max(ts, prev))
+        self.masks.append(LEVELS_UNKNOWN)
+
+    def note_levels(self, block: int, offset: int, data: bytes) -> None:
+        """记录读到的块内出现过的日志级别，后续级别查询可以跳过该块"""
+        with self._lock:
+            if 0 <= block < len(self.offsets) and self.offsets[block] == offset and self.masks[block] == LEVELS_UNKNOWN:
+                self.masks[block] = level_bits(data)
+
+    def block_range(self, start_ts: str | None, end_ts: str | None) -> tuple[int, int]:
+        """可能包含 [start_ts, end_ts] 内日志的块下标区间 [lo, hi)"""
+        lo, hi = 0, len(self.offsets)
+        if start_ts:
+            # 第一个 first_ts >= start_ts 的块的前一块也可能跨入区间
+            lo = max(0, bisect_left(self.first_ts, start_ts) - 1)
+        if end_ts:
+            hi = bisect_right(self.first_ts, end_ts)
+        return lo, max(lo, hi)
+
+    def iter_blocks_reverse(
+        self,
+        start_ts: str | None = None,
+        end_ts: str | None = None,
+        level: str | None = None,
+    ) -> Iterator[tuple[int, int, int]]:
+        """
+        从新到旧产出可能命中的块 (块下标, 起始偏移, 结束偏移)
+
+        尚未索引的文件尾部（最后一行还没写完）以块下标 -1 最先产出。
+        """
+        with self._lock:
+            offsets = list(self.offsets)
+            masks = list(self.masks)
+            indexed_to = self.indexed_to
+            lo, hi = self.block_range(start_ts, end_ts)
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = indexed_to
+        if size > indexed_to and (not end_ts or hi == len(offsets)):
+            yield -1, indexed_to, size
+        bit = _LEVEL_BITS.get(level.upper()) if level else None
+        for i in range(hi - 1, lo - 1, -1):
+            if bit is not None and not masks[i] & bit:
+                continue
+            end = offsets[i + 1] if i + 1 < len(offsets) else indexed_to
+            yield i, offsets[i], end
+
+
+_indexes: OrderedDict[str, LogFileIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_log_index(path: Path) -> LogFileIndex:
+    """获取（并增量刷新）文件的稀疏索引；进程内按路径缓存最近使用的若干个"""
+    key = str(path.resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = LogFileIndex(Path(key))
+            while len(_indexes) > _MAX_CACHED_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(key)
+    index.refresh()
+    return index
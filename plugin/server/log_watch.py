@@ -0,0 +1,139 @@
+"""
+日志目录的文件变化通知
+
+Linux 上通过 inotify（ctypes 调用 libc，无额外依赖）监听目录，事件经事件循环的
+add_reader 投递：空闲时不唤醒、不产生系统调用，写入后立即回调。
+其他平台或 inotify 不可用（如实例数耗尽）时 DirectoryWatch 抛出 OSError，
+由调用方回退到轮询。
+"""
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# 目录内文件的增删改名 / 写入，以及目录自身被删除或移走
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+_libc: ctypes.CDLL | None = None
+_libc_loaded = False
+
+
+def _load_libc() -> ctypes.CDLL | None:
+    global _libc, _libc_loaded
+    if not _libc_loaded:
+        _libc_loaded = True
+        if sys.platform.startswith("linux"):
+            try:
+                lib = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+                lib.inotify_init1.argtypes = [ctypes.c_int]
+                lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                _libc = lib
+            except (OSError, AttributeError):
+                _libc = None
+    return _libc
+
+
+def inotify_supported() -> bool:
+    """当前平台是否可以使用 inotify"""
+    return _load_libc() is not None
+
+
+def _raise_errno(what: str) -> None:
+    err = ctypes.get_errno() or errno.EIO
+    raise OSError(err, f"{what}: {os.strerror(err)}")
+
+
+class DirectoryWatch:
+    """
+    监听单个目录（不递归）
+
+    回调参数为一批 (mask, 文件名) 事件；IN_Q_OVERFLOW 时文件名为空，
+    调用方应当重新扫描目录。目录被删除或移走时会收到 IN_IGNORED。
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        on_events: Callable[[list[tuple[int, str]]], None],
+        mask: int = WATCH_MASK,
+    ):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            _raise_errno("inotify_init1")
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), mask) < 0:
+            try:
+                _raise_errno(f"inotify_add_watch({directory})")
+            finally:
+                os.close(fd)
+        self.directory = directory
+        self._fd = fd
+        self._on_events = on_events
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """在事件循环上注册 fd，可读时回调"""
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def read_events(self) -> list[tuple[int, str]]:
+        """读出当前已就绪的全部事件（非阻塞）"""
+        events: list[tuple[int, str]] = []
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(data):
+                _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = data[pos:pos + length].split(b"\0", 1)[0]
+                pos += length
+                events.append((mask, os.fsdecode(name)))
+        return events
+
+    def _on_readable(self) -> None:
+        try:
+            events = self.read_events()
+        except OSError:
+            events = [(IN_Q_OVERFLOW, "")]
+        if events:
+            self._on_events(events)
+
+    def close(self) -> None:
+        if self._fd < 0:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = -1
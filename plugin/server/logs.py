@@ -4,18 +4,37 @@
 提供插件日志和服务器日志的读取和查询功能。
 支持 WebSocket 实时推送日志更新。
 """
+import os
 import re
+import time
 import asyncio
+import fnmatch
 import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import deque
 
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from plugin.logging_config import get_logger
 
 from plugin.server.infrastructure.config_paths import get_plugin_config_path
-from plugin.settings import BUILTIN_PLUGIN_CONFIG_ROOT
+from plugin.server.log_index import get_log_index, read_tail_lines
+from plugin.server.log_watch import (
+    IN_CREATE,
+    IN_DELETE,
+    IN_DELETE_SELF,
+    IN_IGNORED,
+    IN_MOVE_SELF,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    DirectoryWatch,
+    inotify_supported,
+)
+from plugin.settings import (
+    BUILTIN_PLUGIN_CONFIG_ROOT,
+    PLUGIN_LOG_WATCH_BACKEND,
+    PLUGIN_LOG_WATCH_POLL_INTERVAL,
+)
 
 
 logger = get_logger("server.logs")
@@ -414,6 +433,8 @@ def read_log_file_tail(log_file: Path, lines: int = 100) -> list[dict[str, objec
     """
     读取日志文件的最后N行
     
+    从文件末尾按块向前读取，只读取最后 N 行所需的字节。
+    
     Args:
         log_file: 日志文件路径
         lines: 要读取的行数
@@ -425,25 +446,105 @@ def read_log_file_tail(log_file: Path, lines: int = 100) -> list[dict[str, objec
         return []
     
     try:
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            # 使用deque高效读取最后N行
-            tail_lines = deque(maxlen=lines)
-            for line in f:
-                tail_lines.append(line)
-            
-            # 解析日志行
-            parsed_logs = []
-            for line in tail_lines:
-                log_entry = parse_log_line(line)
-                if log_entry:
-                    parsed_logs.append(log_entry)
-            
-            return parsed_logs
+        # 解析日志行
+        parsed_logs = []
+        for line in read_tail_lines(log_file, lines):
+            log_entry = parse_log_line(line)
+            if log_entry:
+                parsed_logs.append(log_entry)
+        
+        return parsed_logs
     except (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError):
         logger.exception(f"Failed to read log file {log_file}")
         return []
 
 
+# 行首秒级时间戳（用于查询时预筛选行）
+_LINE_TS_RE = re.compile(r"\s*(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+# 同上，按字节统计块内的日志条目数（续行如 traceback 不计入）
+_LINE_TS_BYTES_RE = re.compile(rb"^[ \t]*\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}", re.MULTILINE)
+
+
+def _index_time_bound(value: str | None) -> str | None:
+    """把查询时间转换为索引使用的秒级时间戳字符串"""
+    parsed = _parse_log_time(value) if isinstance(value, str) else None
+    return parsed.strftime("%Y-%m-%d %H:%M:%S") if parsed is not None else None
+
+
+def query_log_file(
+    log_file: Path,
+    lines: int = 100,
+    level: str | None = None,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    search: str | None = None,
+) -> tuple[list[dict[str, object]], int]:
+    """
+    在日志文件中查询最后 N 条满足条件的日志
+    
+    借助稀疏索引只读取时间范围内、且出现过目标级别 / 关键词的块，
+    从新到旧逐块解析过滤，凑满 N 条即停止。
+    
+    Args:
+        log_file: 日志文件路径
+        lines: 最多返回的条数
+        level: 日志级别过滤
+        start_time: 开始时间
+        end_time: 结束时间
+        search: 关键词搜索
+    
+    Returns:
+        (按时间顺序的日志条目列表, 过滤前扫描过的日志条目数)
+    """
+    if not log_file.exists() or lines <= 0:
+        return [], 0
+    
+    index = get_log_index(log_file)
+    start_bound = _index_time_bound(start_time)
+    end_bound = _index_time_bound(end_time)
+    level_token = level.upper() if level else None
+    search_lower = search.lower() if search else None
+    # 字节级 lower() 只转换 ASCII 字母，非 ASCII 关键词无法在解码前可靠地预筛选
+    search_bytes = search_lower.encode("ascii") if search_lower and search_lower.isascii() else None
+    collected: list[list[dict[str, object]]] = []
+    found = 0
+    scanned = 0
+    with open(log_file, "rb") as f:
+        for block, start, end in index.iter_blocks_reverse(start_bound, end_bound, level):
+            f.seek(start)
+            data = f.read(end - start)
+            index.note_levels(block, start, data)
+            scanned += len(_LINE_TS_BYTES_RE.findall(data))
+            if search_bytes is not None and search_bytes not in data.lower():
+                continue
+            entries = []
+            for line in data.decode("utf-8", errors="ignore").splitlines():
+                # 先用廉价的字符串判断排除不可能命中的行，再做完整解析
+                if level_token is not None and level_token not in line:
+                    continue
+                if search_lower is not None and search_lower not in line.lower():
+                    continue
+                if start_bound or end_bound:
+                    ts = _LINE_TS_RE.match(line)
+                    if ts is None:
+                        continue
+                    line_ts = f"{ts.group(1)} {ts.group(2)}"
+                    if (start_bound and line_ts < start_bound) or (end_bound and line_ts > end_bound):
+                        continue
+                log_entry = parse_log_line(line)
+                if log_entry:
+                    entries.append(log_entry)
+            matched = filter_logs(entries, level, start_time, end_time, search)
+            if matched:
+                collected.append(matched)
+                found += len(matched)
+                if found >= lines:
+                    break
+    
+    result = [entry for block in reversed(collected) for entry in block]
+    return result[-lines:], scanned
+
+
 def filter_logs(
     logs: list[dict[str, object]],
     level: str | None = None,
@@ -567,9 +668,15 @@ def get_plugin_logs(
     
     latest_log = log_files[0]
     
-    # 读取日志
+    # 读取日志：无过滤条件时直接倒序读取末尾；有过滤条件时通过索引返回最后 N 条匹配的日志
     try:
-        logs = read_log_file_tail(latest_log, lines)
+        if level or start_time or end_time or search:
+            filtered_logs, total_lines = query_log_file(
+                latest_log, lines, level, start_time, end_time, search
+            )
+        else:
+            filtered_logs = read_log_file_tail(latest_log, lines)
+            total_lines = len(filtered_logs)
     except (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError):
         logger.exception(f"Failed to read log file {latest_log}")
         return {
@@ -580,13 +687,10 @@ def get_plugin_logs(
             "error": "Failed to read log file"
         }
     
-    # 过滤
-    filtered_logs = filter_logs(logs, level, start_time, end_time, search)
-    
     return {
         "plugin_id": plugin_id,
         "logs": filtered_logs,
-        "total_lines": len(logs),
+        "total_lines": total_lines,
         "returned_lines": len(filtered_logs),
         "log_file": latest_log.name
     }
@@ -636,14 +740,45 @@ def read_log_file_incremental(log_file: Path, last_position: int) -> tuple[list[
         return [], last_position
 
 
+def _log_file_pattern(plugin_id: str) -> str:
+    """当前日志文件的 glob 模式"""
+    if plugin_id == SERVER_LOG_ID:
+        return "N.E.K.O_PluginServer_*.log"
+    return f"{plugin_id}_*.log"
+
+
 class LogFileWatcher:
-    """日志文件监控器，用于 WebSocket 实时推送"""
+    """
+    日志文件监控器，用于 WebSocket 实时推送
+    
+    Linux 上用 inotify 监听日志目录：文件写入后立即读取新增的完整行并推送，
+    空闲时不做任何 I/O；新文件创建 / 改名（轮转）时先把旧文件剩余内容读完再切换。
+    inotify 不可用或配置为 "poll" 时回退为定时检查文件大小，并间隔重新扫描目录。
+    """
+    
+    # 轮询模式下重新扫描目录（发现轮转）的间隔（秒）
+    POLL_RESCAN_INTERVAL = 2.0
     
-    def __init__(self, plugin_id: str):
+    def __init__(self, plugin_id: str, backend: str | None = None, poll_interval: float | None = None):
         self.plugin_id = plugin_id
         self.clients: set[WebSocket] = set()
         self.last_position: int = 0
         self.current_log_file: Path | None = None
+        self.backend = backend or PLUGIN_LOG_WATCH_BACKEND
+        self.poll_interval = poll_interval if poll_interval is not None else PLUGIN_LOG_WATCH_POLL_INTERVAL
+        # 实际使用的模式："inotify" / "poll"（启动后确定）
+        self.mode: str | None = None
+        # 唤醒 / 目录扫描 / 文件读取 / 推送条数计数
+        self.stats = {"wakeups": 0, "rescans": 0, "reads": 0, "pushed": 0}
+        self._pattern = _log_file_pattern(plugin_id)
+        self._log_dir: Path | None = None
+        self._file = None
+        self._file_identity: tuple[int, int] | None = None
+        self._rescan_needed = True
+        # 首次扫描前已存在的文件从末尾开始跟踪，之后新出现的文件从头读取
+        self._initial_scan_done = False
+        self._dir_gone = False
+        self._changed: asyncio.Event | None = None
         self._watch_task: asyncio.Task[None] | None = None
         self._running = False
     
@@ -665,6 +800,7 @@ class LogFileWatcher:
             return
         
         self._running = True
+        self._changed = asyncio.Event()
         self._watch_task = asyncio.create_task(self._watch_loop())
     
     def _stop_watching(self):
@@ -674,59 +810,174 @@ class LogFileWatcher:
             self._watch_task.cancel()
             self._watch_task = None
     
+    def _get_log_dir(self) -> Path:
+        # get_plugin_log_dir 会创建目录并做写入检查，只在首次使用时调用
+        if self._log_dir is None:
+            self._log_dir = get_plugin_log_dir(self.plugin_id)
+        return self._log_dir
+    
+    def _open_dir_watch(self) -> DirectoryWatch | None:
+        """按配置创建 inotify 目录监听，失败时返回 None（回退轮询）"""
+        if self.backend == "poll" or not inotify_supported():
+            return None
+        try:
+            watch = DirectoryWatch(self._get_log_dir(), self._on_dir_events)
+            watch.start()
+        except OSError as e:
+            logger.debug(f"inotify unavailable for {self.plugin_id}, falling back to polling: {e}")
+            return None
+        self._dir_gone = False
+        return watch
+    
+    def _on_dir_events(self, events: list[tuple[int, str]]) -> None:
+        """inotify 回调：只关心匹配日志模式的文件"""
+        relevant = False
+        current_name = self.current_log_file.name if self.current_log_file is not None else None
+        for mask, name in events:
+            if mask & (IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                self._rescan_needed = True
+                self._dir_gone = self._dir_gone or bool(mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF))
+                relevant = True
+            elif not fnmatch.fnmatchcase(name, self._pattern):
+                continue
+            elif mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                self._rescan_needed = True
+                relevant = True
+            elif name == current_name or current_name is None:
+                relevant = True
+        if relevant and self._changed is not None:
+            self._changed.set()
+    
     async def _watch_loop(self):
-        """监控循环：定期检查文件变化并推送新日志"""
-        while self._running:
+        """监控循环：inotify 事件驱动，不可用时定期检查文件变化；有新日志立即推送"""
+        dir_watch = self._open_dir_watch()
+        self.mode = "inotify" if dir_watch is not None else "poll"
+        last_rescan = 0.0
+        try:
+            while self._running:
+                try:
+                    if dir_watch is not None and self._dir_gone:
+                        # 日志目录被删除 / 移走：重新建立监听，失败则回退轮询
+                        dir_watch.close()
+                        self._log_dir = None
+                        dir_watch = self._open_dir_watch()
+                        self.mode = "inotify" if dir_watch is not None else "poll"
+                        self._rescan_needed = True
+                    if dir_watch is None:
+                        now = time.monotonic()
+                        if now - last_rescan >= self.POLL_RESCAN_INTERVAL:
+                            self._rescan_needed = True
+                            last_rescan = now
+                    
+                    self.stats["wakeups"] += 1
+                    await self._sync()
+                    
+                    if dir_watch is not None:
+                        await self._changed.wait()
+                        self._changed.clear()
+                    else:
+                        await asyncio.sleep(self.poll_interval if self.current_log_file is not None else 1)
+                    
+                except asyncio.CancelledError:
+                    break
+                except (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError):
+                    logger.exception(f"Error in log watcher loop for {self.plugin_id}")
+                    await asyncio.sleep(1)
+        finally:
+            if dir_watch is not None:
+                dir_watch.close()
+            self._close_file()
+    
+    def _find_latest_log(self) -> Path | None:
+        """目录中最新的日志文件（按 mtime 纳秒比较，相同时取 inode 较大者）"""
+        self.stats["rescans"] += 1
+        latest: Path | None = None
+        latest_key = (-1, -1)
+        for log_file in self._get_log_dir().glob(self._pattern):
             try:
-                # 获取最新的日志文件
-                log_dir = get_plugin_log_dir(self.plugin_id)
-                
-                if self.plugin_id == SERVER_LOG_ID:
-                    pattern = "N.E.K.O_PluginServer_*.log"
-                else:
-                    pattern = f"{self.plugin_id}_*.log"
-                
-                log_files = sorted(
-                    log_dir.glob(pattern),
-                    key=lambda f: f.stat().st_mtime,
-                    reverse=True
-                )
-                
-                if not log_files:
-                    await asyncio.sleep(1)  # 没有日志文件，等待
-                    continue
-                
-                latest_log = log_files[0]
-                
-                # 如果日志文件切换了，重置位置
-                if self.current_log_file != latest_log:
-                    self.current_log_file = latest_log
-                    self.last_position = 0
-                
-                # 读取增量日志
-                new_logs, new_position = read_log_file_incremental(
-                    latest_log, self.last_position
-                )
-                
-                if new_logs:
-                    self.last_position = new_position
-                    # 推送新日志给所有客户端
-                    await self._broadcast_logs(new_logs)
-                
-                # 等待 0.5 秒后再次检查
-                await asyncio.sleep(0.5)
-                
-            except asyncio.CancelledError:
-                break
-            except (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError):
-                logger.exception(f"Error in log watcher loop for {self.plugin_id}")
-                await asyncio.sleep(1)
+                st = log_file.stat()
+            except OSError:
+                continue
+            key = (st.st_mtime_ns, st.st_ino)
+            if key > latest_key:
+                latest, latest_key = log_file, key
+        return latest
+    
+    def _follow(self, log_file: Path, position: int | None = None) -> None:
+        """切换到 log_file，从 position（默认文件末尾）开始跟踪"""
+        self._close_file()
+        f = open(log_file, "rb")
+        st = os.fstat(f.fileno())
+        self._file = f
+        self._file_identity = (st.st_dev, st.st_ino)
+        self.current_log_file = log_file
+        self.last_position = st.st_size if position is None else position
+    
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._file_identity = None
+    
+    def _is_current(self, log_file: Path) -> bool:
+        """log_file 是否就是正在跟踪的文件（按 (st_dev, st_ino) 判断，与路径无关）"""
+        if self._file is None:
+            return False
+        try:
+            st = log_file.stat()
+        except OSError:
+            return False
+        return (st.st_dev, st.st_ino) == self._file_identity
+    
+    def _read_new_lines(self) -> list[dict[str, object]]:
+        """读取当前文件新增的完整行（未写完的最后一行留到下次）"""
+        f = self._file
+        if f is None:
+            return []
+        size = os.fstat(f.fileno()).st_size
+        if size < self.last_position:
+            # 文件被截断：从头开始
+            self.last_position = 0
+        if size == self.last_position:
+            return []
+        f.seek(self.last_position)
+        data = f.read(size - self.last_position)
+        end = data.rfind(b"\n")
+        if end < 0:
+            return []
+        self.stats["reads"] += 1
+        self.last_position += end + 1
+        text = data[:end + 1].decode("utf-8", errors="ignore")
+        return [entry for entry in (parse_log_line(line) for line in text.splitlines()) if entry]
+    
+    async def _sync(self) -> None:
+        """处理轮转并推送当前文件的新增日志"""
+        if self._rescan_needed or self._file is None:
+            self._rescan_needed = False
+            latest = self._find_latest_log()
+            if latest is not None and self._is_current(latest):
+                # 同一个文件只是被改名：更新路径，读取位置不变
+                self.current_log_file = latest
+            elif latest is not None:
+                if self._file is not None:
+                    # 轮转：旧文件（可能已被改名）剩余的内容先推送，新文件从头读
+                    await self._broadcast_logs(self._read_new_lines())
+                self._follow(latest, 0 if self._initial_scan_done else None)
+            self._initial_scan_done = True
+        
+        new_logs = self._read_new_lines()
+        if new_logs:
+            await self._broadcast_logs(new_logs)
     
     async def _broadcast_logs(self, logs: list[dict[str, object]]):
         """广播日志给所有连接的客户端"""
         if not logs or not self.clients:
             return
         
+        self.stats["pushed"] += len(logs)
         disconnected = []
         for client in list(self.clients):
             try:
@@ -765,23 +1016,12 @@ class LogFileWatcher:
                 "total_lines": result.get("total_lines", 0)
             })
             
-            # 记录当前日志文件和位置
-            log_dir = get_plugin_log_dir(self.plugin_id)
-            if self.plugin_id == SERVER_LOG_ID:
-                pattern = "N.E.K.O_PluginServer_*.log"
-            else:
-                pattern = f"{self.plugin_id}_*.log"
-            
-            log_files = sorted(
-                log_dir.glob(pattern),
-                key=lambda f: f.stat().st_mtime,
-                reverse=True
-            )
-            
-            if log_files:
-                self.current_log_file = log_files[0]
-                # 获取文件当前大小作为起始位置
-                self.last_position = self.current_log_file.stat().st_size
+            # 尚未跟踪文件时从当前末尾开始跟踪；已在跟踪时不重置位置，避免漏推给其他客户端
+            if self._file is None and not self._initial_scan_done:
+                latest = self._find_latest_log()
+                if latest is not None:
+                    self._follow(latest)
+                self._initial_scan_done = True
         except (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError):
             logger.exception("Failed to send initial logs")
 
@@ -15,6 +15,8 @@ from plugin.settings import MESSAGE_PLANE_BRIDGE_ENABLED, MESSAGE_PLANE_ZMQ_INGE
 logger = get_logger("server.messaging.plane_bridge")
 
 _RUNTIME_ERRORS = (RuntimeError, ValueError, TypeError, AttributeError, KeyError, OSError, TimeoutError)
+# 一次发送最多合并的 delta 条数
+_MAX_DELTA_BATCH_ITEMS = 256
 
 
 def _dumps(obj: object) -> bytes:
@@ -108,6 +110,26 @@ class _Bridge:
         except queue.Full:
             return
 
+    def _coalesce(self, first: dict[str, object]) -> list[dict[str, object]]:
+        """把队列里已积压的连续 delta 合并进同一个 delta_batch，一次编码、一次发送。
+
+        不额外等待：只取已经在队列里的消息；遇到 snapshot 则先发之前合并的 delta，保持顺序。
+        """
+        if first.get("kind") != "delta_batch":
+            return [first]
+        items = list(first.get("items") or [])  # type: ignore[call-overload]
+        out: list[dict[str, object]] = []
+        while len(items) < _MAX_DELTA_BATCH_ITEMS:
+            try:
+                nxt = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if nxt.get("kind") != "delta_batch":
+                out.append(nxt)
+                break
+            items.extend(nxt.get("items") or [])  # type: ignore[arg-type]
+        return [{**first, "items": items}, *out]
+
     def _wait_tcp_ready(self, endpoint: str) -> None:
         parsed = _parse_tcp_endpoint(endpoint)
         if parsed is None:
@@ -152,10 +174,11 @@ class _Bridge:
                     continue
                 except _RUNTIME_ERRORS:
                     continue
-                try:
-                    sock.send(_dumps(msg), flags=zmq.NOBLOCK)
-                except (RuntimeError, ValueError, TypeError, AttributeError, OSError, zmq.ZMQError):
-                    continue
+                for out in self._coalesce(msg):
+                    try:
+                        sock.send(_dumps(out), flags=zmq.NOBLOCK)
+                    except (RuntimeError, ValueError, TypeError, AttributeError, OSError, zmq.ZMQError):
+                        continue
         finally:
             try:
                 sock.close(0)
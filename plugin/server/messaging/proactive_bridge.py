@@ -9,7 +9,6 @@ Flow: plugin ─(ZMQ ingest)→ message_plane ─(PUB)→ **this bridge** ─(PU
 """
 from __future__ import annotations
 
-import json
 import os
 import threading
 import time
@@ -63,6 +62,7 @@ class ProactiveBridge:
             t.join(timeout=2.0)
 
     def _run(self) -> None:
+        from plugin.message_plane.pub_server import BatchGapDetector, decode_pub_message
         from plugin.settings import MESSAGE_PLANE_ZMQ_PUB_ENDPOINT
 
         pub_endpoint = os.getenv(
@@ -82,6 +82,7 @@ class ProactiveBridge:
         sub_sock.setsockopt(zmq.RCVTIMEO, 1000)
         sub_sock.connect(pub_endpoint)
         sub_sock.setsockopt_string(zmq.SUBSCRIBE, "messages.")
+        gaps = BatchGapDetector()
 
         push_sock = ctx.socket(zmq.PUSH)
         push_sock.linger = 1000
@@ -105,50 +106,20 @@ class ProactiveBridge:
                         time.sleep(0.1)
                     continue
 
-                if len(parts) < 2:
-                    continue
-
                 try:
-                    event = json.loads(parts[1])
+                    header, events = decode_pub_message(parts)
                 except Exception:
                     continue
-
-                payload = event.get("payload") if isinstance(event, dict) else None
-                if not isinstance(payload, dict):
-                    continue
-
-                if payload.get("message_type") != "proactive_notification":
-                    continue
-
-                content = str(payload.get("content") or "").strip()
-                if not content:
-                    continue
-
-                metadata = payload.get("metadata") or {}
-                plugin_id = payload.get("plugin_id", "")
-
-                proactive_event = {
-                    "event_type": "proactive_message",
-                    "lanlan_name": metadata.get("target_lanlan") or None,
-                    "text": content,
-                    "summary": content,
-                    "detail": content,
-                    "channel": f"plugin:{plugin_id}" if plugin_id else "plugin",
-                    "task_id": metadata.get("task_id", ""),
-                    "success": True,
-                    "status": "completed",
-                    "timestamp": payload.get("time", ""),
-                }
-
-                try:
-                    push_sock.send_json(proactive_event, zmq.NOBLOCK)
-                    logger.info(
-                        "proactive bridge forwarded: plugin={} content={}",
-                        plugin_id,
-                        content[:80],
-                    )
-                except Exception as e:
-                    logger.warning("proactive bridge push failed: {}", e)
+                if header is not None:
+                    gap = gaps.observe(header)
+                    if gap is not None:
+                        logger.warning(
+                            "proactive bridge missed records on {} between seq {} and {}",
+                            header.get("topic"),
+                            *gap,
+                        )
+                for event in events:
+                    self._forward(event, push_sock)
         finally:
             try:
                 sub_sock.close(linger=0)
@@ -159,6 +130,44 @@ class ProactiveBridge:
             except Exception:
                 pass
 
+    def _forward(self, event: object, push_sock: "zmq.Socket") -> None:
+        payload = event.get("payload") if isinstance(event, dict) else None
+        if not isinstance(payload, dict):
+            return
+
+        if payload.get("message_type") != "proactive_notification":
+            return
+
+        content = str(payload.get("content") or "").strip()
+        if not content:
+            return
+
+        metadata = payload.get("metadata") or {}
+        plugin_id = payload.get("plugin_id", "")
+
+        proactive_event = {
+            "event_type": "proactive_message",
+            "lanlan_name": metadata.get("target_lanlan") or None,
+            "text": content,
+            "summary": content,
+            "detail": content,
+            "channel": f"plugin:{plugin_id}" if plugin_id else "plugin",
+            "task_id": metadata.get("task_id", ""),
+            "success": True,
+            "status": "completed",
+            "timestamp": payload.get("time", ""),
+        }
+
+        try:
+            push_sock.send_json(proactive_event, zmq.NOBLOCK)
+            logger.info(
+                "proactive bridge forwarded: plugin={} content={}",
+                plugin_id,
+                content[:80],
+            )
+        except Exception as e:
+            logger.warning("proactive bridge push failed: {}", e)
+
 
 _bridge = ProactiveBridge()
 
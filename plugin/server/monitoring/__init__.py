@@ -3,6 +3,6 @@
 
 提供性能指标收集和监控功能。
 """
-from plugin.server.monitoring.metrics import metrics_collector
+from plugin.server.monitoring.metrics import entry_latency, metrics_collector
 
-__all__ = ['metrics_collector']
+__all__ = ['entry_latency', 'metrics_collector']
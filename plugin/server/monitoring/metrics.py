@@ -4,10 +4,12 @@
 提供插件性能指标的收集和查询功能。
 """
 import asyncio
+import math
 import threading
+from bisect import bisect_left
 from datetime import datetime, timezone
 from typing import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 try:
     import psutil
@@ -66,6 +68,213 @@ class PluginMetrics:
     queue_size: int = 0
 
 
+# ========== 入口调用延迟直方图 ==========
+
+# 对数-线性分桶（HDR 风格）：每个 2 的幂区间再均分 _SUB_BUCKETS 份，相对误差约 1/_SUB_BUCKETS；
+# 单位微秒，覆盖 1us ~ 约 71 分钟，超出的计入最后一个桶
+_SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_MAX_VALUE_BITS = 32
+_BUCKET_COUNT = (_MAX_VALUE_BITS - _SUB_BUCKET_BITS + 1) * _SUB_BUCKETS
+
+# Prometheus 导出使用的固定 le 边界（秒）
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_PROMETHEUS_BUCKETS_US = tuple(int(b * 1_000_000) for b in PROMETHEUS_BUCKETS)
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _SUB_BUCKETS:
+        return max(value_us, 0)
+    shift = value_us.bit_length() - _SUB_BUCKET_BITS - 1
+    index = (shift + 1) * _SUB_BUCKETS + (value_us >> shift) - _SUB_BUCKETS
+    return min(index, _BUCKET_COUNT - 1)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """桶内最大值（微秒）"""
+    if index < _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return ((index % _SUB_BUCKETS + _SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    固定分桶的延迟直方图（非线程安全，由 EntryLatencyRegistry 加锁）
+
+    记录为 O(1)，内存固定；分位数按桶上界返回，误差在一个桶宽以内。
+    另外为 Prometheus 导出维护固定 le 边界的精确累计计数。
+    """
+
+    __slots__ = ("counts", "le_counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKET_COUNT
+        self.le_counts = [0] * (len(_PROMETHEUS_BUCKETS_US) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float) -> None:
+        value_us = int(seconds * 1_000_000) if seconds > 0 else 0
+        self.counts[_bucket_index(value_us)] += 1
+        self.le_counts[bisect_left(_PROMETHEUS_BUCKETS_US, value_us)] += 1
+        if self.count == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.count += 1
+        self.total_us += value_us
+
+    def percentiles(self, ps: tuple[float, ...]) -> list[float]:
+        """按升序给出的多个百分位（秒），一次遍历分桶"""
+        if self.count == 0:
+            return [0.0] * len(ps)
+        targets = [max(1, math.ceil(self.count * p / 100.0)) for p in ps]
+        result: list[float] = []
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while len(result) < len(targets) and seen >= targets[len(result)]:
+                result.append(min(_bucket_upper_bound(index), self.max_us) / 1_000_000)
+            if len(result) == len(targets):
+                break
+        result.extend([self.max_us / 1_000_000] * (len(targets) - len(result)))
+        return result
+
+    def percentile(self, p: float) -> float:
+        """第 p 百分位（秒）"""
+        return self.percentiles((p,))[0]
+
+    def summary(self) -> dict[str, object]:
+        """count / mean / p50 / p90 / p99 / max（毫秒）"""
+        mean = self.total_us / self.count / 1000 if self.count else 0.0
+        p50, p90, p99 = self.percentiles((50, 90, 99))
+        return {
+            "count": self.count,
+            "mean_ms": round(mean, 3),
+            "p50_ms": round(p50 * 1000, 3),
+            "p90_ms": round(p90 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+@dataclass
+class EntryLatencyStats:
+    """单个插件入口的调用统计"""
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+
+
+class EntryLatencyRegistry:
+    """
+    按 (plugin_id, entry_id) 记录入口调用的端到端延迟、排队等待和错误数
+
+    端到端延迟为主进程发出 TRIGGER 到收到结果的时间；子进程回报入口实际执行耗时，
+    两者之差计为排队等待（下行传输 + 子进程调度 + 结果回传）。
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[str, str], EntryLatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        plugin_id: str,
+        entry_id: str,
+        latency: float,
+        *,
+        queue_wait: float | None = None,
+        error: bool = False,
+    ) -> None:
+        key = (plugin_id, entry_id)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EntryLatencyStats()
+            stats.latency.record(latency)
+            if queue_wait is not None:
+                stats.queue_wait.record(queue_wait)
+            if error:
+                stats.errors += 1
+
+    def reset(self, plugin_id: str | None = None) -> None:
+        with self._lock:
+            if plugin_id is None:
+                self._stats.clear()
+            else:
+                for key in [k for k in self._stats if k[0] == plugin_id]:
+                    del self._stats[key]
+
+    def plugin_totals(self, plugin_id: str) -> tuple[int, int, float]:
+        """插件所有入口的 (调用次数, 失败次数, 平均耗时秒)"""
+        calls = errors = 0
+        total_us = 0
+        with self._lock:
+            for (pid, _entry_id), stats in self._stats.items():
+                if pid == plugin_id:
+                    calls += stats.latency.count
+                    errors += stats.errors
+                    total_us += stats.latency.total_us
+        return calls, errors, (total_us / calls / 1_000_000 if calls else 0.0)
+
+    def snapshot(self, plugin_id: str | None = None) -> list[dict[str, object]]:
+        """各入口的统计摘要（按 plugin_id、entry_id 排序）"""
+        with self._lock:
+            items = sorted(
+                (key, stats) for key, stats in self._stats.items()
+                if plugin_id is None or key[0] == plugin_id
+            )
+            return [
+                {
+                    "plugin_id": pid,
+                    "entry_id": entry_id,
+                    "calls": stats.latency.count,
+                    "errors": stats.errors,
+                    "latency": stats.latency.summary(),
+                    "queue_wait": stats.queue_wait.summary(),
+                }
+                for (pid, entry_id), stats in items
+            ]
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: list[str] = []
+        with self._lock:
+            items = sorted(self._stats.items())
+            for name, help_text, attr in (
+                ("neko_plugin_entry_latency_seconds", "Plugin entry trigger latency (host round trip).", "latency"),
+                ("neko_plugin_entry_queue_wait_seconds", "Time a plugin entry call spent outside the entry itself.", "queue_wait"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (pid, entry_id), stats in items:
+                    hist: LatencyHistogram = getattr(stats, attr)
+                    labels = f'plugin_id="{_escape_label(pid)}",entry_id="{_escape_label(entry_id)}"'
+                    cumulative = 0
+                    for bound, n in zip(PROMETHEUS_BUCKETS, hist.le_counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {hist.total_us / 1_000_000:.6f}")
+                    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+            lines.append("# HELP neko_plugin_entry_errors_total Plugin entry calls that failed or timed out.")
+            lines.append("# TYPE neko_plugin_entry_errors_total counter")
+            for (pid, entry_id), stats in items:
+                labels = f'plugin_id="{_escape_label(pid)}",entry_id="{_escape_label(entry_id)}"'
+                lines.append(f"neko_plugin_entry_errors_total{{{labels}}} {stats.errors}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
 class MetricsCollector:
     """性能指标收集器"""
     
@@ -211,6 +420,8 @@ class MetricsCollector:
                             logger.debug(f"Failed to get pending requests count for {plugin_id}: {e}")
                         pending_requests = 0
             
+            total_executions, failed_executions, avg_execution_time = entry_latency.plugin_totals(plugin_id)
+            
             return PluginMetrics(
                 plugin_id=plugin_id,
                 timestamp=now_iso(),
@@ -219,6 +430,10 @@ class MetricsCollector:
                 memory_mb=memory_mb,
                 memory_percent=memory_percent,
                 num_threads=num_threads,
+                total_executions=total_executions,
+                successful_executions=total_executions - failed_executions,
+                failed_executions=failed_executions,
+                avg_execution_time=avg_execution_time,
                 pending_requests=pending_requests,
             )
         except _RUNTIME_ERRORS as e:
@@ -327,3 +542,5 @@ class MetricsCollector:
 
 # 全局指标收集器实例
 metrics_collector = MetricsCollector()
+# 全局入口延迟统计实例
+entry_latency = EntryLatencyRegistry()
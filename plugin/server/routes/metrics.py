@@ -6,10 +6,12 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
 
 from plugin.logging_config import get_logger
 from plugin.server.application.contracts import (
     AllPluginMetricsResponse,
+    EntryLatencyMetricsResponse,
     PluginMetricsHistoryResponse,
     PluginMetricsResponse,
 )
@@ -31,6 +33,27 @@ async def get_all_plugin_metrics(_: str = require_admin) -> AllPluginMetricsResp
         raise_http_from_domain(error, logger=logger)
 
 
+# 以下两个固定路径需要注册在 /plugin/metrics/{plugin_id} 之前
+@router.get("/plugin/metrics/entries")
+async def get_entry_latency_metrics(
+    plugin_id: Optional[str] = Query(default=None),
+    _: str = require_admin,
+) -> EntryLatencyMetricsResponse:
+    try:
+        return await metrics_query_service.get_entry_latency_metrics(plugin_id)
+    except ServerDomainError as error:
+        raise_http_from_domain(error, logger=logger)
+
+
+@router.get("/plugin/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics(_: str = require_admin) -> PlainTextResponse:
+    try:
+        text = await metrics_query_service.get_prometheus_metrics()
+    except ServerDomainError as error:
+        raise_http_from_domain(error, logger=logger)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.get("/plugin/metrics/{plugin_id}")
 async def get_plugin_metrics(plugin_id: str, _: str = require_admin) -> PluginMetricsResponse:
     try:
@@ -7,16 +7,17 @@ import json
 from typing import Optional
 
 from fastapi import APIRouter, Body, Query, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 
 from plugin._types.models import RunCreateRequest, RunCreateResponse
 from plugin.logging_config import get_logger
 from plugin.server.application.contracts import UploadBlobResponse, UploadSessionResponse
 from plugin.server.application.runs import RunService
-from plugin.server.application.runs.service import RunRecord
+from plugin.server.application.runs.service import RunListResponse, RunRecord
 from plugin.server.domain.errors import ServerDomainError
 from plugin.server.infrastructure.error_mapping import raise_http_from_domain
+from plugin.server.runs.storage import BLOB_IO_CHUNK
 
 router = APIRouter()
 logger = get_logger("server.routes.runs")
@@ -36,6 +37,19 @@ async def runs_create(payload: RunCreateRequest, request: Request) -> RunCreateR
         raise_http_from_domain(error, logger=logger)
 
 
+@router.get("/runs", response_model=RunListResponse)
+async def runs_list(
+    plugin_id: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None),
+) -> RunListResponse:
+    try:
+        return run_service.list_runs_page(plugin_id=plugin_id, status=status, limit=limit, cursor=cursor)
+    except ServerDomainError as error:
+        raise_http_from_domain(error, logger=logger)
+
+
 @router.get("/runs/{run_id}", response_model=RunRecord)
 async def runs_get(run_id: str) -> RunRecord:
     try:
@@ -44,6 +58,19 @@ async def runs_get(run_id: str) -> RunRecord:
         raise_http_from_domain(error, logger=logger)
 
 
+@router.get("/runs/{run_id}/wait")
+async def runs_wait(
+    run_id: str,
+    timeout: float = Query(default=25.0, ge=0.0, le=60.0),
+    since: Optional[float] = Query(default=None),
+) -> dict[str, object]:
+    try:
+        response = await run_service.wait_run(run_id, timeout=float(timeout), since=since)
+        return response.model_dump(by_alias=True)
+    except ServerDomainError as error:
+        raise_http_from_domain(error, logger=logger)
+
+
 @router.post("/runs/{run_id}/uploads")
 async def runs_create_upload(run_id: str, request: Request) -> UploadSessionResponse:
     raw_body: object | None
@@ -75,13 +102,29 @@ async def uploads_put(upload_id: str, request: Request) -> UploadBlobResponse:
 
 
 @router.get("/runs/{run_id}/blobs/{blob_id}")
-async def runs_get_blob(run_id: str, blob_id: str) -> FileResponse:
+async def runs_get_blob(run_id: str, blob_id: str, request: Request) -> Response:
     try:
-        path = run_service.get_blob_path(run_id=run_id, blob_id=blob_id)
-        return FileResponse(str(path), filename=f"{blob_id}.bin")
+        blob = run_service.get_blob(run_id=run_id, blob_id=blob_id)
     except ServerDomainError as error:
         raise_http_from_domain(error, logger=logger)
 
+    # 内容寻址：sha256 即强 ETag，内容永不变化
+    etag = f'"{blob.sha256}"'
+    headers = {"etag": etag, "cache-control": "private, max-age=31536000, immutable"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    # FileResponse 分块流式发送并处理 Range / If-Range；服务器支持
+    # http.response.pathsend 扩展时直接交给服务器零拷贝发送
+    response = FileResponse(
+        str(blob.path),
+        filename=blob.filename or f"{blob_id}.bin",
+        media_type=blob.mime,
+        headers=headers,
+    )
+    response.chunk_size = BLOB_IO_CHUNK
+    return response
+
 
 @router.post("/runs/{run_id}/cancel", response_model=RunRecord)
 async def runs_cancel(
@@ -3,6 +3,8 @@ from plugin.runs import *  # noqa: F401,F403
 from plugin.runs import (
     RunCancelRequest,
     RunRecord,
+    RunWaitResponse,
+    RunListResponse,
     ExportCategory,
     ExportListResponse,
     InvalidRunTransition,
@@ -13,6 +15,8 @@ from plugin.runs import (
     shutdown_runs,
     list_export_for_run,
     list_runs,
+    list_runs_page,
+    wait_for_run,
     ws_run_endpoint,
     issue_run_token,
     blob_store,
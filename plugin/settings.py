@@ -117,6 +117,21 @@ RUN_EXECUTION_TIMEOUT = _get_float_env("NEKO_RUN_EXECUTION_TIMEOUT", 300.0)
 # InMemoryRunStore 保留的已终止 Run 最大数量，超出后淘汰最旧的
 # Env: NEKO_RUN_STORE_MAX_COMPLETED, default=500
 RUN_STORE_MAX_COMPLETED = _get_int_env("NEKO_RUN_STORE_MAX_COMPLETED", 500)
+# Run / Export 存储后端："memory"（进程内，重启丢失）或 "sqlite"（持久化，带索引与游标分页）
+# Env: NEKO_RUN_STORE_BACKEND, default="memory"
+RUN_STORE_BACKEND = os.getenv("NEKO_RUN_STORE_BACKEND", "memory").strip().lower() or "memory"
+# sqlite 后端的数据库文件
+# Env: NEKO_RUN_STORE_DB_PATH, default=plugin/store/runs.db
+RUN_STORE_DB_PATH = os.getenv("NEKO_RUN_STORE_DB_PATH", str((Path(__file__).parent / "store" / "runs.db").resolve()))
+# sqlite 后端保留的已终止 Run 最大数量（连同其 Export 一起淘汰）
+# Env: NEKO_RUN_STORE_SQLITE_MAX_COMPLETED, default=100000
+RUN_STORE_SQLITE_MAX_COMPLETED = _get_int_env("NEKO_RUN_STORE_SQLITE_MAX_COMPLETED", 100_000)
+# sqlite 后端已终止 Run 的保留时间（秒），<=0 表示不按时间淘汰
+# Env: NEKO_RUN_STORE_RETENTION_SECONDS, default=604800 (7天)
+RUN_STORE_RETENTION_SECONDS = _get_float_env("NEKO_RUN_STORE_RETENTION_SECONDS", 7 * 24 * 3600.0)
+# sqlite 后端单个 Export 序列化后超过该大小时，内容单独存放（列表 / 过滤不读取这部分数据）
+# Env: NEKO_RUN_EXPORT_INLINE_MAX_BYTES, default=16384
+RUN_EXPORT_INLINE_MAX_BYTES = _get_int_env("NEKO_RUN_EXPORT_INLINE_MAX_BYTES", 16 * 1024)
 
 BLOB_STORE_DIR = os.getenv("NEKO_BLOB_STORE_DIR", str((Path(__file__).parent / "store" / "blobs").resolve()))
 BLOB_UPLOAD_MAX_BYTES = _get_int_env("NEKO_BLOB_UPLOAD_MAX_BYTES", 200 * 1024 * 1024)
@@ -183,6 +198,23 @@ PROCESS_TERMINATE_TIMEOUT = _get_float_env("NEKO_PROCESS_TERMINATE_TIMEOUT", 0.5
 # - 公式：``max(8, (CPU核心数 or 1) + 4)``，确保多插件场景下有足够的线程
 COMMUNICATION_THREAD_POOL_MAX_WORKERS = max(32, (os.cpu_count() or 1) + 8)
 
+# 插件启动并发上限：同一依赖层内最多同时启动的插件数（1 表示逐个启动）
+# Env: NEKO_PLUGIN_START_CONCURRENCY, default=min(8, CPU核心数)
+PLUGIN_START_CONCURRENCY = max(1, _get_int_env("NEKO_PLUGIN_START_CONCURRENCY", min(8, os.cpu_count() or 1)))
+
+# 插件就绪等待超时（秒）：同层插件上报 PLUGIN_READY（或超时）后才启动下一依赖层；0 表示不等待
+# Env: NEKO_PLUGIN_READY_TIMEOUT, default=10.0
+PLUGIN_READY_TIMEOUT = max(0.0, _get_float_env("NEKO_PLUGIN_READY_TIMEOUT", 10.0))
+
+# 插件进程启动方式
+# - inherit: 沿用 multiprocessing 的全局默认启动方式（Linux 上为 fork，默认）
+# - zygote: 由预导入 SDK / zmq / msgpack / pydantic 的 zygote 进程 fork 出插件进程（不支持 fork 的平台退回 spawn）
+# - spawn: 每个插件一个全新解释器
+# Env: NEKO_PLUGIN_PROCESS_START_METHOD, default="inherit"
+PLUGIN_PROCESS_START_METHOD = os.getenv("NEKO_PLUGIN_PROCESS_START_METHOD", "inherit").lower()
+if PLUGIN_PROCESS_START_METHOD not in ("zygote", "spawn", "inherit"):
+    PLUGIN_PROCESS_START_METHOD = "inherit"
+
 
 # ========== 消息拉取默认上限 ==========
 
@@ -271,6 +303,33 @@ PLUGIN_ZMQ_IPC_ENABLED = _get_bool_env("NEKO_PLUGIN_ZMQ_IPC_ENABLED", True)
 # Env: NEKO_PLUGIN_ZMQ_IPC_ENDPOINT, default="tcp://127.0.0.1:38765"
 PLUGIN_ZMQ_IPC_ENDPOINT = os.getenv("NEKO_PLUGIN_ZMQ_IPC_ENDPOINT", "tcp://127.0.0.1:38765")
 
+# 插件宿主 <-> 插件子进程 ZMQ 通道的端点类型
+# - tcp: 回环 TCP（127.0.0.1，随机端口）
+# - ipc: Unix 域套接字（ipc://，平台不支持时自动退回 tcp）
+# Env: NEKO_PLUGIN_TRANSPORT_ENDPOINT, default="tcp"
+PLUGIN_TRANSPORT_ENDPOINT = os.getenv("NEKO_PLUGIN_TRANSPORT_ENDPOINT", "tcp").lower()
+if PLUGIN_TRANSPORT_ENDPOINT not in ("tcp", "ipc"):
+    PLUGIN_TRANSPORT_ENDPOINT = "tcp"
+
+# 插件宿主 <-> 插件子进程 ZMQ 通道的编码
+# - pickle: 与 mp.Queue 相同，可传任意对象
+# - msgpack: ormsgpack + 每个通道的字段 schema；无法用 msgpack 表示的消息逐条退回 pickle
+# Env: NEKO_PLUGIN_TRANSPORT_CODEC, default="pickle"
+PLUGIN_TRANSPORT_CODEC = os.getenv("NEKO_PLUGIN_TRANSPORT_CODEC", "pickle").lower()
+if PLUGIN_TRANSPORT_CODEC not in ("pickle", "msgpack"):
+    PLUGIN_TRANSPORT_CODEC = "pickle"
+
+# msgpack 模式下是否允许逐条退回 pickle；默认关闭，宿主拒收插件进程发来的 pickle 帧
+# （pickle 编码模式不受影响）。开启后每次退回都会记录警告日志
+# Env: NEKO_PLUGIN_TRANSPORT_ALLOW_PICKLE, default=False
+PLUGIN_TRANSPORT_ALLOW_PICKLE = _get_bool_env("NEKO_PLUGIN_TRANSPORT_ALLOW_PICKLE", False)
+
+# 超过该大小（字节）的 bytes 类负载改走共享内存旁路，ZMQ 上只传描述符；0 表示关闭（仅 POSIX 生效）
+# 默认关闭：/dev/shm 容量常常很小（如 Docker 默认 64 MiB），需按部署环境显式开启（如 1048576）。
+# 开启后 /dev/shm 剩余空间不足时仍会逐条退回内联发送
+# Env: NEKO_PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES, default=0
+PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES = _get_int_env("NEKO_PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES", 0)
+
 # [MESSAGE FORWARD] 日志去重窗口（秒）
 # Env: NEKO_PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS, default=1.0
 PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS = _get_float_env(
@@ -332,6 +391,22 @@ MESSAGE_PLANE_INGEST_BACKPRESSURE_SLEEP_SECONDS = _get_float_env("NEKO_MESSAGE_P
 MESSAGE_PLANE_INGEST_SNDTIMEO_MS = _get_int_env("NEKO_MESSAGE_PLANE_INGEST_SNDTIMEO_MS", 1000)
 
 MESSAGE_PLANE_PUB_ENABLED = _get_bool_env("NEKO_MESSAGE_PLANE_PUB_ENABLED", True)
+
+# PUB 按 topic 攒批发布（msgpack 编码，批头带 seq 范围供订阅方检测丢失）；关闭则每条记录单独发 JSON
+# Env: NEKO_MESSAGE_PLANE_PUB_BATCH_ENABLED, default=True
+MESSAGE_PLANE_PUB_BATCH_ENABLED = _get_bool_env("NEKO_MESSAGE_PLANE_PUB_BATCH_ENABLED", True)
+
+# 单批最多条数，达到后立即发送
+# Env: NEKO_MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS, default=256
+MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS = _get_int_env("NEKO_MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS", 256)
+
+# 攒批时间窗口（毫秒），即批量发布带来的最大额外延迟
+# Env: NEKO_MESSAGE_PLANE_PUB_BATCH_FLUSH_MS, default=5
+MESSAGE_PLANE_PUB_BATCH_FLUSH_MS = _get_int_env("NEKO_MESSAGE_PLANE_PUB_BATCH_FLUSH_MS", 5)
+
+# 等待发送的记录上限，超出时丢弃该 topic 积压的旧批次（订阅方可通过批头发现缺口）
+# Env: NEKO_MESSAGE_PLANE_PUB_BATCH_MAX_PENDING, default=100000
+MESSAGE_PLANE_PUB_BATCH_MAX_PENDING = _get_int_env("NEKO_MESSAGE_PLANE_PUB_BATCH_MAX_PENDING", 100000)
 MESSAGE_PLANE_VALIDATE_PAYLOAD_BYTES = _get_bool_env("NEKO_MESSAGE_PLANE_VALIDATE_PAYLOAD_BYTES", True)
 
 MESSAGE_PLANE_PUSH_BATCHER_MAX_QUEUE = _get_int_env("NEKO_MESSAGE_PLANE_PUSH_BATCHER_MAX_QUEUE", 100000)
@@ -343,6 +418,42 @@ MESSAGE_PLANE_PUSH_BATCHER_ENQUEUE_TIMEOUT_SECONDS = _get_float_env(
 
 MESSAGE_PLANE_BRIDGE_ENABLED = _get_bool_env("NEKO_MESSAGE_PLANE_BRIDGE_ENABLED", True)
 
+# Message plane 持久化日志（每个 topic 一组追加写的段文件，重启时回放）
+# Env: NEKO_MESSAGE_PLANE_WAL_ENABLED, default=False
+MESSAGE_PLANE_WAL_ENABLED = _get_bool_env("NEKO_MESSAGE_PLANE_WAL_ENABLED", False)
+
+# 日志目录
+# Env: NEKO_MESSAGE_PLANE_WAL_DIR, default=plugin/store/message_plane_wal
+MESSAGE_PLANE_WAL_DIR = os.getenv(
+    "NEKO_MESSAGE_PLANE_WAL_DIR", str((Path(__file__).parent / "store" / "message_plane_wal").resolve())
+)
+
+# fsync 策略：none（只写入操作系统缓冲）/ interval（后台定期 fsync）/ always（每条 fsync）
+# Env: NEKO_MESSAGE_PLANE_WAL_FSYNC, default="interval"
+MESSAGE_PLANE_WAL_FSYNC = os.getenv("NEKO_MESSAGE_PLANE_WAL_FSYNC", "interval").lower()
+if MESSAGE_PLANE_WAL_FSYNC not in ("none", "interval", "always"):
+    MESSAGE_PLANE_WAL_FSYNC = "interval"
+
+# interval 策略下的 fsync 间隔（秒）
+# Env: NEKO_MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS, default=1.0
+MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS = _get_float_env("NEKO_MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS", 1.0)
+
+# 单个段文件的大小上限（字节）；段内记录数另有 maxlen/4 的上限
+# Env: NEKO_MESSAGE_PLANE_WAL_SEGMENT_BYTES, default=4 MiB
+MESSAGE_PLANE_WAL_SEGMENT_BYTES = _get_int_env("NEKO_MESSAGE_PLANE_WAL_SEGMENT_BYTES", 4 * 1024 * 1024)
+
+# 后台压缩间隔（秒）：删除记录已全部被内存淘汰的段文件，使磁盘占用收敛到 maxlen 附近
+# Env: NEKO_MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS, default=30.0
+MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS = _get_float_env("NEKO_MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS", 30.0)
+
+# RPC 重查询（bus.replay、跨 topic 的 bus.query）工作线程数；0 表示全部在轮询线程内联处理
+# Env: NEKO_MESSAGE_PLANE_RPC_WORKERS, default=2
+MESSAGE_PLANE_RPC_WORKERS = _get_int_env("NEKO_MESSAGE_PLANE_RPC_WORKERS", 2)
+
+# bus.replay 结果缓存条数（按 计划指纹 + topic 版本 命中）；0 表示只缓存编译后的计划
+# Env: NEKO_MESSAGE_PLANE_QUERY_CACHE_ENTRIES, default=256
+MESSAGE_PLANE_QUERY_CACHE_ENTRIES = _get_int_env("NEKO_MESSAGE_PLANE_QUERY_CACHE_ENTRIES", 256)
+
 # PUSH 批量大小（条数）
 # Env: NEKO_PLUGIN_ZMQ_MESSAGE_PUSH_BATCH_SIZE, default=256
 PLUGIN_ZMQ_MESSAGE_PUSH_BATCH_SIZE = _get_int_env("NEKO_PLUGIN_ZMQ_MESSAGE_PUSH_BATCH_SIZE", 256)
@@ -373,6 +484,18 @@ PLUGIN_LOG_BACKUP_COUNT = 10
 # 最多保留的日志文件总数（包括当前和备份），默认 20 个
 PLUGIN_LOG_MAX_FILES = 20
 
+# 日志实时推送（WebSocket）的文件监控后端
+# - "auto": Linux 上使用 inotify，不可用时回退轮询（默认）
+# - "poll": 始终轮询
+# Env: NEKO_PLUGIN_LOG_WATCH_BACKEND, default="auto"
+PLUGIN_LOG_WATCH_BACKEND = os.getenv("NEKO_PLUGIN_LOG_WATCH_BACKEND", "auto").strip().lower()
+if PLUGIN_LOG_WATCH_BACKEND not in ("auto", "poll"):
+    PLUGIN_LOG_WATCH_BACKEND = "auto"
+
+# 轮询模式下检查日志文件增长的间隔（秒）
+# Env: NEKO_PLUGIN_LOG_WATCH_POLL_INTERVAL, default=0.5
+PLUGIN_LOG_WATCH_POLL_INTERVAL = _get_float_env("NEKO_PLUGIN_LOG_WATCH_POLL_INTERVAL", 0.5)
+
 
 # ========== 插件状态持久化配置 ==========
 
@@ -545,6 +668,9 @@ __all__ = [
     
     # 线程池配置
     "COMMUNICATION_THREAD_POOL_MAX_WORKERS",
+    "PLUGIN_START_CONCURRENCY",
+    "PLUGIN_READY_TIMEOUT",
+    "PLUGIN_PROCESS_START_METHOD",
     
     # 消息队列配置
     "MESSAGE_QUEUE_DEFAULT_MAX_COUNT",
@@ -559,6 +685,12 @@ __all__ = [
     "MESSAGE_SCHEMA_ALLOW_UNSAFE",
     "MESSAGE_SCHEMA_WARN_UNKNOWN_FIELDS",
     
+    # 插件进程传输
+    "PLUGIN_TRANSPORT_ENDPOINT",
+    "PLUGIN_TRANSPORT_CODEC",
+    "PLUGIN_TRANSPORT_ALLOW_PICKLE",
+    "PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES",
+    
     # 其他配置
     "STATUS_CONSUMER_SLEEP_INTERVAL",
     "MESSAGE_CONSUMER_SLEEP_INTERVAL",
@@ -580,12 +712,26 @@ __all__ = [
     "MESSAGE_PLANE_ZMQ_PUB_ENDPOINT",
     "MESSAGE_PLANE_ZMQ_INGEST_ENDPOINT",
     "MESSAGE_PLANE_VALIDATE_MODE",
+    "MESSAGE_PLANE_WAL_ENABLED",
+    "MESSAGE_PLANE_WAL_DIR",
+    "MESSAGE_PLANE_WAL_FSYNC",
+    "MESSAGE_PLANE_WAL_FSYNC_INTERVAL_SECONDS",
+    "MESSAGE_PLANE_WAL_SEGMENT_BYTES",
+    "MESSAGE_PLANE_WAL_COMPACT_INTERVAL_SECONDS",
+    "MESSAGE_PLANE_RPC_WORKERS",
+    "MESSAGE_PLANE_QUERY_CACHE_ENTRIES",
+    "MESSAGE_PLANE_PUB_BATCH_ENABLED",
+    "MESSAGE_PLANE_PUB_BATCH_MAX_ITEMS",
+    "MESSAGE_PLANE_PUB_BATCH_FLUSH_MS",
+    "MESSAGE_PLANE_PUB_BATCH_MAX_PENDING",
     
     # 插件Logger配置
     "PLUGIN_LOG_LEVEL",
     "PLUGIN_LOG_MAX_BYTES",
     "PLUGIN_LOG_BACKUP_COUNT",
     "PLUGIN_LOG_MAX_FILES",
+    "PLUGIN_LOG_WATCH_BACKEND",
+    "PLUGIN_LOG_WATCH_POLL_INTERVAL",
     
     # 状态持久化配置
     "PLUGIN_STATE_BACKEND_DEFAULT",
@@ -593,6 +739,11 @@ __all__ = [
     # Run 配置
     "RUN_EXECUTION_TIMEOUT",
     "RUN_STORE_MAX_COMPLETED",
+    "RUN_STORE_BACKEND",
+    "RUN_STORE_DB_PATH",
+    "RUN_STORE_SQLITE_MAX_COMPLETED",
+    "RUN_STORE_RETENTION_SECONDS",
+    "RUN_EXPORT_INLINE_MAX_BYTES",
     
     # 验证函数
     "validate_config",
@@ -653,4 +804,6 @@ PUBLIC_SYSTEM_CONFIG_KEYS = (
     "PLUGIN_STATE_BACKEND_DEFAULT",
     "RUN_EXECUTION_TIMEOUT",
     "RUN_STORE_MAX_COMPLETED",
+    "RUN_STORE_BACKEND",
+    "RUN_STORE_RETENTION_SECONDS",
 )
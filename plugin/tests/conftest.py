@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import os
+import tempfile
 from collections.abc import AsyncIterator
 
-import pytest
-from fastapi import FastAPI
-from httpx import ASGITransport, AsyncClient
+# 组件日志写到临时目录，避免测试运行改动仓库里的 log/；必须在导入 plugin 模块之前设置
+os.environ.setdefault("NEKO_LOG_DIR", tempfile.mkdtemp(prefix="neko-plugin-test-logs-"))
 
-from plugin.server.infrastructure.auth import verify_admin_code
-from plugin.server.infrastructure.exceptions import register_exception_handlers
-from plugin.server.routes.health import router as health_router
-from plugin.server.routes.metrics import router as metrics_router
-from plugin.server.routes.runs import router as runs_router
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from plugin.server.infrastructure.auth import verify_admin_code  # noqa: E402
+from plugin.server.infrastructure.exceptions import register_exception_handlers  # noqa: E402
+from plugin.server.routes.health import router as health_router  # noqa: E402
+from plugin.server.routes.metrics import router as metrics_router  # noqa: E402
+from plugin.server.routes.runs import router as runs_router  # noqa: E402
 
 
 def pytest_addoption(parser: pytest.Parser) -> None:
@@ -15,3 +15,27 @@ async def test_metrics_history_invalid_start_time_returns_400(plugin_async_clien
     assert response.status_code == 400
     payload = response.json()
     assert isinstance(payload.get("detail"), str)
+
+
+@pytest.mark.plugin_integration
+@pytest.mark.asyncio
+async def test_entry_latency_and_prometheus_routes(
+    plugin_async_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from plugin.server.monitoring import metrics as metrics_module
+
+    registry = metrics_module.EntryLatencyRegistry()
+    registry.record("demo", "run", 0.012, queue_wait=0.002)
+    monkeypatch.setattr("plugin.server.application.monitoring.query_service.entry_latency", registry)
+
+    response = await plugin_async_client.get("/plugin/metrics/entries", params={"plugin_id": "demo"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["count"] == 1
+    assert payload["entries"][0]["latency"]["p99_ms"] >= 12
+
+    response = await plugin_async_client.get("/plugin/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'neko_plugin_entry_latency_seconds_count{plugin_id="demo",entry_id="run"} 1' in response.text
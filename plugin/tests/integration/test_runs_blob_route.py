@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from plugin.runs import manager as run_manager
+from plugin.runs.manager import InMemoryRunStore, RunRecord
+from plugin.runs.storage import BlobStore
+from plugin.server.application.runs import service as service_module
+
+
+@pytest.mark.plugin_integration
+@pytest.mark.asyncio
+async def test_blob_upload_dedup_range_and_conditional_get(
+    plugin_async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(service_module, "blob_store", BlobStore(root=tmp_path))
+    run_store = InMemoryRunStore()
+    monkeypatch.setattr(run_manager, "_run_store", run_store)
+    now = time.time()
+    run_store.create(RunRecord(run_id="run-1", plugin_id="p", entry_id="e", status="running", created_at=now, updated_at=now))
+    data = bytes(range(256)) * 4096
+
+    async def _body():
+        for i in range(0, len(data), 100_000):
+            yield data[i : i + 100_000]
+
+    results = []
+    for _ in range(2):
+        session = (await plugin_async_client.post("/runs/run-1/uploads", json={"filename": "a.bin"})).json()
+        put = await plugin_async_client.put(session["upload_url"], content=_body())
+        assert put.status_code == 200
+        results.append((session, put.json()))
+    (first_session, first), (_, second) = results
+    assert first["sha256"] == second["sha256"] == hashlib.sha256(data).hexdigest()
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert first["size"] == len(data)
+
+    url = first_session["blob_url"]
+    full = await plugin_async_client.get(url)
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["etag"] == f'"{first["sha256"]}"'
+
+    part = await plugin_async_client.get(url, headers={"range": "bytes=1000-1999"})
+    assert part.status_code == 206 and part.content == data[1000:2000]
+    assert part.headers["content-range"] == f"bytes 1000-1999/{len(data)}"
+
+    cached = await plugin_async_client.get(url, headers={"if-none-match": full.headers["etag"]})
+    assert cached.status_code == 304 and cached.content == b""
+
+    assert (await plugin_async_client.get("/runs/other/blobs/" + first["blob_id"])).status_code == 404
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from plugin.runs import manager as run_manager
+from plugin.runs.manager import RunRecord, RunsDatabase, SqliteRunStore
+
+
+@pytest.mark.plugin_integration
+@pytest.mark.asyncio
+async def test_runs_list_route_paginates_and_filters(
+    plugin_async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
+) -> None:
+    store = SqliteRunStore(RunsDatabase(tmp_path / "runs.db"))
+    monkeypatch.setattr(run_manager, "_run_store", store)
+    for i in range(5):
+        store.create(RunRecord(
+            run_id=f"r{i}", plugin_id="demo" if i % 2 else "other", entry_id="run",
+            status="running", created_at=100.0 + i, updated_at=100.0 + i,
+        ))
+
+    first = await plugin_async_client.get("/runs", params={"limit": 2})
+    assert first.status_code == 200
+    body = first.json()
+    assert [r["run_id"] for r in body["items"]] == ["r4", "r3"] and body["next_cursor"]
+
+    rest = await plugin_async_client.get("/runs", params={"limit": 10, "cursor": body["next_cursor"]})
+    assert [r["run_id"] for r in rest.json()["items"]] == ["r2", "r1", "r0"]
+    assert rest.json()["next_cursor"] is None
+
+    demo = await plugin_async_client.get("/runs", params={"plugin_id": "demo", "status": "running"})
+    assert [r["run_id"] for r in demo.json()["items"]] == ["r3", "r1"]
+
+    bad = await plugin_async_client.get("/runs", params={"cursor": "garbage"})
+    assert bad.status_code == 400
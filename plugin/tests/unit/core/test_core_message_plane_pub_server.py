@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import pytest
+
+zmq = pytest.importorskip("zmq")
+pytest.importorskip("ormsgpack")
+
+from plugin.message_plane.pub_server import (  # noqa: E402
+    BatchGapDetector,
+    MessagePlanePubServer,
+    decode_pub_message,
+)
+
+
+def _event(seq: int, topic: str = "messages.t") -> dict[str, Any]:
+    return {"seq": seq, "ts": 1.0, "store": "messages", "topic": topic, "payload": {"n": seq, "content": "x" * 48}, "index": {}}
+
+
+class _Sub:
+    def __init__(self, endpoint: str) -> None:
+        self.sock = zmq.Context.instance().socket(zmq.SUB)
+        self.sock.linger = 0
+        self.sock.setsockopt(zmq.RCVHWM, 0)
+        self.sock.connect(endpoint)
+        self.sock.setsockopt_string(zmq.SUBSCRIBE, "messages.")
+        time.sleep(0.2)  # 等 SUB 连上，避免丢掉最早的消息
+
+    def recv_all(self, timeout_ms: int = 300) -> list[list[bytes]]:
+        out = []
+        while self.sock.poll(timeout_ms):
+            out.append(self.sock.recv_multipart())
+        return out
+
+    def close(self) -> None:
+        self.sock.close(linger=0)
+
+
+@pytest.fixture
+def pub_factory() -> Iterator[Any]:
+    opened: list[Any] = []
+
+    def _make(**kwargs: Any) -> tuple[MessagePlanePubServer, _Sub]:
+        pub = MessagePlanePubServer(endpoint="tcp://127.0.0.1:*", **kwargs)
+        sub = _Sub(pub._sock.getsockopt(zmq.LAST_ENDPOINT).decode())
+        opened.extend([sub, pub])
+        return pub, sub
+
+    yield _make
+    for obj in opened:
+        obj.close()
+
+
+@pytest.mark.plugin_unit
+def test_batches_group_per_topic_and_chain_seq_ranges(pub_factory: Any) -> None:
+    pub, sub = pub_factory(batch=True, batch_max_items=100, flush_interval_ms=20)
+    for seq in range(1, 601):
+        pub.publish("messages.a" if seq % 3 else "messages.b", _event(seq))
+    assert pub.flush()
+
+    gaps = BatchGapDetector()
+    got: dict[str, list[int]] = {"messages.a": [], "messages.b": []}
+    for parts in sub.recv_all():
+        header, events = decode_pub_message(parts)
+        assert header is not None and parts[0].decode() == header["topic"]
+        assert 0 < header["count"] == len(events) <= 100
+        assert (header["first_seq"], header["last_seq"]) == (events[0]["seq"], events[-1]["seq"])
+        assert gaps.observe(header) is None
+        got[header["topic"]].extend(ev["seq"] for ev in events)
+    assert got["messages.a"] == [s for s in range(1, 601) if s % 3]
+    assert got["messages.b"] == [s for s in range(1, 601) if not s % 3]
+    assert pub.stats["records"] == 600 and pub.stats["batches"] < 20
+
+
+@pytest.mark.plugin_unit
+def test_shed_backlog_is_visible_as_gap(pub_factory: Any) -> None:
+    pub, sub = pub_factory(batch=True, flush_interval_ms=5000, max_pending=10)
+    gaps = BatchGapDetector()
+    for seq in range(1, 6):
+        pub.publish("messages.t", _event(seq))
+    assert pub.flush()
+    for seq in range(6, 18):  # 6..15 积压满 10 条，16 触发丢弃积压，17 开始新批次
+        pub.publish("messages.t", _event(seq))
+    assert pub.flush()
+
+    headers = [decode_pub_message(parts)[0] for parts in sub.recv_all()]
+    assert [gaps.observe(h) for h in headers] == [None, (5, 17)]
+    assert pub.stats["dropped"] == 11
+
+
+@pytest.mark.plugin_unit
+def test_unbatched_mode_keeps_json_frames(pub_factory: Any) -> None:
+    pub, sub = pub_factory(batch=False)
+    pub.publish("messages.t", _event(1))
+    (parts,) = sub.recv_all()
+    assert len(parts) == 2 and json.loads(parts[1])["seq"] == 1
+    assert decode_pub_message(parts) == (None, [_event(1)])
+
+
+def _offered_load(pub: MessagePlanePubServer, sub: _Sub, rate: int, duration: float = 1.0) -> dict[str, float]:
+    """以固定速率（每 1ms 一小批）向 8 个 topic 发布，统计订阅方收到的记录数、消息数与进程 CPU 时间。"""
+    received = {"records": 0, "messages": 0}
+    stop = threading.Event()
+
+    def _drain() -> None:
+        while not stop.is_set() or sub.sock.poll(200):
+            if not sub.sock.poll(50):
+                continue
+            parts = sub.sock.recv_multipart()
+            _, events = decode_pub_message(parts)
+            received["records"] += len(events)
+            received["messages"] += 1
+
+    reader = threading.Thread(target=_drain)
+    reader.start()
+    total = int(rate * duration)
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    seq = 0
+    while seq < total:
+        due = min(total, int((time.perf_counter() - t0) * rate) + 1)
+        while seq < due:
+            seq += 1
+            pub.publish(f"messages.t{seq % 8}", _event(seq))
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    pub.flush(timeout=5.0)
+    stop.set()
+    reader.join()
+    return {
+        "achieved_rate": total / elapsed,
+        "delivered": received["records"] / total,
+        "messages": float(received["messages"]),
+        "cpu_us_per_record": (time.process_time() - cpu0) / total * 1e6,
+    }
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.parametrize("rate", [10_000, 100_000])
+def test_benchmark_offered_load(pub_factory: Any, rate: int, record_property: Callable[[str, object], None]) -> None:
+    """每秒 1 万 / 10 万条：逐条 JSON 发布 vs 按 topic 攒批的 msgpack 发布（含订阅方解码）。"""
+    results = {}
+    for name, kwargs in (("per-record json", {"batch": False}), ("batched msgpack", {"batch": True})):
+        pub, sub = pub_factory(**kwargs)
+        results[name] = _offered_load(pub, sub, rate)
+        r = results[name]
+        record_property(
+            "perf",
+            f"{rate}/s {name}: achieved={r['achieved_rate']:.0f}/s delivered={r['delivered']:.1%} "
+            f"zmq_msgs={r['messages']:.0f} cpu={r['cpu_us_per_record']:.2f}us/record"
+        )
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["batched msgpack"]["delivered"] == 1.0
+        assert results["batched msgpack"]["achieved_rate"] > rate * 0.8
+        assert results["batched msgpack"]["cpu_us_per_record"] < results["per-record json"]["cpu_us_per_record"]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import time
+from typing import Any, Callable
+
+import pytest
+
+from plugin.message_plane.query_plan import QueryPlanCache, compile_plan, plan_fingerprint
+from plugin.message_plane.stores import TopicStore
+
+
+def _store(count: int, topics: int = 4, seed: int = 3) -> TopicStore:
+    rng = random.Random(seed)
+    st = TopicStore(name="messages", maxlen=20000)
+    for i in range(count):
+        st.publish(
+            f"t{i % topics}",
+            {
+                "id": f"m{i}",
+                "plugin_id": f"p{rng.randrange(20)}",
+                "kind": rng.choice(["text", "image"]),
+                "priority": rng.randrange(10),
+                "content": rng.choice(["hello world", "status ok", "error: disk"]),
+                "timestamp": 1000.0 + i,
+                "metadata": {"conversation_id": f"c{i % 3}"},
+            },
+        )
+    return st
+
+
+def _get(topic: str, **params: Any) -> dict[str, Any]:
+    return {"kind": "get", "op": "get", "params": {"params": {"topic": topic, "max_count": 1000, **params}}}
+
+
+def _unary(op: str, child: dict[str, Any], **params: Any) -> dict[str, Any]:
+    return {"kind": "unary", "op": op, "params": params, "child": child}
+
+
+def _binary(op: str, left: dict[str, Any], right: dict[str, Any]) -> dict[str, Any]:
+    return {"kind": "binary", "op": op, "params": {}, "left": left, "right": right}
+
+
+def _ids(items: list[dict[str, Any]]) -> list[int]:
+    return [int(ev["payload"]["id"][1:]) for ev in items]
+
+
+@pytest.mark.plugin_unit
+def test_compiled_ops_match_reference_semantics() -> None:
+    st = _store(400)
+    t0 = list(st.items["t0"])
+
+    def run(plan: dict[str, Any]) -> Any:
+        compiled = compile_plan(plan)
+        return None if compiled is None else compiled.run(st)
+
+    flt = run(_unary("filter", _get("t0"), plugin_id="p3", priority_min=4, content_re="hello", flt={"since_ts": 1100}))
+    assert _ids(flt) == [
+        int(ev["payload"]["id"][1:]) for ev in t0
+        if ev["payload"]["plugin_id"] == "p3" and ev["payload"]["priority"] >= 4
+        and "hello" in ev["payload"]["content"] and ev["index"]["timestamp"] >= 1100
+    ]
+    assert _ids(run(_unary("filter", _get("t0"), conversation_id="c1"))) == [i for i in _ids(t0) if i % 3 == 1]
+
+    by_priority = run(_unary("limit", _unary("sort", _get("t0"), by=["priority", "timestamp"], reverse=True), n=5))
+    assert [(e["payload"]["priority"], e["index"]["timestamp"]) for e in by_priority] == sorted(
+        ((e["payload"]["priority"], e["index"]["timestamp"]) for e in t0), reverse=True
+    )[:5]
+
+    assert {e["payload"]["kind"] for e in run(_unary("where_in", _get("t0"), field="kind", values=["image"]))} == {"image"}
+    assert all("disk" in e["payload"]["content"] for e in run(_unary("where_contains", _get("t0"), field="content", value="disk")))
+    assert _ids(run(_unary("where_regex", _get("t0"), field="content", pattern="^status"))) == [
+        i for i, e in zip(_ids(t0), t0) if e["payload"]["content"].startswith("status")
+    ]
+    assert run(_unary("where_regex", _get("t0"), field="content", pattern="x" * 200)) == []
+    assert run(_unary("where_eq", _get("t0"), field="", value=1)) == t0
+
+    both = run(_binary("merge", _get("t0"), _get("t1")))
+    assert _ids(both) == sorted(_ids(t0) + _ids(st.items["t1"]), reverse=True)
+    assert _ids(run(_binary("intersection", _get("t0"), _unary("where_eq", _get("t0"), field="kind", value="text")))) == [
+        i for i, e in zip(_ids(t0), t0) if e["payload"]["kind"] == "text"
+    ][::-1]
+    assert run(_binary("difference", _get("t0"), _get("t0"))) == []
+
+    assert run(_unary("explode", _get("t0"))) is None
+    assert run({"kind": "binary", "op": "xor", "left": _get("t0"), "right": _get("t1")}) is None
+
+
+@pytest.mark.plugin_unit
+def test_result_cache_follows_topic_revisions() -> None:
+    st = _store(200)
+    cache = QueryPlanCache(max_results=8)
+    plan = _unary("filter", _get("t0"), kind="text")
+    reordered = {"child": plan["child"], "params": {"kind": "text"}, "op": "filter", "kind": "unary"}
+    assert plan_fingerprint(plan) == plan_fingerprint(reordered)
+
+    first = cache.execute(st, plan)
+    assert cache.execute(st, reordered) is first
+    st.publish("t1", {"id": "m900", "kind": "text"})  # 别的 topic 变化不影响
+    assert cache.execute(st, plan) is first
+    assert cache.stats()["result_hits"] == 2 and cache.stats()["plan_hits"] == 2
+
+    st.publish("t0", {"id": "m901", "kind": "text"})
+    fresh = cache.execute(st, plan)
+    assert _ids(fresh)[-1] == 901 and fresh is not first
+
+    wildcard = _unary("limit", _get("*", kind="text"), n=3)
+    assert _ids(cache.execute(st, wildcard))[0] == 901
+    st.publish("t3", {"id": "m902", "kind": "text"})  # 通配叶子依赖整个 store
+    assert _ids(cache.execute(st, wildcard))[0] == 902
+
+    st.replace_topic("t0", [{"id": "m903", "kind": "text"}])
+    assert _ids(cache.execute(st, plan)) == [903]
+
+    assert cache.execute(st, {"kind": "nope"}) is None
+    assert cache.execute(st, {"kind": "nope"}) is None
+    stats = cache.stats()
+    assert stats["result_misses"] == 5 and stats["plan_misses"] == 3 and stats["compiled_plans"] == 3
+
+
+def _time(fn: Any, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_repeated_watcher_plan(record_property: Callable[[str, object], None]) -> None:
+    """watcher 反复发送同一计划（4 个 topic merge + 正则 filter + sort）：每次编译 / 复用编译结果 / 结果缓存命中。"""
+    st = _store(20000)
+    plan = _unary(
+        "sort",
+        _unary(
+            "filter",
+            _binary("merge", _binary("merge", _get("t0"), _get("t1")), _binary("merge", _get("t2"), _get("t3"))),
+            content_re="^(hello|error)", priority_min=3,
+        ),
+        by="priority",
+        reverse=True,
+    )
+    compiled_only = QueryPlanCache(max_results=0)
+    cached = QueryPlanCache()
+    cached.execute(st, plan)
+
+    results = {
+        "compile per call": _time(lambda: compile_plan(plan).run(st), 30),  # type: ignore[union-attr]
+        "compiled plan": _time(lambda: compiled_only.execute(st, plan), 30),
+        "result cache hit": _time(lambda: cached.execute(st, plan), 30),
+    }
+    st.publish("other", {"id": "m0"})
+    results["hit after unrelated publish"] = _time(lambda: cached.execute(st, plan), 30)
+    for name, us in results.items():
+        record_property("perf", f"{name}: {us:.1f}us")
+    record_property("perf", f"cache stats: {cached.stats()}")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["result cache hit"] * 50 < results["compiled plan"]
+        assert results["hit after unrelated publish"] * 50 < results["compiled plan"]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import pytest
+
+zmq = pytest.importorskip("zmq")
+ormsgpack = pytest.importorskip("ormsgpack")
+
+from plugin.message_plane.query_plan import QueryPlanCache  # noqa: E402
+from plugin.message_plane.rpc_server import MessagePlaneRpcServer  # noqa: E402
+from plugin.message_plane.stores import StoreRegistry, TopicStore  # noqa: E402
+
+
+def _stores(count: int = 0) -> StoreRegistry:
+    stores = StoreRegistry(default_store="messages")
+    st = TopicStore(name="messages", maxlen=20000)
+    stores.register(st)
+    for i in range(count):
+        st.publish(
+            f"t{i % 4}",
+            {"plugin_id": f"p{i % 50}", "kind": "text", "priority": i % 10, "content": f"hello {i}", "timestamp": float(i)},
+        )
+    return stores
+
+
+class _Server:
+    def __init__(self, stores: StoreRegistry, workers: int) -> None:
+        self.srv = MessagePlaneRpcServer(endpoint="tcp://127.0.0.1:*", stores=stores, workers=workers)
+        self.endpoint = self.srv._sock.getsockopt(zmq.LAST_ENDPOINT).decode()
+        self.thread = threading.Thread(target=self.srv.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.srv.stop()
+        self.thread.join(timeout=2.0)
+        self.srv.close()
+
+
+@pytest.fixture
+def server_factory() -> Iterator[Any]:
+    started: list[_Server] = []
+
+    def _make(stores: StoreRegistry, workers: int = 2) -> _Server:
+        s = _Server(stores, workers)
+        started.append(s)
+        return s
+
+    yield _make
+    for s in started:
+        s.close()
+
+
+class _Client:
+    def __init__(self, endpoint: str, codec: str = "msgpack") -> None:
+        self.sock = zmq.Context.instance().socket(zmq.DEALER)
+        self.sock.linger = 0
+        self.sock.connect(endpoint)
+        self.codec = codec
+        self._n = 0
+
+    def send(self, op: str, args: dict[str, Any]) -> str:
+        self._n += 1
+        req = {"v": 1, "op": op, "req_id": f"r{self._n}", "args": args}
+        raw = ormsgpack.packb(req) if self.codec == "msgpack" else json.dumps(req).encode()
+        self.sock.send(raw)
+        return req["req_id"]
+
+    def recv(self, timeout_ms: int = 5000) -> dict[str, Any]:
+        assert self.sock.poll(timeout_ms), "no response"
+        raw = self.sock.recv()
+        return ormsgpack.unpackb(raw) if self.codec == "msgpack" else json.loads(raw)
+
+    def call(self, op: str, args: dict[str, Any]) -> dict[str, Any]:
+        req_id = self.send(op, args)
+        resp = self.recv()
+        assert resp["req_id"] == req_id
+        return resp
+
+    def close(self) -> None:
+        self.sock.close(linger=0)
+
+
+def _plan(leaves: int = 1) -> dict[str, Any]:
+    """leaves 个 get 叶子两两 merge，再 filter + sort 的回放计划。"""
+
+    def _get(i: int) -> dict[str, Any]:
+        return {"kind": "get", "op": "get", "params": {"params": {"topic": f"t{i % 4}", "max_count": 1000}}}
+
+    nodes = [_get(i) for i in range(leaves)]
+    while len(nodes) > 1:
+        nodes = [{"kind": "binary", "op": "merge", "left": a, "right": b, "params": {}} for a, b in zip(nodes[::2], nodes[1::2])]
+    flt = {"kind": "unary", "op": "filter", "params": {"content_re": "hello 1", "priority_min": 2}, "child": nodes[0]}
+    return {"kind": "unary", "op": "sort", "params": {"by": "priority", "reverse": True}, "child": flt}
+
+
+@pytest.mark.plugin_unit
+def test_codec_detected_once_per_connection(server_factory: Any) -> None:
+    server = server_factory(_stores(100))
+    clients = [_Client(server.endpoint, "msgpack"), _Client(server.endpoint, "json")]
+    try:
+        for c in clients:
+            for _ in range(3):
+                resp = c.call("bus.get_since", {"store": "messages", "topic": "t1", "after_seq": 90, "limit": 5})
+                assert resp["ok"] and [e["seq"] for e in resp["result"]["items"]] == [94, 98]
+        assert sorted(server.srv._peer_codecs.values()) == ["json", "msgpack"]
+    finally:
+        for c in clients:
+            c.close()
+
+
+@pytest.mark.plugin_unit
+def test_heavy_plans_run_on_workers_and_match_inline(server_factory: Any) -> None:
+    stores = _stores(2000)
+    server = server_factory(stores)
+    reference = MessagePlaneRpcServer(endpoint="tcp://127.0.0.1:*", stores=stores, workers=0)
+    client = _Client(server.endpoint)
+    try:
+        for args in (
+            {"store": "messages", "plan": _plan(4)},
+            {"store": "messages", "plan": _plan(1), "light": True},
+            {"store": "messages", "topic": "*", "plugin_id": "p7", "limit": 20},
+        ):
+            op = "bus.query" if "plan" not in args else "bus.replay"
+            resp = client.call(op, args)
+            expected = reference._handle({"v": 1, "op": op, "req_id": resp["req_id"], "args": args})
+            assert resp["ok"] and resp["result"] == ormsgpack.unpackb(ormsgpack.packb(expected["result"]))
+        assert client.call("bus.replay", {"store": "messages", "plan": {"kind": "nope"}})["ok"] is False
+    finally:
+        client.close()
+        reference.close()
+
+
+@pytest.mark.plugin_unit
+def test_blocked_plan_does_not_stall_cheap_requests(server_factory: Any) -> None:
+    server = server_factory(_stores(100), workers=1)
+    release = threading.Event()
+    original = server.srv._eval_plan
+
+    def _slow_eval(st: Any, node: Any) -> Any:
+        release.wait(5.0)
+        return original(st, node)
+
+    server.srv._eval_plan = _slow_eval
+    heavy, cheap = _Client(server.endpoint), _Client(server.endpoint, "json")
+    try:
+        heavy.send("bus.replay", {"store": "messages", "plan": _plan(1)})
+        heavy.send("bus.replay", {"store": "messages", "plan": _plan(1)})  # 排队等唯一的 worker
+        for _ in range(5):
+            assert cheap.call("bus.get_recent", {"store": "messages", "topic": "t0", "limit": 3})["ok"]
+        assert heavy.sock.poll(50) == 0
+        release.set()
+        assert heavy.recv()["ok"] and heavy.recv()["ok"]
+    finally:
+        release.set()
+        heavy.close()
+        cheap.close()
+
+
+def _mixed_load(stores: StoreRegistry, workers: int, duration: float = 2.0) -> dict[str, float]:
+    server = _Server(stores, workers)
+    server.srv._plans = QueryPlanCache(max_results=0)  # 数据不变时结果缓存会直接命中，这里要真正执行计划
+    stop = threading.Event()
+    heavy_done = [0]
+
+    def _heavy() -> None:
+        c = _Client(server.endpoint)
+        try:
+            while not stop.is_set():
+                c.call("bus.replay", {"store": "messages", "plan": _plan(16)})
+                heavy_done[0] += 1
+        finally:
+            c.close()
+
+    heavy_threads = [threading.Thread(target=_heavy) for _ in range(2)]
+    for t in heavy_threads:
+        t.start()
+    cheap = _Client(server.endpoint)
+    latencies: list[float] = []
+    try:
+        time.sleep(0.2)
+        deadline = time.perf_counter() + duration
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            t0 = time.perf_counter()
+            cheap.call("bus.get_since", {"store": "messages", "topic": "t0", "after_seq": 19990, "limit": 50})
+            latencies.append(time.perf_counter() - t0)
+            time.sleep(0.002)
+    finally:
+        stop.set()
+        for t in heavy_threads:
+            t.join()
+        cheap.close()
+        server.close()
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "heavy_qps": heavy_done[0] / duration,
+    }
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_mixed_load_tail_latency(record_property: Callable[[str, object], None]) -> None:
+    """2 个客户端持续发 16 叶子的 merge+filter+sort 回放计划时，另一客户端 get_since 的延迟：内联 vs 工作线程。"""
+    stores = _stores(20000)
+    results = {"inline": _mixed_load(stores, workers=0), "workers=2": _mixed_load(stores, workers=2)}
+    for name, r in results.items():
+        record_property(
+            "perf",
+            f"{name}: cheap p50={r['p50_ms']:.2f}ms p99={r['p99_ms']:.2f}ms heavy={r['heavy_qps']:.0f} plans/s"
+        )
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["workers=2"]["p99_ms"] < results["inline"]["p99_ms"] / 2
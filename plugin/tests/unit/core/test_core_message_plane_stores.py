@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import time
+from typing import Any, Callable
+
+import pytest
+
+from plugin.message_plane.stores import INDEXED_FIELDS, TopicStore
+
+
+def _payload(rng: random.Random, i: int) -> dict[str, Any]:
+    return {
+        "message_id": f"m{i}",
+        "plugin_id": f"plugin_{rng.randrange(100)}",
+        "source": rng.choice(["ui", "timer", "bus", "api"]),
+        "kind": rng.choice(["text", "image", "status", "event"]),
+        "type": rng.choice(["info", "warn", "error"]) if rng.random() < 0.9 else None,
+        "priority": rng.randrange(10),
+        "timestamp": 1_700_000_000.0 + i,
+    }
+
+
+def _fill(store: TopicStore, topics: list[str], count: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    for i in range(count):
+        store.publish(rng.choice(topics), _payload(rng, i))
+
+
+def _scan(store: TopicStore, *, topic: str | None, limit: int = 200, **filters: Any) -> list[dict[str, Any]]:
+    """全量线性扫描 + 排序（建索引前的查询方式），作为对照。"""
+    topics = list(store.items) if topic in (None, "", "*") else [topic]
+    pid, src, kd, tp = (filters.get(k) for k in ("plugin_id", "source", "kind", "type_"))
+    pmin, s_ts, u_ts = (filters.get(k) for k in ("priority_min", "since_ts", "until_ts"))
+    out = []
+    for t in topics:
+        for ev in store.items.get(t) or ():
+            idx = ev["index"]
+            if pid is not None and idx["plugin_id"] != pid:
+                continue
+            if src is not None and idx["source"] != src:
+                continue
+            if kd is not None and idx["kind"] != kd:
+                continue
+            if tp is not None and idx["type"] != tp:
+                continue
+            if pmin is not None and idx["priority"] < pmin:
+                continue
+            if s_ts is not None and idx["timestamp"] < s_ts:
+                continue
+            if u_ts is not None and idx["timestamp"] > u_ts:
+                continue
+            out.append(ev)
+    out.sort(key=lambda e: e["seq"], reverse=True)
+    return out[:limit]
+
+
+_FILTER_CASES: list[dict[str, Any]] = [
+    {},
+    {"plugin_id": "plugin_3"},
+    {"plugin_id": "plugin_3", "kind": "text"},
+    {"kind": "image", "source": "bus", "priority_min": 5},
+    {"type_": "error", "since_ts": 1_700_000_500.0, "until_ts": 1_700_001_500.0},
+    {"plugin_id": "missing"},
+    {"source": "api", "type_": "warn", "limit": 5},
+]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.parametrize("topic", ["t0", "*"])
+def test_indexed_query_matches_full_scan_across_eviction(topic: str) -> None:
+    store = TopicStore(name="messages", maxlen=500)
+    _fill(store, ["t0", "t1", "t2"], 4000)
+
+    for case in _FILTER_CASES:
+        case = dict(case)
+        limit = case.pop("limit", 200)
+        got = store.query(topic=topic, limit=limit, **case)
+        assert [e["seq"] for e in got] == [e["seq"] for e in _scan(store, topic=topic, limit=limit, **case)], case
+
+    # 淘汰后索引只保留仍在 topic 中的事件
+    for t, dq in store.items.items():
+        live = {id(ev) for ev in dq}
+        for f in INDEXED_FIELDS:
+            postings = store._indexes[t][f]
+            assert sum(len(p) for p in postings.values()) == sum(1 for ev in dq if ev["index"][f] is not None)
+            assert all(id(ev) in live for p in postings.values() for ev in p)
+
+
+@pytest.mark.plugin_unit
+def test_planner_drives_from_most_selective_index_and_replace_resets() -> None:
+    store = TopicStore(name="messages", maxlen=20000)
+    _fill(store, ["t0"], 5000)
+
+    with store._lock:
+        driver, rows = store._plan_topic("t0", {"kind": "text", "plugin_id": "plugin_3"})
+        assert driver == "plugin_id" and 0 < len(rows) < 200
+        assert store._plan_topic("t0", {})[0] is None
+        assert len(store._plan_topic("t0", {"plugin_id": "missing"})[1]) == 0
+
+    store.replace_topic("t0", [{"plugin_id": "solo", "kind": "text"}])
+    assert [e["payload"]["plugin_id"] for e in store.query(topic="t0", kind="text")] == ["solo"]
+    assert store.query(topic="t0", plugin_id="plugin_3") == []
+
+
+def _scan_since(store: TopicStore, *, topic: str | None, after_seq: int, limit: int) -> list[dict[str, Any]]:
+    """逐条比较 seq + 排序（改为二分前的 get_since），作为对照。"""
+    topics = list(store.items) if topic in (None, "", "*") else [topic]
+    out = [ev for t in topics for ev in store.items.get(t) or () if ev["seq"] > after_seq]
+    out.sort(key=lambda e: e["seq"])
+    return out[:limit]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.parametrize("topic", ["t0", "*"])
+def test_get_since_bisects_and_matches_scan(topic: str) -> None:
+    store = TopicStore(name="messages", maxlen=300)
+    _fill(store, ["t0", "t1"], 2000)
+
+    for t, dq in store.items.items():
+        assert store._seqs[t][store._seq_base[t]:] == [ev["seq"] for ev in dq]
+    for after in (0, 1500, 1800, 1990, 2000, 5000):
+        for limit in (1, 7, 100, 1000):
+            got = store.get_since(topic=topic, after_seq=after, limit=limit)
+            assert [e["seq"] for e in got] == [e["seq"] for e in _scan_since(store, topic=topic, after_seq=after, limit=limit)]
+
+    store.replace_topic("t0", [{"plugin_id": "a"}, {"plugin_id": "b"}])
+    got = store.get_since(topic="t0", after_seq=0, limit=10)
+    assert [e["payload"]["plugin_id"] for e in got] == ["a", "b"]
+    assert store.get_since(topic="t0", after_seq=got[0]["seq"], limit=10) == got[1:]
+    assert store.get_since(topic="missing", after_seq=0, limit=10) == []
+
+
+def _time_queries(fn: Any, cases: list[dict[str, Any]], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        for case in cases:
+            t0 = time.perf_counter()
+            fn(**case)
+            samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_query_full_20k_topic(record_property: Callable[[str, object], None]) -> None:
+    """满 20k 条的 topic 上按 plugin_id / kind / type / source 过滤：全量扫描 vs 二级索引。"""
+    store = TopicStore(name="messages", maxlen=20000)
+    _fill(store, ["messages"], 25000)
+    assert len(store.items["messages"]) == 20000
+
+    # 最后一组只能由 25% 选择度的 source 索引驱动且结果稀疏，是索引收益最小的情况
+    cases = {
+        "plugin_id (1%)": [{"topic": "messages", "plugin_id": f"plugin_{i}"} for i in range(10)],
+        "plugin_id+kind": [{"topic": "messages", "plugin_id": f"plugin_{i}", "kind": "image"} for i in range(10)],
+        "kind, limit 50": [{"topic": "messages", "kind": "status", "limit": 50}],
+        "source+type+priority (sparse)": [{"topic": "messages", "type_": "error", "priority_min": 9, "source": "api"}],
+    }
+    results = {}
+    for name, qs in cases.items():
+        scan_us = _time_queries(lambda **kw: _scan(store, **kw), qs, 5)
+        indexed_us = _time_queries(store.query, qs, 5)
+        results[name] = (scan_us, indexed_us)
+        record_property("perf", f"{name}: full-scan={scan_us:.0f}us indexed={indexed_us:.0f}us ({scan_us / indexed_us:.1f}x)")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        for name in ("plugin_id (1%)", "plugin_id+kind", "kind, limit 50"):
+            scan_us, indexed_us = results[name]
+            assert indexed_us * 10 < scan_us, name
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_get_since_full_20k_topic(record_property: Callable[[str, object], None]) -> None:
+    """满 20k 条的 topic 上轮询 get_since：逐条扫描 + 排序 vs seq 二分取窗口。"""
+    store = TopicStore(name="messages", maxlen=20000)
+    _fill(store, ["messages"], 25000)
+    last = store.items["messages"][-1]["seq"]
+
+    cases = {
+        "poller, 10 new": [{"topic": "messages", "after_seq": last - 10, "limit": 200}],
+        "catch-up from middle": [{"topic": "messages", "after_seq": last - 10000, "limit": 200}],
+        "up to date": [{"topic": "messages", "after_seq": last, "limit": 200}],
+    }
+    for name, qs in cases.items():
+        scan_us = _time_queries(lambda **kw: _scan_since(store, **kw), qs, 20)
+        bisect_us = _time_queries(store.get_since, qs, 20)
+        record_property("perf", f"get_since {name}: scan={scan_us:.0f}us bisect={bisect_us:.1f}us ({scan_us / bisect_us:.0f}x)")
+        if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+            assert bisect_us * 10 < scan_us, name
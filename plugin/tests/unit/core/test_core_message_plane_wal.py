@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from plugin.message_plane.stores import TopicStore
+from plugin.message_plane.wal import MessagePlaneWal
+
+pytest.importorskip("ormsgpack")
+
+
+def _open(root: Path, maxlen: int = 1000, **kwargs: Any) -> tuple[TopicStore, MessagePlaneWal]:
+    store = TopicStore(name="messages", maxlen=maxlen)
+    wal = MessagePlaneWal(root, **kwargs)
+    wal.attach(store)
+    return store, wal
+
+
+def _payload(i: int) -> dict[str, Any]:
+    return {"message_id": f"m{i}", "plugin_id": f"p{i % 3}", "kind": "text", "content": "x" * 64, "n": i}
+
+
+@pytest.mark.plugin_unit
+def test_replay_restores_topics_with_original_seqs(tmp_path: Path) -> None:
+    store, wal = _open(tmp_path, fsync="always")
+    for i in range(30):
+        store.publish(f"t{i % 2}", _payload(i))
+    cursor = store.get_since(topic="t0", after_seq=0, limit=5)[-1]["seq"]
+    before = {t: [(e["seq"], e["payload"]) for e in dq] for t, dq in store.items.items()}
+    wal.close()
+
+    restored, wal2 = _open(tmp_path, fsync="always")
+    try:
+        assert {t: [(e["seq"], e["payload"]) for e in dq] for t, dq in restored.items.items()} == before
+        # 消费者的游标在重启后依然有效，新消息的 seq 接着增长
+        assert [e["seq"] for e in restored.get_since(topic="t0", after_seq=cursor, limit=100)] == [
+            s for s, _ in before["t0"] if s > cursor
+        ]
+        assert [e["payload"]["n"] for e in restored.query(topic="t1", plugin_id="p1")][:2] == [25, 19]
+        assert restored.publish("t0", _payload(99))["seq"] == 31
+        assert wal2.stats["replayed"] == 30
+    finally:
+        wal2.close()
+
+
+@pytest.mark.plugin_unit
+def test_compaction_keeps_disk_near_maxlen_and_replay_takes_tail(tmp_path: Path) -> None:
+    store, wal = _open(tmp_path, maxlen=40, fsync="none")
+    for i in range(400):
+        store.publish("t", _payload(i))
+    (log,) = wal._logs.values()
+    assert len(log.segments) == 40  # maxlen/4 条一段
+    assert wal.compact() == 36
+    assert log.record_count == 40
+    wal.close()
+
+    restored, wal2 = _open(tmp_path, maxlen=40, fsync="none")
+    try:
+        assert [e["payload"]["n"] for e in restored.items["t"]] == list(range(360, 400))
+    finally:
+        wal2.close()
+
+
+@pytest.mark.plugin_unit
+def test_torn_tail_is_truncated_and_replace_resets_log(tmp_path: Path) -> None:
+    store, wal = _open(tmp_path, fsync="none")
+    for i in range(5):
+        store.publish("t", _payload(i))
+    (log,) = wal._logs.values()
+    seg_path = log.segments[-1].path
+    wal.close()
+    with open(seg_path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x01\x02")  # 写到一半的帧
+
+    store, wal = _open(tmp_path, fsync="none")
+    try:
+        assert [e["payload"]["n"] for e in store.items["t"]] == [0, 1, 2, 3, 4]
+        store.publish("t", _payload(5))
+        store.replace_topic("snap", [{"plugin_id": "a"}, {"plugin_id": "b"}])
+        store.replace_topic("snap", [{"plugin_id": "c"}])
+    finally:
+        wal.close()
+
+    store, wal = _open(tmp_path, fsync="none")
+    try:
+        assert [e["payload"]["n"] for e in store.items["t"]] == [0, 1, 2, 3, 4, 5]
+        assert [e["payload"]["plugin_id"] for e in store.items["snap"]] == ["c"]
+    finally:
+        wal.close()
+
+
+@pytest.mark.plugin_unit
+def test_interval_policy_syncs_in_background(tmp_path: Path) -> None:
+    store, wal = _open(tmp_path, fsync="interval", fsync_interval=0.02)
+    wal.start()
+    try:
+        store.publish("t", _payload(0))
+        (log,) = wal._logs.values()
+        assert log.dirty
+        deadline = time.monotonic() + 2.0
+        while log.dirty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not log.dirty
+    finally:
+        wal.close()
+    with pytest.raises(ValueError):
+        MessagePlaneWal(tmp_path, fsync="sometimes")
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_ingest_per_fsync_policy_and_recovery(
+    tmp_path: Path,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """单 store 写入吞吐（无 WAL / none / interval / always）与 5×20k 条记录的重启回放耗时。"""
+    results: dict[str, float] = {}
+    for policy in ("memory", "none", "interval", "always"):
+        count = 2000 if policy == "always" else 20000
+        store = TopicStore(name="messages", maxlen=20000)
+        wal = None
+        if policy != "memory":
+            wal = MessagePlaneWal(tmp_path / policy, fsync=policy, fsync_interval=0.2)
+            wal.attach(store)
+            wal.start()
+        t0 = time.perf_counter()
+        for i in range(count):
+            store.publish("t", _payload(i))
+        results[policy] = count / (time.perf_counter() - t0)
+        if wal is not None:
+            wal.close()
+        record_property("perf", f"ingest {policy}: {results[policy]:.0f} msg/s")
+
+    store, wal = _open(tmp_path / "recovery", maxlen=20000, fsync="none")
+    for i in range(100000):
+        store.publish(f"t{i % 5}", _payload(i))
+    wal.close()
+    t0 = time.perf_counter()
+    restored, wal = _open(tmp_path / "recovery", maxlen=20000, fsync="none")
+    recovery = time.perf_counter() - t0
+    wal.close()
+    assert sum(len(dq) for dq in restored.items.values()) == 100000
+    record_property("perf", f"recovery of 100k records / 5 topics: {recovery * 1000:.0f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["interval"] > results["always"]
+        assert recovery < 5.0
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+import plugin.core.registry as registry_module
+import plugin.server.lifecycle as lifecycle_module
+from plugin._types.models import PluginDependency
+import plugin.core.dependency as dependency_module
+from plugin.core.communication import PluginCommunicationResourceManager
+from plugin.core.dependency import _build_plugin_dependency_graph, _group_plugins_by_dependency_level
+from plugin.core.registry import PluginContext, PluginLoadReport
+
+
+class _Logger:
+    def __getattr__(self, _name: str) -> Any:
+        return lambda *args, **kwargs: None
+
+
+def _ctx(pid: str, deps: tuple[str, ...] = (), **pdata: Any) -> PluginContext:
+    return PluginContext(
+        pid=pid,
+        toml_path=Path(f"/tmp/{pid}/plugin.toml"),
+        conf={},
+        pdata={"id": pid, **pdata},
+        entry=f"plugins.{pid}:Plugin",
+        dependencies=[PluginDependency(id=d, untested=">=0") for d in deps],
+        sdk_supported_str=None,
+        sdk_recommended_str=None,
+        sdk_untested_str=None,
+        sdk_conflicts_list=[],
+        enabled=True,
+        auto_start=True,
+    )
+
+
+# base <- (mid_a, mid_b) <- top；solo 无依赖
+_CONTEXTS = [_ctx("top", ("mid_a", "mid_b")), _ctx("mid_a", ("base",)), _ctx("mid_b", ("base",)), _ctx("base"), _ctx("solo")]
+
+
+@pytest.mark.plugin_unit
+def test_group_plugins_by_dependency_level() -> None:
+    pid_to_context = {c.pid: c for c in _CONTEXTS}
+    order = ["base", "solo", "mid_a", "mid_b", "top"]
+    graph = _build_plugin_dependency_graph(_CONTEXTS, pid_to_context, _Logger())
+    levels = _group_plugins_by_dependency_level(order, graph, _Logger())
+    assert levels == [["base", "solo"], ["mid_a", "mid_b"], ["top"]]
+
+
+@pytest.mark.plugin_unit
+def test_load_plugins_reports_levels_timings_and_isolates_failures(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(
+        registry_module,
+        "_collect_plugin_contexts_from_roots",
+        lambda roots, logger: (list(_CONTEXTS), {c.pid: c for c in _CONTEXTS}),
+    )
+    monkeypatch.setattr(registry_module, "_prepare_plugin_import_roots", lambda roots, logger: None)
+    loaded: list[str] = []
+
+    def _fake_load(pid: str, ctx: PluginContext, extension_map: dict, logger: Any, factory: Any) -> str | None:
+        if pid == "mid_a":
+            raise RuntimeError("boom")
+        loaded.append(pid)
+        return None if pid == "solo" else pid
+
+    monkeypatch.setattr(registry_module, "_load_plugin_from_context", _fake_load)
+    graph_builds: list[int] = []
+    real_build = registry_module._build_plugin_dependency_graph
+
+    def _counting_build(*args: Any, **kwargs: Any) -> dict:
+        graph_builds.append(1)
+        return real_build(*args, **kwargs)
+
+    monkeypatch.setattr(registry_module, "_build_plugin_dependency_graph", _counting_build)
+    monkeypatch.setattr(dependency_module, "_build_plugin_dependency_graph", _counting_build)
+
+    report = registry_module.load_plugins_from_roots([tmp_path], _Logger(), lambda *a, **k: None)
+
+    assert report.levels == [["base"], ["mid_b"], ["top"]]
+    assert sorted(report.skipped) == ["mid_a", "solo"]
+    assert set(report.load_seconds) == {"base", "mid_b", "top"}
+    assert loaded.index("base") < loaded.index("mid_b") < loaded.index("top")
+    assert len(graph_builds) == 1  # 拓扑排序与分层共用同一份依赖图
+
+
+class _FakeHost:
+    running = 0
+    peak = 0
+    events: list[tuple[str, str]] = []
+
+    def __init__(self, plugin_id: str, delay: float, fail: bool = False) -> None:
+        self.plugin_id = plugin_id
+        self.delay = delay
+        self.fail = fail
+
+    async def start(self, message_target_queue: object) -> None:
+        cls = type(self)
+        cls.running += 1
+        cls.peak = max(cls.peak, cls.running)
+        cls.events.append(("start", self.plugin_id))
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("spawn failed")
+        finally:
+            cls.running -= 1
+            cls.events.append(("done", self.plugin_id))
+
+    async def shutdown(self, timeout: float = 1.0) -> None:
+        return None
+
+
+class _ReadyHost(_FakeHost):
+    """进程很快拉起，但 startup 生命周期要再过一会儿才上报 PLUGIN_READY。"""
+
+    ready_delay = 0.05
+
+    async def wait_ready(self, timeout: float) -> bool:
+        await asyncio.sleep(self.ready_delay)
+        type(self).events.append(("ready", self.plugin_id))
+        return self.plugin_id != "slow"
+
+
+async def _start_fake_hosts(
+    monkeypatch: pytest.MonkeyPatch, levels: list[list[str]], delay: float, concurrency: int, fail: set[str] = frozenset(),
+    host_cls: type[_FakeHost] = _FakeHost, depended_on: tuple[str, ...] = (),
+) -> PluginLoadReport:
+    _FakeHost.running = _FakeHost.peak = 0
+    _FakeHost.events = []
+    hosts = {pid: host_cls(pid, delay, pid in fail) for level in levels for pid in level}
+    service = lifecycle_module.ServerLifecycleService()
+    service.load_report.depended_on = list(depended_on)
+    monkeypatch.setattr(service, "_get_plugin_hosts_snapshot", lambda: dict(hosts))
+    monkeypatch.setattr(lifecycle_module, "PLUGIN_START_CONCURRENCY", concurrency)
+    await service._start_hosts(levels)
+    return service.load_report
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_start_hosts_runs_levels_concurrently_with_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    levels = [["a", "b", "c"], ["d"]]
+    report = await _start_fake_hosts(monkeypatch, levels, delay=0.02, concurrency=2, fail={"b"})
+
+    assert _FakeHost.peak == 2
+    # 下一层在上一层全部结束后才开始
+    first_d = _FakeHost.events.index(("start", "d"))
+    assert all(_FakeHost.events.index(("done", pid)) < first_d for pid in ("a", "b", "c"))
+    assert report.failed == ["b"]
+    assert set(report.start_seconds) == {"a", "b", "c", "d"}
+    assert report.start_total_seconds > 0
+    assert "slowest" in report.summary()
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_start_hosts_waits_only_for_depended_on_plugins(monkeypatch: pytest.MonkeyPatch) -> None:
+    levels = [["a", "slow", "free"], ["d"], ["last"]]
+    report = await _start_fake_hosts(
+        monkeypatch, levels, delay=0.0, concurrency=1, host_cls=_ReadyHost, depended_on=("a", "slow", "d", "last"),
+    )
+
+    # 并发名额只覆盖进程拉起：上限为 1 时，同层插件也不必排队等待彼此就绪
+    assert [e for e in _FakeHost.events if e[0] != "done"][:3] == [("start", "a"), ("start", "slow"), ("start", "free")]
+    # 下一层要等上一层中被依赖的插件就绪（或超时）；未就绪只告警，不算失败
+    first_d = _FakeHost.events.index(("start", "d"))
+    assert all(_FakeHost.events.index(("ready", pid)) < first_d for pid in ("a", "slow"))
+    # 没有被依赖的插件和最后一层都不等待
+    assert ("ready", "free") not in _FakeHost.events
+    assert ("ready", "last") not in _FakeHost.events
+    assert _FakeHost.events.index(("ready", "d")) < _FakeHost.events.index(("start", "last"))
+    assert report.failed == []
+    assert report.start_seconds["a"] < _ReadyHost.ready_delay
+
+
+@pytest.mark.plugin_unit
+def test_load_report_lists_depended_on_plugins(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(
+        registry_module,
+        "_collect_plugin_contexts_from_roots",
+        lambda roots, logger: (list(_CONTEXTS), {c.pid: c for c in _CONTEXTS}),
+    )
+    monkeypatch.setattr(registry_module, "_prepare_plugin_import_roots", lambda roots, logger: None)
+    monkeypatch.setattr(registry_module, "_load_plugin_from_context", lambda pid, *a: pid)
+
+    report = registry_module.load_plugins_from_roots([tmp_path], _Logger(), lambda *a, **k: None)
+    assert report.depended_on == ["base", "mid_a", "mid_b"]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_comm_manager_ready_signal_is_consumed_not_forwarded() -> None:
+    manager = PluginCommunicationResourceManager(plugin_id="demo", transport=None)  # type: ignore[arg-type]
+    forwarded: asyncio.Queue = asyncio.Queue()
+    manager._message_target_queue = forwarded
+    assert await manager.wait_ready(timeout=0.01) is False
+
+    await manager._route_message({"type": "PLUGIN_READY", "plugin_id": "demo"})
+    assert await manager.wait_ready(timeout=0.01) is True
+    assert forwarded.empty()
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+async def test_benchmark_sequential_vs_level_parallel_start(
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """12 个插件（3 层）、每个启动 50ms：逐个启动 vs 按层并发（上限 8）。"""
+    levels = [[f"l0_{i}" for i in range(6)], [f"l1_{i}" for i in range(4)], ["l2_0", "l2_1"]]
+
+    started = time.perf_counter()
+    await _start_fake_hosts(monkeypatch, levels, delay=0.05, concurrency=1)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    report = await _start_fake_hosts(monkeypatch, levels, delay=0.05, concurrency=8)
+    parallel = time.perf_counter() - started
+
+    record_property("perf", f"sequential={sequential * 1000:.0f}ms level-parallel={parallel * 1000:.0f}ms ({report.summary()})")
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert parallel < sequential / 3
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from plugin import settings
+from plugin.core import shm_payload
+from plugin.core.shm_payload import SHM_DESCRIPTOR_KEY, SharedPayloadChannel
+from plugin.core.zmq_transport import CH_RES, ChildTransport, HostTransport, TransportCodec, TransportCodecError
+
+pytestmark = pytest.mark.skipif(os.name != "posix" or not os.path.isdir("/dev/shm"), reason="POSIX shared memory only")
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[4]
+_real_free_bytes = shm_payload._shm_free_bytes
+
+
+def _segment_exists(name: str) -> bool:
+    return os.path.exists(os.path.join("/dev/shm", name))
+
+
+@pytest.mark.plugin_unit
+def test_offload_and_restore_nested_payload() -> None:
+    channel = SharedPayloadChannel(prefix="nktest1", threshold=1024)
+    small = {"k": "v"}
+    big = bytes(range(256)) * 16
+    msg = {"req_id": "r1", "meta": small, "data": {"png": big, "raw": [bytearray(big), b"tiny"]}}
+
+    sent, segments = channel.offload(msg)
+    assert len(segments) == 2
+    assert sent["meta"] is small                       # 未涉及的容器不复制
+    assert sent["data"]["png"][SHM_DESCRIPTOR_KEY] == segments[0]
+    assert sent["data"]["raw"][1] == b"tiny"
+    assert msg["data"]["png"] is big                   # 原消息不被修改
+    assert all(_segment_exists(n) for n in segments)
+
+    restored = channel.restore(sent)
+    assert restored == msg
+    assert isinstance(restored["data"]["raw"][0], bytearray)
+    assert not any(_segment_exists(n) for n in segments)
+    assert channel.stats["offloaded"] == 2 and channel.stats["restored"] == 2
+
+    assert channel.offload({"x": b"y" * 10}) == ({"x": b"y" * 10}, [])
+
+
+@pytest.mark.plugin_unit
+def test_short_or_unknown_shm_space_falls_back_to_inline(monkeypatch: pytest.MonkeyPatch) -> None:
+    channel = SharedPayloadChannel(prefix="nktest2", threshold=1)
+    msg = {"data": b"x" * 4096}
+
+    monkeypatch.setattr(shm_payload, "_shm_free_bytes", lambda: shm_payload._SHM_MIN_FREE_BYTES + 1024)
+    assert channel.offload(msg) == (msg, [])
+
+    monkeypatch.setattr(shm_payload.os, "statvfs", lambda _path: (_ for _ in ()).throw(OSError("no shm")))
+    monkeypatch.setattr(shm_payload, "_shm_free_bytes", _real_free_bytes)
+    assert channel.offload(msg) == (msg, [])
+    assert channel.stats["inline_fallbacks"] == 2 and channel.stats["offloaded"] == 0
+
+
+@pytest.mark.plugin_unit
+def test_failed_page_reservation_unlinks_segment_and_sends_inline(monkeypatch: pytest.MonkeyPatch) -> None:
+    channel = SharedPayloadChannel(prefix="nktest4", threshold=1)
+    created: list[str] = []
+    real_shm = shm_payload.shared_memory.SharedMemory
+
+    def _tracking_shm(*args, **kwargs):
+        shm = real_shm(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    def _enospc(*_args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(shm_payload.shared_memory, "SharedMemory", _tracking_shm)
+    monkeypatch.setattr(shm_payload.os, "posix_fallocate", _enospc, raising=False)
+    assert channel.offload({"data": b"payload"}) == ({"data": b"payload"}, [])
+    assert created and not any(_segment_exists(n) for n in created)
+    assert channel.stats["inline_fallbacks"] == 1
+
+
+@pytest.mark.plugin_unit
+def test_shared_memory_side_channel_is_off_by_default() -> None:
+    if "NEKO_PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES" not in os.environ:
+        assert settings.PLUGIN_TRANSPORT_SHM_THRESHOLD_BYTES == 0
+
+
+@pytest.mark.plugin_unit
+def test_discard_cleanup_and_foreign_descriptors() -> None:
+    channel = SharedPayloadChannel(prefix="nktest3", threshold=1)
+    _, names = channel.offload([b"a", b"b"])
+    channel.discard(names[:1])
+    assert not _segment_exists(names[0]) and _segment_exists(names[1])
+    assert channel.cleanup() == 1
+    assert not _segment_exists(names[1])
+
+    other = SharedPayloadChannel(prefix="nkother", threshold=1)
+    sent, other_names = other.offload({"data": b"x"})
+    with pytest.raises(ValueError):
+        channel.restore(sent)
+    other.discard(other_names)
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_transport_sends_large_payload_via_shared_memory() -> None:
+    host = HostTransport("ipc", TransportCodec("msgpack", allow_pickle=False), shm_threshold=64 * 1024)
+    child = ChildTransport(host.downlink_endpoint, host.uplink_endpoint, codec=host.codec, shm=host.shm)
+    try:
+        blob = os.urandom(256 * 1024)
+        child.send_uplink(CH_RES, {"req_id": "r1", "data": blob})
+        assert await host.recv(timeout_ms=2000) == (CH_RES, {"req_id": "r1", "data": blob})
+        assert host.shm.stats["offloaded_bytes"] == len(blob)
+
+        # 伪造不属于本通道的描述符：被当作非法帧丢弃
+        child.send_uplink(CH_RES, {"req_id": "r2", "data": {SHM_DESCRIPTOR_KEY: "psm_evil", "size": 1}})
+        with pytest.raises(TransportCodecError):
+            await host.recv(timeout_ms=2000)
+    finally:
+        child.close()
+        host.close()
+
+
+_BENCH_SCRIPT = r"""
+import asyncio, json, resource, sys, threading, time
+from plugin.core.zmq_transport import CH_RES, ChildTransport, HostTransport
+
+size, count, threshold = map(int, sys.argv[1:4])
+
+async def main():
+    host = HostTransport("ipc", shm_threshold=threshold)
+    child = ChildTransport(host.downlink_endpoint, host.uplink_endpoint, codec=host.codec, shm=host.shm)
+    blob = b"\x5a" * size
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def send():
+        for i in range(count):
+            child.send_uplink(CH_RES, {"req_id": str(i), "data": blob})
+
+    t0 = time.perf_counter()
+    sender = threading.Thread(target=send)
+    sender.start()
+    for _ in range(count):
+        ch, msg = await host.recv(timeout_ms=30000)
+        assert len(msg["data"]) == size
+        del msg
+    elapsed = time.perf_counter() - t0
+    sender.join()
+    child.close()
+    host.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mb_s": size * count / elapsed / 1e6, "rss_growth_mb": (peak - base) / 1024}))
+
+asyncio.run(main())
+"""
+
+
+def _run_bench(size: int, count: int, threshold: int) -> dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-c", _BENCH_SCRIPT, str(size), str(count), str(threshold)],
+        cwd=_PROJECT_ROOT, capture_output=True, text=True, timeout=300, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_shared_memory_vs_inline(record_property: Callable[[str, object], None]) -> None:
+    """1–50 MB 负载：内联（pickle 过 ZMQ）与共享内存旁路的吞吐与峰值 RSS 增量（每组独立进程）。"""
+    results = {}
+    for mb in (1, 10, 50):
+        size = mb * 1024 * 1024
+        count = max(2, 100 // mb)
+        inline = _run_bench(size, count, threshold=0)
+        shm = _run_bench(size, count, threshold=512 * 1024)
+        results[mb] = (inline, shm)
+        record_property(
+            "perf",
+            f"{mb:>2} MB x{count}: inline {inline['mb_s']:.0f} MB/s, +{inline['rss_growth_mb']:.0f} MB RSS"
+            f" | shm {shm['mb_s']:.0f} MB/s, +{shm['rss_growth_mb']:.0f} MB RSS"
+        )
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        inline, shm = results[50]
+        assert shm["mb_s"] > inline["mb_s"]
+        assert shm["rss_growth_mb"] < inline["rss_growth_mb"]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+from plugin.core.state import GlobalState
+
+
+def _local_state() -> GlobalState:
+    """不启动 Manager 进程的 GlobalState：共享字典用普通 dict 代替。"""
+    st = GlobalState()
+    st._plugin_response_map = {}
+    st._plugin_response_event_map = {}
+    return st
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_response_set_from_other_thread_wakes_waiter() -> None:
+    st = _local_state()
+    waiter = asyncio.create_task(st.wait_for_plugin_response_async("r1", timeout=2.0))
+    await asyncio.sleep(0.01)
+    assert len(st._plugin_response_waiters) == 1
+
+    threading.Thread(target=st.set_plugin_response, args=("r1", {"result": 1})).start()
+    assert await waiter == {"result": 1}
+    # 直接交给等待者，不写入共享字典
+    assert st._plugin_response_map == {}
+    assert len(st._plugin_response_waiters) == 0
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_response_before_wait_and_timeout_cleanup() -> None:
+    st = _local_state()
+    st.set_plugin_response("early", {"result": "x"})
+    assert await st.wait_for_plugin_response_async("early", timeout=1.0) == {"result": "x"}
+
+    started = time.perf_counter()
+    assert await st.wait_for_plugin_response_async("missing", timeout=0.05) is None
+    assert time.perf_counter() - started < 0.5
+    assert len(st._plugin_response_waiters) == 0
+
+    # 等待被取消后，迟到的响应回落到共享字典
+    task = asyncio.create_task(st.wait_for_plugin_response_async("late", timeout=5.0))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    st.set_plugin_response("late", {"result": 2})
+    assert st.get_plugin_response("late") == {"result": 2}
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_downlink_response_resolves_waiter_directly(monkeypatch: pytest.MonkeyPatch) -> None:
+    from plugin.core import host as host_module
+
+    st = _local_state()
+    monkeypatch.setattr(host_module, "state", st)
+    task = asyncio.create_task(st.wait_for_plugin_response_async("x", timeout=2.0))
+    await asyncio.sleep(0.01)
+
+    host_module._deliver_plugin_response({"to_plugin": "demo", "request_id": "x", "result": 3})
+    assert await asyncio.wait_for(task, timeout=0.5) == {"to_plugin": "demo", "request_id": "x", "result": 3}
+    assert st._plugin_response_map == {}
+
+    # 响应先于等待者登记到达：落入共享字典，登记后立即取走
+    host_module._deliver_plugin_response({"to_plugin": "demo", "request_id": "early", "result": 4})
+    host_module._deliver_plugin_response({"to_plugin": "demo"})
+    assert (await st.wait_for_plugin_response_async("early", timeout=0.5) or {}).get("result") == 4
+    assert len(st._plugin_response_waiters) == 0
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_bus_delete_async_waits_on_response_registry(monkeypatch: pytest.MonkeyPatch) -> None:
+    from plugin.sdk.bus.events import EventClient
+
+    st = _local_state()
+    monkeypatch.setattr(sys.modules["plugin.core.state"], "state", st)
+    sent: list[dict] = []
+
+    class _Queue:
+        def put(self, request: dict, timeout: float | None = None) -> None:
+            sent.append(request)
+            threading.Timer(0.02, st.set_plugin_response, args=(request["request_id"], {"result": {"deleted": True}})).start()
+
+    class _Ctx:
+        plugin_id = "demo"
+        _plugin_comm_queue = _Queue()
+
+    assert await EventClient(_Ctx()).delete_async("ev-1", timeout=2.0) is True  # type: ignore[arg-type]
+    assert len(sent) == 1 and len(st._plugin_response_waiters) == 0
+
+
+async def _legacy_wait(st: GlobalState, rid: str, timeout: float, inbox: asyncio.Queue, pending: dict) -> Any:
+    """改造前插件进程里的等待方式：每轮查一次共享字典，再以 50ms 超时读取 CH_RESP 收件箱。"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if rid in pending:
+            return pending.pop(rid)
+        got = st.get_plugin_response(rid)
+        if got is not None:
+            return got
+        try:
+            msg = await asyncio.wait_for(inbox.get(), timeout=min(0.05, deadline - time.time()))
+        except asyncio.TimeoutError:
+            continue
+        if msg.get("request_id") == rid:
+            return msg
+        pending[msg["request_id"]] = msg
+    return None
+
+
+async def _run_ipc_calls(st: GlobalState, calls: int, *, legacy: bool) -> dict[str, float]:
+    """calls 个并发插件调用经真实 ZMQ 传输往返：子端上行 CH_COMM，主端回 CH_RESP，子端接收循环分发。"""
+    from plugin.core import host as host_module
+    from plugin.core.zmq_transport import CH_COMM, CH_RESP, ChildTransport, HostTransport
+
+    host = HostTransport("tcp")
+    child = ChildTransport(host.downlink_endpoint, host.uplink_endpoint, codec=host.codec, shm=host.shm)
+    inbox: asyncio.Queue = asyncio.Queue()
+    pending: dict[str, Any] = {}
+    stop = asyncio.Event()
+
+    async def _host_router() -> None:
+        while not stop.is_set():
+            got = await host.recv(timeout_ms=50)
+            if got is not None:
+                _, msg = got
+                await host.send_response({"to_plugin": "demo", "request_id": msg["request_id"], "result": msg["request_id"]})
+
+    async def _child_receive_loop() -> None:
+        while not stop.is_set():
+            got = await child.recv_downlink(timeout_ms=50)
+            if got is None:
+                continue
+            ch, msg = got
+            if ch != CH_RESP:
+                continue
+            if legacy:
+                await inbox.put(msg)
+            else:
+                host_module._deliver_plugin_response(msg)
+
+    latencies: list[float] = []
+
+    async def _call(i: int) -> None:
+        rid = f"req-{i}"
+        await asyncio.sleep(random.uniform(0, 0.1))
+        started = time.perf_counter()
+        child.send_uplink(CH_COMM, {"type": "PLUGIN_QUERY", "from_plugin": "demo", "request_id": rid})
+        if legacy:
+            got = await _legacy_wait(st, rid, 30.0, inbox, pending)
+        else:
+            got = await st.wait_for_plugin_response_async(rid, 30.0)
+        assert got is not None and got["result"] == rid
+        latencies.append(time.perf_counter() - started)
+
+    loops = [asyncio.create_task(_host_router()), asyncio.create_task(_child_receive_loop())]
+    try:
+        await asyncio.gather(*(_call(i) for i in range(calls)))
+    finally:
+        stop.set()
+        await asyncio.gather(*loops)
+        child.close()
+        host.close()
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+async def test_benchmark_plugin_calls_over_ipc(
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """200 个并发插件调用经 ZMQ 往返的延迟：旧的收件箱 + 共享字典轮询 vs 接收循环直接唤醒 future。"""
+    from plugin.core import host as host_module
+
+    st = GlobalState()  # 与生产一致：Manager 共享字典
+    monkeypatch.setattr(host_module, "state", st)
+    _ = st.plugin_response_map  # 插件进程启动前 Manager 已就绪，不计入测量
+    try:
+        futures = await _run_ipc_calls(st, 200, legacy=False)
+        legacy = await _run_ipc_calls(st, 200, legacy=True)
+    finally:
+        if st._plugin_response_map_manager is not None:
+            st._plugin_response_map_manager.shutdown()
+
+    for name, r in (("inbox-polling", legacy), ("futures", futures)):
+        record_property("perf", f"{name}: p50={r['p50_ms']:.2f}ms p99={r['p99_ms']:.2f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert futures["p99_ms"] < legacy["p99_ms"]
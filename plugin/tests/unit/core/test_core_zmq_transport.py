@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import os
+import pickle
+import statistics
+import time
+from collections.abc import Callable
+
+import pytest
+
+from plugin.core import zmq_transport as module
+from plugin.core.zmq_transport import (
+    CH_CMD,
+    CH_COMM,
+    CH_RES,
+    ChildTransport,
+    HostTransport,
+    TransportCodec,
+    TransportCodecError,
+)
+
+
+def _pair(endpoint_kind: str, codec_name: str, allow_pickle: bool = True) -> tuple[HostTransport, ChildTransport]:
+    host = HostTransport(endpoint_kind, TransportCodec(codec_name, allow_pickle=allow_pickle))
+    child = ChildTransport(host.downlink_endpoint, host.uplink_endpoint, codec=pickle.loads(pickle.dumps(host.codec)))
+    return host, child
+
+
+@pytest.mark.plugin_unit
+def test_msgpack_codec_roundtrip_and_pickle_fallback() -> None:
+    codec = TransportCodec("msgpack")
+    raw = codec.encode(CH_RES, {"req_id": "r1", "success": True, "data": {"x": [1, 2.5, None, b"\x00"]}})
+    assert raw[0] == 0x92
+    assert codec.decode(raw) == (CH_RES, {"req_id": "r1", "success": True, "data": {"x": [1, 2.5, None, b"\x00"]}})
+
+    # tuple / datetime 无法无损表示为 msgpack，逐条退回 pickle 并保持原类型
+    ts = datetime.datetime(2024, 1, 1, 12, 0)
+    raw = codec.encode(CH_RES, {"req_id": "r2", "data": (1, ts)})
+    assert raw[0] == 0x80
+    assert codec.decode(raw) == (CH_RES, {"req_id": "r2", "data": (1, ts)})
+
+    # 不满足通道 schema 的消息同样退回 pickle
+    assert codec.encode(CH_COMM, {"type": "PLUGIN_QUERY"})[0] == 0x80
+    assert codec.stats["pickle_fallbacks"] == 2
+
+
+@pytest.mark.plugin_unit
+def test_strict_msgpack_codec_rejects_pickle_and_schema_violations() -> None:
+    codec = TransportCodec("msgpack", allow_pickle=False)
+    with pytest.raises(TransportCodecError):
+        codec.encode(CH_RES, {"req_id": "r1", "data": {1, 2}})
+    with pytest.raises(TransportCodecError):
+        codec.decode(pickle.dumps((CH_RES, {"req_id": "r1"})))
+
+    lenient = TransportCodec("msgpack")
+    with pytest.raises(TransportCodecError):
+        codec.decode(lenient.encode(CH_CMD, {"no_type": 1}))  # 由 pickle 回退产生，严格模式拒收
+    import ormsgpack
+
+    with pytest.raises(TransportCodecError):
+        codec.decode(ormsgpack.packb(["res", {"req_id": 123}]))
+    with pytest.raises(TransportCodecError):
+        codec.decode(ormsgpack.packb(["evil", {}]))
+    assert codec.stats["rejected"] == 5
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_host_rejects_pickled_frame_in_msgpack_mode_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    from plugin import settings
+
+    if "NEKO_PLUGIN_TRANSPORT_ALLOW_PICKLE" not in os.environ:
+        assert settings.PLUGIN_TRANSPORT_ALLOW_PICKLE is False
+    monkeypatch.setattr(module, "PLUGIN_TRANSPORT_CODEC", "msgpack")
+    monkeypatch.setattr(module, "PLUGIN_TRANSPORT_ALLOW_PICKLE", False)
+    host = HostTransport("tcp")
+    peer = module.zmq.Context.instance().socket(module.zmq.PUSH)
+    peer.setsockopt(module.zmq.LINGER, 0)
+    peer.connect(host.uplink_endpoint)
+    try:
+        assert host.codec.name == "msgpack" and host.codec.allow_pickle is False
+        # 恶意或配置不一致的子进程直接发送 pickle 帧：宿主拒收，不会反序列化
+        peer.send(pickle.dumps((CH_RES, {"req_id": "r1", "data": 1})))
+        with pytest.raises(TransportCodecError):
+            await host.recv(timeout_ms=2000)
+
+        peer.send(TransportCodec("msgpack").encode(CH_RES, {"req_id": "r2", "data": 2}))
+        assert await host.recv(timeout_ms=2000) == (CH_RES, {"req_id": "r2", "data": 2})
+        assert host.codec.stats["rejected"] == 1
+    finally:
+        peer.close()
+        host.close()
+
+
+@pytest.mark.plugin_unit
+def test_pickle_fallback_logs_warning() -> None:
+    messages: list[str] = []
+    sink_id = module.logger.add(lambda m: messages.append(str(m)), level="WARNING")
+    try:
+        codec = TransportCodec("msgpack", allow_pickle=True)
+        codec.decode(codec.encode(CH_RES, {"req_id": "r1", "data": (1, 2)}))
+    finally:
+        module.logger.remove(sink_id)
+    assert len(messages) == 2 and "falls back to pickle" in messages[0]
+
+
+@pytest.mark.plugin_unit
+def test_pickle_codec_decodes_msgpack_frames() -> None:
+    # 接收端总是按首字节识别编码，宿主与子进程只需约定是否接受 pickle
+    frame = TransportCodec("msgpack").encode(CH_CMD, {"type": "STOP"})
+    assert TransportCodec("pickle").decode(frame) == (CH_CMD, {"type": "STOP"})
+    with pytest.raises(ValueError):
+        TransportCodec("json")
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint_kind,codec_name", [("tcp", "pickle"), ("ipc", "msgpack")])
+async def test_host_child_roundtrip(endpoint_kind: str, codec_name: str) -> None:
+    host, child = _pair(endpoint_kind, codec_name)
+    try:
+        if endpoint_kind == "ipc" and module.zmq.has("ipc"):
+            assert host.downlink_endpoint.startswith("ipc://")
+            ipc_paths = list(host._ipc_paths)
+            assert all(os.path.exists(p) for p in ipc_paths)
+        else:
+            ipc_paths = []
+            assert host.downlink_endpoint.startswith("tcp://")
+
+        await host.send_command({"type": "TRIGGER", "req_id": "r1", "args": {"n": 1}})
+        assert await child.recv_downlink(timeout_ms=2000) == (CH_CMD, {"type": "TRIGGER", "req_id": "r1", "args": {"n": 1}})
+
+        child.channel_sender(CH_RES).put({"req_id": "r1", "success": True, "data": 2})
+        assert await host.recv(timeout_ms=2000) == (CH_RES, {"req_id": "r1", "success": True, "data": 2})
+        assert await host.recv(timeout_ms=10) is None
+    finally:
+        child.close()
+        host.close()
+    assert not any(os.path.exists(p) for p in ipc_paths)
+
+
+async def _measure(endpoint_kind: str, codec_name: str, rounds: int, burst: int) -> dict[str, float]:
+    host, child = _pair(endpoint_kind, codec_name)
+    payload = {"type": "TRIGGER", "req_id": "", "entry_id": "run", "args": {"text": "x" * 256, "items": list(range(32))}}
+    latencies: list[float] = []
+    try:
+        for i in range(rounds):
+            payload["req_id"] = str(i)
+            t0 = time.perf_counter()
+            await host.send_command(payload)
+            _, msg = await child.recv_downlink(timeout_ms=2000)
+            child.send_uplink(CH_RES, {"req_id": msg["req_id"], "success": True, "data": msg["args"]})
+            await host.recv(timeout_ms=2000)
+            latencies.append(time.perf_counter() - t0)
+
+        sender = child.channel_sender(CH_RES)
+        t0 = time.perf_counter()
+        received = 0
+
+        async def _drain() -> None:
+            nonlocal received
+            while received < burst:
+                if await host.recv(timeout_ms=2000) is None:
+                    break
+                received += 1
+
+        drain = asyncio.create_task(_drain())
+        for i in range(burst):
+            sender.put({"req_id": str(i), "success": True, "data": payload["args"]})
+            if i % 256 == 0:
+                await asyncio.sleep(0)
+        await drain
+        elapsed = time.perf_counter() - t0
+    finally:
+        child.close()
+        host.close()
+    latencies.sort()
+    return {
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "msgs_per_s": received / elapsed,
+    }
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+async def test_benchmark_tcp_pickle_vs_ipc_msgpack(record_property: Callable[[str, object], None]) -> None:
+    """往返延迟（host→child→host）与单向吞吐：tcp+pickle 对比 ipc+msgpack。"""
+    rounds, burst = 500, 5000
+    results = {
+        "tcp+pickle": await _measure("tcp", "pickle", rounds, burst),
+        "ipc+msgpack": await _measure("ipc", "msgpack", rounds, burst),
+    }
+    for name, r in results.items():
+        record_property("perf", f"{name}: p50={r['p50_us']:.0f}us p99={r['p99_us']:.0f}us throughput={r['msgs_per_s']:.0f} msg/s")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["ipc+msgpack"]["p50_us"] <= results["tcp+pickle"]["p50_us"] * 1.2
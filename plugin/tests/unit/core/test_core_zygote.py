@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+from typing import Any, Callable
+
+import pytest
+
+from plugin.core import zygote
+from plugin.core.zmq_transport import CH_STS, ChildTransport, HostTransport
+
+_HAS_FORKSERVER = "forkserver" in multiprocessing.get_all_start_methods()
+
+
+def _plugin_child(downlink: str, uplink: str, codec: Any, stop_event: Any) -> None:
+    """模拟插件进程：导入插件运行时，经交接的端点上报 ready，等待 STOP 或 stop event。"""
+    import plugin.core.host  # noqa: F401  与真实插件进程相同的导入
+
+    async def _main() -> None:
+        child = ChildTransport(downlink, uplink, codec=codec)
+        try:
+            child.send_uplink(CH_STS, {"type": "ready", "pid": os.getpid(), "ppid": os.getppid()})
+            while not stop_event.is_set():
+                msg = await child.recv_downlink(timeout_ms=50)
+                if msg is not None and msg[1].get("type") == "STOP":
+                    break
+        finally:
+            child.close()
+
+    asyncio.run(_main())
+
+
+async def _start_child(method: str) -> tuple[multiprocessing.process.BaseProcess, HostTransport, Any, dict, float]:
+    ctx = zygote.get_plugin_process_context(method)
+    transport = HostTransport()
+    stop_event = ctx.Event()
+    proc = ctx.Process(
+        target=_plugin_child,
+        args=(transport.downlink_endpoint, transport.uplink_endpoint, transport.codec, stop_event),
+    )
+    started = time.perf_counter()
+    proc.start()
+    received = await transport.recv(timeout_ms=30000)
+    elapsed = time.perf_counter() - started
+    assert received is not None and received[0] == CH_STS
+    return proc, transport, stop_event, received[1], elapsed
+
+
+@pytest.mark.plugin_unit
+def test_resolve_start_method_falls_back_to_spawn_without_fork(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(zygote.multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    assert zygote.resolve_start_method("zygote") == "spawn"
+    assert zygote.get_plugin_process_context("zygote").get_start_method() == "spawn"
+    assert zygote.warm_up_plugin_zygote() in ("spawn", "inherit")
+    assert zygote.resolve_start_method("bogus") == "inherit"
+    assert zygote.resolve_start_method("inherit") == "inherit"
+
+
+@pytest.mark.plugin_unit
+def test_zygote_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 默认沿用平台默认启动方式（Linux 上为 fork），不拉起 zygote
+    monkeypatch.setattr(zygote, "PLUGIN_PROCESS_START_METHOD", "inherit")
+    assert zygote.resolve_start_method() == "inherit"
+    assert zygote.get_plugin_process_context().get_start_method() == multiprocessing.get_start_method()
+    assert zygote.warm_up_plugin_zygote() == "inherit"
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@pytest.mark.skipif(not _HAS_FORKSERVER, reason="zygote needs fork support")
+async def test_zygote_forks_children_with_transport_handoff() -> None:
+    assert zygote.warm_up_plugin_zygote("zygote") == "zygote"
+    first = await _start_child("zygote")
+    second = await _start_child("zygote")
+    try:
+        (proc_a, host_a, _, ready_a, _), (proc_b, _, stop_b, ready_b, _) = first, second
+        assert proc_a.pid == ready_a["pid"] and proc_b.pid == ready_b["pid"]
+        # 两个插件进程都由同一个 zygote fork，而不是由宿主直接派生
+        assert ready_a["ppid"] == ready_b["ppid"] != os.getpid()
+        assert proc_a.is_alive() and proc_a.exitcode is None
+
+        await host_a.send_command({"type": "STOP"})
+        stop_b.set()
+        for proc in (proc_a, proc_b):
+            await asyncio.to_thread(proc.join, 10)
+            assert proc.exitcode == 0
+    finally:
+        for proc, host, *_ in (first, second):
+            if proc.is_alive():
+                proc.kill()
+            host.close()
+
+
+async def _measure_starts(method: str, count: int) -> list[float]:
+    samples: list[float] = []
+    for _ in range(count):
+        proc, host, stop_event, _, elapsed = await _start_child(method)
+        samples.append(elapsed)
+        stop_event.set()
+        await asyncio.to_thread(proc.join, 10)
+        host.close()
+    return samples
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+@pytest.mark.skipif(not _HAS_FORKSERVER, reason="zygote needs fork support")
+async def test_benchmark_cold_spawn_vs_zygote_start(record_property: Callable[[str, object], None]) -> None:
+    """插件进程从 start() 到经 ZMQ 上报 ready 的耗时：全新解释器（spawn）对比 zygote fork。"""
+    zygote.warm_up_plugin_zygote("zygote")
+    await _measure_starts("zygote", 1)  # 等待 zygote 完成预导入
+    results = {
+        "spawn": await _measure_starts("spawn", 8),
+        "zygote": await _measure_starts("zygote", 8),
+    }
+    for name, samples in results.items():
+        record_property("perf", f"{name}: p50={statistics.median(samples) * 1000:.0f}ms max={max(samples) * 1000:.0f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert statistics.median(results["zygote"]) < statistics.median(results["spawn"]) / 2
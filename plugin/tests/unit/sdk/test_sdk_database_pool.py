@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import Column, Integer, String, event, select, text
+
+from plugin.sdk.database import PluginDatabase
+
+
+def _count_statements(db: PluginDatabase, needle: str) -> list[str]:
+    seen: list[str] = []
+
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        if needle in statement:
+            seen.append(statement)
+
+    return seen
+
+
+@pytest.fixture
+def db(tmp_path: Path):
+    database = PluginDatabase(plugin_id="demo", plugin_dir=tmp_path, pool_size=2)
+    yield database
+    database.close()
+
+
+@pytest.mark.plugin_unit
+def test_scoped_session_is_reused_per_thread(db: PluginDatabase) -> None:
+    assert db.scoped_session() is db.scoped_session()
+    other: list[Any] = []
+    t = threading.Thread(target=lambda: other.append(db.scoped_session()))
+    t.start()
+    t.join()
+    assert other[0] is not db.scoped_session()
+
+
+@pytest.mark.plugin_unit
+def test_kv_schema_check_runs_once_per_process(db: PluginDatabase, tmp_path: Path) -> None:
+    creates = _count_statements(db, "CREATE TABLE")
+    for i in range(5):
+        db.kv.set(f"k{i}", i)
+        assert db.kv.get(f"k{i}") == i
+
+    # 同一数据库文件上的新实例也不再重复建表
+    again = PluginDatabase(plugin_id="demo", plugin_dir=tmp_path)
+    assert again.kv.get("k3") == 3
+    again.close()
+    assert len(creates) == 1
+
+
+@pytest.mark.plugin_unit
+def test_kv_recreates_table_when_cache_is_stale(db: PluginDatabase) -> None:
+    db.kv.set("a", 1)
+    with db.session() as session:
+        session.execute(text("DROP TABLE _plugin_kv_store"))
+        session.commit()
+    db.kv.set("b", 2)
+    assert db.kv.keys() == ["b"]
+
+
+@pytest.mark.plugin_unit
+def test_kv_ops_do_not_commit_callers_scoped_transaction(db: PluginDatabase) -> None:
+    class Note(db.Base):
+        __tablename__ = "notes"
+        id = Column(Integer, primary_key=True)
+        body = Column(String)
+
+    db.create_all()
+    session = db.scoped_session()
+    session.add(Note(id=1, body="draft"))
+    assert session.in_transaction()
+
+    db.kv.set("a", 1)
+    assert db.kv.get("a") == 1
+    assert session.in_transaction()  # 调用方的事务仍未结束
+    session.rollback()
+
+    assert db.kv.get("a") == 1
+    with db.session() as other:
+        assert other.execute(select(Note)).first() is None
+
+
+@pytest.mark.plugin_unit
+def test_kv_mget_mset(db: PluginDatabase) -> None:
+    assert db.kv.mset({f"k{i}": {"n": i} for i in range(1200)}) == 1200
+    got = db.kv.mget(["k0", "k1199", "missing"], default=-1)
+    assert got == {"k0": {"n": 0}, "k1199": {"n": 1199}, "missing": -1}
+    assert len(db.kv.mget([f"k{i}" for i in range(1200)])) == 1200
+    assert db.kv.count() == 1200
+    assert db.kv.delete("k0") is True and db.kv.delete("k0") is False
+    assert db.kv.clear() == 1199
+
+
+@pytest.mark.plugin_unit
+def test_bulk_insert_and_upsert(db: PluginDatabase) -> None:
+    class Item(db.Base):
+        __tablename__ = "items"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(50))
+        qty = Column(Integer)
+
+    db.create_all_sync()
+    assert db.bulk_insert(Item, [{"id": i, "name": f"n{i}", "qty": 0} for i in range(3)]) == 3
+    assert db.bulk_upsert(Item, [{"id": 1, "name": "renamed", "qty": 5}, {"id": 9, "name": "new", "qty": 1}]) == 2
+    db.bulk_upsert(Item.__table__, [{"id": 2, "name": "ignored", "qty": 7}], update_columns=["qty"])
+
+    with db.session() as session:
+        rows = {r.id: (r.name, r.qty) for r in session.execute(select(Item)).scalars()}
+    assert rows == {0: ("n0", 0), 1: ("renamed", 5), 2: ("n2", 7), 9: ("new", 1)}
+
+    with pytest.raises(TypeError):
+        db.bulk_insert(object(), [{"id": 1}])
+
+
+@pytest.mark.plugin_unit
+def test_concurrent_kv_writers_share_the_pool(db: PluginDatabase) -> None:
+    errors: list[BaseException] = []
+
+    def _writer(w: int) -> None:
+        try:
+            for i in range(50):
+                db.kv.set(f"w{w}:{i}", i)
+                assert db.kv.get(f"w{w}:{i}") == i
+        except BaseException as e:  # pragma: no cover - 失败时收集
+            errors.append(e)
+
+    threads = [threading.Thread(target=_writer, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert db.kv.count() == 200
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_async_access_runs_on_dedicated_db_thread(db: PluginDatabase) -> None:
+    await db.kv.mset_async({"a": 1, "b": 2})
+    assert await db.kv.get_async("a") == 1
+    assert await db.kv.mget_async(["a", "b", "c"]) == {"a": 1, "b": 2, "c": None}
+    assert await db.kv.delete_async("b") is True
+
+    threads = {await db.run_in_db_thread(lambda s: threading.current_thread().name) for _ in range(3)}
+    assert len(threads) == 1 and threads.pop().startswith("plugin-db-demo")
+    assert await db.run_in_db_thread(lambda s: s.execute(text("SELECT COUNT(*) FROM _plugin_kv_store")).scalar()) == 1
+
+
+def _latency_us(fn: Callable[[], Any], n: int) -> dict[str, float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {"p50": samples[n // 2], "p99": samples[int(n * 0.99)]}
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_kv_latency_legacy_vs_pooled(
+    db: PluginDatabase,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """旧路径（每次新建 Session + 建表检查）与 scoped Session + 建表缓存的单次操作延迟。"""
+    db.kv.mset({f"k{i}": {"n": i} for i in range(100)})
+
+    def _legacy_get() -> Any:
+        with db.session() as session:
+            session.execute(text(
+                "CREATE TABLE IF NOT EXISTS _plugin_kv_store "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            ))
+            session.commit()
+        with db.session() as session:
+            return session.execute(text("SELECT value FROM _plugin_kv_store WHERE key = 'k7'")).fetchone()
+
+    n = 2000
+    legacy = _latency_us(_legacy_get, n)
+    pooled = _latency_us(lambda: db.kv.get("k7"), n)
+    for name, r in (("legacy session-per-op", legacy), ("scoped + schema cache", pooled)):
+        record_property("perf", f"kv.get {name}: p50={r['p50']:.1f}us p99={r['p99']:.1f}us")
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        db.kv.set(f"s{i}", i)
+    seq = n / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    db.kv.mset({f"m{i}": i for i in range(n)})
+    bulk = n / (time.perf_counter() - t0)
+    record_property("perf", f"kv writes: sequential set={seq:.0f} ops/s mset={bulk:.0f} ops/s")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert pooled["p50"] < legacy["p50"]
+        assert bulk > seq * 3
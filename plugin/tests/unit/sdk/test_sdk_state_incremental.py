@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from plugin.sdk.state import PluginStatePersistence
+
+KEYS = ["counter", "cache", "history", "started_at", "gone"]
+
+
+def _persistence(tmp_path: Path, **kwargs) -> PluginStatePersistence:
+    return PluginStatePersistence(plugin_id="demo", plugin_dir=tmp_path, backend="file", **kwargs)
+
+
+def _plugin() -> SimpleNamespace:
+    return SimpleNamespace(
+        counter=0,
+        cache={f"k{i}": "v" * 100 for i in range(200)},
+        history=[],
+        started_at=datetime(2026, 1, 1, 8, 0),
+        gone="soon",
+    )
+
+
+def _restore(tmp_path: Path) -> SimpleNamespace:
+    fresh = SimpleNamespace()
+    assert _persistence(tmp_path).load(fresh) is True
+    return fresh
+
+
+@pytest.mark.plugin_unit
+def test_small_changes_append_deltas_instead_of_rewriting(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path)
+    plugin = _plugin()
+    assert sp.save(plugin, KEYS)
+    snapshot = (tmp_path / ".plugin_state").read_bytes()
+    assert not (tmp_path / ".plugin_state.log").exists()
+
+    for i in range(1, 6):
+        plugin.counter = i
+        plugin.history.append(f"msg{i}")
+        assert sp.save(plugin, KEYS)
+    assert sp.save(plugin, KEYS)  # 无变化：不写任何东西
+
+    log_size = (tmp_path / ".plugin_state.log").stat().st_size
+    assert (tmp_path / ".plugin_state").read_bytes() == snapshot
+    assert 0 < log_size < len(snapshot)
+
+    restored = _restore(tmp_path)
+    assert restored.counter == 5
+    assert restored.history == [f"msg{i}" for i in range(1, 6)]
+    assert restored.cache == plugin.cache
+    assert restored.started_at == plugin.started_at
+
+
+@pytest.mark.plugin_unit
+def test_deleted_attrs_are_removed_on_replay(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path)
+    plugin = _plugin()
+    sp.save(plugin, KEYS)
+    del plugin.gone
+    plugin.counter = 1
+    sp.save(plugin, KEYS)
+
+    restored = _restore(tmp_path)
+    assert restored.counter == 1 and not hasattr(restored, "gone")
+
+
+@pytest.mark.plugin_unit
+def test_mutable_value_replaced_by_none_is_detected(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path)
+    plugin = _plugin()
+    sp.save(plugin, KEYS)
+    plugin.history = None
+    sp.save(plugin, KEYS)
+    assert _restore(tmp_path).history is None
+
+
+@pytest.mark.plugin_unit
+def test_torn_log_tail_is_ignored(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path)
+    plugin = _plugin()
+    sp.save(plugin, KEYS)
+    plugin.counter = 1
+    sp.save(plugin, KEYS)
+    plugin.counter = 2
+    sp.save(plugin, KEYS)
+
+    log = tmp_path / ".plugin_state.log"
+    log.write_bytes(log.read_bytes()[:-3])
+    assert _restore(tmp_path).counter == 1
+
+
+@pytest.mark.plugin_unit
+def test_new_snapshot_ignores_stale_log_and_compacts(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path, snapshot_every=3)
+    plugin = _plugin()
+    sp.save(plugin, KEYS)
+    stale = tmp_path / "stale.log"
+    for i in range(1, 4):
+        plugin.counter = i
+        sp.save(plugin, KEYS)
+    (tmp_path / ".plugin_state.log").replace(stale)
+
+    # 第 4 次增量触发压实：新快照，日志清空
+    plugin.counter = 4
+    sp.save(plugin, KEYS)
+    assert not (tmp_path / ".plugin_state.log").exists()
+
+    # 模拟「快照已替换、旧日志还没删」时崩溃：旧 generation 的记录不能覆盖新快照
+    stale.replace(tmp_path / ".plugin_state.log")
+    assert _restore(tmp_path).counter == 4
+
+
+@pytest.mark.plugin_unit
+def test_first_save_and_freeze_write_full_snapshot(tmp_path: Path) -> None:
+    plugin = _plugin()
+    _persistence(tmp_path).save(plugin, KEYS)
+    plugin.counter = 1
+    _persistence(tmp_path).save(plugin, KEYS)  # 新进程（新实例）的首次保存
+    assert not (tmp_path / ".plugin_state.log").exists()
+
+    sp = _persistence(tmp_path)
+    sp.save(plugin, KEYS)
+    plugin.counter = 2
+    sp.save(plugin, KEYS)
+    assert (tmp_path / ".plugin_state.log").exists()
+    info = sp.get_state_info()
+    assert info is not None and info["delta_log_bytes"] > 0
+
+    plugin.counter = 3
+    sp.save(plugin, KEYS, reason="freeze")
+    assert not (tmp_path / ".plugin_state.log").exists()
+    assert _restore(tmp_path).counter == 3
+
+    assert sp.clear() is True
+    assert not sp.has_saved_state()
+
+
+@pytest.mark.plugin_unit
+def test_legacy_v3_state_file_still_loads(tmp_path: Path) -> None:
+    sp = _persistence(tmp_path)
+    legacy = {"version": 3, "plugin_id": "demo", "saved_at": 0.0, "reason": "auto", "data": {"counter": 7}}
+    (tmp_path / ".plugin_state").write_bytes(sp._serialize(legacy))
+    assert _restore(tmp_path).counter == 7
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_save_latency_vs_state_size(tmp_path: Path, record_property: Callable[[str, object], None]) -> None:
+    """一次小改动后的保存延迟：整体重写（compact_ratio=0）vs 增量 delta，随状态大小变化。"""
+    results = {}
+    for size_kb in (16, 1024, 8192):
+        for mode, kwargs in (("full", {"compact_ratio": 0.0}), ("incremental", {})):
+            d = tmp_path / f"{mode}_{size_kb}"
+            d.mkdir()
+            sp = _persistence(d, **kwargs)
+            plugin = SimpleNamespace(
+                counter=0,
+                blob="x" * (size_kb * 1024 // 2),
+                cache={f"k{i}": "v" * 64 for i in range(size_kb * 1024 // 2 // 80)},
+            )
+            keys = ["counter", "blob", "cache"]
+            sp.save(plugin, keys)
+            samples = []
+            for i in range(20):
+                plugin.counter = i + 1
+                t0 = time.perf_counter()
+                assert sp.save(plugin, keys)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            results[(mode, size_kb)] = samples[len(samples) // 2]
+            record_property("perf", f"state save {mode} {size_kb}KB: p50={results[(mode, size_kb)]:.3f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results[("incremental", 8192)] < results[("full", 8192)] / 2
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from plugin.core.host import _close_plugin_storage
+from plugin.sdk.store import PluginStore
+
+_HAS_FORK = "fork" in multiprocessing.get_all_start_methods()
+
+
+def _db_rows(path: Path) -> dict[str, float | None]:
+    conn = sqlite3.connect(str(path / "store.db"))
+    try:
+        return {k: exp for k, exp in conn.execute("SELECT key, expires_at FROM kv_store")}
+    finally:
+        conn.close()
+
+
+@pytest.mark.plugin_unit
+def test_write_behind_is_readable_before_flush(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, flush_interval=60)
+    store.set("k", {"v": 1})
+    assert store.get("k") == {"v": 1}
+    assert _db_rows(tmp_path) == {}  # 尚在缓冲区
+
+    assert store.flush() == 1
+    assert set(_db_rows(tmp_path)) == {"k"}
+    assert store.flush() == 0
+    store.close()
+
+
+@pytest.mark.plugin_unit
+def test_background_flusher_and_close_persist(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, flush_interval=0.02)
+    store.set("a", 1)
+    deadline = time.time() + 2.0
+    while "a" not in _db_rows(tmp_path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert "a" in _db_rows(tmp_path)
+
+    store.set("b", 2)
+    store.close()
+    reopened = PluginStore(plugin_id="demo", plugin_dir=tmp_path)
+    assert reopened.mget(["a", "b"]) == {"a": 1, "b": 2}
+    reopened.close()
+
+
+class _Logger:
+    def warning(self, *args: object) -> None:
+        pass
+
+
+class _PluginInstance:
+    def __init__(self, plugin_dir: str) -> None:
+        self.store = PluginStore(plugin_id="demo", plugin_dir=Path(plugin_dir), flush_interval=60)
+
+
+def _child_writes(plugin_dir: str, key: str, teardown: bool) -> None:
+    """插件子进程：写入后按 host 的退出流程关闭 store（或不关闭），然后随进程结束。"""
+    instance = _PluginInstance(plugin_dir)
+    instance.store.set(key, "v")
+    if teardown:
+        _close_plugin_storage(instance, _Logger())
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.skipif(not _HAS_FORK, reason="needs the fork start method")
+def test_plugin_process_teardown_flushes_write_behind_buffer(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("fork")
+    for key, teardown in (("lost", False), ("kept", True)):
+        proc = ctx.Process(target=_child_writes, args=(str(tmp_path), key, teardown))
+        proc.start()
+        proc.join(10)
+        assert proc.exitcode == 0
+    # 子进程以 os._exit 结束，atexit 不会执行：只有显式关闭的写入落盘
+    assert set(_db_rows(tmp_path)) == {"kept"}
+
+
+@pytest.mark.plugin_unit
+def test_mget_mset_mdelete(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, flush_interval=60)
+    store.mset({"a": 1, "b": [2], "c": {"x": 3}})
+    store.flush()
+    store.set("d", 4)  # 仅在缓冲区
+
+    assert store.mget(["a", "b", "d", "zz"], default=0) == {"a": 1, "b": [2], "d": 4, "zz": 0}
+    assert store.mdelete(["a", "d", "zz"]) == 2
+    assert store.mget(["a", "d"]) == {"a": None, "d": None}
+    assert sorted(store.keys()) == ["b", "c"]
+    assert store.count() == 2
+    store.close()
+
+
+@pytest.mark.plugin_unit
+def test_delete_is_not_undone_by_pending_write(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, flush_interval=60)
+    store.set("k", 1)
+    store.flush()
+    store.set("k", 2)
+    assert store.delete("k") is True
+    store.flush()
+    assert store.get("k") is None
+    assert _db_rows(tmp_path) == {}
+    store.close()
+
+
+@pytest.mark.plugin_unit
+def test_ttl_lazy_and_background_expiry(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, flush_interval=60, expire_interval=0)
+    store.set("short", 1, ttl=0.05)
+    store.mset({"long1": 1, "long2": 2}, ttl=60)
+    store.set("forever", 1)
+    store.flush()
+    time.sleep(0.1)
+
+    assert store.get("short", default="gone") == "gone"
+    assert "short" not in store
+    assert sorted(store.keys()) == ["forever", "long1", "long2"]
+    assert store.delete("short") is False
+    assert "short" not in _db_rows(tmp_path)  # 读到过期键后惰性删除
+
+    store.set("short2", 1, ttl=0.05)
+    store.flush()
+    time.sleep(0.1)
+    assert store.purge_expired() == 1
+    assert set(_db_rows(tmp_path)) == {"forever", "long1", "long2"}
+    store.close()
+
+
+@pytest.mark.plugin_unit
+def test_lru_serves_hits_and_is_bounded(tmp_path: Path) -> None:
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path, cache_size=2, write_behind=False)
+    store.mset({"a": 1, "b": 2, "c": 3})
+    assert len(store._cache) == 2
+
+    # 绕过 store 改库：命中 LRU 的键仍返回缓存值，被淘汰的键回源
+    conn = sqlite3.connect(str(tmp_path / "store.db"))
+    conn.execute("UPDATE kv_store SET value = ?", (store._serialize(99),))
+    conn.commit()
+    conn.close()
+    assert store.get("c") == 3
+    assert store.get("a") == 99
+    store.close()
+
+
+@pytest.mark.plugin_unit
+def test_migrates_store_without_expires_at(tmp_path: Path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "store.db"))
+    conn.execute(
+        "CREATE TABLE kv_store (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+        "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO kv_store VALUES ('old', ?, 0, 0)", (PluginStore("x", tmp_path, enabled=False)._serialize("v"),))
+    conn.commit()
+    conn.close()
+
+    store = PluginStore(plugin_id="demo", plugin_dir=tmp_path)
+    assert store.get("old") == "v"
+    store.set("new", 1, ttl=60)
+    store.flush()
+    assert _db_rows(tmp_path)["new"] is not None
+    store.close()
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_sequential_and_batched_writes(
+    tmp_path: Path,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """逐条同步提交 vs write-behind 逐条写入 vs mset 批量写入的 ops/s。"""
+    n = 2000
+    results = {}
+
+    def _run(name: str, fn) -> None:
+        t0 = time.perf_counter()
+        fn()
+        results[name] = n / (time.perf_counter() - t0)
+        record_property("perf", f"store {name}: {results[name]:.0f} ops/s")
+
+    for name in ("sync", "wb", "batch"):
+        (tmp_path / name).mkdir()
+    sync_store = PluginStore(plugin_id="demo", plugin_dir=tmp_path / "sync", write_behind=False)
+    wb_store = PluginStore(plugin_id="demo", plugin_dir=tmp_path / "wb", flush_interval=60, max_pending=500)
+    batch_store = PluginStore(plugin_id="demo", plugin_dir=tmp_path / "batch", flush_interval=60)
+
+    _run("sequential commit-per-set", lambda: [sync_store.set(f"k{i}", {"n": i}) for i in range(n)])
+
+    def _write_behind() -> None:
+        for i in range(n):
+            wb_store.set(f"k{i}", {"n": i})
+        wb_store.flush()
+
+    def _batched() -> None:
+        for start in range(0, n, 100):
+            batch_store.mset({f"k{i}": {"n": i} for i in range(start, start + 100)})
+        batch_store.flush()
+
+    _run("write-behind set", _write_behind)
+    _run("batched mset", _batched)
+    for store in (sync_store, wb_store, batch_store):
+        assert store.count() == n
+        store.close()
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["write-behind set"] > results["sequential commit-per-set"] * 3
+        assert results["batched mset"] > results["sequential commit-per-set"] * 3
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from plugin.server import log_index
+from plugin.server.logs import filter_logs, parse_log_line, query_log_file, read_log_file_tail
+
+_T0 = datetime(2026, 3, 1, 10, 0, 0)
+_LEVELS = ("INFO", "INFO", "DEBUG", "INFO", "WARNING", "INFO", "INFO", "DEBUG", "INFO", "INFO")
+
+
+def _line(i: int) -> str:
+    ts = (_T0 + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+    level = "ERROR" if i % 997 == 0 else _LEVELS[i % len(_LEVELS)]
+    return f"{ts} | {level} | [Plugin-demo] message {i} payload={'x' * (i % 50)}\n"
+
+
+def _write_log(path: Path, start: int, count: int) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(_line(i) for i in range(start, start + count))
+
+
+def _reference(path: Path, lines: int, **filters: str | None) -> list[dict[str, object]]:
+    """旧实现：整个文件读进 deque 再过滤（无过滤时只取末尾 N 行）。"""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        entries = [e for e in (parse_log_line(line) for line in f) if e]
+    if not any(filters.values()):
+        return list(deque(entries, maxlen=lines))
+    return filter_logs(entries, **filters)[-lines:]
+
+
+@pytest.fixture
+def small_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(log_index, "BLOCK_SIZE", 4096)
+    monkeypatch.setattr(log_index, "_TAIL_CHUNK", 1024)
+
+
+@pytest.mark.plugin_unit
+def test_tail_reads_backwards_and_matches_full_read(tmp_path: Path, small_blocks: None) -> None:
+    log = tmp_path / "demo.log"
+    _write_log(log, 0, 500)
+    for n in (1, 7, 100, 499, 500, 800):
+        assert read_log_file_tail(log, n) == _reference(log, n)
+
+    # 没有结尾换行的最后一行也要返回
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("2026-03-01 11:00:00 | INFO | [Plugin-demo] partial")
+    assert read_log_file_tail(log, 2)[-1]["message"] == "partial"
+    assert read_log_file_tail(log, 0) == []
+
+
+@pytest.mark.plugin_unit
+def test_index_grows_incrementally_and_resets_on_rotation(tmp_path: Path, small_blocks: None) -> None:
+    log = tmp_path / "demo.log"
+    _write_log(log, 0, 300)
+    index = log_index.get_log_index(log)
+    first_offsets = list(index.offsets)
+    assert index.indexed_to == log.stat().st_size and len(first_offsets) > 3
+    assert index.first_ts == sorted(index.first_ts)
+
+    _write_log(log, 300, 300)
+    index = log_index.get_log_index(log)
+    # 只有原来末尾不满一块的块会被重新切分，之前的块保持不变
+    assert list(index.offsets[: len(first_offsets) - 1]) == first_offsets[:-1]
+    assert index.indexed_to == log.stat().st_size
+
+    rotated = tmp_path / "new.log"
+    _write_log(rotated, 1000, 10)
+    os.replace(rotated, log)
+    index = log_index.get_log_index(log)
+    assert index.offsets[0] == 0 and index.indexed_to == log.stat().st_size
+    assert index.first_ts[0] == (_T0 + timedelta(seconds=1000)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"start_time": "2026-03-01 10:02:00", "end_time": "2026-03-01 10:03:00"},
+        {"start_time": "2026-03-01 10:30:00"},
+        {"end_time": "2026-03-01 10:00:30"},
+        {"level": "error"},
+        {"level": "WARNING", "start_time": "2026-03-01 10:10:00", "end_time": "2026-03-01 10:20:00"},
+        {"search": "MESSAGE 1234 "},
+        {"start_time": "2026-03-02 00:00:00"},
+    ],
+)
+def test_indexed_query_matches_full_scan(tmp_path: Path, small_blocks: None, filters: dict[str, str]) -> None:
+    log = tmp_path / "demo.log"
+    _write_log(log, 0, 3000)
+    for n in (5, 50, 10000):
+        got, scanned = query_log_file(log, n, **filters)
+        assert got == _reference(log, n, **filters)
+        assert scanned <= 3000
+
+
+@pytest.mark.plugin_unit
+def test_indexed_query_reads_only_relevant_blocks(tmp_path: Path, small_blocks: None) -> None:
+    log = tmp_path / "demo.log"
+    _write_log(log, 0, 3000)
+    _, scanned = query_log_file(log, 100, start_time="2026-03-01 10:05:00", end_time="2026-03-01 10:06:00")
+    assert scanned < 300
+    _, scanned = query_log_file(log, 1, level="ERROR")
+    assert scanned < 300  # 只解析最后一个含 ERROR 的块
+
+
+@pytest.mark.plugin_unit
+def test_non_ascii_search_is_case_insensitive_and_scanned_counts_entries(tmp_path: Path, small_blocks: None) -> None:
+    log = tmp_path / "demo.log"
+    _write_log(log, 0, 200)
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("2026-03-01 11:00:00 | INFO | [Plugin-demo] Café ÉTÉ ready\n")
+        f.write("Traceback (most recent call last):\n")  # 续行不是日志条目
+    _write_log(log, 300, 200)
+
+    got, _ = query_log_file(log, 10, search="café été")
+    assert [e["message"] for e in got] == ["Café ÉTÉ ready"]
+    assert got == _reference(log, 10, search="café été")
+
+    # 第二个返回值与旧的 total_lines 一致：过滤前参与匹配的日志条目数
+    _, scanned = query_log_file(log, 10000, search="no such text")
+    assert scanned == 401
+
+
+def _generate(path: Path, target_bytes: int) -> None:
+    written, i = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target_bytes:
+            chunk = "".join(_line(j) for j in range(i, i + 10000))
+            f.write(chunk)
+            written += len(chunk)
+            i += 10000
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_tail_and_queries_on_large_log(
+    tmp_path: Path,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """默认生成 64MB 日志；LOG_BENCH_MB=1024 复现 1GB 场景。"""
+    size_mb = int(os.environ.get("LOG_BENCH_MB", "64"))
+    log = tmp_path / "big.log"
+    _generate(log, size_mb * 1024 * 1024)
+
+    def _timed(name: str, fn) -> float:
+        t0 = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - t0) * 1000
+        record_property("perf", f"logs {size_mb}MB {name}: {elapsed:.1f}ms")
+        return elapsed
+
+    def _old_tail() -> None:
+        with open(log, encoding="utf-8", errors="ignore") as f:
+            tail = deque(f, maxlen=100)
+        filter_logs([parse_log_line(line) for line in tail], level="ERROR")
+
+    old = _timed("old full-read tail(100)", _old_tail)
+    new = _timed("reverse tail(100)", lambda: read_log_file_tail(log, 100))
+    _timed("index build (first query)", lambda: log_index.get_log_index(log))
+    _timed("index refresh (no growth)", lambda: log_index.get_log_index(log))
+    _timed("time range 1min", lambda: query_log_file(log, 1000, start_time="2026-03-02 10:30:00", end_time="2026-03-02 10:31:00"))
+    _timed("last 100 ERROR", lambda: query_log_file(log, 100, level="ERROR"))
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert new * 20 < old
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from plugin.server import logs as logs_module
+from plugin.server.log_watch import inotify_supported
+from plugin.server.logs import LogFileWatcher
+
+needs_inotify = pytest.mark.skipif(not inotify_supported(), reason="inotify not available")
+BACKENDS = [pytest.param("auto", marks=needs_inotify), "poll"]
+
+
+class _Client:
+    """只实现 send_json 的 WebSocket 替身，记录收到每批日志的时间"""
+
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+        self.received_at: list[float] = []
+        self.arrived = asyncio.Event()
+
+    async def send_json(self, payload: dict[str, object]) -> None:
+        now = time.perf_counter()
+        for entry in payload["logs"]:
+            self.messages.append(entry["message"])
+            self.received_at.append(now)
+        self.arrived.set()
+
+    async def wait_for(self, count: int, timeout: float = 3.0) -> list[str]:
+        deadline = time.monotonic() + timeout
+        while len(self.messages) < count and time.monotonic() < deadline:
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+        return self.messages
+
+
+def _append(path: Path, *messages: str, newline: bool = True) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        for message in messages:
+            f.write(f"2026-03-01 10:00:00 | INFO | mod:fn:1 | {message}" + ("\n" if newline else ""))
+
+
+@pytest.fixture
+def log_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(logs_module, "get_plugin_log_dir", lambda plugin_id: tmp_path)
+    monkeypatch.setattr(LogFileWatcher, "POLL_RESCAN_INTERVAL", 0.05)
+    return tmp_path
+
+
+async def _start(backend: str) -> tuple[LogFileWatcher, _Client]:
+    watcher = LogFileWatcher("demo", backend=backend, poll_interval=0.02)
+    client = _Client()
+    watcher.add_client(client)  # type: ignore[arg-type]
+    # 等待首次扫描完成
+    for _ in range(100):
+        if watcher.mode is not None and watcher.stats["rescans"]:
+            break
+        await asyncio.sleep(0.01)
+    return watcher, client
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", BACKENDS)
+async def test_pushes_only_new_complete_lines(log_dir: Path, backend: str) -> None:
+    log = log_dir / "demo_20260301.log"
+    _append(log, "old")
+    watcher, client = await _start(backend)
+    assert watcher.mode == ("inotify" if backend == "auto" else "poll")
+
+    _append(log, "one", "two")
+    _append(log, "partial", newline=False)
+    assert await client.wait_for(2) == ["one", "two"]
+    await asyncio.sleep(0.1)
+    assert client.messages == ["one", "two"]  # 未写完的行不推送
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(" done\n")
+    assert (await client.wait_for(3))[-1] == "partial done"
+    watcher.remove_client(client)  # type: ignore[arg-type]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", BACKENDS)
+async def test_follows_rotation_and_truncation(log_dir: Path, backend: str) -> None:
+    log = log_dir / "demo_20260301.log"
+    _append(log, "start")
+    watcher, client = await _start(backend)
+
+    # 改名轮转：旧文件改名后写入的尾部也要推送，然后切换到新文件并从头读取
+    _append(log, "before-rotate")
+    rotated = log_dir / "demo_20260301.1.bak"
+    os.rename(log, rotated)
+    _append(rotated, "tail-of-old")
+    time.sleep(0.01)
+    new_log = log_dir / "demo_20260302.log"
+    _append(new_log, "first-of-new")
+    assert await client.wait_for(3) == ["before-rotate", "tail-of-old", "first-of-new"]
+    assert watcher.current_log_file == new_log
+
+    # 截断：从头重新读取
+    await asyncio.sleep(0.05)
+    with open(new_log, "w", encoding="utf-8"):
+        pass
+    await asyncio.sleep(0.1)
+    _append(new_log, "after-truncate")
+    assert (await client.wait_for(4))[-1] == "after-truncate"
+    watcher.remove_client(client)  # type: ignore[arg-type]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", BACKENDS)
+async def test_rename_of_followed_file_keeps_position(log_dir: Path, backend: str) -> None:
+    log = log_dir / "demo_20260301.log"
+    _append(log, "start")
+    watcher, client = await _start(backend)
+
+    # 改名后仍匹配日志模式且仍是最新文件：继续从原位置读取，不重复推送
+    _append(log, "before-rename")
+    assert await client.wait_for(1) == ["before-rename"]
+    renamed = log_dir / "demo_20260301_0001.log"
+    os.rename(log, renamed)
+    _append(renamed, "after-rename")
+    assert await client.wait_for(2) == ["before-rename", "after-rename"]
+    await asyncio.sleep(0.15)
+    assert client.messages == ["before-rename", "after-rename"]
+    assert watcher.current_log_file == renamed
+
+    time.sleep(0.01)
+    new_log = log_dir / "demo_20260302.log"
+    _append(new_log, "first-of-new")
+    assert await client.wait_for(3) == ["before-rename", "after-rename", "first-of-new"]
+    assert watcher.current_log_file == new_log
+    watcher.remove_client(client)  # type: ignore[arg-type]
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+@needs_inotify
+async def test_inotify_is_idle_without_relevant_writes(log_dir: Path) -> None:
+    log = log_dir / "demo_20260301.log"
+    _append(log, "x")
+    watcher, client = await _start("auto")
+    await asyncio.sleep(0.05)
+    before = dict(watcher.stats)
+
+    (log_dir / "other_plugin.log").write_text("noise\n")
+    await asyncio.sleep(0.2)
+    assert watcher.stats == before  # 无关文件和空闲期间不唤醒、不扫描、不读取
+
+    _append(log, "y")
+    assert await client.wait_for(1) == ["y"]
+    assert watcher.stats["rescans"] == before["rescans"]
+    watcher.remove_client(client)  # type: ignore[arg-type]
+
+
+def _syscr() -> int:
+    with open("/proc/self/io", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("syscr:"):
+                return int(line.split()[1])
+    return 0
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.exists("/proc/self/io"), reason="needs /proc/self/io")
+async def test_benchmark_idle_cost_and_push_latency(
+    log_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """空闲 1 秒的读系统调用数 / 唤醒次数，以及写入一行到推送给客户端的延迟。"""
+    monkeypatch.setattr(LogFileWatcher, "POLL_RESCAN_INTERVAL", 2.0)
+    results = {}
+
+    # 旧实现：每 0.5 秒 glob + 按 mtime 排序 + 从上次位置 readlines
+    legacy_log = log_dir / "demo_legacy.log"
+    _append(legacy_log, "x")
+    position = legacy_log.stat().st_size
+    syscr, cpu = _syscr(), time.process_time()
+    for _ in range(2):
+        latest = sorted(log_dir.glob("demo_*.log"), key=lambda f: f.stat().st_mtime, reverse=True)[0]
+        _, position = logs_module.read_log_file_incremental(latest, position)
+        await asyncio.sleep(0.5)
+    record_property(
+        "perf",
+        f"log watcher legacy poll: idle 2 wakeups/s, {_syscr() - syscr} read syscalls/s, "
+        f"cpu {(time.process_time() - cpu) * 1000:.2f}ms/s; push latency up to 500ms"
+    )
+    legacy_log.unlink()
+
+    backends = (["auto"] if inotify_supported() else []) + ["poll"]
+    for backend in backends:
+        log = log_dir / f"demo_{backend}.log"
+        _append(log, "x")
+        watcher = LogFileWatcher("demo", backend=backend, poll_interval=0.5)
+        client = _Client()
+        watcher.add_client(client)  # type: ignore[arg-type]
+        await asyncio.sleep(0.1)
+
+        wakeups, syscr, cpu = watcher.stats["wakeups"], _syscr(), time.process_time()
+        await asyncio.sleep(1.0)
+        idle_wakeups = watcher.stats["wakeups"] - wakeups
+        idle_syscr = _syscr() - syscr
+        idle_cpu = (time.process_time() - cpu) * 1000
+
+        latencies = []
+        for i in range(20):
+            t0 = time.perf_counter()
+            _append(log, f"m{i}")
+            await client.wait_for(i + 1)
+            latencies.append((client.received_at[i] - t0) * 1000)
+            await asyncio.sleep(0.01)
+        watcher.remove_client(client)  # type: ignore[arg-type]
+        latencies.sort()
+        results[watcher.mode] = latencies[len(latencies) // 2]
+        record_property(
+            "perf",
+            f"log watcher {watcher.mode}: idle {idle_wakeups} wakeups/s, {idle_syscr} read syscalls/s, cpu {idle_cpu:.2f}ms/s; "
+            f"push latency p50={latencies[len(latencies) // 2]:.2f}ms max={latencies[-1]:.2f}ms"
+        )
+        log.unlink()
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true" and "inotify" in results:
+        assert results["inotify"] < results["poll"]
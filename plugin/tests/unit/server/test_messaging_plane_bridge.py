@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pytest
+
+from plugin.server.messaging.plane_bridge import _Bridge
+
+
+@pytest.mark.plugin_unit
+def test_coalesce_merges_queued_deltas_and_keeps_snapshot_order() -> None:
+    bridge = _Bridge()
+    bridge._enabled = True
+    for i in range(3):
+        bridge.enqueue_delta(store="messages", topic="t", payload={"n": i})
+    bridge.enqueue_snapshot(store="messages", topic="t", items=[{"n": 99}])
+    bridge.enqueue_delta(store="messages", topic="t", payload={"n": 3})
+
+    first = bridge._q.get_nowait()
+    batch, snapshot = bridge._coalesce(first)
+    assert batch["kind"] == "delta_batch" and [it["payload"]["n"] for it in batch["items"]] == [0, 1, 2]
+    assert snapshot["kind"] == "snapshot"
+
+    (tail,) = bridge._coalesce(bridge._q.get_nowait())
+    assert [it["payload"]["n"] for it in tail["items"]] == [3]
+    assert bridge._coalesce(snapshot) == [snapshot]
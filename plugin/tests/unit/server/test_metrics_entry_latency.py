@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections.abc import Callable
+
+import pytest
+
+from plugin._types.exceptions import PluginExecutionError
+from plugin.core.communication import PluginCommunicationResourceManager
+from plugin.server.monitoring import metrics as module
+from plugin.server.monitoring.metrics import EntryLatencyRegistry, LatencyHistogram
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> EntryLatencyRegistry:
+    fresh = EntryLatencyRegistry()
+    monkeypatch.setattr(module, "entry_latency", fresh)
+    return fresh
+
+
+@pytest.mark.plugin_unit
+def test_histogram_percentiles_within_bucket_error() -> None:
+    rng = random.Random(7)
+    samples = sorted(rng.lognormvariate(-5, 1.2) for _ in range(20000))
+    hist = LatencyHistogram()
+    for value in samples:
+        hist.record(value)
+
+    for p in (50, 90, 99):
+        exact = samples[int(len(samples) * p / 100) - 1]
+        assert abs(hist.percentile(p) - exact) / exact < 0.07
+    assert hist.count == len(samples)
+    assert hist.percentile(100) == pytest.approx(samples[-1], abs=1e-6)
+    assert LatencyHistogram().percentile(99) == 0.0
+
+    hist.record(10_000.0)  # 超出范围计入最后一个桶，不报错
+    assert hist.summary()["max_ms"] == 10_000_000.0
+
+
+@pytest.mark.plugin_unit
+def test_registry_snapshot_and_plugin_totals(registry: EntryLatencyRegistry) -> None:
+    registry.record("demo", "run", 0.010, queue_wait=0.001)
+    registry.record("demo", "run", 0.030, queue_wait=0.002, error=True)
+    registry.record("demo", "ping", 0.001)
+    registry.record("other", "run", 1.0)
+
+    snapshot = registry.snapshot("demo")
+    assert [(e["entry_id"], e["calls"], e["errors"]) for e in snapshot] == [("ping", 1, 0), ("run", 2, 1)]
+    run = snapshot[1]
+    assert run["latency"]["count"] == 2 and run["latency"]["max_ms"] == 30.0
+    assert run["queue_wait"]["count"] == 2
+    assert snapshot[0]["queue_wait"]["count"] == 0
+
+    calls, errors, avg = registry.plugin_totals("demo")
+    assert (calls, errors) == (3, 1) and avg == pytest.approx(0.041 / 3)
+
+    registry.reset("demo")
+    assert [e["plugin_id"] for e in registry.snapshot()] == ["other"]
+
+
+@pytest.mark.plugin_unit
+def test_prometheus_text_is_cumulative(registry: EntryLatencyRegistry) -> None:
+    for value in (0.0005, 0.003, 0.2, 120.0):
+        registry.record('we"ird', "run", value, queue_wait=value / 10)
+    registry.record('we"ird', "run", 0.004, error=True)
+    text = registry.render_prometheus()
+
+    assert "# TYPE neko_plugin_entry_latency_seconds histogram" in text
+    labels = 'plugin_id="we\\"ird",entry_id="run"'
+    buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith(f"neko_plugin_entry_latency_seconds_bucket{{{labels}")
+    ]
+    assert buckets == sorted(buckets) and buckets[-1] == 5
+    assert f'neko_plugin_entry_latency_seconds_bucket{{{labels},le="0.001"}} 1' in text
+    assert f'neko_plugin_entry_latency_seconds_bucket{{{labels},le="60"}} 4' in text
+    assert f"neko_plugin_entry_queue_wait_seconds_count{{{labels}}} 4" in text
+    assert f"neko_plugin_entry_errors_total{{{labels}}} 1" in text
+
+
+class _FakeTransport:
+    """收到 TRIGGER 后模拟子进程：等待 delay 秒再回报结果（exec_ms 为其中一部分）"""
+
+    def __init__(self, delay: float, exec_ms: float | None, success: bool = True) -> None:
+        self.delay = delay
+        self.exec_ms = exec_ms
+        self.success = success
+        self.manager: PluginCommunicationResourceManager | None = None
+
+    async def send_command(self, msg: dict) -> None:
+        async def _reply() -> None:
+            await asyncio.sleep(self.delay)
+            res = {"req_id": msg["req_id"], "success": self.success, "data": "ok", "error": "boom"}
+            if self.exec_ms is not None:
+                res["exec_ms"] = self.exec_ms
+            self.manager._dispatch_result(res)
+
+        asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(_reply()))
+
+
+def _manager(transport: _FakeTransport) -> PluginCommunicationResourceManager:
+    manager = PluginCommunicationResourceManager(plugin_id="demo", transport=transport)  # type: ignore[arg-type]
+    transport.manager = manager
+    return manager
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_trigger_records_latency_queue_wait_and_errors(registry: EntryLatencyRegistry) -> None:
+    assert await _manager(_FakeTransport(0.05, exec_ms=20.0)).trigger("run", {}, timeout=2) == "ok"
+    with pytest.raises(PluginExecutionError):
+        await _manager(_FakeTransport(0.0, exec_ms=1.0, success=False)).trigger("run", {}, timeout=2)
+    with pytest.raises(TimeoutError):
+        await _manager(_FakeTransport(1.0, exec_ms=None)).trigger("slow", {}, timeout=0.05)
+    await _manager(_FakeTransport(0.0, exec_ms=None)).trigger_custom_event("timer", "tick", {}, timeout=2)
+
+    entries = {e["entry_id"]: e for e in registry.snapshot("demo")}
+    run = entries["run"]
+    assert run["calls"] == 2 and run["errors"] == 1
+    assert run["latency"]["max_ms"] >= 50
+    # 排队等待 = 往返耗时 - 子进程执行耗时
+    assert 25 <= run["queue_wait"]["max_ms"] <= run["latency"]["max_ms"] - 19
+    assert entries["slow"]["errors"] == 1 and entries["slow"]["queue_wait"]["count"] == 0
+    assert entries["timer.tick"]["calls"] == 1
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_record_cost(record_property: Callable[[str, object], None]) -> None:
+    """单次 record 的开销（含锁），以及 1k 入口下 snapshot / Prometheus 渲染耗时。"""
+    registry = EntryLatencyRegistry()
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        registry.record("demo", "run", 0.0001 * (i % 1000), queue_wait=0.00001)
+    per_record_us = (time.perf_counter() - t0) / n * 1e6
+
+    for i in range(1000):
+        registry.record(f"p{i % 20}", f"e{i}", 0.01)
+    t0 = time.perf_counter()
+    registry.snapshot()
+    snapshot_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    text = registry.render_prometheus()
+    render_ms = (time.perf_counter() - t0) * 1000
+    record_property(
+        "perf",
+        f"entry latency record: {per_record_us:.2f}us/op; "
+        f"1k entries snapshot={snapshot_ms:.1f}ms prometheus={render_ms:.1f}ms ({len(text) // 1024}KB)"
+    )
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert per_record_us < 20
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+import pytest
+from starlette.responses import FileResponse
+
+from plugin.runs import manager as run_manager
+from plugin.runs.manager import InMemoryRunStore, RunRecord
+from plugin.runs.storage import BLOB_IO_CHUNK, BlobStore, UploadNotFoundError
+from plugin.server.application.runs import service as service_module
+from plugin.server.application.runs.service import RunService
+
+
+def _upload(store: BlobStore, run_id: str, data: bytes) -> str:
+    sess = store.create_upload(run_id=run_id, filename="a.bin", mime="application/octet-stream", max_bytes=None)
+    with store.open_writer(sess) as writer:
+        writer.write(data)
+    store.finalize_upload(sess.upload_id, sha256=writer.sha256)
+    return sess.blob_id
+
+
+def _objects(root: Path) -> list[Path]:
+    return [p for p in (root / "sha256").rglob("*") if p.is_file()]
+
+
+@pytest.mark.plugin_unit
+def test_identical_content_is_stored_once_and_refcounted(tmp_path: Path) -> None:
+    store = BlobStore(root=tmp_path)
+    a = _upload(store, "run-1", b"same bytes")
+    b = _upload(store, "run-2", b"same bytes")
+    c = _upload(store, "run-2", b"other")
+
+    info_a = store.get_blob(run_id="run-1", blob_id=a)
+    info_b = store.get_blob(run_id="run-2", blob_id=b)
+    assert info_a.path == info_b.path and info_a.sha256 == hashlib.sha256(b"same bytes").hexdigest()
+    assert info_b.path.read_bytes() == b"same bytes"
+    assert store.get_blob(run_id="run-1", blob_id=b) is None  # blob 仍按 run 隔离
+    assert len(_objects(tmp_path)) == 2
+    assert store.usage() == {"blobs": 3, "objects": 2, "logical_bytes": 25, "stored_bytes": 15}
+    assert not list((tmp_path / "tmp").iterdir())
+
+    # 重启后索引仍在
+    reopened = BlobStore(root=tmp_path)
+    assert reopened.get_blob_path(run_id="run-2", blob_id=c).read_bytes() == b"other"
+
+    # 最后一个引用释放时才删除对象文件
+    assert reopened.release_run("run-1") == 1
+    assert info_b.path.exists()
+    assert reopened.release_run("run-2") == 2
+    assert _objects(tmp_path) == []
+    assert reopened.usage()["objects"] == 0
+
+
+@pytest.mark.plugin_unit
+def test_finalize_hashes_when_digest_missing_and_is_idempotent(tmp_path: Path) -> None:
+    store = BlobStore(root=tmp_path)
+    sess = store.create_upload(run_id="r", filename=None, mime=None, max_bytes=None)
+    sess.tmp_path.write_bytes(b"payload")
+    first = store.finalize_upload(sess.upload_id)
+    assert first.sha256 == hashlib.sha256(b"payload").hexdigest() and first.deduplicated is False
+    assert store.finalize_upload(sess.upload_id).sha256 == first.sha256
+    with pytest.raises(UploadNotFoundError):
+        store.finalize_upload("missing")
+
+    again = store.create_upload(run_id="r", filename=None, mime=None, max_bytes=None)
+    again.tmp_path.write_bytes(b"payload")
+    assert store.finalize_upload(again.upload_id).deduplicated is True
+    assert store.release_blob(sess.blob_id) and first.path.exists()
+    assert store.release_blob(again.blob_id) and not first.path.exists()
+
+
+@pytest.mark.plugin_unit
+def test_expired_uploads_are_swept_lazily(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = BlobStore(root=tmp_path)
+    stale = store.create_upload(run_id="r", filename=None, mime=None, max_bytes=None)
+    stale.tmp_path.write_bytes(b"partial")
+    later = time.time() + store._upload_ttl_seconds + 20
+    monkeypatch.setattr(time, "time", lambda: later)
+    store._next_cleanup = 0.0
+
+    store.create_upload(run_id="r", filename=None, mime=None, max_bytes=None)
+    assert store.get_upload(stale.upload_id) is None and not stale.tmp_path.exists()
+
+
+@pytest.mark.plugin_unit
+def test_evicting_a_run_releases_its_blobs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = BlobStore(root=tmp_path)
+    monkeypatch.setattr(run_manager, "blob_store", store)
+    run_store = InMemoryRunStore(max_completed=1)
+    monkeypatch.setattr(run_manager, "_run_store", run_store)
+    for rid in ("r1", "r2"):
+        now = time.time()
+        run_store.create(RunRecord(run_id=rid, plugin_id="p", entry_id="e", status="running", created_at=now, updated_at=now))
+        _upload(store, rid, rid.encode() * 10)
+        run_store.commit_terminal(rid, status="succeeded", error=None, result_refs=[])
+    assert store.usage()["blobs"] == 1 and len(_objects(tmp_path)) == 1
+
+
+async def _chunks(data: bytes, size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    view = memoryview(data)
+    for i in range(0, len(data), size):
+        yield bytes(view[i : i + size])
+
+
+async def _legacy_upload(root: Path, data: bytes, i: int) -> None:
+    # 旧实现：每个请求块都做一次线程切换写入，文件按 blob_id 各存一份，不做哈希
+    with open(root / f"{i}.blob", "wb") as f:
+        async for chunk in _chunks(data):
+            await asyncio.to_thread(f.write, chunk)
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+async def test_benchmark_repeated_large_artifacts(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """重复上传同一大文件：磁盘占用与上传 / 下载吞吐（对比旧的按上传各存一份）。"""
+    size_mb, repeats = 32, 8
+    data = os.urandom(size_mb << 20)
+    store = BlobStore(root=tmp_path / "cas")
+    monkeypatch.setattr(service_module, "blob_store", store)
+    run_store = InMemoryRunStore()
+    monkeypatch.setattr(run_manager, "_run_store", run_store)
+    now = time.time()
+    run_store.create(RunRecord(run_id="run", plugin_id="p", entry_id="e", status="running", created_at=now, updated_at=now))
+    service = RunService()
+
+    legacy_root = tmp_path / "legacy"
+    legacy_root.mkdir()
+    t0 = time.perf_counter()
+    for i in range(repeats):
+        await _legacy_upload(legacy_root, data, i)
+    legacy_s = time.perf_counter() - t0
+    legacy_bytes = sum(p.stat().st_size for p in legacy_root.iterdir())
+    shutil.rmtree(legacy_root)
+
+    blob_ids = []
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        sess = store.create_upload(run_id="run", filename="model.bin", mime=None, max_bytes=None)
+        result = await service.upload_blob(upload_id=sess.upload_id, chunks=_chunks(data))
+        blob_ids.append(result["blob_id"])
+    upload_s = time.perf_counter() - t0
+    stored_bytes = sum(p.stat().st_size for p in _objects(tmp_path / "cas"))
+
+    received = 0
+
+    async def _send(message: dict) -> None:
+        nonlocal received
+        received += len(message.get("body", b""))
+
+    scope = {"type": "http", "method": "GET", "headers": [], "asgi": {"spec_version": "2.4"}}
+    t0 = time.perf_counter()
+    for blob_id in blob_ids:
+        response = FileResponse(str(store.get_blob_path(run_id="run", blob_id=blob_id)))
+        response.chunk_size = BLOB_IO_CHUNK
+        await response(scope, None, _send)  # type: ignore[arg-type]
+    download_s = time.perf_counter() - t0
+    assert received == repeats * len(data)
+
+    total_mb = size_mb * repeats
+    record_property(
+        "perf",
+        f"blob store {repeats}x{size_mb}MB identical artifacts: "
+        f"disk legacy={legacy_bytes >> 20}MB cas={stored_bytes >> 20}MB; "
+        f"upload legacy(no hash)={total_mb / legacy_s:.0f}MB/s cas(sha256+dedup)={total_mb / upload_s:.0f}MB/s; "
+        f"download={total_mb / download_s:.0f}MB/s"
+    )
+    assert stored_bytes == len(data)
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert stored_bytes * repeats == legacy_bytes
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from plugin.runs import manager as run_manager
+from plugin.runs.manager import (
+    ExportItem,
+    InMemoryRunStore,
+    RunError,
+    RunRecord,
+    RunsDatabase,
+    SqliteExportStore,
+    SqliteRunStore,
+)
+
+
+def _run(run_id: str, *, plugin_id: str = "demo", status: str = "running", created_at: float | None = None) -> RunRecord:
+    ts = time.time() if created_at is None else created_at
+    return RunRecord(
+        run_id=run_id, plugin_id=plugin_id, entry_id="run", status=status,
+        created_at=ts, updated_at=ts, started_at=ts,
+    )
+
+
+def _export(run_id: str, export_id: str, *, category: str = "user", size: int = 10) -> ExportItem:
+    return ExportItem.model_validate({
+        "export_item_id": export_id, "run_id": run_id, "type": "json", "category": category,
+        "created_at": time.time(), "json": {"blob": "x" * size},
+    })
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> RunsDatabase:
+    return RunsDatabase(tmp_path / "runs.db")
+
+
+@pytest.fixture
+def exports(db: RunsDatabase, monkeypatch: pytest.MonkeyPatch) -> SqliteExportStore:
+    store = SqliteExportStore(db, inline_max_bytes=1024)
+    monkeypatch.setattr(run_manager, "_export_store", store)
+    return store
+
+
+@pytest.mark.plugin_unit
+def test_run_lifecycle_persists_and_interrupted_runs_are_closed_on_reopen(tmp_path: Path) -> None:
+    store = SqliteRunStore(RunsDatabase(tmp_path / "runs.db"))
+    store.create(_run("a"))
+    store.create(_run("b", status="queued"))
+    store.create(_run("c"))
+
+    assert store.update("a", progress=0.5, stage="half").progress == 0.5
+    assert store.update("b", status="succeeded").status == "queued"  # 非法状态迁移被拦截
+    done = store.commit_terminal("c", status="succeeded", error=None, result_refs=["e1"])
+    assert done.status == "succeeded" and done.progress == 1.0 and done.result_refs == ["e1"]
+    assert store.update("c", progress=0.1).progress == 1.0  # 终态之后不再修改
+    assert store.get("missing") is None
+
+    # 重启：上个进程遗留的未完成 Run 被关闭，已完成的原样保留
+    reopened = SqliteRunStore(RunsDatabase(tmp_path / "runs.db"))
+    a, b, c = (reopened.get(rid) for rid in ("a", "b", "c"))
+    assert (a.status, a.error.code, a.stage) == ("failed", "INTERRUPTED", "half")
+    assert b.status == "canceled" and b.finished_at is not None
+    assert c == done
+    assert [r.run_id for r in reopened.list_runs(plugin_id="demo")] == ["a", "b", "c"]
+
+
+@pytest.mark.plugin_unit
+def test_list_page_matches_in_memory_store(db: RunsDatabase) -> None:
+    sqlite_store, memory_store = SqliteRunStore(db), InMemoryRunStore()
+    for i in range(57):
+        # created_at 有重复，验证 (created_at, run_id) 游标不丢不重
+        rec = _run(f"r{i:03d}", plugin_id=f"p{i % 3}", status="running" if i % 4 else "queued", created_at=1000.0 + i // 2)
+        sqlite_store.create(rec)
+        memory_store.create(rec)
+
+    for filters in ({}, {"plugin_id": "p1"}, {"status": "queued"}, {"plugin_id": "p2", "status": "running"}):
+        pages = {}
+        for name, store in (("sqlite", sqlite_store), ("memory", memory_store)):
+            ids, cursor = [], None
+            while True:
+                items, cursor = store.list_page(limit=7, cursor=cursor, **filters)
+                ids.extend(r.run_id for r in items)
+                if cursor is None:
+                    break
+            pages[name] = ids
+        assert pages["sqlite"] == pages["memory"]
+        assert len(set(pages["sqlite"])) == len(pages["sqlite"]) > 0
+
+    newest, _ = sqlite_store.list_page(limit=2)
+    assert [r.run_id for r in newest] == ["r056", "r055"]
+    with pytest.raises(ValueError):
+        sqlite_store.list_page(cursor="not-a-cursor")
+
+
+@pytest.mark.plugin_unit
+def test_eviction_by_count_and_retention_removes_exports(db: RunsDatabase, exports: SqliteExportStore) -> None:
+    store = SqliteRunStore(db, max_completed=3, retention_seconds=0)
+    for i in range(5):
+        store.create(_run(f"r{i}"))
+        exports.append(_export(f"r{i}", f"e{i}", size=4096))
+        store.commit_terminal(f"r{i}", status="succeeded", error=None, result_refs=[])
+    assert [r.run_id for r in store.list_runs()] == ["r2", "r3", "r4"]
+    assert exports.list_for_run(run_id="r0", after=None, limit=10) == ([], None)
+    assert db.conn().execute("SELECT COUNT(*) FROM run_export_payloads").fetchone()[0] == 3
+
+    aged = SqliteRunStore(db, max_completed=100, retention_seconds=0.05)
+    store.create(_run("live"))
+    time.sleep(0.1)
+    aged.create(_run("new"))
+    aged.commit_terminal("new", status="failed", error=RunError(code="E", message="boom"), result_refs=[])
+    assert sorted(r.run_id for r in aged.list_runs()) == ["live", "new"]
+
+
+@pytest.mark.plugin_unit
+def test_export_store_pagination_and_out_of_line_payloads(db: RunsDatabase, exports: SqliteExportStore) -> None:
+    for i in range(6):
+        exports.append(_export("r1", f"e{i}", category="system" if i % 2 else "user", size=5000 if i == 3 else 10))
+    exports.append(_export("r2", "other"))
+
+    rows = dict(db.conn().execute("SELECT export_item_id, item IS NULL FROM run_exports"))
+    assert rows["e3"] == 1 and rows["e2"] == 0  # 超过阈值的内容不在列表行里
+
+    items, after = exports.list_for_run(run_id="r1", after=None, limit=4)
+    assert [i.export_item_id for i in items] == ["e0", "e1", "e2", "e3"] and after == "e3"
+    assert items[3].json_data == {"blob": "x" * 5000}
+    items, after = exports.list_for_run(run_id="r1", after=after, limit=4)
+    assert [i.export_item_id for i in items] == ["e4", "e5"] and after is None
+    system, _ = exports.list_for_run(run_id="r1", after=None, limit=10, category="system")
+    assert [i.export_item_id for i in system] == ["e1", "e3", "e5"]
+
+    exports.append(_export("r1", "e0", size=20))  # 相同 ID 重新写入：替换
+    items, _ = exports.list_for_run(run_id="r1", after=None, limit=10)
+    assert [i.export_item_id for i in items] == ["e1", "e2", "e3", "e4", "e5", "e0"]
+
+    exports.remove_for_run("r1")
+    assert exports.list_for_run(run_id="r1", after=None, limit=10) == ([], None)
+    assert db.conn().execute("SELECT COUNT(*) FROM run_export_payloads").fetchone()[0] == 0
+    assert len(exports.list_for_run(run_id="r2", after=None, limit=10)[0]) == 1
+
+
+@pytest.mark.plugin_perf
+def test_benchmark_list_and_filter_at_100k_runs(
+    db: RunsDatabase,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """10 万条 Run 下的列表 / 过滤延迟：旧路径（全量复制后过滤）vs 分页接口（内存 / SQLite）。"""
+    n = 100_000
+    memory_store, sqlite_store = InMemoryRunStore(max_completed=n), SqliteRunStore(db, max_completed=n)
+    statuses = ("succeeded", "failed", "running", "succeeded", "timeout")
+    records = [
+        _run(f"run-{i:06d}", plugin_id=f"plugin_{i % 50}", status=statuses[i % 5], created_at=1_700_000_000.0 + i)
+        for i in range(n)
+    ]
+    for rec in records:
+        memory_store._runs[rec.run_id] = rec
+    t0 = time.perf_counter()
+    conn = db.conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO runs (run_id, plugin_id, status, created_at, finished_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (SqliteRunStore._row(rec) for rec in records),
+        )
+    insert_s = time.perf_counter() - t0
+
+    def _ms(fn, repeat: int = 5) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t)
+        return best * 1000
+
+    def _legacy_plugin_page() -> list[RunRecord]:
+        # 旧的 list_runs(plugin_id=...)：全量深拷贝后在 Python 里过滤
+        items = [r.model_copy(deep=True) for r in memory_store._runs.values()]
+        return sorted((r for r in items if r.plugin_id == "plugin_7"), key=lambda r: r.created_at, reverse=True)[:50]
+
+    _, deep_cursor = sqlite_store.list_page(limit=500, plugin_id="plugin_7")
+    cases = {
+        "legacy list_runs(plugin)": _ms(_legacy_plugin_page, repeat=1),
+        "memory page(plugin)": _ms(lambda: memory_store.list_page(plugin_id="plugin_7")),
+        "sqlite page(all)": _ms(lambda: sqlite_store.list_page()),
+        "sqlite page(plugin)": _ms(lambda: sqlite_store.list_page(plugin_id="plugin_7")),
+        "sqlite page(status)": _ms(lambda: sqlite_store.list_page(status="failed")),
+        "sqlite page(plugin+status)": _ms(lambda: sqlite_store.list_page(plugin_id="plugin_7", status="running")),
+        "sqlite page(plugin, cursor)": _ms(lambda: sqlite_store.list_page(plugin_id="plugin_7", cursor=deep_cursor)),
+        "sqlite get": _ms(lambda: sqlite_store.get("run-050000")),
+    }
+    record_property("perf", f"run store {n} runs: sqlite bulk insert {insert_s:.2f}s, db {os.path.getsize(db.path) // (1 << 20)}MB")
+    for name, ms in cases.items():
+        record_property("perf", f"{name}: {ms:.2f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert cases["sqlite page(plugin)"] * 20 < cases["legacy list_runs(plugin)"]
+        assert cases["sqlite page(plugin+status)"] < 20
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+import pytest
+
+from plugin.runs import manager as run_manager
+from plugin.runs.manager import ExportItem, InMemoryExportStore, InMemoryRunStore, RunRecord
+from plugin.server.application.runs.service import RunService
+from plugin.server.domain.errors import ServerDomainError
+
+
+@pytest.fixture
+def stores(monkeypatch: pytest.MonkeyPatch) -> tuple[InMemoryRunStore, InMemoryExportStore]:
+    run_store, export_store = InMemoryRunStore(), InMemoryExportStore()
+    monkeypatch.setattr(run_manager, "_run_store", run_store)
+    monkeypatch.setattr(run_manager, "_export_store", export_store)
+    return run_store, export_store
+
+
+def _running(store: InMemoryRunStore) -> str:
+    run_id = str(uuid.uuid4())
+    now = time.time()
+    store.create(RunRecord(
+        run_id=run_id, plugin_id="demo", entry_id="run", status="running",
+        created_at=now, updated_at=now, started_at=now,
+    ))
+    return run_id
+
+
+def _finish(store: InMemoryRunStore, exports: InMemoryExportStore, run_id: str) -> None:
+    exports.append(ExportItem.model_validate({
+        "export_item_id": f"{run_id}-resp", "run_id": run_id, "type": "json", "category": "system",
+        "created_at": time.time(), "json": {"success": True, "data": {"answer": 42}},
+    }))
+    rec = store.commit_terminal(run_id, status="succeeded", error=None, result_refs=[f"{run_id}-resp"])
+    run_manager._emit_runs("change", rec)
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_wait_returns_on_terminal_commit_from_other_thread(stores) -> None:
+    run_store, export_store = stores
+    run_id = _running(run_store)
+    waiter = asyncio.create_task(run_manager.wait_for_run(run_id, timeout=5.0))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    # 终态提交可能发生在 IPC 处理线程上
+    t0 = time.perf_counter()
+    threading.Thread(target=_finish, args=(run_store, export_store, run_id)).start()
+    rec = await asyncio.wait_for(waiter, timeout=2.0)
+    assert rec is not None and rec.status == "succeeded"
+    assert time.perf_counter() - t0 < 0.5
+    assert run_manager._run_waiters == {}
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_wait_since_returns_on_update_and_times_out_with_current_state(stores) -> None:
+    run_store, _ = stores
+    run_id = _running(run_store)
+    first = await run_manager.wait_for_run(run_id, timeout=1.0, since=0.0)
+    assert first is not None and first.status == "running"
+
+    waiter = asyncio.create_task(run_manager.wait_for_run(run_id, timeout=5.0, since=first.updated_at))
+    await asyncio.sleep(0.02)
+    updated, emitted = run_manager.update_run_from_plugin(from_plugin="demo", run_id=run_id, patch={"progress": 0.5})
+    assert emitted
+    rec = await asyncio.wait_for(waiter, timeout=2.0)
+    assert rec.progress == 0.5
+
+    t0 = time.monotonic()
+    rec = await run_manager.wait_for_run(run_id, timeout=0.1, since=rec.updated_at)
+    assert rec.status == "running" and time.monotonic() - t0 >= 0.09
+    assert await run_manager.wait_for_run("missing", timeout=0.1) is None
+    assert run_manager._run_waiters == {}
+
+
+@pytest.mark.plugin_unit
+@pytest.mark.asyncio
+async def test_service_wait_includes_system_exports_when_terminal(stores) -> None:
+    run_store, export_store = stores
+    service = RunService()
+    run_id = _running(run_store)
+
+    pending = await service.wait_run(run_id, timeout=0.0, since=None)
+    assert pending.terminal is False and pending.exports == []
+
+    _finish(run_store, export_store, run_id)
+    done = (await service.wait_run(run_id, timeout=1.0, since=None)).model_dump(by_alias=True)
+    assert done["terminal"] is True and done["run"]["status"] == "succeeded"
+    assert done["exports"][0]["json"] == {"success": True, "data": {"answer": 42}}
+
+    with pytest.raises(ServerDomainError) as exc_info:
+        await service.wait_run("missing", timeout=0.0, since=None)
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.plugin_perf
+@pytest.mark.asyncio
+async def test_benchmark_completion_detection_push_vs_poll(
+    stores,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """Run 完成到调用方感知的延迟：长轮询唤醒 vs 0.5s 轮询 get_run。"""
+    run_store, export_store = stores
+
+    async def _poll(run_id: str) -> None:
+        while run_manager.get_run(run_id).status == "running":
+            await asyncio.sleep(0.5)
+
+    results = {}
+    for mode in ("push", "poll"):
+        samples = []
+        for i in range(4):
+            run_id = _running(run_store)
+            if mode == "push":
+                waiter = asyncio.create_task(run_manager.wait_for_run(run_id, timeout=5.0))
+            else:
+                waiter = asyncio.create_task(_poll(run_id))
+            await asyncio.sleep(0.05 + 0.11 * i)  # 完成时刻落在轮询周期的不同位置
+            t0 = time.perf_counter()
+            _finish(run_store, export_store, run_id)
+            await waiter
+            samples.append((time.perf_counter() - t0) * 1000)
+        results[mode] = sum(samples) / len(samples)
+        record_property("perf", f"run completion detection {mode}: mean={results[mode]:.2f}ms max={max(samples):.2f}ms")
+
+    if os.environ.get("RUN_PERF_TESTS", "").lower() == "true":
+        assert results["push"] * 10 < results["poll"]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+字幕批量翻译器 — 单元测试
+
+使用本地桩翻译函数（带固定延迟）统计 provider 请求数与片段延迟，
+覆盖合并发送、编号拆分、拆分失败逐条回退、大小上限立即发送。
+"""
+
+import asyncio
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from utils.language_utils import BatchTranslator, _split_numbered_segments
+
+
+class StubProvider:
+    """本地桩：把每行文本加上 `ZH:` 前缀，可选择丢弃编号模拟模型输出错位"""
+
+    def __init__(self, latency: float = 0.02, drop_numbers: bool = False):
+        self.latency = latency
+        self.drop_numbers = drop_numbers
+        self.calls = []
+
+    async def __call__(self, text, target_lang, source_lang=None, skip_google=False):
+        self.calls.append(text)
+        await asyncio.sleep(self.latency)
+        if self.drop_numbers and '\n' in text:
+            return re.sub(r'^\[\d+\]\s*', '', text, flags=re.MULTILINE), False
+        return re.sub(r'^(\[\d+\]\s*)?', lambda m: (m.group(0) or '') + 'ZH:', text, flags=re.MULTILINE), False
+
+
+@pytest.mark.unit
+def test_split_numbered_segments_requires_exact_sequence():
+    assert _split_numbered_segments("[1] a\n[2] b", 2) == ["a", "b"]
+    assert _split_numbered_segments("【1】a\n【2】b\nmore", 2) == ["a", "b\nmore"]
+    assert _split_numbered_segments("[1] a\n[3] b", 2) is None
+    assert _split_numbered_segments("[1] a", 2) is None
+    assert _split_numbered_segments("[1] a\n[2] ", 2) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_translator_merges_segments_into_one_request():
+    stub = StubProvider(latency=0.02)
+    translator = BatchTranslator(translate_fn=stub, window_seconds=0.01, max_items=32)
+    segments = [f"こんにちは{i}" for i in range(10)]
+
+    results = await asyncio.gather(*[translator.translate(s, 'zh', 'ja') for s in segments])
+
+    assert [text for text, _ in results] == [f"ZH:{s}" for s in segments]
+    stats = translator.get_stats()
+    assert stats['segments'] == 10
+    assert stats['provider_requests'] == 1
+    assert stats['batches'] == 1
+    assert stats['fallbacks'] == 0
+    # 每个片段的延迟 ≈ 窗口 + 一次 provider 往返，而不是 10 次往返
+    assert stats['latency_ms_max'] < 10 * stub.latency * 1000
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_translator_falls_back_per_item_when_split_mismatches():
+    stub = StubProvider(latency=0.0, drop_numbers=True)
+    translator = BatchTranslator(translate_fn=stub, window_seconds=0.01)
+    segments = ["おはよう", "こんばんは", "さようなら"]
+
+    results = await asyncio.gather(*[translator.translate(s, 'zh', 'ja') for s in segments])
+
+    assert [text for text, _ in results] == [f"ZH:{s}" for s in segments]
+    stats = translator.get_stats()
+    assert stats['fallbacks'] == 1
+    assert stats['provider_requests'] == 1 + len(segments)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_translator_flushes_on_size_limit_and_skips_same_language():
+    stub = StubProvider(latency=0.0)
+    translator = BatchTranslator(translate_fn=stub, window_seconds=10.0, max_items=4)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*[translator.translate(f"テスト{i}", 'zh', 'ja') for i in range(8)]),
+        timeout=1.0,
+    )
+    assert len(results) == 8
+    assert translator.get_stats()['provider_requests'] == 2
+
+    same, _ = await translator.translate("你好", 'zh', 'zh')
+    assert same == "你好"
+    assert translator.get_stats()['provider_requests'] == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_translator_close_flushes_and_tracks_tasks():
+    stub = StubProvider(latency=0.01)
+    translator = BatchTranslator(translate_fn=stub, window_seconds=10.0)
+    pending = asyncio.ensure_future(translator.translate("さようなら", 'zh', 'ja'))
+    await asyncio.sleep(0)
+
+    # 窗口未到也会立即发送，并等待批次完成
+    await asyncio.wait_for(translator.close(), timeout=1.0)
+    assert pending.done() and pending.result()[0] == "ZH:さようなら"
+    assert not translator._pending_tasks
+
+    # 超时取消的批次返回原文，调用方不会挂起
+    slow = BatchTranslator(translate_fn=StubProvider(latency=5.0), window_seconds=10.0)
+    pending = asyncio.ensure_future(slow.translate("おはよう", 'zh', 'ja'))
+    await asyncio.sleep(0)
+    await slow.close(timeout=0.05)
+    assert await asyncio.wait_for(pending, timeout=1.0) == ("おはよう", False)
+    assert not slow._pending_tasks
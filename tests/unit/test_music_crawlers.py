@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+音乐搜索缓存与竞速调度 — 单元测试 / 性能基准
+
+使用本地 HTTP 桩服务（asyncio.start_server）模拟各音源，并按音源注入不同延迟，
+对比「等待所有音源」与「竞速返回」的耗时，以及缓存命中后的耗时。
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import utils.music_crawlers as music_crawlers
+from utils.music_crawlers import BaseMusicCrawler, MusicSearchCache, MusicSearchError
+
+
+class LatencyStubServer:
+    """本地 HTTP 桩：GET /<source>?delay=<秒>&count=<n> 延迟后返回 n 首歌曲的 JSON"""
+
+    def __init__(self):
+        self.server = None
+        self.port = None
+        self.hits = {}
+
+    async def _handle(self, reader, writer):
+        request_line = (await reader.readline()).decode()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        path = request_line.split(' ')[1]
+        source, _, query = path.lstrip('/').partition('?')
+        params = dict(p.split('=') for p in query.split('&') if p)
+        self.hits[source] = self.hits.get(source, 0) + 1
+        await asyncio.sleep(float(params.get('delay', 0)))
+        body = json.dumps([
+            {'name': f'{source}-{i}', 'url': f'http://stub/{source}/{i}.mp3', 'artist': source}
+            for i in range(int(params.get('count', 1)))
+        ]).encode()
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                     + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+        await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class StubCrawler(BaseMusicCrawler):
+    def __init__(self, source, port, delay, count=1, fail=False):
+        super().__init__(source)
+        self.source, self.port, self.delay, self.count, self.fail = source, port, delay, count, fail
+
+    async def search(self, keyword: str = "", limit: int = 1):
+        resp = await self.client.get(
+            f'http://127.0.0.1:{self.port}/{self.source}?delay={self.delay}&count={self.count}'
+        )
+        if self.fail:
+            raise MusicSearchError(f"{self.source} 模拟请求失败")
+        return [self._format_item(t['name'], t['url'], t['artist']) for t in resp.json()][:limit]
+
+
+@pytest.fixture
+async def stub_env(monkeypatch):
+    server = LatencyStubServer()
+    await server.start()
+    crawlers = {}
+
+    def install(delays, counts=None, failing=()):
+        counts = counts or {}
+        crawlers.clear()
+        crawlers.update({
+            name: StubCrawler(name, server.port, delay, counts.get(name, 1), fail=name in failing)
+            for name, delay in delays.items()
+        })
+
+    monkeypatch.setattr(music_crawlers, 'get_music_crawlers', lambda: crawlers)
+    monkeypatch.setattr(music_crawlers, '_music_search_cache', MusicSearchCache(None))
+    monkeypatch.setattr(music_crawlers, 'music_cache', music_crawlers.MusicCache(expire_seconds=300))
+    monkeypatch.setattr(music_crawlers, 'is_china_region', lambda: False)
+    yield server, install
+    for crawler in crawlers.values():
+        await crawler.close()
+    await server.stop()
+
+
+@pytest.mark.unit
+def test_search_cache_per_source_ttl_and_negative_entries(tmp_path):
+    db = str(tmp_path / "cache" / "music.sqlite3")
+    cache = MusicSearchCache(db, source_ttls={'soundcloud': 0.0, 'itunes': 60.0}, negative_ttl=60.0)
+    track = {'name': 'a', 'url': 'u', 'artist': 'x'}
+    cache.set('itunes', 'LoFi', 1, [track])
+    cache.set('soundcloud', 'lofi', 1, [track])
+    cache.set('fma', 'nothing', 1, [])
+    cache.close()
+
+    reopened = MusicSearchCache(db, source_ttls={'soundcloud': 0.0, 'itunes': 60.0}, negative_ttl=60.0)
+    assert reopened.get('itunes', 'lofi', 1) == [track]      # 持久化 + 关键词大小写无关
+    assert reopened.get('soundcloud', 'lofi', 1) is None     # TTL=0 立即过期
+    assert reopened.get('fma', 'nothing', 1) == []           # 负缓存
+    assert reopened.get('fma', 'other', 1) is None
+    assert reopened.stats == {'hits': 1, 'negative_hits': 1, 'misses': 2}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_search_cache_opens_off_event_loop(monkeypatch):
+    opened_in = []
+
+    def _open(db_path):
+        opened_in.append(threading.get_ident())
+        return MusicSearchCache(None)
+
+    monkeypatch.setattr(music_crawlers, '_music_search_cache', None)
+    monkeypatch.setattr(music_crawlers, 'MusicSearchCache', _open)
+    first = await music_crawlers.get_music_search_cache_async()
+    assert await music_crawlers.get_music_search_cache_async() is first
+    # 打开数据库与清理过期条目只发生一次，且不在事件循环线程上
+    assert len(opened_in) == 1 and opened_in[0] != threading.get_ident()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_race_returns_fast_source_and_backfills_cache(stub_env):
+    server, install = stub_env
+    install({'soundcloud': 0.02, 'itunes': 0.5})
+
+    start = time.perf_counter()
+    results = await music_crawlers.race_search([('soundcloud', 'lofi'), ('itunes', 'lofi')], limit=1)
+    elapsed = time.perf_counter() - start
+
+    assert [r['name'] for r in results] == ['soundcloud-0']
+    assert elapsed < 0.4
+    # 慢音源在后台完成并回填缓存
+    await asyncio.sleep(0.6)
+    assert music_crawlers.get_music_search_cache().get('itunes', 'lofi', 1)[0]['name'] == 'itunes-0'
+
+    again = await music_crawlers.race_search([('itunes', 'lofi')], limit=1)
+    assert again[0]['name'] == 'itunes-0'
+    assert server.hits['itunes'] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_race_respects_per_crawler_deadline_and_negative_cache(stub_env):
+    server, install = stub_env
+    install({'fma': 0.01, 'netease': 1.0}, counts={'fma': 0})
+
+    start = time.perf_counter()
+    results = await music_crawlers.race_search([('fma', 'x'), ('netease', 'x')], limit=1, deadline=0.1)
+    assert results == []
+    assert time.perf_counter() - start < 0.5
+
+    await music_crawlers.race_search([('fma', 'x')], limit=1)
+    assert server.hits['fma'] == 1   # 空结果被负缓存
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_crawler_is_not_negative_cached(stub_env):
+    server, install = stub_env
+    install({'netease': 0.0}, failing={'netease'})
+
+    assert await music_crawlers.race_search([('netease', 'x')], limit=1) == []
+    assert music_crawlers.get_music_search_cache().get('netease', 'x', 1) is None
+    await music_crawlers.race_search([('netease', 'x')], limit=1)
+    assert server.hits['netease'] == 2   # 请求失败不写负缓存，下次仍会重试
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_random_recommendation_waits_for_all_selected_styles(stub_env, monkeypatch):
+    _, install = stub_env
+    install({'bandcamp': 0.3, 'fma': 0.0, 'itunes': 0.0})
+    monkeypatch.setattr(music_crawlers.random, 'sample', lambda pool, k: [('bandcamp', 'indie'), ('fma', 'ambient'), ('itunes', 'lofi')])
+
+    result = await music_crawlers.fetch_music_content('', limit=1)
+
+    # 不竞速：按抽中的顺序取结果，不会总是偏向最快的音源
+    assert result['success'] and [t['name'] for t in result['data']] == ['bandcamp-0']
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_benchmark_race_vs_wait_all(stub_env):
+    """
+    性能基准：一快（50ms）两慢（800ms）的音源组合下，
+    比较 gather 等待全部、竞速返回、缓存命中三种方式的耗时。
+    """
+    _, install = stub_env
+    delays = {'itunes': 0.05, 'fma': 0.8, 'bandcamp': 0.8}
+    install(delays)
+    jobs = [(name, 'lofi') for name in delays]
+    crawlers = music_crawlers.get_music_crawlers()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[crawlers[name].search(kw, 1) for name, kw in jobs])
+    wait_all = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await music_crawlers.race_search(jobs, limit=1)
+    race = time.perf_counter() - start
+
+    await asyncio.sleep(0.9)  # 等慢音源回填缓存
+    start = time.perf_counter()
+    await music_crawlers.race_search(jobs, limit=1)
+    cached = time.perf_counter() - start
+
+    print(f"\n[性能] 等待全部={wait_all * 1000:.0f}ms, 竞速={race * 1000:.0f}ms, 缓存命中={cached * 1000:.1f}ms")
+
+    if os.environ.get('RUN_PERF_TESTS', '').lower() == 'true':
+        assert race < wait_all / 4
+        assert cached < 0.05
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+monitor 迟到观众回放缓冲 — 单元测试
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from utils.replay_buffer import ReplayBuffer, ReplayRegistry
+
+
+@pytest.mark.unit
+def test_replay_buffer_evicts_by_time_window():
+    buf = ReplayBuffer(max_age_seconds=5.0, max_bytes=0)
+    buf.append_json({"type": "gemini_response", "text": "a"}, now=0.0)
+    buf.append_binary(b"\x00" * 16, now=3.0)
+    buf.append_json({"type": "gemini_response", "text": "b"}, now=7.0)
+
+    frames = buf.snapshot(now=7.0)
+
+    assert [f.kind for f in frames] == ["binary", "json"]
+    assert frames[-1].payload["text"] == "b"
+
+
+@pytest.mark.unit
+def test_replay_buffer_evicts_by_byte_window_but_keeps_latest_frame():
+    buf = ReplayBuffer(max_age_seconds=0, max_bytes=100)
+    for i in range(5):
+        buf.append_binary(bytes([i]) * 40, now=float(i))
+
+    assert buf.total_bytes <= 100
+    assert [f.payload[0] for f in buf.snapshot(now=5.0)] == [3, 4]
+
+    buf.append_binary(b"x" * 500, now=6.0)
+    assert len(buf) == 1
+    assert buf.total_bytes == 500
+
+
+@pytest.mark.unit
+def test_replay_registry_is_per_room_and_resets_after_turn_end():
+    registry = ReplayRegistry(max_age_seconds=60.0, max_bytes=1 << 20)
+    registry.record_json("neko", {"type": "gemini_response", "text": "hi"})
+    registry.record_binary("neko", b"\x01" * 8)
+    registry.record_json("other", {"type": "gemini_response", "text": "yo"})
+
+    assert len(registry.snapshot("neko")) == 2
+    assert len(registry.snapshot("other")) == 1
+    assert registry.snapshot("missing") == []
+
+    registry.record_json("neko", {"type": "turn end"})
+    registry.mark_turn_end("neko")
+    # 回合结束帧本身仍可回放，直到下一回合的首帧到来
+    assert len(registry.snapshot("neko")) == 3
+
+    registry.record_json("neko", {"type": "gemini_response", "text": "next"})
+    frames = registry.snapshot("neko")
+    assert [f.payload["text"] for f in frames] == ["next"]
+
+
+@pytest.mark.unit
+def test_replay_registry_reports_time_to_first_frame():
+    registry = ReplayRegistry()
+    assert registry.stats()["time_to_first_frame_ms"]["p50"] is None
+
+    for ms in (1.0, 2.0, 3.0, 4.0, 50.0):
+        registry.record_time_to_first_frame(ms)
+
+    ttff = registry.stats()["time_to_first_frame_ms"]
+    assert ttff["count"] == 5
+    assert ttff["p50"] == 3.0
+    assert ttff["max"] == 50.0
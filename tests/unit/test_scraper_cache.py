@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫连接池 / TTL 缓存 — 单元测试
+
+通过 FixtureTransport 回放 tests/unit/fixtures/web_scraper 下录制的响应，不访问真实网络。
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import utils.web_scraper as web_scraper
+from utils.scraper_cache import FixtureTransport, TTLCache, cached_fetch, http_pool, scraper_cache
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "web_scraper"
+
+
+@pytest.fixture
+def offline_scraper(monkeypatch):
+    transport = FixtureTransport.from_path(FIXTURES_DIR)
+    http_pool.set_transport(transport)
+    scraper_cache.invalidate()
+
+    async def _no_delay(_low, _high):
+        return None
+
+    monkeypatch.setattr(web_scraper, "_random_delay", _no_delay)
+    yield transport
+    http_pool.set_transport(None)
+    scraper_cache.invalidate()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reddit_popular_replays_fixture_and_coalesces(offline_scraper):
+    results = await asyncio.gather(*[web_scraper.fetch_reddit_popular(3) for _ in range(5)])
+
+    assert all(r['success'] for r in results)
+    assert [p['title'] for p in results[0]['posts']] == ["Cat learns to open doors", "New telescope images"]
+    assert results[0]['posts'][1]['score'] == "2.0M"
+    # 5 个并发调用只产生 1 次真实请求
+    assert len(offline_scraper.requests) == 1
+    assert offline_scraper.unmatched == []
+
+    # 新鲜期内再次调用直接命中缓存；调用方修改结果不影响缓存
+    results[0]['posts'].clear()
+    again = await web_scraper.fetch_reddit_popular(3)
+    assert len(again['posts']) == 2
+    assert len(offline_scraper.requests) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_fetch_is_not_cached(offline_scraper):
+    transport = FixtureTransport([{
+        "method": "GET",
+        "url": "https://www.reddit.com/r/popular/hot.json?limit=7",
+        "status": 503,
+        "text": "",
+    }])
+    http_pool.set_transport(transport)
+
+    first = await web_scraper.fetch_reddit_popular(7)
+    second = await web_scraper.fetch_reddit_popular(7)
+
+    assert first['success'] is False and second['success'] is False
+    assert len(transport.requests) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_http_pool_reuses_client_per_host(offline_scraper):
+    a = http_pool.get_client("https://www.reddit.com/r/popular/hot.json")
+    b = http_pool.get_client("https://www.reddit.com/other")
+    c = http_pool.get_client("https://weibo.com/ajax/side/hotSearch")
+    assert a is b
+    assert a is not c
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_shared_client_never_stores_response_cookies():
+    seen = []
+
+    class CookieTransport(FixtureTransport):
+        async def handle_async_request(self, request):
+            seen.append(request.headers.get("cookie"))
+            return web_scraper.httpx.Response(200, headers={"set-cookie": "sid=leaked; Path=/"}, request=request)
+
+    http_pool.set_transport(CookieTransport([]))
+    try:
+        async with http_pool.client("https://example.com/a") as client:
+            await client.get("https://example.com/a", headers={"Cookie": "SESSDATA=user-a"})
+        async with http_pool.client("https://example.com/b") as client:
+            await client.get("https://example.com/b")
+            assert len(client.cookies) == 0
+    finally:
+        http_pool.set_transport(None)
+
+    # 第二个请求既没有带上第一个请求的凭证，也没有带上响应下发的 Cookie
+    assert seen == ["SESSDATA=user-a", None]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cached_fetch_vary_separates_credentials():
+    cache = TTLCache()
+    account = ["a"]
+    calls = []
+
+    @cached_fetch(ttl=60, cache=cache, vary=lambda: account[0])
+    async def fetch_feed(limit=10):
+        calls.append(account[0])
+        return {"success": True, "owner": account[0]}
+
+    assert (await fetch_feed())["owner"] == "a"
+    assert (await fetch_feed())["owner"] == "a"
+    account[0] = "b"
+    assert (await fetch_feed())["owner"] == "b"
+    assert calls == ["a", "b"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ttl_cache_serves_stale_while_revalidating():
+    now = [0.0]
+    cache = TTLCache(clock=lambda: now[0])
+    calls = []
+
+    async def fetch():
+        calls.append(now[0])
+        await asyncio.sleep(0)
+        return {"success": True, "n": len(calls)}
+
+    assert (await cache.get_or_fetch("k", fetch, ttl=10, stale_ttl=30))["n"] == 1
+    now[0] = 5.0
+    assert (await cache.get_or_fetch("k", fetch, ttl=10, stale_ttl=30))["n"] == 1
+
+    now[0] = 20.0
+    stale = await cache.get_or_fetch("k", fetch, ttl=10, stale_ttl=30)
+    assert stale["n"] == 1                       # 先返回旧值
+    await asyncio.sleep(0.01)                    # 后台刷新完成
+    assert (await cache.get_or_fetch("k", fetch, ttl=10, stale_ttl=30))["n"] == 2
+
+    now[0] = 100.0                               # 超过陈旧期，同步重新抓取
+    assert (await cache.get_or_fetch("k", fetch, ttl=10, stale_ttl=30))["n"] == 3
+    assert cache.stats()['stale_hits'] == 1
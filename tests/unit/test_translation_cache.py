@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+持久化翻译缓存 — 单元测试
+"""
+
+import os
+import sys
+
+import pytest
+from langchain_core.messages import AIMessage
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import utils.language_utils as language_utils
+from utils.translation_cache import PersistentTranslationCache
+
+
+@pytest.mark.unit
+def test_cache_survives_restart_and_reports_hit_rate(tmp_path):
+    db_path = tmp_path / "cache" / "translation_cache.sqlite3"
+    first = PersistentTranslationCache(db_path)
+    assert first.get("你好", "zh-CN", "en", "llm:m") is None
+    first.set("你好", "zh-CN", "en", "llm:m", "Hello")
+    first.close()
+
+    second = PersistentTranslationCache(db_path)
+    assert second.get("你好", "zh-CN", "en", "llm:m") == "Hello"   # 磁盘命中
+    assert second.get("你好", "zh-CN", "en", "llm:m") == "Hello"   # 前置缓存命中
+    # 后端 / 源语言不同则互不命中
+    assert second.get("你好", "zh-CN", "en", "llm:other") is None
+    assert second.get("你好", "ja", "en", "llm:m") is None
+
+    stats = second.stats()
+    assert stats['persistent'] is True
+    assert stats['disk_hits'] == 1
+    assert stats['front_hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['hit_rate'] == 0.5
+    assert stats['disk_entries'] == 1
+
+
+@pytest.mark.unit
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PersistentTranslationCache(tmp_path / "c.sqlite3", max_entries=3, front_max_entries=1, touch_interval=0)
+    for i in range(3):
+        cache.set(f"t{i}", "en", "zh-CN", "b", f"译{i}")
+    # 第 4 条写入后超出上限，最久未使用的 t0 被淘汰
+    cache.set("filler", "en", "ja", "b", "x")
+    cache.prune()
+    assert cache.stats()['disk_entries'] == 3
+    assert cache.get("t0", "en", "zh-CN", "b") is None
+
+    cache.get("t1", "en", "zh-CN", "b")
+    cache.set("t4", "en", "zh-CN", "b", "译4")
+    cache.prune()
+    assert cache.get("t1", "en", "zh-CN", "b") == "译1"
+    assert cache.get("t2", "en", "zh-CN", "b") is None
+
+
+@pytest.mark.unit
+def test_disk_hit_skips_recent_last_used_refresh(tmp_path):
+    db_path = tmp_path / "c.sqlite3"
+    cache = PersistentTranslationCache(db_path, front_max_entries=1, touch_interval=60)
+    cache.set("a", "en", "zh-CN", "b", "甲")
+    cache.set("b", "en", "zh-CN", "b", "乙")   # 挤出前置缓存，下次读 "a" 走磁盘
+    changes = cache._conn.total_changes
+
+    assert cache.get("a", "en", "zh-CN", "b") == "甲"
+    assert cache.stats()['disk_hits'] == 1
+    # 上次使用时间还很新，磁盘命中不产生写入
+    assert cache._conn.total_changes == changes
+
+
+@pytest.mark.unit
+def test_cache_without_db_path_is_memory_only():
+    cache = PersistentTranslationCache(None, front_max_entries=2)
+    cache.set("a", "en", "zh-CN", "b", "甲")
+    assert cache.get("a", "en", "zh-CN", "b") == "甲"
+    assert cache.stats()['persistent'] is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_translation_service_uses_persistent_cache(tmp_path, monkeypatch):
+    calls = []
+
+    class FakeConfigManager:
+        app_docs_dir = tmp_path
+
+        def get_model_api_config(self, model_type):
+            return {"model": "fake-model", "base_url": "http://localhost", "api_key": "k"}
+
+    class FakeLLM:
+        async def ainvoke(self, messages):
+            calls.append(messages)
+            return AIMessage(content="Hello")
+
+    service = language_utils.TranslationService(FakeConfigManager())
+    monkeypatch.setattr(service, "_get_llm_client", lambda: FakeLLM())
+
+    assert await service.translate_text_robust("你好世界", "en") == "Hello"
+    assert await service.translate_text_robust("你好世界", "en") == "Hello"
+    assert len(calls) == 1
+
+    # 新实例（模拟重启）直接命中磁盘缓存
+    restarted = language_utils.TranslationService(FakeConfigManager())
+    monkeypatch.setattr(restarted, "_get_llm_client", lambda: FakeLLM())
+    assert await restarted.translate_text_robust("你好世界", "en") == "Hello"
+    assert len(calls) == 1
+    assert restarted.get_cache_stats()['disk_hits'] == 1
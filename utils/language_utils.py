@@ -13,13 +13,12 @@ import locale
 import threading
 import asyncio
 import os
-import hashlib
-from collections import OrderedDict
-from typing import Optional, Tuple, List, Any, Dict
+from typing import Optional, Tuple, List, Any, Dict, Set
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from utils.config_manager import get_config_manager
 from utils.logger_config import get_module_logger
+from utils.translation_cache import PersistentTranslationCache, DEFAULT_DISK_MAX_ENTRIES
 
 logger = get_module_logger(__name__)
 
@@ -909,8 +908,10 @@ async def get_user_language_async() -> str:
 
 
 
-# 缓存配置
+# 缓存配置（进程内前置缓存 / 磁盘持久化缓存的条目上限）
 CACHE_MAX_SIZE = 1000
+PERSISTENT_CACHE_MAX_SIZE = DEFAULT_DISK_MAX_ENTRIES
+PERSISTENT_CACHE_FILENAME = "translation_cache.sqlite3"
 SUPPORTED_LANGUAGES = ['zh', 'zh-CN', 'en', 'ja', 'ko', 'ru']
 DEFAULT_LANGUAGE = 'zh-CN'
 
@@ -926,9 +927,26 @@ class TranslationService:
         """
         self.config_manager = config_manager
         self._llm_client = None
-        self._cache = OrderedDict()
-        self._cache_lock = None  # 懒加载：在首次使用时创建异步锁
-        self._cache_lock_init_lock = threading.Lock()  # 用于保护异步锁的创建过程
+        self._cache = PersistentTranslationCache(
+            self._get_cache_db_path(),
+            max_entries=PERSISTENT_CACHE_MAX_SIZE,
+            front_max_entries=CACHE_MAX_SIZE,
+        )
+
+    def _get_cache_db_path(self):
+        """持久化缓存位于用户文档目录下，多个服务进程共享；无法确定目录时仅使用内存缓存"""
+        app_docs_dir = getattr(self.config_manager, 'app_docs_dir', None)
+        if app_docs_dir is None:
+            return None
+        return os.path.join(str(app_docs_dir), "cache", PERSISTENT_CACHE_FILENAME)
+
+    def _get_cache_backend(self) -> str:
+        """缓存键中的后端标识（不同模型的译文分开缓存）"""
+        try:
+            model = self.config_manager.get_model_api_config('emotion').get('model')
+        except Exception:
+            model = None
+        return f"llm:{model}" if model else "llm"
 
     def _get_llm_client(self) -> Optional[ChatOpenAI]:
         """获取LLM客户端（用于翻译，复用 emotion 模型配置）"""
@@ -956,29 +974,17 @@ class TranslationService:
             logger.error(f"翻译服务：初始化LLM客户端失败: {e}")
             return None
     
-    async def _get_from_cache(self, text: str, target_lang: str) -> Optional[str]:
+    async def _get_from_cache(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
         """从缓存获取翻译结果"""
-        async with self._get_cache_lock():
-            cache_key = self._get_cache_key(text, target_lang)
-            return self._cache.get(cache_key)
-    
-    def _get_cache_lock(self):
-        """懒加载获取缓存锁"""
-        if self._cache_lock is None:
-            with self._cache_lock_init_lock:
-                if self._cache_lock is None:
-                    self._cache_lock = asyncio.Lock()
-        return self._cache_lock
+        return await self._cache.aget(text, source_lang, target_lang, self._get_cache_backend())
     
-    async def _save_to_cache(self, text: str, target_lang: str, translated: str):
+    async def _save_to_cache(self, text: str, source_lang: str, target_lang: str, translated: str):
         """保存翻译结果到缓存"""
-        async with self._get_cache_lock():
-            if len(self._cache) >= CACHE_MAX_SIZE:
-                first_key = next(iter(self._cache))
-                del self._cache[first_key]
-                
-            cache_key = self._get_cache_key(text, target_lang)
-            self._cache[cache_key] = translated
+        await self._cache.aset(text, source_lang, target_lang, self._get_cache_backend(), translated)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取翻译缓存统计（命中率、条目数等）"""
+        return self._cache.stats()
     
     def _normalize_language_code(self, lang: str) -> str:
         """归一化语言代码"""
@@ -986,12 +992,6 @@ class TranslationService:
             return DEFAULT_LANGUAGE
         return normalize_language_code(lang, format='full')
     
-    def _get_cache_key(self, text: str, target_lang: str) -> str:
-        """生成缓存键"""
-        normalized_lang = self._normalize_language_code(target_lang)
-        text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-        return f"{normalized_lang}:{text_hash}"
-
     def _detect_language(self, text: str) -> str:
         """检测文本语言"""
         lang = detect_language(text)
@@ -1019,7 +1019,7 @@ class TranslationService:
         if detected_lang_normalized == target_lang_normalized:
             return text
         
-        cached = await self._get_from_cache(text, target_lang_normalized)
+        cached = await self._get_from_cache(text, detected_lang_normalized, target_lang_normalized)
         if cached is not None:
             return cached
         
@@ -1095,7 +1095,7 @@ class TranslationService:
             if not translated:
                 logger.warning(f"翻译服务：LLM返回空结果，使用原文: '{text[:50]}...'")
                 return text            
-            await self._save_to_cache(text, target_lang_normalized, translated)
+            await self._save_to_cache(text, detected_lang_normalized, target_lang_normalized, translated)
             
             logger.debug(f"翻译服务：'{text[:50]}...' -> '{translated[:50]}...' ({target_lang})")
             return translated
@@ -1166,3 +1166,220 @@ def get_translation_service(config_manager) -> TranslationService:
     return _translation_service_instance
 
 
+
+
+# ============================================================================
+# 字幕批量翻译（合并短时间窗口内的多个片段为一次编号请求）
+# ============================================================================
+
+# 批量窗口与大小上限
+BATCH_TRANSLATE_WINDOW_SECONDS = 0.08
+BATCH_TRANSLATE_MAX_ITEMS = 16
+BATCH_TRANSLATE_MAX_CHARS = 3000
+
+_NUMBERED_LINE_PATTERN = re.compile(r'^\s*[\[【(（]\s*(\d+)\s*[\]】)）]\s?', re.MULTILINE)
+
+
+def _join_numbered_segments(texts: List[str]) -> str:
+    """将多个片段拼接为 `[1] xxx` 形式的编号文本（片段内换行折叠为空格，保证编号独占行首）"""
+    return '\n'.join(f"[{i}] {' '.join(t.splitlines())}" for i, t in enumerate(texts, 1))
+
+
+def _split_numbered_segments(text: str, expected: int) -> Optional[List[str]]:
+    """
+    按编号拆分批量翻译结果
+
+    Returns:
+        编号恰好为 1..expected 且各段非空时返回拆分结果，否则返回 None（由调用方逐条回退）
+    """
+    if not text:
+        return None
+    matches = list(_NUMBERED_LINE_PATTERN.finditer(text))
+    if len(matches) != expected:
+        return None
+    segments: List[str] = []
+    for idx, match in enumerate(matches):
+        if int(match.group(1)) != idx + 1:
+            return None
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(text)
+        segment = text[match.end():end].strip()
+        if not segment:
+            return None
+        segments.append(segment)
+    return segments
+
+
+class BatchTranslator:
+    """
+    字幕批量翻译器
+
+    流式字幕会在短时间内产生大量小片段，逐条调用翻译服务会放大请求数。
+    本类把同一 (源语言, 目标语言, skip_google) 下、窗口期内到达的片段合并为一次编号请求，
+    拆分译文后分别返回给各调用方；若编号对不上，则回退为逐条翻译。
+
+    Args:
+        translate_fn: 与 `translate_text` 同签名的翻译函数，默认使用 `translate_text`
+        window_seconds: 首个片段到达后等待合并的时间窗口
+        max_items: 单批最多片段数，达到后立即发送
+        max_chars: 单批最多字符数，达到后立即发送
+    """
+
+    def __init__(
+        self,
+        translate_fn=None,
+        window_seconds: float = BATCH_TRANSLATE_WINDOW_SECONDS,
+        max_items: int = BATCH_TRANSLATE_MAX_ITEMS,
+        max_chars: int = BATCH_TRANSLATE_MAX_CHARS,
+    ):
+        self._translate_fn = translate_fn
+        self.window_seconds = window_seconds
+        self.max_items = max(1, max_items)
+        self.max_chars = max(1, max_chars)
+        # key -> {"items": [(text, future)], "chars": int, "timer": TimerHandle}
+        self._pending: Dict[Tuple[str, str, bool], Dict[str, Any]] = {}
+        # 正在执行的批次任务，持有强引用防止被 GC 回收，close() 时统一等待
+        self._pending_tasks: Set["asyncio.Task"] = set()
+        self._stats = {
+            'segments': 0,
+            'batches': 0,
+            'provider_requests': 0,
+            'fallbacks': 0,
+            'latency_ms_total': 0.0,
+            'latency_ms_max': 0.0,
+        }
+
+    async def _call_provider(self, text: str, target_lang: str, source_lang: Optional[str],
+                             skip_google: bool) -> Tuple[str, bool]:
+        self._stats['provider_requests'] += 1
+        fn = self._translate_fn or translate_text
+        return await fn(text, target_lang, source_lang, skip_google=skip_google)
+
+    async def translate(self, text: str, target_lang: str, source_lang: Optional[str] = None,
+                        skip_google: bool = False) -> Tuple[str, bool]:
+        """
+        翻译单个片段（与其他并发片段合并发送）
+
+        Returns:
+            (翻译后的文本, google_failed)，语义与 `translate_text` 一致
+        """
+        if not text or not text.strip():
+            return text, False
+        if source_lang is None:
+            source_lang = detect_language(text)
+        if source_lang == target_lang or source_lang == 'unknown':
+            return text, False
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        future = loop.create_future()
+        key = (source_lang, target_lang, bool(skip_google))
+        self._stats['segments'] += 1
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = {"items": [], "chars": 0, "timer": None}
+            self._pending[key] = batch
+            batch["timer"] = loop.call_later(self.window_seconds, self._schedule_flush, key)
+        batch["items"].append((text, future))
+        batch["chars"] += len(text)
+        if len(batch["items"]) >= self.max_items or batch["chars"] >= self.max_chars:
+            self._schedule_flush(key)
+
+        try:
+            return await future
+        finally:
+            elapsed_ms = (loop.time() - started) * 1000
+            self._stats['latency_ms_total'] += elapsed_ms
+            self._stats['latency_ms_max'] = max(self._stats['latency_ms_max'], elapsed_ms)
+
+    def _schedule_flush(self, key: Tuple[str, str, bool]) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch["timer"] is not None:
+            batch["timer"].cancel()
+        task = asyncio.ensure_future(self._flush(key, batch["items"]))
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """
+        立即发送所有未到窗口期的批次，并等待进行中的批次完成；超时则取消剩余批次
+
+        Args:
+            timeout: 等待进行中批次的最长秒数，None 表示一直等待
+        """
+        for key in list(self._pending):
+            self._schedule_flush(key)
+        tasks = list(self._pending_tasks)
+        if not tasks:
+            return
+        _, still_running = await asyncio.wait(tasks, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+    async def _flush(self, key: Tuple[str, str, bool], items: List[Tuple[str, "asyncio.Future"]]) -> None:
+        source_lang, target_lang, skip_google = key
+        texts = [text for text, _ in items]
+        self._stats['batches'] += 1
+        # 默认返回原文：批次异常或在 close() 中被取消时，调用方也不会一直挂起
+        results = [(text, False) for text in texts]
+        try:
+            results = await self._translate_items(texts, target_lang, source_lang, skip_google)
+        except Exception as e:
+            logger.warning(f"❌ [批量翻译] 批次翻译异常: {type(e).__name__}，返回原文")
+        finally:
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _translate_items(self, texts: List[str], target_lang: str, source_lang: str,
+                               skip_google: bool) -> List[Tuple[str, bool]]:
+        if len(texts) == 1:
+            return [await self._call_provider(texts[0], target_lang, source_lang, skip_google)]
+
+        translated, google_failed = await self._call_provider(
+            _join_numbered_segments(texts), target_lang, source_lang, skip_google
+        )
+        segments = _split_numbered_segments(translated, len(texts))
+        if segments is not None:
+            return [(segment, google_failed) for segment in segments]
+
+        # 编号对不上：逐条回退，保证每个片段都拿到独立译文
+        logger.debug(f"🔄 [批量翻译] 批次 {len(texts)} 条拆分失败，回退逐条翻译")
+        self._stats['fallbacks'] += 1
+        return list(await asyncio.gather(*[
+            self._call_provider(text, target_lang, source_lang, skip_google or google_failed)
+            for text in texts
+        ]))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回请求数与延迟统计"""
+        stats = dict(self._stats)
+        segments = stats['segments']
+        stats['latency_ms_avg'] = round(stats['latency_ms_total'] / segments, 3) if segments else 0.0
+        return stats
+
+
+_batch_translator_instance: Optional[BatchTranslator] = None
+
+
+def get_batch_translator() -> BatchTranslator:
+    """获取进程内共享的字幕批量翻译器（单例）"""
+    global _batch_translator_instance
+    if _batch_translator_instance is None:
+        with _instance_lock:
+            if _batch_translator_instance is None:
+                _batch_translator_instance = BatchTranslator()
+    return _batch_translator_instance
+
+
+async def close_batch_translator(timeout: Optional[float] = None) -> None:
+    """关闭共享的字幕批量翻译器：发送剩余批次并等待其完成"""
+    global _batch_translator_instance
+    translator = _batch_translator_instance
+    _batch_translator_instance = None
+    if translator is not None:
+        await translator.close(timeout=timeout)
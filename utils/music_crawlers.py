@@ -10,6 +10,8 @@
     -   每个平台实现为 `BaseMusicCrawler` 的子类，只需重写 `search` 方法即可。
     -   主函数 `fetch_music_content` 通过 `asyncio.gather` 并发执行多个爬虫，并根据区域、关键词和多样性策略进行智能调度。
     -   实现了短期去重机制，避免同一首歌曲在短时间内被重复爬取。
+    -   关键词搜索结果写入磁盘缓存（SQLite），按音源设置 TTL，并对音源确认无结果的查询做负缓存（请求失败不缓存）。
+    -   关键词搜索的各梯队以竞速模式调度：凑够所需数量即返回，每个爬虫有独立的截止时间。
 """
 
 import asyncio
@@ -17,10 +19,13 @@ import httpx
 import random
 import re
 import json
+import os
+import sqlite3
+import threading
 import time
 import urllib.parse
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from collections import Counter
 from utils.logger_config import get_module_logger
 
@@ -161,6 +166,152 @@ def anykw(tracks: List[Dict[str, Any]], keywords: List[str]) -> bool:
 # 全局缓存实例
 music_cache = MusicCache(expire_seconds=300)
 
+
+# ==================================================
+# 搜索结果磁盘缓存
+# ==================================================
+
+# 各音源搜索结果缓存时间（秒）：SoundCloud 流地址带签名、很快失效，TTL 最短；
+# iTunes / Musopen 的链接长期稳定，可缓存更久
+SOURCE_CACHE_TTLS = {
+    'netease': 6 * 3600,
+    'soundcloud': 300,
+    'itunes': 24 * 3600,
+    'musopen': 24 * 3600,
+    'fma': 6 * 3600,
+    'bandcamp': 3600,
+}
+DEFAULT_SOURCE_CACHE_TTL = 3600
+# 未命中（空结果）的负缓存时间，避免反复请求必然落空的音源
+NEGATIVE_CACHE_TTL = 120
+# 单个爬虫在竞速调度中的截止时间（秒），超时视为本次未命中
+CRAWLER_DEADLINE_SECONDS = 6.0
+MUSIC_SEARCH_CACHE_FILENAME = "music_search_cache.sqlite3"
+
+
+class MusicSearchCache:
+    """
+    音乐搜索结果缓存（SQLite 持久化，进程重启后仍有效）
+
+    键为 (音源, 关键词, 数量)；空列表同样写入，作为负缓存使用更短的 TTL。
+    db_path 为 None 时使用内存数据库。
+    """
+
+    def __init__(self, db_path: Optional[str] = None,
+                 source_ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_SOURCE_CACHE_TTL,
+                 negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.source_ttls = dict(SOURCE_CACHE_TTLS if source_ttls is None else source_ttls)
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0}
+        self._conn = self._connect(db_path)
+
+    def _connect(self, db_path: Optional[str]) -> sqlite3.Connection:
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                return self._init_schema(conn)
+            except Exception as e:
+                logger.warning(f"音乐搜索缓存数据库不可用 ({db_path}): {e}，改用内存缓存")
+        return self._init_schema(sqlite3.connect(":memory:", check_same_thread=False))
+
+    @staticmethod
+    def _init_schema(conn: sqlite3.Connection) -> sqlite3.Connection:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS music_search (
+                source TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                result_limit INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (source, keyword, result_limit)
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def ttl_for(self, source: str, results: List[Dict[str, Any]]) -> float:
+        if not results:
+            return self.negative_ttl
+        return self.source_ttls.get(source, self.default_ttl)
+
+    def get(self, source: str, keyword: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """返回缓存结果；未命中或已过期返回 None，负缓存命中返回空列表"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, stored_at FROM music_search WHERE source = ? AND keyword = ? AND result_limit = ?",
+                (source, keyword.lower(), limit),
+            ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        try:
+            results = json.loads(row[0])
+        except ValueError:
+            results = None
+        if results is None or time.time() - row[1] > self.ttl_for(source, results):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits' if results else 'negative_hits'] += 1
+        return results
+
+    def set(self, source: str, keyword: str, limit: int, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO music_search (source, keyword, result_limit, results, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source, keyword.lower(), limit, json.dumps(results, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """删除超过最长 TTL 的条目，返回删除数量"""
+        max_ttl = max([self.default_ttl, self.negative_ttl, *self.source_ttls.values()])
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM music_search WHERE stored_at < ?", (time.time() - max_ttl,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_music_search_cache: Optional[MusicSearchCache] = None
+_music_search_cache_lock = threading.Lock()
+
+
+def get_music_search_cache() -> MusicSearchCache:
+    """懒加载搜索缓存，数据库放在用户文档目录的 cache 子目录下（首次调用会打开数据库并清理过期条目）"""
+    global _music_search_cache
+    if _music_search_cache is not None:
+        return _music_search_cache
+    with _music_search_cache_lock:
+        if _music_search_cache is None:
+            db_path = None
+            try:
+                from utils.config_manager import get_config_manager
+                db_path = os.path.join(str(get_config_manager().app_docs_dir), "cache", MUSIC_SEARCH_CACHE_FILENAME)
+            except Exception as e:
+                logger.debug(f"无法确定音乐搜索缓存路径: {e}")
+            cache = MusicSearchCache(db_path)
+            cache.purge_expired()
+            _music_search_cache = cache
+    return _music_search_cache
+
+
+async def get_music_search_cache_async() -> MusicSearchCache:
+    """事件循环中使用：首次打开数据库与清理过期条目放到线程中执行，不阻塞事件循环"""
+    if _music_search_cache is not None:
+        return _music_search_cache
+    return await asyncio.to_thread(get_music_search_cache)
+
 def get_random_user_agent() -> str:
     """
     随机获取一个User-Agent
@@ -183,6 +334,12 @@ except ImportError:
 # 2. 爬虫基类
 # =======================================================
 
+class MusicSearchError(Exception):
+    """
+    爬虫请求失败（超时 / 异常状态码 / 解析错误）。
+    与音源正常返回的空结果区分开：只有后者会写入负缓存。
+    """
+
 class BaseMusicCrawler:
     """
     音乐爬虫的基类，封装了通用的请求逻辑和格式化方法。
@@ -204,7 +361,10 @@ class BaseMusicCrawler:
             limit: 希望返回的结果数量。
 
         Returns:
-            一个包含 APlayer 格式字典的列表。
+            一个包含 APlayer 格式字典的列表；音源正常响应但没有结果时返回空列表。
+
+        Raises:
+            MusicSearchError: 请求失败（超时、异常状态码、解析错误等）。
         """
         raise NotImplementedError
 
@@ -260,7 +420,10 @@ class NeteaseCrawler(BaseMusicCrawler):
             response.raise_for_status()
             result = response.json()
 
-            if result.get("code") != 200 or not result.get("result", {}).get("songs"):
+            if result.get("code") != 200:
+                logger.warning(f"[{self.platform_name}] API 返回错误: {result}")
+                raise MusicSearchError(f"{self.platform_name} API 返回错误码 {result.get('code')}")
+            if not result.get("result", {}).get("songs"):
                 logger.warning(f"[{self.platform_name}] API 未返回有效歌曲: {result}")
                 return []
 
@@ -293,12 +456,14 @@ class NeteaseCrawler(BaseMusicCrawler):
             
             return final_results
 
-        except httpx.TimeoutException:
+        except MusicSearchError:
+            raise
+        except httpx.TimeoutException as e:
             logger.warning(f"[{self.platform_name}] 搜索 '{keyword}' 超时")
+            raise MusicSearchError(f"{self.platform_name} 搜索超时") from e
         except Exception as e:
             logger.error(f"[{self.platform_name}] 搜索 '{keyword}' 失败: {e}", exc_info=True)
-        
-        return []
+            raise MusicSearchError(f"{self.platform_name} 搜索失败: {e}") from e
 
 
 class SoundCloudCrawler(BaseMusicCrawler):
@@ -351,7 +516,7 @@ class SoundCloudCrawler(BaseMusicCrawler):
             
             if not client_id:
                 logger.warning(f"[{self.platform_name}] 无法获取有效的 Client ID，跳过搜索")
-                return []
+                raise MusicSearchError(f"{self.platform_name} 无法获取 Client ID")
             
             try:
                 search_url = "https://api-v2.soundcloud.com/search/tracks"
@@ -369,7 +534,7 @@ class SoundCloudCrawler(BaseMusicCrawler):
                     continue               # 立即进入下一次循环，重新去首页偷新 Token
                 
                 if response.status_code != 200:
-                    return []
+                    raise MusicSearchError(f"{self.platform_name} 搜索返回状态码 {response.status_code}")
                 
                 data = response.json()
                 collection = data.get('collection', [])
@@ -416,11 +581,14 @@ class SoundCloudCrawler(BaseMusicCrawler):
                 results = valid_results[:limit]
                 return results # 成功则直接返回，退出重试循环
 
+            except MusicSearchError:
+                raise
             except Exception as e:
+                # 网络或解析报错（非权限问题）没必要重试，直接退出
                 logger.error(f"[{self.platform_name}] 搜索失败: {e}")
-                break # 网络或解析报错（非权限问题）没必要重试，直接退出
+                raise MusicSearchError(f"{self.platform_name} 搜索失败: {e}") from e
         
-        return []
+        raise MusicSearchError(f"{self.platform_name} API 认证失败")
 
 
 class iTunesCrawler(BaseMusicCrawler):
@@ -473,12 +641,14 @@ class iTunesCrawler(BaseMusicCrawler):
             
             return results
 
-        except httpx.TimeoutException:
+        except MusicSearchError:
+            raise
+        except httpx.TimeoutException as e:
             logger.warning(f"[{self.platform_name}] 搜索 '{keyword}' 超时")
+            raise MusicSearchError(f"{self.platform_name} 搜索超时") from e
         except Exception as e:
             logger.error(f"[{self.platform_name}] 搜索 '{keyword}' 失败: {e}", exc_info=True)
-        
-        return []
+            raise MusicSearchError(f"{self.platform_name} 搜索失败: {e}") from e
 
 class MusopenCrawler(BaseMusicCrawler):
     """
@@ -610,12 +780,12 @@ class MusopenCrawler(BaseMusicCrawler):
                 results.append(self._format_item(name=real_name, url=link, artist="古典音乐", cover=cover_url))
             return results
 
-        except httpx.TimeoutException:
+        except httpx.TimeoutException as e:
             logger.warning(f"[{self.platform_name}] 访问 {url} 超时")
+            raise MusicSearchError(f"{self.platform_name} 访问超时") from e
         except Exception as e:
             logger.error(f"[{self.platform_name}] 抓取失败: {e}", exc_info=True)
-        
-        return []
+            raise MusicSearchError(f"{self.platform_name} 抓取失败: {e}") from e
 
 class FMACrawler(BaseMusicCrawler):
     """
@@ -691,12 +861,14 @@ class FMACrawler(BaseMusicCrawler):
                         break
             return results
 
-        except httpx.TimeoutException:
+        except MusicSearchError:
+            raise
+        except httpx.TimeoutException as e:
             logger.warning(f"[{self.platform_name}] 搜索 '{keyword}' 超时")
+            raise MusicSearchError(f"{self.platform_name} 搜索超时") from e
         except Exception as e:
             logger.error(f"[{self.platform_name}] 搜索 '{keyword}' 失败: {e}", exc_info=True)
-        
-        return []
+            raise MusicSearchError(f"{self.platform_name} 搜索失败: {e}") from e
 
 class BandcampCrawler(BaseMusicCrawler):
     """
@@ -716,7 +888,7 @@ class BandcampCrawler(BaseMusicCrawler):
             
             response = await self.client.get(url, params=params) # httpx 会自动编码
             if response.status_code != 200:
-                return []
+                raise MusicSearchError(f"{self.platform_name} 搜索返回状态码 {response.status_code}")
                 
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -778,10 +950,14 @@ class BandcampCrawler(BaseMusicCrawler):
             for track in track_results:
                 if isinstance(track, dict) and len(results) < limit:
                     results.append(track)
-        except httpx.TimeoutException:
+        except MusicSearchError:
+            raise
+        except httpx.TimeoutException as e:
             logger.warning(f"[{self.platform_name}] 搜索 '{keyword}' 超时")
+            raise MusicSearchError(f"{self.platform_name} 搜索超时") from e
         except Exception as e:
             logger.error(f"[{self.platform_name}] 抓取失败: {e}", exc_info=True)
+            raise MusicSearchError(f"{self.platform_name} 抓取失败: {e}") from e
             
         return results
 
@@ -835,7 +1011,105 @@ async def close_all_crawlers():
     logger.info("所有音乐爬虫实例已清理完毕")
 
 # =======================================================
-# 4. 主调度函数
+# 4. 竞速搜索
+# =======================================================
+
+# 竞速返回后仍在后台运行、用于回填缓存的任务（保持引用，防止被回收）
+_background_searches: set = set()
+
+
+async def _search_source(source: str, keyword: Optional[str], limit: int,
+                         deadline: float, use_cache: bool) -> List[Dict[str, Any]]:
+    """
+    查询单个音源：优先读缓存，否则在截止时间内调用爬虫并写回缓存。
+    keyword 为 None 时使用爬虫自身的默认关键词（如 Musopen 随机推荐），此时不走缓存。
+    """
+    use_cache = use_cache and bool(keyword)
+    cache = await get_music_search_cache_async() if use_cache else None
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, source, keyword, limit)
+        if cached is not None:
+            logger.debug(f"[音乐缓存] 命中 {source}:{keyword} ({len(cached)} 首)")
+            return cached
+
+    crawler = get_music_crawlers()[source]
+    search = crawler.search(limit=limit) if keyword is None else crawler.search(keyword, limit)
+    try:
+        results = await asyncio.wait_for(search, timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.info(f"[竞速调度] {source} 超过截止时间 {deadline}s，视为未命中")
+        return []
+    except MusicSearchError as e:
+        # 请求失败不是「没有结果」，不写负缓存，下次仍会重试该音源
+        logger.info(f"[竞速调度] {source} 请求失败，本次视为未命中: {e}")
+        return []
+
+    # 只有音源正常响应的结果（含空列表）才写入缓存
+    results = results if isinstance(results, list) else []
+    if cache is not None:
+        await asyncio.to_thread(cache.set, source, keyword, limit, results)
+    return results
+
+
+def _count_usable(results: List[Dict[str, Any]]) -> int:
+    """按 URL 去重并剔除近期已播放的歌曲后，统计可下发数量"""
+    seen = set()
+    unique = []
+    for item in results:
+        if item.get('url') and item['url'] not in seen:
+            seen.add(item['url'])
+            unique.append(item)
+    return len(music_cache.filter_duplicates(unique))
+
+
+async def race_search(jobs: Iterable[Tuple[str, Optional[str]]], limit: int,
+                      want: Optional[int] = None,
+                      deadline: float = CRAWLER_DEADLINE_SECONDS,
+                      use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    竞速搜索：并发查询多个 (音源, 关键词)，可用结果数达到 want（默认 limit）即返回，
+    不再等待慢音源。每个爬虫受 deadline 约束。
+
+    启用缓存时，未完成的慢音源会在后台继续（仍受 deadline 约束）并回填缓存，供下次直接命中；
+    未启用缓存时则直接取消。
+    """
+    want = want or limit
+    tasks = {
+        asyncio.create_task(_search_source(source, kw, limit, deadline, use_cache)): source
+        for source, kw in jobs
+    }
+    results: List[Dict[str, Any]] = []
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                exc = task.exception()
+                if exc is not None:
+                    logger.warning(f"[竞速调度] {tasks[task]} 异常: {exc}")
+                    continue
+                res = task.result()
+                if res:
+                    results.extend(res)
+            if _count_usable(results) >= want:
+                if pending:
+                    logger.info(f"[竞速调度] 已凑够 {want} 首，不再等待: {[tasks[t] for t in pending]}")
+                break
+    finally:
+        for task in pending:
+            if use_cache:
+                _background_searches.add(task)
+                task.add_done_callback(_background_searches.discard)
+                # 消费后台任务的异常，避免 "Task exception was never retrieved"
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            else:
+                task.cancel()
+    return results
+
+# =======================================================
+# 5. 主调度函数
 # =======================================================
 
 async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
@@ -846,9 +1120,6 @@ async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
     logger.info(f"音乐搜索请求: keyword='{keyword}', limit={limit}, is_china_region={china}")
 
     all_results = []
-    
-    # 使用懒加载访问器获取爬虫实例
-    all_crawlers = get_music_crawlers() 
 
     if keyword: 
         # 场景 A: 用户指定了明确关键词 -> 开启"梯队降级"机制
@@ -896,7 +1167,7 @@ async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
             "台式", "台客", "闽南语", "台语",
         ]
         chinese_keywords = [kw.lower() for kw in raw_chinese_keywords]
-        primary_tasks = []
+        primary_jobs = []
         
         # --- 组建第一梯队（最优解竞速） ---
         
@@ -906,87 +1177,43 @@ async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
         
         if is_classical:
             logger.info(f"[智能调度] 识别到古典/纯正乐器意图，优先调度 Musopen: {keyword}")
-            primary_tasks.append(all_crawlers['musopen'].search(keyword, limit))
+            primary_jobs.append(('musopen', keyword))
         
         # 2. 【补充修复】华语/流行路由：命中你定义的华语歌手或关键词
         elif any(kw in kw_lower for kw in chinese_keywords):
             logger.info(f"[智能调度] 识别到华语检索意图，优先调度网易云: {keyword}")
-            primary_tasks.append(all_crawlers['netease'].search(keyword, limit))
+            primary_jobs.append(('netease', keyword))
 
         # 3. 独立/电子/Lofi 路由
         elif any(kw in kw_lower for kw in indie_keywords):
             logger.info(f"[智能调度] 识别到独立/电子风格意图，优先调度 Bandcamp/SoundCloud: {keyword}")
-            primary_tasks.append(all_crawlers['bandcamp'].search(keyword, limit))
-            primary_tasks.append(all_crawlers['soundcloud'].search(keyword, limit))
+            primary_jobs.append(('bandcamp', keyword))
+            primary_jobs.append(('soundcloud', keyword))
             
         # 4. 默认兜底：按地域偏好
         else:
             if china:
-                primary_tasks.append(all_crawlers['netease'].search(keyword, limit))
+                primary_jobs.append(('netease', keyword))
             else:
                 # 非中文区默认首选
-                primary_tasks.append(all_crawlers['soundcloud'].search(keyword, limit))
-                primary_tasks.append(all_crawlers['itunes'].search(keyword, limit))
+                primary_jobs.append(('soundcloud', keyword))
+                primary_jobs.append(('itunes', keyword))
 
-        # 执行第一梯队 - 竞速模式：任一源返回结果即停止等待
-        if primary_tasks:
-            # 创建任务以便后续取消
-            primary_task_objs = [asyncio.create_task(coro) for coro in primary_tasks]
-            
-            for completed_task in asyncio.as_completed(primary_task_objs):
-                try:
-                    res = await completed_task
-                    if isinstance(res, list) and res:
-                        all_results.extend(res)
-                        logger.info("[智能调度] 第一梯队某源命中，取消其他任务")
-                        # 取消剩余任务
-                        for task in primary_task_objs:
-                            if not task.done():
-                                task.cancel()
-                        # 等待取消完成
-                        await asyncio.gather(*primary_task_objs, return_exceptions=True)
-                        break
-                except asyncio.CancelledError:
-                    # 任务被取消，忽略
-                    pass
-                except Exception as e:
-                    logger.warning(f"[智能调度] 第一梯队某源异常: {e}")
+        # 执行第一梯队 - 竞速模式：凑够 limit 首可用歌曲即返回，不等待慢源
+        if primary_jobs:
+            all_results.extend(await race_search(primary_jobs, limit))
                 
         # --- 组建第二梯队（兜底截断逻辑） ---
         if not all_results:
             logger.info("[智能调度] 第一梯队未命中，触发第二级兜底引擎...")
-            fallback_tasks = []
-            
             # 【核心修复】不要在这里将关键词篡改为 "relax"
             # 必须透传原始 keyword，这样搜不到才会真实返回空，让路由层去触发真正的随机逻辑
-            fallback_tasks.append(all_crawlers['netease'].search(keyword, limit))
-            fallback_tasks.append(all_crawlers['fma'].search(keyword, limit))
-            
+            fallback_jobs = [('netease', keyword), ('fma', keyword)]
             # 兜底梯队也使用竞速模式
-            fallback_task_objs = [asyncio.create_task(coro) for coro in fallback_tasks]
-            # 【统一命名】将循环变量改为 completed_task，与主循环保持一致
-            for completed_task in asyncio.as_completed(fallback_task_objs):
-                try:
-                    res = await completed_task
-                    if isinstance(res, list) and res:
-                        all_results.extend(res)
-                        logger.info("[智能调度] 兜底源命中，取消其他任务")
-                        # 取消剩余任务
-                        for task in fallback_task_objs:
-                            if not task.done():
-                                task.cancel()
-                        # 等待取消完成
-                        await asyncio.gather(*fallback_task_objs, return_exceptions=True)
-                        break
-                except asyncio.CancelledError:
-                    # 任务被取消，忽略
-                    pass
-                except Exception as e:
-                    logger.warning(f"[智能调度] 兜底源异常: {e}")
+            all_results.extend(await race_search(fallback_jobs, limit))
 
     else: 
         # 场景 B: 纯背景音乐推荐 -> 并发盲抽
-        tasks = []
         if china:
             china_styles = [
                 ('netease', '华语'), ('netease', '流行'), ('netease', '电子'), 
@@ -1002,13 +1229,12 @@ async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
             ]
             selected_styles = random.sample(global_styles, min(3, len(global_styles)))
         
-        for source, kw in selected_styles:
-            if source == 'musopen':
-                tasks.append(all_crawlers['musopen'].search(limit=limit))
-            else:
-                tasks.append(all_crawlers[source].search(kw, limit))
-                
-        crawler_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 盲抽追求随机性与多样性：不走缓存、不竞速，等待每个选中的风格各自返回（仍受截止时间约束），
+        # 并按随机抽中的顺序合并，避免结果总是偏向响应最快的音源
+        crawler_results = await asyncio.gather(*[
+            _search_source(source, kw, limit, CRAWLER_DEADLINE_SECONDS, use_cache=False)
+            for source, kw in selected_styles
+        ], return_exceptions=True)
         for res in crawler_results:
             if isinstance(res, list) and res:
                 all_results.extend(res)
@@ -1052,7 +1278,7 @@ async def fetch_music_content(keyword: str, limit: int = 1) -> Dict[str, Any]:
     return {'success': True, 'data': final_results, 'diversity': diversity_info}
 
 # =======================================================
-# 5. 用于独立测试的入口
+# 6. 用于独立测试的入口
 # =======================================================
 
 async def main():
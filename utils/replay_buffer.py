@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+监控端（monitor.py）的迟到观众回放缓冲
+
+功能:
+- 按房间（lanlan_name）保存最近的字幕 JSON 帧与音频二进制帧
+- 以时间窗口和字节窗口双重上限淘汰旧帧（环形缓冲）
+- 新观众连接时整体取出快照，在进入实时广播前一次性补发
+- 统计重连后的首帧耗时（time-to-first-frame）
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Union
+
+FramePayload = Union[dict, bytes]
+
+
+@dataclass
+class ReplayFrame:
+    """一条被缓存的帧"""
+    ts: float
+    kind: str              # "json" 或 "binary"
+    payload: FramePayload
+    size: int
+
+
+@dataclass
+class ReplayBuffer:
+    """单个房间的环形回放缓冲。
+
+    帧按到达顺序保存；超过 ``max_age_seconds`` 或总字节数超过
+    ``max_bytes`` 时从最旧的一端淘汰。``max_age_seconds``/``max_bytes``
+    任一为 0 表示不启用该维度的限制（但二者至少应有一个生效）。
+    """
+    max_age_seconds: float = 15.0
+    max_bytes: int = 2 * 1024 * 1024
+    _frames: Deque[ReplayFrame] = field(default_factory=deque)
+    _total_bytes: int = 0
+
+    def append_json(self, message: dict, now: Optional[float] = None) -> None:
+        # JSON 帧按文本长度粗略估算字节数，足以用于窗口控制
+        size = len(str(message).encode("utf-8", errors="ignore"))
+        self._append(ReplayFrame(now if now is not None else time.monotonic(), "json", message, size), now)
+
+    def append_binary(self, data: bytes, now: Optional[float] = None) -> None:
+        self._append(ReplayFrame(now if now is not None else time.monotonic(), "binary", data, len(data)), now)
+
+    def _append(self, frame: ReplayFrame, now: Optional[float]) -> None:
+        self._frames.append(frame)
+        self._total_bytes += frame.size
+        self._evict(frame.ts if now is None else now)
+
+    def _evict(self, now: float) -> None:
+        frames = self._frames
+        if self.max_age_seconds > 0:
+            cutoff = now - self.max_age_seconds
+            while frames and frames[0].ts < cutoff:
+                self._total_bytes -= frames.popleft().size
+        if self.max_bytes > 0:
+            # 至少保留最新一帧，避免单个大帧把缓冲清空
+            while len(frames) > 1 and self._total_bytes > self.max_bytes:
+                self._total_bytes -= frames.popleft().size
+
+    def snapshot(self, now: Optional[float] = None) -> List[ReplayFrame]:
+        """返回当前窗口内所有帧的快照（按时间顺序）。"""
+        self._evict(now if now is not None else time.monotonic())
+        return list(self._frames)
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+class ReplayRegistry:
+    """按房间管理回放缓冲，并记录重连首帧耗时。"""
+
+    def __init__(self, max_age_seconds: float = 15.0, max_bytes: int = 2 * 1024 * 1024,
+                 ttff_samples: int = 256):
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._rooms: Dict[str, ReplayBuffer] = {}
+        # 回合结束后，下一条有效帧到来时清空该房间，避免回放上一回合
+        self._turn_ended: Dict[str, bool] = {}
+        self._ttff_ms: Deque[float] = deque(maxlen=ttff_samples)
+
+    def room(self, name: str) -> ReplayBuffer:
+        buf = self._rooms.get(name)
+        if buf is None:
+            buf = ReplayBuffer(max_age_seconds=self.max_age_seconds, max_bytes=self.max_bytes)
+            self._rooms[name] = buf
+        return buf
+
+    def _start_frame(self, name: str) -> ReplayBuffer:
+        buf = self.room(name)
+        if self._turn_ended.pop(name, False):
+            buf.clear()
+        return buf
+
+    def record_json(self, name: str, message: dict) -> None:
+        self._start_frame(name).append_json(message)
+
+    def record_binary(self, name: str, data: bytes) -> None:
+        self._start_frame(name).append_binary(data)
+
+    def mark_turn_end(self, name: str) -> None:
+        self._turn_ended[name] = True
+
+    def snapshot(self, name: str) -> List[ReplayFrame]:
+        buf = self._rooms.get(name)
+        return buf.snapshot() if buf is not None else []
+
+    def record_time_to_first_frame(self, elapsed_ms: float) -> None:
+        self._ttff_ms.append(elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._ttff_ms)
+
+        def _pct(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            idx = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[idx], 3)
+
+        return {
+            "window_seconds": self.max_age_seconds,
+            "window_bytes": self.max_bytes,
+            "rooms": {
+                name: {"frames": len(buf), "bytes": buf.total_bytes}
+                for name, buf in self._rooms.items()
+            },
+            "time_to_first_frame_ms": {
+                "count": len(samples),
+                "p50": _pct(0.5),
+                "p90": _pct(0.9),
+                "max": round(samples[-1], 3) if samples else None,
+            },
+        }
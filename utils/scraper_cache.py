@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+网络爬虫的共享连接池与结果缓存
+
+- HttpClientPool: 按主机复用 httpx.AsyncClient（HTTP keep-alive），避免每次抓取都重新握手
+- TTLCache: 带 stale-while-revalidate 的 TTL 缓存；同一数据源的并发调用合并为一次在途请求
+- cached_fetch: 给抓取函数加缓存的装饰器（仅缓存 success=True 的结果）
+- 离线夹具：FixtureTransport 按录制好的 JSON 夹具回放响应，RecordingTransport 负责录制，
+  通过 http_pool.set_transport() 注入后，测试无需访问真实网络
+"""
+
+import asyncio
+import copy
+import functools
+import http.cookiejar
+import json
+import time
+import weakref
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.logger_config import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# 每个主机的 keep-alive 连接上限与空闲保持时间
+POOL_MAX_KEEPALIVE_CONNECTIONS = 4
+POOL_KEEPALIVE_EXPIRY = 60.0
+
+
+# ==================================================
+# 连接池
+# ==================================================
+
+class _RejectAllCookiePolicy(http.cookiejar.DefaultCookiePolicy):
+    """共享客户端的 cookie 策略：响应中的 Cookie 一律不存储"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class HttpClientPool:
+    """
+    按 (主机, 超时, 是否跟随重定向) 复用 httpx.AsyncClient
+
+    httpx 客户端绑定在创建它的事件循环上，因此池按事件循环分组（弱引用，循环销毁后自动释放）。
+    池内客户端被多个抓取函数并发共享，其 cookie jar 拒绝存储任何 Cookie（不保留响应中的 Set-Cookie），
+    需要登录态的请求通过请求级 `cookies=` / `Cookie` 头传入，不同请求之间不会串用登录态。
+    """
+
+    def __init__(self):
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+
+    def set_transport(self, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """注入自定义 transport（离线夹具 / 录制），传 None 恢复真实网络；已有客户端会被丢弃"""
+        self._transport = transport
+        self._clients = weakref.WeakKeyDictionary()
+
+    def get_client(self, url: str, timeout: float = 5.0, follow_redirects: bool = True) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            clients = {}
+            self._clients[loop] = clients
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, timeout, follow_redirects)
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            kwargs: Dict[str, Any] = {
+                'cookies': http.cookiejar.CookieJar(policy=_RejectAllCookiePolicy()),
+                'timeout': timeout,
+                'follow_redirects': follow_redirects,
+                'limits': httpx.Limits(
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                ),
+            }
+            if self._transport is not None:
+                kwargs['transport'] = self._transport
+            client = httpx.AsyncClient(**kwargs)
+            clients[key] = client
+        return client
+
+    @asynccontextmanager
+    async def client(self, url: str, timeout: float = 5.0, follow_redirects: bool = True):
+        """`async with http_pool.client(url) as client:` —— 与 `httpx.AsyncClient()` 用法一致，但退出时不关闭连接"""
+        yield self.get_client(url, timeout=timeout, follow_redirects=follow_redirects)
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环下的所有客户端"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        clients = self._clients.pop(loop, None) or {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+http_pool = HttpClientPool()
+
+
+# ==================================================
+# TTL 缓存
+# ==================================================
+
+class TTLCache:
+    """
+    带 stale-while-revalidate 与请求合并的异步 TTL 缓存
+
+    - 新鲜期（ttl 内）：直接返回缓存
+    - 陈旧期（ttl ~ ttl + stale_ttl）：立即返回旧值，同时在后台刷新（同一 key 只会有一个刷新任务）
+    - 过期或不存在：发起抓取；同一 key 的并发调用共享这一次在途请求
+    - 抓取结果不满足 is_cacheable 时不写入缓存（也不会覆盖仍可用的旧值）
+    """
+
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'fetches': 0, 'errors': 0}
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0,
+        is_cacheable: Callable[[Any], bool] = lambda _: True,
+    ) -> Any:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = now - stored_at
+            if age <= ttl:
+                self._stats['hits'] += 1
+                return value
+            if age <= ttl + stale_ttl:
+                self._stats['stale_hits'] += 1
+                self._start_fetch(key, fetch, is_cacheable)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self._stats['coalesced'] += 1
+        else:
+            self._stats['misses'] += 1
+            task = self._start_fetch(key, fetch, is_cacheable)
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                     is_cacheable: Callable[[Any], bool]) -> "asyncio.Task":
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            return task
+
+        async def _run():
+            self._stats['fetches'] += 1
+            try:
+                value = await fetch()
+            except Exception:
+                self._stats['errors'] += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+            if is_cacheable(value):
+                self._store(key, value)
+            return value
+
+        task = asyncio.ensure_future(_run())
+        # 后台刷新没有等待者时也要消费异常，避免 "Task exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock(), value)
+        if len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            self._entries.pop(oldest, None)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """清除单个 key；不传 key 时清空全部缓存"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats['entries'] = len(self._entries)
+        stats['inflight'] = len(self._inflight)
+        return stats
+
+
+scraper_cache = TTLCache()
+
+
+def _is_success(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get('success'))
+
+
+def cached_fetch(ttl: float, stale_ttl: float = 0.0, cache: Optional[TTLCache] = None,
+                 vary: Optional[Callable[[], Hashable]] = None):
+    """
+    抓取函数缓存装饰器：按 (函数名, 参数) 缓存 success=True 的结果
+
+    `vary` 在每次调用时求值并并入缓存 key，用于结果依赖调用参数之外状态的抓取函数
+    （例如按当前登录凭证区分个人动态）。
+    每次返回深拷贝，调用方修改结果不会污染缓存。原函数可通过 `__wrapped__` 直接调用。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            if vary is not None:
+                key += (vary(),)
+            result = await (cache or scraper_cache).get_or_fetch(
+                key, lambda: func(*args, **kwargs), ttl, stale_ttl, is_cacheable=_is_success,
+            )
+            return copy.deepcopy(result)
+        return wrapper
+    return decorator
+
+
+# ==================================================
+# 离线夹具
+# ==================================================
+
+def _fixture_key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+
+class FixtureTransport(httpx.AsyncBaseTransport):
+    """
+    按录制的夹具回放响应
+
+    夹具为 JSON 列表，每项包含 method / url / status / headers / text；
+    完整 URL 精确匹配优先，否则忽略查询串按路径匹配。
+    未命中的请求返回 404，并记录在 `unmatched` 中便于断言。
+    """
+
+    def __init__(self, fixtures: List[Dict[str, Any]]):
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._by_path: Dict[str, Dict[str, Any]] = {}
+        for item in fixtures:
+            method = item.get('method', 'GET')
+            self._exact[_fixture_key(method, item['url'])] = item
+            self._by_path[_fixture_key(method, item['url'].split('?', 1)[0])] = item
+        self.requests: List[httpx.Request] = []
+        self.unmatched: List[str] = []
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "FixtureTransport":
+        """从单个 JSON 文件或包含多个 JSON 文件的目录加载夹具"""
+        path = Path(path)
+        files = sorted(path.glob('*.json')) if path.is_dir() else [path]
+        fixtures: List[Dict[str, Any]] = []
+        for file in files:
+            data = json.loads(file.read_text(encoding='utf-8'))
+            fixtures.extend(data if isinstance(data, list) else [data])
+        return cls(fixtures)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        url = str(request.url)
+        item = self._exact.get(_fixture_key(request.method, url)) or self._by_path.get(
+            _fixture_key(request.method, url.split('?', 1)[0])
+        )
+        if item is None:
+            self.unmatched.append(url)
+            return httpx.Response(404, text='', request=request)
+        return httpx.Response(
+            item.get('status', 200),
+            headers=item.get('headers') or {},
+            text=item.get('text', ''),
+            request=request,
+        )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """包装真实 transport，把每个响应录制为 FixtureTransport 可回放的夹具"""
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self._inner = inner or httpx.AsyncHTTPTransport()
+        self.fixtures: List[Dict[str, Any]] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._inner.handle_async_request(request)
+        body = await response.aread()
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() in ('content-type', 'location')}
+        self.fixtures.append({
+            'method': request.method,
+            'url': str(request.url),
+            'status': response.status_code,
+            'headers': headers,
+            'text': body.decode('utf-8', errors='replace'),
+        })
+        # aread() 已解压内容，去掉编码/长度头后再交给上层
+        passthrough = [(k, v) for k, v in response.headers.multi_items()
+                       if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')]
+        return httpx.Response(response.status_code, headers=passthrough, content=body, request=request)
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self.fixtures, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+持久化翻译缓存
+
+- 基于 SQLite（WAL 模式）保存译文，多个服务进程共享同一个数据库文件，重启后仍可命中
+- 缓存键为 (原文哈希, 源语言, 目标语言, 翻译后端)
+- 按最近使用时间做 LRU 淘汰，总条目数受上限约束；命中时只有距上次记录超过
+  touch_interval 才更新使用时间，读多的热路径不会每次都变成写
+- 进程内再加一层小的 LRU 前置缓存，热点字符串无需访问磁盘
+- 数据库不可用时自动降级为纯内存缓存
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from utils.logger_config import get_module_logger
+
+logger = get_module_logger(__name__)
+
+DEFAULT_DISK_MAX_ENTRIES = 50000
+DEFAULT_FRONT_MAX_ENTRIES = 1000
+# 磁盘命中时刷新 last_used 的最小间隔（秒）；LRU 淘汰只需粗粒度的使用时间
+DEFAULT_TOUCH_INTERVAL = 600.0
+# 超出上限这么多比例后才触发一次批量淘汰，避免每次写入都扫描
+_PRUNE_SLACK_RATIO = 0.1
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def make_cache_key(text: str, source_lang: str, target_lang: str, backend: str) -> CacheKey:
+    """生成缓存键：(原文 sha256, 源语言, 目标语言, 后端)"""
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return (text_hash, source_lang or 'auto', target_lang, backend or 'default')
+
+
+class PersistentTranslationCache:
+    """
+    SQLite 持久化翻译缓存 + 进程内 LRU 前置缓存
+
+    线程安全；异步调用方使用 `aget`/`aset`，磁盘访问放在线程池中执行，不阻塞事件循环。
+
+    Args:
+        db_path: 数据库文件路径；为 None 时仅使用内存前置缓存
+        max_entries: 磁盘缓存条目上限（LRU 淘汰）
+        front_max_entries: 进程内前置缓存条目上限
+        touch_interval: 磁盘命中时，距上次使用超过该秒数才写回 last_used
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]],
+        max_entries: int = DEFAULT_DISK_MAX_ENTRIES,
+        front_max_entries: int = DEFAULT_FRONT_MAX_ENTRIES,
+        touch_interval: float = DEFAULT_TOUCH_INTERVAL,
+    ):
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max(1, max_entries)
+        self.front_max_entries = max(1, front_max_entries)
+        self.touch_interval = max(0.0, touch_interval)
+        self._front: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._front_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_prune = 0
+        self._stats = {
+            'front_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+        }
+        if self.db_path is not None:
+            self._open()
+
+    # ------------------------------------------------------------------
+    # SQLite
+    # ------------------------------------------------------------------
+
+    def _open(self) -> None:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_cache (
+                    text_hash TEXT NOT NULL,
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (text_hash, source_lang, target_lang, backend)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used "
+                "ON translation_cache (last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception as e:
+            logger.warning(f"翻译缓存：无法打开数据库 {self.db_path}: {e}，降级为内存缓存")
+            self._conn = None
+
+    def _disk_get(self, key: CacheKey) -> Optional[str]:
+        if self._conn is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT translated, last_used FROM translation_cache "
+                    "WHERE text_hash = ? AND source_lang = ? AND target_lang = ? AND backend = ?",
+                    key,
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] > self.touch_interval:
+                    self._conn.execute(
+                        "UPDATE translation_cache SET last_used = ? "
+                        "WHERE text_hash = ? AND source_lang = ? AND target_lang = ? AND backend = ?",
+                        (now, *key),
+                    )
+                    self._conn.commit()
+                return row[0]
+        except sqlite3.Error as e:
+            logger.debug(f"翻译缓存：读取失败: {e}")
+            return None
+
+    def _disk_set(self, key: CacheKey, translated: str) -> None:
+        if self._conn is None:
+            return
+        now = time.time()
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    """
+                    INSERT INTO translation_cache
+                        (text_hash, source_lang, target_lang, backend, translated, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(text_hash, source_lang, target_lang, backend) DO UPDATE SET
+                        translated = excluded.translated,
+                        last_used = excluded.last_used
+                    """,
+                    (*key, translated, now, now),
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= max(1, int(self.max_entries * _PRUNE_SLACK_RATIO)):
+                    self._prune_locked()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"翻译缓存：写入失败: {e}")
+
+    def _prune_locked(self) -> None:
+        """按 last_used 淘汰超出上限的条目（调用方需持有 _db_lock）"""
+        self._writes_since_prune = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        cursor = self._conn.execute(
+            "DELETE FROM translation_cache WHERE rowid IN ("
+            "SELECT rowid FROM translation_cache ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self._stats['evictions'] += max(cursor.rowcount, 0)
+
+    def prune(self) -> None:
+        """立即执行一次 LRU 淘汰"""
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._prune_locked()
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # 前置缓存
+    # ------------------------------------------------------------------
+
+    def _front_get(self, key: CacheKey) -> Optional[str]:
+        with self._front_lock:
+            value = self._front.get(key)
+            if value is not None:
+                self._front.move_to_end(key)
+            return value
+
+    def _front_set(self, key: CacheKey, translated: str) -> None:
+        with self._front_lock:
+            self._front[key] = translated
+            self._front.move_to_end(key)
+            while len(self._front) > self.front_max_entries:
+                self._front.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+
+    def get(self, text: str, source_lang: str, target_lang: str, backend: str) -> Optional[str]:
+        key = make_cache_key(text, source_lang, target_lang, backend)
+        value = self._front_get(key)
+        if value is not None:
+            self._stats['front_hits'] += 1
+            return value
+        value = self._disk_get(key)
+        if value is not None:
+            self._stats['disk_hits'] += 1
+            self._front_set(key, value)
+            return value
+        self._stats['misses'] += 1
+        return None
+
+    def set(self, text: str, source_lang: str, target_lang: str, backend: str, translated: str) -> None:
+        key = make_cache_key(text, source_lang, target_lang, backend)
+        self._stats['writes'] += 1
+        self._front_set(key, translated)
+        self._disk_set(key, translated)
+
+    async def aget(self, text: str, source_lang: str, target_lang: str, backend: str) -> Optional[str]:
+        """异步读取：前置缓存命中时直接返回，否则在线程池中查询磁盘"""
+        key = make_cache_key(text, source_lang, target_lang, backend)
+        value = self._front_get(key)
+        if value is not None:
+            self._stats['front_hits'] += 1
+            return value
+        return await asyncio.to_thread(self.get, text, source_lang, target_lang, backend)
+
+    async def aset(self, text: str, source_lang: str, target_lang: str, backend: str, translated: str) -> None:
+        await asyncio.to_thread(self.set, text, source_lang, target_lang, backend, translated)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中率等统计信息"""
+        stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats['front_hits'] + stats['disk_hits'] + stats['misses']
+        hits = stats['front_hits'] + stats['disk_hits']
+        stats['lookups'] = lookups
+        stats['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        with self._front_lock:
+            stats['front_entries'] = len(self._front)
+        stats['disk_entries'] = 0
+        stats['persistent'] = self._conn is not None
+        if self._conn is not None:
+            try:
+                with self._db_lock:
+                    stats['disk_entries'] = self._conn.execute(
+                        "SELECT COUNT(*) FROM translation_cache"
+                    ).fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return stats
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
@@ -6,6 +6,7 @@
 同时支持获取活跃窗口标题和搜索功能
 """
 import asyncio
+import hashlib
 import httpx
 import random
 import re
@@ -23,10 +24,16 @@ import sys
 
 from config import get_extra_body
 from utils.file_utils import atomic_write_json
+from utils.scraper_cache import cached_fetch, http_pool
 
 logger = get_module_logger(__name__)
 
 
+async def _random_delay(low: float, high: float) -> None:
+    """请求前的随机延迟，避免请求过快（测试中替换为空操作）"""
+    await asyncio.sleep(random.uniform(low, high))
+
+
 def _extract_llm_text_content(content: Any) -> str:
     """
     尽量从不同形态的 LLM content 中提取可用文本。
@@ -204,6 +211,13 @@ except ImportError:
             return False
 
 
+# 抓取结果缓存时间（秒）：新鲜期内直接复用，陈旧期内先返回旧值再后台刷新
+TRENDING_CACHE_TTL = 300
+TRENDING_CACHE_STALE_TTL = 900
+SEARCH_CACHE_TTL = 600
+PERSONAL_DYNAMIC_CACHE_TTL = 120
+PERSONAL_DYNAMIC_CACHE_STALE_TTL = 300
+
 # User-Agent池，随机选择以避免被识别
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -244,6 +258,7 @@ def _get_bilibili_credential() -> Any | None:
 # 热门内容获取函数
 # ==================================================
 
+@cached_fetch(ttl=TRENDING_CACHE_TTL, stale_ttl=TRENDING_CACHE_STALE_TTL)
 async def fetch_bilibili_trending(limit: int = 30) -> Dict[str, Any]:
     """
     获取B站首页推荐视频
@@ -257,7 +272,7 @@ async def fetch_bilibili_trending(limit: int = 30) -> Dict[str, Any]:
         credential = _get_bilibili_credential()
         
         # 添加随机延迟，避免请求过快
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
         # 使用bilibili-api获取首页推荐
         # 如果有credential，会获取个性化推荐；否则获取通用推荐
@@ -330,6 +345,7 @@ async def fetch_bilibili_trending(limit: int = 30) -> Dict[str, Any]:
 
 
 
+@cached_fetch(ttl=TRENDING_CACHE_TTL, stale_ttl=TRENDING_CACHE_STALE_TTL)
 async def fetch_reddit_popular(limit: int = 10) -> Dict[str, Any]:
     """
     获取Reddit热门帖子
@@ -350,9 +366,9 @@ async def fetch_reddit_popular(limit: int = 10) -> Dict[str, Any]:
             'Accept': 'application/json',
         }
         
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
@@ -424,6 +440,7 @@ def _format_score(count: int) -> str:
     return "0"
 
 
+@cached_fetch(ttl=TRENDING_CACHE_TTL, stale_ttl=TRENDING_CACHE_STALE_TTL)
 async def fetch_weibo_trending(limit: int = 10) -> Dict[str, Any]:
     """
     获取微博热议话题
@@ -452,9 +469,9 @@ async def fetch_weibo_trending(limit: int = 10) -> Dict[str, Any]:
             headers['Cookie'] = cookie_header
         
         # 添加随机延迟
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             
@@ -552,9 +569,9 @@ async def _fetch_weibo_trending_fallback(limit: int = 10) -> Dict[str, Any]:
             'Pragma': 'no-cache',
         }
         
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
@@ -607,6 +624,7 @@ async def _fetch_weibo_trending_fallback(limit: int = 10) -> Dict[str, Any]:
         }
 
 
+@cached_fetch(ttl=TRENDING_CACHE_TTL, stale_ttl=TRENDING_CACHE_STALE_TTL)
 async def fetch_twitter_trending(limit: int = 10) -> Dict[str, Any]:
     """
     获取Twitter/X热门话题
@@ -631,9 +649,9 @@ async def fetch_twitter_trending(limit: int = 10) -> Dict[str, Any]:
             'DNT': '1',
         }
         
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             html_content = response.text
@@ -752,9 +770,9 @@ async def _fetch_twitter_trending_fallback(limit: int = 10) -> Dict[str, Any]:
     # 按优先级遍历所有数据源
     for source in fallback_sources:
         try:
-            await asyncio.sleep(random.uniform(0.1, 0.3))
+            await _random_delay(0.1, 0.3)
             
-            async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+            async with http_pool.client(source['url'], timeout=5.0) as client:
                 response = await client.get(source['url'], headers=headers)
                 
                 if response.status_code == 200:
@@ -1392,6 +1410,7 @@ def clean_window_title(title: str) -> str:
 # 搜索函数
 # =======================================================
 
+@cached_fetch(ttl=SEARCH_CACHE_TTL)
 async def search_google(query: str, limit: int = 10) -> Dict[str, Any]:
     """
     使用Google搜索关键词并获取搜索结果（用于非中文区域）
@@ -1427,9 +1446,9 @@ async def search_google(query: str, limit: int = 10) -> Dict[str, Any]:
         }
         
         # 添加随机延迟
-        await asyncio.sleep(random.uniform(0.2, 0.5))
+        await _random_delay(0.2, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             html_content = response.text
@@ -1545,6 +1564,7 @@ def parse_google_results(html_content: str, limit: int = 5) -> List[Dict[str, st
         return []
 
 
+@cached_fetch(ttl=SEARCH_CACHE_TTL)
 async def search_baidu(query: str, limit: int = 5) -> Dict[str, Any]:
     """
     使用百度搜索关键词并获取搜索结果
@@ -1581,9 +1601,9 @@ async def search_baidu(query: str, limit: int = 5) -> Dict[str, Any]:
         }
         
         # 添加随机延迟
-        await asyncio.sleep(random.uniform(0.2, 0.5))
+        await _random_delay(0.2, 0.5)
         
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=5.0) as client:
             response = await client.get(url, headers=headers)
             response.raise_for_status()
             html_content = response.text
@@ -2056,8 +2076,26 @@ def _get_platform_cookies(platform_name: str) -> dict[str, str]:
 
     return {}
 
+
+def _credential_fingerprint(platform_name: str) -> Optional[str]:
+    """当前平台凭证的摘要，并入个人动态的缓存 key：切换账号或凭证更新后不会读到旧账号的缓存"""
+    cookies = _get_platform_cookies(platform_name)
+    if not cookies:
+        return None
+    payload = json.dumps(cookies, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cached_personal_fetch(platform_name: str):
+    return cached_fetch(
+        ttl=PERSONAL_DYNAMIC_CACHE_TTL,
+        stale_ttl=PERSONAL_DYNAMIC_CACHE_STALE_TTL,
+        vary=lambda: _credential_fingerprint(platform_name),
+    )
+
 # 获取个人关注动态内容
 
+@_cached_personal_fetch('bilibili')
 async def fetch_bilibili_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取B站推送的动态消息
@@ -2071,10 +2109,10 @@ async def fetch_bilibili_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
 
         url = "https://api.bilibili.com/x/polymer/web-dynamic/v1/feed/all"
         headers = {"User-Agent": get_random_user_agent(), "Referer": "https://t.bilibili.com/"}
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, cookies=credential.get_cookies(), timeout=10.0)
+        async with http_pool.client(url, timeout=10.0, follow_redirects=False) as client:
+            response = await client.get(url, headers=headers, cookies=credential.get_cookies())
             response.raise_for_status()
             data = response.json()
 
@@ -2215,6 +2253,7 @@ async def fetch_bilibili_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
         logger.error(f"获取B站动态消息失败: {e}")
         return {'success': False, 'error': str(e)}
         
+@_cached_personal_fetch('douyin')
 async def fetch_douyin_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取抖音个人关注动态
@@ -2246,9 +2285,9 @@ async def fetch_douyin_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
             "aid": "6383"
         }
 
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             response = await client.get(url, params=params, headers=headers, cookies=cookies)
             response.raise_for_status()
             data = response.json()
@@ -2308,6 +2347,7 @@ async def fetch_douyin_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
         return {'success': False, 'error': str(e)}
 
 
+@_cached_personal_fetch('kuaishou')
 async def fetch_kuaishou_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取快手个人关注动态 (GraphQL 接口 + 严格 Cookie)
@@ -2340,9 +2380,9 @@ async def fetch_kuaishou_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
             "query": "fragment photoContent on PhotoEntity {\n  id\n  caption\n  timestamp\n  __typename\n}\n\nfragment feedContent on Feed {\n  type\n  author {\n    id\n    name\n    __typename\n  }\n  photo {\n    ...photoContent\n    __typename\n  }\n  __typename\n}\n\nquery visionFollowFeed($pcursor: String, $limit: Int) {\n  visionFollowFeed(pcursor: $pcursor, limit: $limit) {\n    pcursor\n    feeds {\n      ...feedContent\n      __typename\n    }\n    __typename\n  }\n}\n"
         }
 
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             response = await client.post(url, headers=headers, json=payload, cookies=cookies)
             response.raise_for_status()
             data = response.json()
@@ -2389,6 +2429,7 @@ async def fetch_kuaishou_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
         logger.error(f"获取快手动态失败: {e}")
         return {'success': False, 'error': str(e)}
 
+@_cached_personal_fetch('weibo')
 async def fetch_weibo_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取微博动态
@@ -2431,10 +2472,10 @@ async def fetch_weibo_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
         # 仅携带最纯净的 SUB 即可
         req_cookies = {'SUB': sub}
         
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
 
         # 4. 移动端 API 非常宽容，直接用普通的 httpx 即可稳定发包
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             response = await client.get(url, headers=headers, cookies=req_cookies)
             
             if response.status_code != 200:
@@ -2511,6 +2552,7 @@ async def fetch_weibo_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
         logger.error(f"微博动态解析发生错误: {e}")
         return {'success': False, 'error': str(e)}
 
+@_cached_personal_fetch('reddit')
 async def fetch_reddit_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取Reddit推送的动态帖子
@@ -2521,9 +2563,9 @@ async def fetch_reddit_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
             return {'success': False, 'error': '未配置 config/reddit_cookies.json'}
         url = f"https://www.reddit.com/hot.json?limit={limit}"
         headers = {'User-Agent': get_random_user_agent(), 'Accept': 'application/json'}
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             response = await client.get(url, headers=headers, cookies=reddit_cookies)
             data = response.json()
             posts = [
@@ -2549,7 +2591,7 @@ async def _fetch_twitter_personal_web_scraping(limit: int = 10, cookies: Optiona
     try:
         url = "https://twitter.com/home"
         headers = {'User-Agent': get_random_user_agent()}
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             res = await client.get(url, headers=headers, cookies=cookies)
             
             # 如果被重定向到了登录页，说明 Cookie 彻底失效了
@@ -2580,6 +2622,7 @@ async def _fetch_twitter_personal_web_scraping(limit: int = 10, cookies: Optiona
         logger.error(f"Twitter 网页抓取 fallback 失败: {e}")
         return {'success': False, 'error': str(e)}
 
+@_cached_personal_fetch('twitter')
 async def fetch_twitter_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
     """
     获取 Twitter 个人时间线
@@ -2623,9 +2666,9 @@ async def fetch_twitter_personal_dynamic(limit: int = 10) -> Dict[str, Any]:
             headers['x-twitter-auth-type'] = ''
         headers['x-csrf-token'] = ct0
         
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+        await _random_delay(0.1, 0.5)
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        async with http_pool.client(url, timeout=10.0) as client:
             response = await client.get(url, headers=headers, cookies=twitter_cookies)
             
             # 状态码非 200 时，平滑降级到备用网页刮削方案